@@ -0,0 +1,8 @@
+"""
+WADM benchmark suite
+Reproducible performance measurements for ingest, indicators, SMC and API hot paths
+
+Usage (from the wadm directory):
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json --threshold 0.25
+"""
@@ -0,0 +1,100 @@
+"""
+Benchmark CLI
+
+    python -m benchmarks [--groups ingest,indicators,smc,encoding,api] [--sizes 1000,100000,1000000]
+                         [--output results.json] [--baseline previous.json] [--threshold 0.25]
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import timedelta
+
+from .harness import BenchmarkRunner, DEFAULT_THRESHOLD, compare
+from .synthetic import SyntheticTradeGenerator
+
+GROUPS = ("ingest", "indicators", "smc", "encoding", "api")
+
+
+def _csv(value: str):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run WADM benchmarks")
+    parser.add_argument("--groups", type=_csv, default=list(GROUPS), help=f"Subset of {','.join(GROUPS)}")
+    parser.add_argument("--sizes", type=lambda v: [int(s) for s in _csv(v)],
+                        default=[1_000, 100_000, 1_000_000], help="Indicator input sizes")
+    parser.add_argument("--ingest-trades", type=int, default=100_000)
+    parser.add_argument("--smc-trades", type=int, default=100_000)
+    parser.add_argument("--encoding-trades", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed fractional slowdown before a benchmark counts as regressed")
+    parser.add_argument("--thresholds", help="JSON file of per-benchmark threshold overrides")
+    parser.add_argument("--verbose", action="store_true", help="Keep application logging enabled")
+    args = parser.parse_args()
+
+    unknown = set(args.groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"Unknown groups: {sorted(unknown)}")
+
+    if not args.verbose:
+        # Collectors and detectors log per message; keep that out of the timings
+        logging.disable(logging.WARNING)
+
+    generator = SyntheticTradeGenerator(seed=args.seed)
+    runner = BenchmarkRunner(repeat=args.repeat)
+
+    if "ingest" in args.groups:
+        from . import ingest
+        ingest.run(runner, generator.generate(args.ingest_trades))
+
+    if "indicators" in args.groups and args.sizes:
+        from . import indicators
+        indicators.run(runner, generator.generate(max(args.sizes)), args.sizes)
+
+    if "smc" in args.groups:
+        from . import smc
+        smc.run(runner, generator.generate(args.smc_trades, duration=timedelta(hours=24)))
+
+    if "encoding" in args.groups:
+        from . import encoding
+        encoding.run(runner, generator.generate(args.encoding_trades, duration=timedelta(hours=24)))
+
+    if "api" in args.groups:
+        from . import api
+        api.run(runner)
+
+    results = runner.to_dict(args.seed)
+    if args.output:
+        runner.save(args.output, args.seed)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        overrides = {}
+        if args.thresholds:
+            with open(args.thresholds) as f:
+                overrides = json.load(f)
+
+        rows = compare(results, baseline, args.threshold, overrides)
+        regressions = [r for r in rows if r["regressed"]]
+        print(f"\nComparison with {baseline['meta'].get('commit') or args.baseline}")
+        for row in rows:
+            flag = "REGRESSED" if row["regressed"] else "ok"
+            print(f"  {row['name']:<55} {row['baseline_ms']:10.2f} -> {row['current_ms']:10.2f} ms "
+                  f"({row['ratio']:.2f}x) {flag}")
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed beyond threshold")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+FastAPI endpoint benchmarks over an in-process ASGI client
+"""
+import os
+from typing import List
+
+import httpx
+
+from src.api.app import create_app
+from src.api.config import APIConfig
+
+from .harness import BenchmarkRunner
+
+# Served without MongoDB
+STATIC_ENDPOINTS = [
+    "/api/v1",
+    "/api/v1/system/health",
+]
+
+# Need a reachable MongoDB with trades for the symbol
+DATABASE_ENDPOINTS = [
+    "/api/v1/market/trades/{symbol}?per_page=500",
+    "/api/v1/market/candles/{symbol}/1m?limit=500",
+    "/api/v1/market/stats/{symbol}",
+    "/api/v1/indicators/volume-profile/{symbol}",
+    "/api/v1/indicators/order-flow/{symbol}",
+]
+
+
+def _mongo_reachable() -> bool:
+    try:
+        from pymongo import MongoClient
+        url = os.getenv("DATABASE_URL", os.getenv("MONGODB_URL", "mongodb://mongo:27017/wadm"))
+        client = MongoClient(url, serverSelectionTimeoutMS=1000)
+        client.server_info()
+        client.close()
+        return True
+    except Exception:
+        return False
+
+
+def run(runner: BenchmarkRunner, symbol: str = "BTCUSDT", requests_per_run: int = 50):
+    print("API")
+    app = create_app()
+    headers = {APIConfig.API_KEY_HEADER: APIConfig.MASTER_API_KEY}
+
+    endpoints: List[str] = list(STATIC_ENDPOINTS)
+    if _mongo_reachable():
+        endpoints += [e.format(symbol=symbol) for e in DATABASE_ENDPOINTS]
+    else:
+        print("  MongoDB not reachable, skipping database-backed endpoints")
+
+    for endpoint in endpoints:
+        async def hit(endpoint=endpoint):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+                for _ in range(requests_per_run):
+                    response = await client.get(endpoint)
+                    response.raise_for_status()
+
+        runner.run(f"api.GET {endpoint.split('?')[0]}", "api", hit, items=requests_per_run)
@@ -0,0 +1,95 @@
+"""
+Response serialization benchmarks
+Time and payload size per endpoint-shaped payload: the stdlib path the API
+used before (jsonable_encoder + json.dumps), orjson rows, orjson columnar,
+and gzip/brotli compression of the encoded body.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from src.api.encoding import BROTLI_AVAILABLE, columnar, compress, dumps
+from src.api.models.market import Candle, Trade
+from src.smc import SMCDashboard
+
+from .harness import BenchmarkRunner
+from .synthetic import InMemoryTradeStore
+
+
+def _trade_page(trades: List[Dict[str, Any]], per_page: int = 1000) -> List[Trade]:
+    """A /market/trades page"""
+    return [
+        Trade(id=t["trade_id"], symbol=t["symbol"], exchange=t["exchange"], price=Decimal(str(t["price"])),
+              quantity=Decimal(str(t["quantity"])), side=t["side"], timestamp=t["timestamp"])
+        for t in trades[-per_page:]
+    ]
+
+
+def _candles(trades: List[Dict[str, Any]], limit: int = 500) -> List[Candle]:
+    """/market/candles 1m candles"""
+    buckets = defaultdict(list)
+    for t in trades:
+        buckets[t["timestamp"].replace(second=0, microsecond=0)].append(t)
+    candles = []
+    for minute in sorted(buckets)[-limit:]:
+        rows = buckets[minute]
+        prices = [t["price"] for t in rows]
+        buy = sum(t["quantity"] for t in rows if t["side"] == "buy")
+        sell = sum(t["quantity"] for t in rows if t["side"] == "sell")
+        candles.append(Candle(
+            timestamp=minute, open=Decimal(str(prices[0])), high=Decimal(str(max(prices))),
+            low=Decimal(str(min(prices))), close=Decimal(str(prices[-1])), volume=Decimal(str(buy + sell)),
+            trades=len(rows), buy_volume=Decimal(str(buy)), sell_volume=Decimal(str(sell)),
+        ))
+    return candles
+
+
+def _smc_analysis(trades: List[Dict[str, Any]], symbol: str) -> Dict[str, Any]:
+    """/indicators/smc/{symbol}/analysis source document"""
+    dashboard = SMCDashboard(InMemoryTradeStore(trades))
+    return asyncio.run(dashboard.get_comprehensive_analysis(symbol)).to_dict()
+
+
+def run(runner: BenchmarkRunner, trades: List[Dict[str, Any]], symbol: str = "BTCUSDT"):
+    print(f"Encoding (brotli {'available' if BROTLI_AVAILABLE else 'not installed'})")
+    payloads = {
+        "trades": _trade_page(trades),
+        "candles": _candles(trades),
+        "smc_analysis": _smc_analysis(trades, symbol),
+    }
+    encodings = ["gzip"] + (["br"] if BROTLI_AVAILABLE else [])
+
+    for endpoint, payload in payloads.items():
+        items = len(payload) if isinstance(payload, list) else 1
+        legacy = json.dumps(jsonable_encoder(payload)).encode()
+        runner.run(f"encoding.{endpoint}.stdlib", "encoding",
+                   lambda payload=payload: json.dumps(jsonable_encoder(payload)),
+                   items=items, bytes=len(legacy))
+
+        rows = [item.model_dump(mode="json") for item in payload] if isinstance(payload, list) else payload
+        body = dumps(rows)
+        runner.run(f"encoding.{endpoint}.orjson", "encoding", lambda rows=rows: dumps(rows),
+                   items=items, bytes=len(body))
+
+        sizes = {"json": len(legacy), "orjson": len(body)}
+        packed = None
+        if isinstance(rows, list):
+            packed = dumps(columnar(rows))
+            runner.run(f"encoding.{endpoint}.orjson_columnar", "encoding",
+                       lambda rows=rows: dumps(columnar(rows)), items=items, bytes=len(packed))
+            sizes["columnar"] = len(packed)
+
+        for encoding in encodings:
+            compressed = compress(body, encoding)
+            runner.run(f"encoding.{endpoint}.{encoding}", "encoding",
+                       lambda body=body, encoding=encoding: compress(body, encoding),
+                       items=items, bytes=len(compressed))
+            sizes[encoding] = len(compressed)
+            if packed is not None:
+                sizes[f"columnar+{encoding}"] = len(compress(packed, encoding))
+
+        print("    bytes: " + ", ".join(f"{name} {size:,}" for name, size in sizes.items()))
@@ -0,0 +1,143 @@
+"""
+Benchmark harness
+Timing, JSON result files and regression comparison
+"""
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# A benchmark regresses when its median is this much slower than the baseline
+DEFAULT_THRESHOLD = 0.25
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing summary for one benchmark"""
+    name: str
+    group: str
+    items: int  # Work items per run (trades, messages, requests)
+    runs: int
+    min_s: float
+    median_s: float
+    mean_s: float
+    max_s: float
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.median_s if self.median_s > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["items_per_second"] = self.items_per_second
+        return data
+
+
+class BenchmarkRunner:
+    """Runs benchmark callables and collects results"""
+
+    def __init__(self, repeat: int = 5, warmup: int = 1):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.results: List[BenchmarkResult] = []
+
+    def run(self, name: str, group: str, func: Callable[[], Any], items: int,
+            repeat: Optional[int] = None, **params) -> BenchmarkResult:
+        """Time a sync callable (or a zero-arg coroutine factory)"""
+        repeat = repeat or self.repeat
+
+        def call():
+            result = func()
+            if asyncio.iscoroutine(result):
+                asyncio.run(result)
+
+        for _ in range(self.warmup):
+            call()
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+
+        result = BenchmarkResult(
+            name=name,
+            group=group,
+            items=items,
+            runs=repeat,
+            min_s=min(timings),
+            median_s=statistics.median(timings),
+            mean_s=statistics.fmean(timings),
+            max_s=max(timings),
+            params=params,
+        )
+        self.results.append(result)
+        print(f"  {name:<55} {result.median_s * 1000:10.2f} ms  {result.items_per_second:14,.0f} items/s")
+        return result
+
+    def to_dict(self, seed: int) -> Dict[str, Any]:
+        return {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": seed,
+                "repeat": self.repeat,
+            },
+            "results": {r.name: r.to_dict() for r in self.results},
+        }
+
+    def save(self, path: str, seed: int):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(seed), f, indent=2)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD,
+            overrides: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """
+    Compare two result files.
+
+    Args:
+        current: Result dict from this run
+        baseline: Result dict from the reference commit
+        threshold: Allowed fractional slowdown of the median (0.25 = 25%)
+        overrides: Per-benchmark thresholds keyed by benchmark name
+
+    Returns:
+        One row per benchmark present in both files, with ``regressed`` set
+    """
+    overrides = overrides or {}
+    rows = []
+    for name, result in current.get("results", {}).items():
+        base = baseline.get("results", {}).get(name)
+        if not base or base["median_s"] <= 0:
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        limit = overrides.get(name, threshold)
+        rows.append({
+            "name": name,
+            "baseline_ms": base["median_s"] * 1000,
+            "current_ms": result["median_s"] * 1000,
+            "ratio": ratio,
+            "threshold": limit,
+            "regressed": ratio > 1 + limit,
+        })
+    return rows
@@ -0,0 +1,35 @@
+"""
+Indicator calculator benchmarks
+"""
+from typing import Any, Dict, List
+
+from src.indicators import (
+    VolumeProfileCalculator, OrderFlowCalculator, FootprintCalculator,
+    MarketProfileCalculator, VWAPCalculator
+)
+
+from .harness import BenchmarkRunner
+
+
+def run(runner: BenchmarkRunner, trades: List[Dict[str, Any]], sizes: List[int]):
+    print("Indicators")
+    calculators = {
+        "volume_profile": VolumeProfileCalculator,
+        "order_flow": OrderFlowCalculator,
+        "footprint": FootprintCalculator,
+        "market_profile": MarketProfileCalculator,
+        "vwap": VWAPCalculator,
+    }
+
+    for size in sizes:
+        sample = trades[-size:]
+        # Large inputs are slow by design; fewer repeats keep the suite usable
+        repeat = 3 if size >= 1_000_000 else None
+        for name, calculator_cls in calculators.items():
+            calculator = calculator_cls()
+
+            def calculate(calculator=calculator, sample=sample):
+                calculator.calculate(sample, "BTCUSDT", "bybit")
+
+            runner.run(f"indicator.{name}.{size}", "indicators", calculate,
+                       items=len(sample), repeat=repeat, trades=size)
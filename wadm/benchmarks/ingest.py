@@ -0,0 +1,46 @@
+"""
+Collector parsing benchmarks
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from src.collectors import BybitCollector, BinanceCollector, CoinbaseCollector, KrakenCollector
+
+from .harness import BenchmarkRunner
+from .synthetic import to_exchange_messages
+
+
+async def _noop(trades):
+    pass
+
+
+def _collectors() -> Dict[str, Any]:
+    return {
+        "bybit": BybitCollector(["BTCUSDT"], _noop),
+        "binance": BinanceCollector(["BTCUSDT"], _noop),
+        "coinbase": CoinbaseCollector(["BTC-USD"], _noop),
+        "kraken": KrakenCollector(["XBT/USD"], _noop),
+    }
+
+
+def run(runner: BenchmarkRunner, trades: List[Dict[str, Any]]):
+    print("Collector parsing")
+    for exchange, collector in _collectors().items():
+        messages = to_exchange_messages(trades, exchange)
+        frames = [json.dumps(message) for message in messages]
+        received_at = datetime.now(timezone.utc)
+
+        def parse_all(parse=collector.parse_message, messages=messages):
+            for message in messages:
+                parse(message)
+
+        # Full parse stage: JSON decode, parse, receive stamping, sequence tracking, metrics
+        def parse_frames(parse_frame=collector.parse_frame, frames=frames):
+            for frame in frames:
+                parse_frame(frame, received_at)
+
+        runner.run(f"parse_message.{exchange}", "ingest", parse_all, items=len(trades),
+                   messages=len(messages))
+        runner.run(f"parse_frame.{exchange}", "ingest", parse_frames, items=len(trades),
+                   messages=len(frames))
@@ -0,0 +1,39 @@
+"""
+SMC detector and dashboard benchmarks
+"""
+from typing import Any, Dict, List
+
+from src.smc import (
+    OrderBlockDetector, FVGDetector, StructureAnalyzer, LiquidityMapper, SMCDashboard
+)
+
+from .harness import BenchmarkRunner
+from .synthetic import InMemoryTradeStore
+
+
+def run(runner: BenchmarkRunner, trades: List[Dict[str, Any]], symbol: str = "BTCUSDT"):
+    print(f"SMC ({len(trades):,} trades)")
+    store = InMemoryTradeStore(trades)
+
+    order_blocks = OrderBlockDetector(store)
+    fvgs = FVGDetector(store)
+    structure = StructureAnalyzer(store)
+    liquidity = LiquidityMapper(store)
+    dashboard = SMCDashboard(store)
+
+    runner.run("smc.order_blocks", "smc", lambda: order_blocks.detect_order_blocks(symbol),
+               items=len(trades))
+    runner.run("smc.fvg", "smc", lambda: fvgs.detect_fair_value_gaps(symbol), items=len(trades))
+    runner.run("smc.structure", "smc", lambda: structure.analyze_market_structure(symbol),
+               items=len(trades))
+    runner.run("smc.liquidity", "smc", lambda: liquidity.map_liquidity_zones(symbol), items=len(trades))
+
+    def comprehensive():
+        # Drop the incremental graphs so every run does the full analysis
+        dashboard.clear_cache()
+        return dashboard.get_comprehensive_analysis(symbol)
+
+    runner.run("smc.dashboard.comprehensive", "smc", comprehensive, items=len(trades))
+    # Steady state: no candle closed since the previous call
+    runner.run("smc.dashboard.incremental", "smc", lambda: dashboard.get_comprehensive_analysis(symbol),
+               items=len(trades))
@@ -0,0 +1,162 @@
+"""
+Seeded synthetic trade generator
+Realistic multi-exchange trade tape for benchmarks: GBM price walk with volatility
+regimes, bursty arrivals, heavy-tailed sizes and per-exchange basis
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Share of prints per exchange and basis offset in basis points vs the reference price
+EXCHANGE_MIX = {
+    "bybit": (0.40, 0.0),
+    "binance": (0.40, 0.5),
+    "coinbase": (0.12, -1.5),
+    "kraken": (0.08, 2.0),
+}
+
+
+class SyntheticTradeGenerator:
+    """Deterministic trade tape generator (same seed -> same trades)"""
+
+    def __init__(self, seed: int = 42, symbol: str = "BTCUSDT", start_price: float = 65000.0,
+                 annual_volatility: float = 0.6, exchanges: Optional[Dict[str, tuple]] = None):
+        self.seed = seed
+        self.symbol = symbol
+        self.start_price = start_price
+        self.annual_volatility = annual_volatility
+        self.exchanges = exchanges or EXCHANGE_MIX
+
+    def generate(self, count: int, duration: timedelta = timedelta(hours=6),
+                 end_time: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Generate ``count`` trades spread over ``duration`` ending at ``end_time``.
+
+        Trades are dicts shaped like documents in the trades collection and are
+        returned sorted by timestamp.
+        """
+        rng = np.random.default_rng(self.seed)
+        end_time = end_time or datetime.now(timezone.utc)
+        start_time = end_time - duration
+        span = duration.total_seconds()
+
+        # Bursty arrivals: exponential gaps scaled by a regime that switches between
+        # calm and burst periods, then normalised onto the requested duration
+        regime = np.repeat(rng.choice([1.0, 0.1], size=max(1, count // 500 + 1), p=[0.85, 0.15]), 500)[:count]
+        gaps = rng.exponential(1.0, count) * regime
+        offsets = np.cumsum(gaps)
+        offsets = offsets / offsets[-1] * span if count else offsets
+
+        # GBM price walk with volatility clustering
+        dt = np.diff(offsets, prepend=0.0) / (365 * 24 * 3600)
+        vol = self.annual_volatility * np.repeat(rng.lognormal(0.0, 0.35, size=count // 2000 + 1), 2000)[:count]
+        returns = rng.standard_normal(count) * vol * np.sqrt(np.maximum(dt, 1e-12))
+        prices = self.start_price * np.exp(np.cumsum(returns))
+
+        # Exchange routing and basis
+        names = list(self.exchanges)
+        weights = np.array([self.exchanges[n][0] for n in names])
+        venue = rng.choice(len(names), size=count, p=weights / weights.sum())
+        basis = np.array([self.exchanges[n][1] for n in names])[venue] / 10_000
+        prices = np.round(prices * (1 + basis), 2)
+
+        # Heavy tailed sizes with occasional block prints, aggressor side follows momentum
+        quantities = rng.lognormal(-4.0, 1.2, count)
+        whales = rng.random(count) < 0.002
+        quantities[whales] *= rng.uniform(50, 200, whales.sum())
+        quantities = np.round(quantities, 6) + 1e-6
+        buy_prob = np.clip(0.5 + np.sign(returns) * 0.15, 0.05, 0.95)
+        is_buy = rng.random(count) < buy_prob
+
+        trades = []
+        for i in range(count):
+            exchange = names[venue[i]]
+            trades.append({
+                "exchange": exchange,
+                "symbol": self.symbol,
+                "price": float(prices[i]),
+                "quantity": float(quantities[i]),
+                "side": "buy" if is_buy[i] else "sell",
+                "timestamp": start_time + timedelta(seconds=float(offsets[i])),
+                "trade_id": f"{exchange}-{i}",
+            })
+        return trades
+
+
+def to_exchange_messages(trades: List[Dict[str, Any]], exchange: str, batch: int = 10) -> List[Any]:
+    """
+    Encode trades as the raw (already JSON-decoded) WebSocket payloads of ``exchange``.
+
+    Bybit and Kraken deliver several prints per message, Binance and Coinbase one.
+    """
+    messages: List[Any] = []
+    if exchange == "binance":
+        for i, t in enumerate(trades):
+            messages.append({
+                "stream": f"{t['symbol'].lower()}@aggTrade",
+                "data": {
+                    "e": "aggTrade", "s": t["symbol"], "p": str(t["price"]), "q": str(t["quantity"]),
+                    "m": t["side"] == "buy", "T": int(t["timestamp"].timestamp() * 1000), "a": i,
+                },
+            })
+    elif exchange == "bybit":
+        for start in range(0, len(trades), batch):
+            chunk = trades[start:start + batch]
+            messages.append({
+                "topic": f"publicTrade.{chunk[0]['symbol']}",
+                "data": [
+                    {
+                        "T": int(t["timestamp"].timestamp() * 1000), "s": t["symbol"],
+                        "S": "Buy" if t["side"] == "buy" else "Sell",
+                        "v": str(t["quantity"]), "p": str(t["price"]), "i": t["trade_id"],
+                    }
+                    for t in chunk
+                ],
+            })
+    elif exchange == "coinbase":
+        for i, t in enumerate(trades):
+            messages.append({
+                "type": "match", "trade_id": i, "product_id": f"{t['symbol'].replace('USDT', '')}-USD",
+                "size": str(t["quantity"]), "price": str(t["price"]), "side": t["side"],
+                "time": t["timestamp"].isoformat().replace("+00:00", "Z"),
+            })
+    elif exchange == "kraken":
+        for start in range(0, len(trades), batch):
+            chunk = trades[start:start + batch]
+            base = chunk[0]["symbol"].replace("USDT", "")
+            pair = "XBT/USD" if base == "BTC" else f"{base}/USD"
+            messages.append([
+                0,
+                [[str(t["price"]), str(t["quantity"]), f"{t['timestamp'].timestamp():.6f}",
+                  "b" if t["side"] == "buy" else "s", "m", ""] for t in chunk],
+                "trade",
+                pair,
+            ])
+    else:
+        raise ValueError(f"Unknown exchange '{exchange}'")
+    return messages
+
+
+class InMemoryTradeStore:
+    """
+    Storage stand-in serving synthetic trades to the SMC detectors.
+
+    Implements the subset of StorageManager the detectors use, so detector cost
+    is measured without MongoDB round trips.
+    """
+
+    def __init__(self, trades: List[Dict[str, Any]]):
+        self._by_key: Dict[tuple, List[Dict[str, Any]]] = {}
+        for trade in trades:
+            self._by_key.setdefault((trade["symbol"], trade["exchange"]), []).append(trade)
+        for rows in self._by_key.values():
+            rows.sort(key=lambda t: t["timestamp"], reverse=True)
+
+    def get_recent_trades(self, symbol: str, exchange: str, minutes: int = 5) -> List[Dict[str, Any]]:
+        since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+        rows = self._by_key.get((symbol, exchange), [])
+        return [t for t in rows if t["timestamp"] >= since]
+
+    def save_smc_analysis(self, analysis: Dict[str, Any]):
+        pass
@@ -0,0 +1,51 @@
+"""
+Tests for the benchmark harness and synthetic data
+"""
+from datetime import datetime, timedelta, timezone
+
+from . import ingest
+from .harness import BenchmarkRunner, compare
+from .synthetic import SyntheticTradeGenerator, to_exchange_messages
+
+END = datetime(2025, 1, 2, tzinfo=timezone.utc)
+
+RESULT_FIELDS = {"name", "group", "items", "runs", "min_s", "median_s", "mean_s", "max_s", "params",
+                 "items_per_second"}
+
+
+class TestSyntheticData:
+    """Test the deterministic trade generator"""
+
+    def test_same_seed_same_sorted_tape(self):
+        first = SyntheticTradeGenerator(seed=7).generate(300, duration=timedelta(minutes=5), end_time=END)
+        second = SyntheticTradeGenerator(seed=7).generate(300, duration=timedelta(minutes=5), end_time=END)
+
+        assert first == second
+        assert [t["timestamp"] for t in first] == sorted(t["timestamp"] for t in first)
+        assert END - timedelta(minutes=5) <= first[0]["timestamp"] and first[-1]["timestamp"] <= END
+        assert {t["side"] for t in first} <= {"buy", "sell"}
+        assert all(t["quantity"] > 0 and t["price"] > 0 for t in first)
+        assert len({t["trade_id"] for t in first}) == 300
+        assert to_exchange_messages([t for t in first if t["exchange"] == "bybit"], "bybit")
+
+
+class TestHarness:
+    """Test one tiny benchmark group end to end"""
+
+    def test_ingest_group_result_schema(self):
+        runner = BenchmarkRunner(repeat=2, warmup=0)
+        ingest.run(runner, SyntheticTradeGenerator(seed=1).generate(200, end_time=END))
+
+        results = runner.to_dict(seed=1)
+        assert set(results["meta"]) == {"timestamp", "commit", "python", "platform", "seed", "repeat"}
+        assert results["results"]
+        for name, result in results["results"].items():
+            assert set(result) == RESULT_FIELDS
+            assert result["name"] == name and result["group"] == "ingest"
+            assert result["items"] == 200 and result["runs"] == 2
+            assert 0 < result["min_s"] <= result["median_s"] <= result["max_s"]
+
+        slower = {"results": {name: {**r, "median_s": r["median_s"] * 2} for name, r in results["results"].items()}}
+        rows = compare(slower, results, threshold=0.25)
+        assert len(rows) == len(results["results"]) and all(row["regressed"] for row in rows)
+        assert not any(row["regressed"] for row in compare(results, results))
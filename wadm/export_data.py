@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Bulk export of WADM data to Arrow IPC / Parquet
+
+Examples:
+    python export_data.py trades BTCUSDT --start 2025-01-01 --end 2025-01-08 -o btc_trades.parquet
+    python export_data.py candles ETHUSDT --timeframe 5m --format arrow -o eth_5m.arrows
+    python export_data.py order_flows BTCUSDT --exchange bybit --columns timestamp,delta,cumulative_delta
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+
+from src.storage import StorageManager
+from src.storage.export import (
+    DataExporter, DEFAULT_CHUNK_SIZE, EXPORT_DATASETS, EXPORT_FORMATS,
+    CANDLE_INTERVALS_MS, PYARROW_AVAILABLE
+)
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO date/datetime, assuming UTC when no offset is given"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export WADM data as Arrow IPC or Parquet")
+    parser.add_argument("dataset", choices=EXPORT_DATASETS)
+    parser.add_argument("symbol", help="Trading symbol, e.g. BTCUSDT")
+    parser.add_argument("-o", "--output", help="Output file (defaults to <symbol>_<dataset>.<ext>)")
+    parser.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="parquet")
+    parser.add_argument("--exchange", help="Filter by exchange")
+    parser.add_argument("--start", type=parse_time, help="Start time (inclusive, ISO format)")
+    parser.add_argument("--end", type=parse_time, help="End time (exclusive, ISO format)")
+    parser.add_argument("--columns", help="Comma separated column projection")
+    parser.add_argument("--timeframe", choices=list(CANDLE_INTERVALS_MS), default="1m",
+                        help="Candle timeframe (candles only)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per cursor batch / record batch")
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        print("pyarrow is not installed: pip install pyarrow", file=sys.stderr)
+        return 1
+
+    extension = "parquet" if args.format == "parquet" else "arrows"
+    output = args.output or f"{args.symbol.upper()}_{args.dataset}.{extension}"
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+
+    storage = StorageManager()
+    try:
+        exporter = DataExporter(storage.db, chunk_size=args.chunk_size)
+        started = datetime.now()
+        rows = exporter.write(
+            output, args.format, args.dataset, args.symbol,
+            exchange=args.exchange,
+            start_time=args.start,
+            end_time=args.end,
+            columns=columns,
+            timeframe=args.timeframe
+        )
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"Wrote {rows} rows to {output} in {elapsed:.1f}s")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        storage.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
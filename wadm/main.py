@@ -6,6 +6,8 @@ import asyncio
 import signal
 import sys
 from src.manager import WADMManager
+from src.sharding import ShardSupervisor
+from src.config import SHARD_COUNT
 from src.logger import get_logger
 
 logger = get_logger(__name__)
@@ -29,8 +31,12 @@ async def main():
     # Create shutdown event
     shutdown_event = asyncio.Event()
     
-    # Create manager
-    manager = WADMManager()
+    # Create manager (or a supervisor of symbol shards, one process each)
+    if SHARD_COUNT > 1:
+        logger.info(f"Sharded mode: {SHARD_COUNT} worker processes")
+        manager = ShardSupervisor(SHARD_COUNT)
+    else:
+        manager = WADMManager()
     
     # Setup signal handlers
     signal.signal(signal.SIGINT, signal_handler)
@@ -38,7 +44,9 @@ async def main():
     
     try:
         # Create tasks
-        manager_task = asyncio.create_task(manager.start())
+        manager_task = asyncio.create_task(
+            manager.run() if isinstance(manager, ShardSupervisor) else manager.start()
+        )
         shutdown_task = asyncio.create_task(shutdown_event.wait())
         
         # Wait for either manager to stop or shutdown signal
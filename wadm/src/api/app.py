@@ -9,16 +9,24 @@ from typing import AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from src.api.routers import auth, market_data, system, indicators, sessions, mcp, testing
+from src.api.routers import auth, market_data, system, indicators, sessions, mcp, testing, export
 from src.api.middleware import LoggingMiddleware
 from src.api.middleware.rate_limit import EnhancedRateLimitMiddleware
 from src.api.config import APIConfig
+from src.api.encoding import FastJSONResponse
 from src.storage.mongo_manager import MongoManager
-from src.config import Config
+from src.storage.stats import stats_sampler
+from src.market_stats import market_stats_mirror
+from src.indicator_feed import indicator_feed
+from src.market_context import market_context
+from src.config import Config, LOOP_MONITOR_ENABLED
+from src.metrics import render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from src.loop_monitor import LoopMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -39,12 +47,36 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     app.state.config = Config()
     app.state.api_config = APIConfig()
     
+    # Event loop lag / slow callback monitoring
+    app.state.loop_monitor = LoopMonitor("api") if LOOP_MONITOR_ENABLED else None
+    if app.state.loop_monitor:
+        app.state.loop_monitor.start()
+    
+    # Status endpoints read sampled storage stats instead of counting documents
+    stats_sampler.start()
+    
+    # Compact context snapshots follow indicator updates and the mirrored market stats
+    market_context.attach(indicator_feed, market_stats_mirror)
+    
+    # Market stats endpoints read the manager's rolling 24h stats
+    if mongo.connected:
+        market_stats_mirror.attach(mongo.db)
+        market_stats_mirror.start()
+        # Indicator subscriptions push what the manager appends to the update feed
+        indicator_feed.attach(mongo.db)
+        indicator_feed.start()
+    
     logger.info("WADM API Server started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down WADM API Server...")
+    if app.state.loop_monitor:
+        await app.state.loop_monitor.stop()
+    await stats_sampler.stop()
+    await market_stats_mirror.stop()
+    await indicator_feed.stop()
     # MongoDB connection will be cleaned up automatically
     logger.info("WADM API Server stopped")
 
@@ -62,7 +94,8 @@ def create_app() -> FastAPI:
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         openapi_url="/api/openapi.json",
-        lifespan=lifespan
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse
     )
     
     # CORS middleware
@@ -81,10 +114,13 @@ def create_app() -> FastAPI:
                       default_calls_per_minute=config.RATE_LIMIT_CALLS,
                                               default_calls_per_hour=config.RATE_LIMIT_CALLS * 60)
     
+    # Compress large bodies; responses already encoded by the response cache pass through
+    app.add_middleware(GZipMiddleware, minimum_size=config.COMPRESSION_MIN_SIZE)
+    
     # Exception handlers
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request, exc):
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=exc.status_code,
             content={
                 "error": {
@@ -97,7 +133,7 @@ def create_app() -> FastAPI:
     
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request, exc):
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=422,
             content={
                 "error": {
@@ -111,7 +147,7 @@ def create_app() -> FastAPI:
     @app.exception_handler(Exception)
     async def general_exception_handler(request, exc):
         logger.error(f"Unhandled exception: {exc}", exc_info=True)
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={
                 "error": {
@@ -129,6 +165,7 @@ def create_app() -> FastAPI:
     app.include_router(mcp.router, prefix="/api/v1", tags=["MCP Analysis"])
     app.include_router(system.router, prefix="/api/v1/system", tags=["System"])
     app.include_router(testing.router, prefix="/api/v1/testing", tags=["Testing"])
+    app.include_router(export.router, prefix="/api/v1/export", tags=["Export"])
     
     # Root endpoint
     @app.get("/")
@@ -140,6 +177,11 @@ def create_app() -> FastAPI:
             "docs": "/api/docs"
         }
     
+    # Prometheus scrape endpoint (API process metrics)
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+    
     @app.get("/api/v1")
     async def api_info():
         return {
@@ -151,7 +193,8 @@ def create_app() -> FastAPI:
                 "indicators": "/api/v1/indicators",
                 "mcp": "/api/v1/mcp",
                 "system": "/api/v1/system",
-                "testing": "/api/v1/testing"
+                "testing": "/api/v1/testing",
+                "export": "/api/v1/export"
             }
         }
     
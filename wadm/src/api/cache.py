@@ -7,12 +7,17 @@ Uses in-memory caching if Redis not available
 import json
 import logging
 import time
-from typing import Any, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from datetime import datetime, timedelta
 import hashlib
 
+from src.metrics import CACHE_REQUESTS
+
 logger = logging.getLogger(__name__)
 
+_cache_hits = CACHE_REQUESTS.labels("hit")
+_cache_misses = CACHE_REQUESTS.labels("miss")
+
 
 class CacheManager:
     """
@@ -70,6 +75,10 @@ class CacheManager:
         key_data = f"{prefix}:{json.dumps(kwargs, sort_keys=True, default=str)}"
         return hashlib.md5(key_data.encode()).hexdigest()[:16]
     
+    def get_cache_key(self, prefix: str, *parts: Any) -> str:
+        """Cache key from a prefix and positional parts"""
+        return self._generate_key(prefix, parts=[str(part) for part in parts])
+    
     def _cleanup_expired(self):
         """Remove expired keys from in-memory cache"""
         current_time = time.time()
@@ -86,6 +95,7 @@ class CacheManager:
         if self.redis_available:
             try:
                 value = self.redis_client.get(key)
+                (_cache_hits if value else _cache_misses).inc()
                 return json.loads(value) if value else None
             except Exception as e:
                 logger.warning(f"Redis get error: {e}")
@@ -96,14 +106,40 @@ class CacheManager:
         
         if key in self._cache and key in self._expires:
             if self._expires[key] > current_time:
+                _cache_hits.inc()
                 return self._cache[key]
             else:
                 # Expired
                 self._cache.pop(key, None)
                 self._expires.pop(key, None)
         
+        _cache_misses.inc()
         return None
     
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values in one round trip (MGET); missing keys are left out"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+    
+        if self.redis_available:
+            try:
+                values = self.redis_client.mget(keys)
+                found = {key: json.loads(value) for key, value in zip(keys, values) if value}
+                _cache_hits.inc(len(found))
+                _cache_misses.inc(len(keys) - len(found))
+                return found
+            except Exception as e:
+                logger.warning(f"Redis mget error: {e}")
+    
+        # Fallback to in-memory
+        found = {}
+        for key in keys:
+            value = await self.get(key)
+            if value:
+                found[key] = value
+        return found
+    
     async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Set value in cache with TTL"""
         ttl = ttl or self.default_ttl
@@ -44,8 +44,16 @@ class APIConfig:
     CACHE_TTL_INDICATORS: int = 120  # 2 minutes for indicators
     CACHE_PREFIX: str = "wadm:api:"
     
+    # Batch indicator endpoint
+    BATCH_CONCURRENCY: int = int(os.getenv("WADM_API_BATCH_CONCURRENCY", "8"))  # computations in flight
+    BATCH_ITEM_TIMEOUT: float = float(os.getenv("WADM_API_BATCH_ITEM_TIMEOUT", "10"))  # seconds
+    
     # Response settings
     PRETTY_JSON: bool = os.getenv("WADM_API_PRETTY_JSON", "false").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("WADM_API_COMPRESSION_MIN_SIZE", "1024"))  # bytes
+    # Encoded bodies sit in front of the data caches, so keep this short
+    RESPONSE_CACHE_TTL: int = int(os.getenv("WADM_API_RESPONSE_CACHE_TTL", "10"))  # seconds
+    RESPONSE_CACHE_ENTRIES: int = int(os.getenv("WADM_API_RESPONSE_CACHE_ENTRIES", "512"))
     
     # Security
     ENABLE_DOCS: bool = os.getenv("WADM_API_ENABLE_DOCS", "true").lower() == "true"
@@ -0,0 +1,209 @@
+"""
+Response encoding
+orjson-backed JSON responses, an opt-in columnar layout for list endpoints and
+an in-process cache of encoded (and gzip/brotli compressed) bodies, so a hot
+cacheable response is serialized and compressed once per TTL instead of once
+per request.
+"""
+import gzip
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import decimal_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from src.api.config import APIConfig
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Near gzip -6 speed with smaller output
+
+
+class ResponseFormat(str, Enum):
+    """Layout of list payloads"""
+    ROWS = "rows"          # Array of objects (default)
+    COLUMNAR = "columnar"  # Object of parallel arrays, one per field
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively, encoded like jsonable_encoder does"""
+    if isinstance(obj, Decimal):
+        return decimal_encoder(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if hasattr(obj, "tolist"):  # numpy scalars and arrays without orjson
+        return obj.tolist()
+    return str(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits and other values orjson refuses
+            pass
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; the application's default response class"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def columnar(rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Parallel arrays from a list of dicts; every key seen in any row becomes a
+    column, with None where a row lacks it
+    """
+    fields: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            fields.setdefault(key)
+    return {field: [row.get(field) for row in rows] for field in fields}
+
+
+def shape(rows: List[Dict[str, Any]], fmt: ResponseFormat) -> Any:
+    """``rows`` in the requested layout"""
+    return columnar(rows) if fmt == ResponseFormat.COLUMNAR else rows
+
+
+def negotiate(accept_encoding: Optional[str]) -> str:
+    """Best supported content coding for an Accept-Encoding header"""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        name, _, value = params.partition("=")
+        try:
+            if name.strip() == "q" and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip())
+    if BROTLI_AVAILABLE and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+class EncodedResponseCache:
+    """
+    TTL/LRU cache of response bodies per (key, content coding)
+
+    The JSON body is stored once per key; compressed variants are produced
+    from it the first time each coding is asked for. Bodies under
+    ``min_size`` are always sent uncompressed.
+    """
+
+    def __init__(self, max_entries: int = APIConfig.RESPONSE_CACHE_ENTRIES,
+                 min_size: int = APIConfig.COMPRESSION_MIN_SIZE):
+        self.max_entries = max_entries
+        self.min_size = min_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, bytes]]]" = OrderedDict()
+        self._lock = threading.Lock()  # Sync endpoints run in the threadpool
+        self.hits = 0
+        self.misses = 0
+
+    def _variants(self, key: str) -> Optional[Dict[str, bytes]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, variants = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return variants
+
+    def _respond(self, variants: Dict[str, bytes], encoding: str) -> Response:
+        # Compression runs outside the lock; two requests racing on a new
+        # coding both compress and the second write wins, which is harmless
+        body = variants["identity"]
+        if encoding == "identity" or len(body) < self.min_size:
+            return Response(content=body, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+        compressed = variants.get(encoding)
+        if compressed is None:
+            compressed = variants[encoding] = compress(body, encoding)
+        return Response(
+            content=compressed,
+            media_type="application/json",
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+
+    def get(self, request: Request, key: str) -> Optional[Response]:
+        """Cached response for ``key`` in the request's preferred coding, or None"""
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        with self._lock:
+            variants = self._variants(key)
+            if variants is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._respond(variants, encoding)
+
+    def put(self, request: Request, key: str, content: Any, ttl: int = APIConfig.RESPONSE_CACHE_TTL) -> Response:
+        """Encode ``content`` once, cache it under ``key`` and respond with it"""
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        variants = {"identity": dumps(content)}
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, variants)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return self._respond(variants, encoding)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "brotli": BROTLI_AVAILABLE,
+            "orjson": ORJSON_AVAILABLE,
+        }
+
+
+# Global encoded response cache
+response_cache = EncodedResponseCache()
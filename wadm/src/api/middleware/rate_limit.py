@@ -128,7 +128,7 @@ class EnhancedRateLimitMiddleware(BaseHTTPMiddleware):
         Process the request with rate limiting and session tracking.
         """
         # Skip rate limiting for docs and health checks
-        if request.url.path in ["/", "/api/docs", "/api/redoc", "/api/openapi.json", "/api/v1"]:
+        if request.url.path in ["/", "/api/docs", "/api/redoc", "/api/openapi.json", "/api/v1", "/metrics"]:
             return await call_next(request)
         
         # Extract API key
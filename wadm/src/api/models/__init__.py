@@ -41,6 +41,16 @@ class PaginatedResponse(BaseModel):
     pages: int
 
 
+class CursorPage(BaseModel):
+    """Keyset-paginated page; pass next_cursor back as ``cursor`` for the next one"""
+    data: List[Any]
+    per_page: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    total: Optional[int] = Field(None, description="Matching items, only when requested")
+    total_is_lower_bound: bool = Field(False, description="Count stopped at the cap")
+
+
 class ErrorResponse(BaseModel):
     error: Dict[str, Any] = Field(..., description="Error details")
 
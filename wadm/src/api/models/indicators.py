@@ -4,7 +4,7 @@ Pydantic models for indicator responses
 """
 
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Literal
 from decimal import Decimal
 from pydantic import BaseModel, Field
 
@@ -136,3 +136,39 @@ class IndicatorStatus(BaseModel):
     smc_analyses_count: int = Field(..., description="Number of SMC analyses stored")
     cache_enabled: bool = Field(..., description="Cache system status")
     status: str = Field(..., description="Overall system status")
+
+
+class IndicatorSpec(BaseModel):
+    """One item of a batch indicator request"""
+    indicator: Literal["volume_profile", "order_flow", "smc_analysis", "smc_bias"] = Field(
+        ..., description="Indicator to resolve")
+    symbol: str = Field(..., description="Trading symbol")
+    exchange: Optional[str] = Field(None, description="Specific exchange")
+    params: Dict[str, Any] = Field(default_factory=dict,
+                                   description="mode / timeframe, as on the single-indicator endpoints")
+
+
+class BatchIndicatorRequest(BaseModel):
+    """Batch indicator request"""
+    items: List[IndicatorSpec] = Field(..., min_length=1, max_length=100, description="Indicator specs")
+
+
+class BatchItemResult(BaseModel):
+    """Result of one batch item, in request order"""
+    indicator: str = Field(..., description="Requested indicator")
+    symbol: str = Field(..., description="Trading symbol")
+    exchange: Optional[str] = Field(None, description="Requested exchange")
+    status: Literal["ok", "error"] = Field(..., description="Item outcome")
+    cached: bool = Field(False, description="Served from the batch cache lookup")
+    data: Optional[Dict[str, Any]] = Field(None, description="Indicator data when ok")
+    error: Optional[Dict[str, str]] = Field(None, description="type and message when failed")
+
+
+class BatchIndicatorResponse(BaseModel):
+    """Batch indicator response"""
+    results: List[BatchItemResult] = Field(..., description="One result per requested item")
+    succeeded: int = Field(..., description="Items resolved")
+    failed: int = Field(..., description="Items that failed")
+    cache_hits: int = Field(..., description="Items served from the cache lookup")
+    duration_ms: float = Field(..., description="Time to resolve the batch")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Batch metadata")
@@ -11,5 +11,6 @@ from . import system
 from . import sessions
 from . import mcp
 from . import testing
+from . import export
 
-__all__ = ['auth', 'market_data', 'indicators', 'smc', 'system', 'sessions', 'mcp', 'testing']
+__all__ = ['auth', 'market_data', 'indicators', 'smc', 'system', 'sessions', 'mcp', 'testing', 'export']
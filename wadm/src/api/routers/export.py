@@ -0,0 +1,87 @@
+"""
+Export Router
+Streaming Arrow IPC / Parquet export of trades, candles and indicator series
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
+
+from src.api.routers.auth import verify_api_key
+from src.api.models import TimeFrame, Exchange
+from src.storage.export import (
+    DataExporter, EXPORT_DATASETS, EXPORT_FORMATS, PYARROW_AVAILABLE
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+FILE_EXTENSIONS = {"arrow": "arrows", "parquet": "parquet"}
+
+
+@router.get("/{dataset}/{symbol}")
+def export_dataset(
+    request: Request,
+    dataset: str = Path(..., description=f"Dataset: {', '.join(EXPORT_DATASETS)}"),
+    symbol: str = Path(..., description="Trading symbol"),
+    format: str = Query("arrow", description=f"Output format: {', '.join(EXPORT_FORMATS)}"),
+    exchange: Optional[Exchange] = Query(None, description="Filter by exchange"),
+    start_time: Optional[datetime] = Query(None, description="Start time (inclusive)"),
+    end_time: Optional[datetime] = Query(None, description="End time (exclusive)"),
+    columns: Optional[str] = Query(None, description="Comma separated column projection"),
+    timeframe: TimeFrame = Query(TimeFrame.M1, description="Candle timeframe (candles only)"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Stream a dataset as Arrow IPC stream or Parquet.
+
+    Filters and projection are pushed down to MongoDB and the response is
+    produced chunk by chunk, so arbitrarily large ranges use bounded memory.
+    Defined as a sync endpoint: the blocking cursor runs in the threadpool.
+    """
+    if not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Columnar export requires pyarrow on the server")
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset '{dataset}'")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'")
+    if start_time and end_time and start_time >= end_time:
+        raise HTTPException(status_code=400, detail="start_time must be before end_time")
+
+    # The app's shared client: a manager per request would open a connection pool each time
+    mongo = request.app.state.mongo
+    if not mongo.connected:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    exporter = DataExporter(mongo.db)
+    column_list = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+
+    try:
+        exporter.schema(dataset, column_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    stream = exporter.stream(
+        format, dataset, symbol,
+        exchange=exchange.value if exchange else None,
+        start_time=start_time,
+        end_time=end_time,
+        columns=column_list,
+        timeframe=timeframe.value
+    )
+
+    filename = f"{symbol.upper()}_{dataset}.{FILE_EXTENSIONS[format]}"
+    logger.info(f"Streaming {dataset} export for {symbol} as {format}")
+
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -3,12 +3,13 @@ WADM Indicators API Router
 Endpoints for technical indicators with real calculation services
 """
 
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, List
 from decimal import Decimal
 
-from fastapi import APIRouter, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
 from ..models.indicators import (
     VolumeProfileResponse,
@@ -16,6 +17,8 @@ from ..models.indicators import (
     SMCAnalysisResponse,
     SMCSignalsResponse,
     IndicatorStatus,
+    BatchIndicatorRequest,
+    BatchIndicatorResponse,
     OrderBlock,
     FairValueGap,
     StructureBreak,
@@ -23,12 +26,19 @@ from ..models.indicators import (
 )
 from ..models.auth import APIKeyVerifyResponse, PermissionLevel
 from ..models.session import SessionResponse
-from ..routers.auth import verify_api_key
+from ..models import CursorPage
+from ..routers.auth import verify_api_key, get_auth_service
 from ..dependencies import require_active_session
 from ..cache import cache_manager
-from ..services import VolumeProfileService, OrderFlowService, SMCService
+from ..config import APIConfig
+from ..encoding import FastJSONResponse, dumps, response_cache
+from ..services import VolumeProfileService, OrderFlowService, SMCService, IndicatorBatchService
 from ...storage.mongo_manager import MongoManager
 from ...config import Config
+from ...latency import latency_tracker
+from ...indicator_feed import FeedFilter, indicator_feed
+from ...market_context import market_context
+from ...metrics import WEBSOCKET_CLIENTS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -43,6 +53,9 @@ storage = MongoManager()
 vp_service = VolumeProfileService(storage, cache_manager)
 of_service = OrderFlowService(storage, cache_manager)
 smc_service = SMCService(storage, cache_manager)
+batch_service = IndicatorBatchService(vp_service, of_service, smc_service, cache_manager)
+
+WEBSOCKET_CLIENTS.labels("indicator_feed").set_function(lambda: len(indicator_feed.subscriptions))
 
 
 @router.get("/status", response_model=IndicatorStatus)
@@ -58,8 +71,8 @@ async def get_indicators_status(
         last_volume_profile = await storage.get_latest_volume_profile("BTCUSDT")
         last_order_flow = await storage.get_latest_order_flow("BTCUSDT")
         
-        # Get SMC analysis count
-        smc_count = await storage.db.smc_analyses.count_documents({})
+        # Get SMC analysis count (sampled estimate)
+        smc_count = storage.get_database_stats().get("smc_analyses_count", 0)
         
         return IndicatorStatus(
             available_symbols=symbols,
@@ -102,7 +115,7 @@ async def get_volume_profile(
         
         elif mode == "realtime":
             # Calculate from recent trades
-            minutes = {"15m": 15, "1h": 60, "4h": 240, "1d": 1440}.get(timeframe, 60)
+            minutes = vp_service.TIMEFRAME_MINUTES.get(timeframe, vp_service.DEFAULT_MINUTES)
             data = await vp_service.calculate_realtime(symbol, exchange or "bybit", minutes)
         
         elif mode == "multi-timeframe":
@@ -135,6 +148,7 @@ async def get_volume_profile(
                 "exchange": data.get("exchange", exchange),
                 "time_period_minutes": data.get("time_period_minutes", 60),
                 "data_quality": "high" if data.get("trades_count", 0) > 100 else "medium",
+                "data_age_ms": latency_tracker.record_served(exchange, data.get("latency")),
                 "session_id": session.id
             }
         )
@@ -174,7 +188,7 @@ async def get_order_flow(
         
         elif mode == "realtime":
             # Calculate from recent trades
-            minutes = {"5m": 5, "15m": 15, "1h": 60, "4h": 240}.get(timeframe, 15)
+            minutes = of_service.TIMEFRAME_MINUTES.get(timeframe, of_service.DEFAULT_MINUTES)
             data = await of_service.calculate_realtime(symbol, exchange or "bybit", minutes)
         
         elif mode == "analysis":
@@ -182,7 +196,7 @@ async def get_order_flow(
             data = await of_service.get_flow_analysis(symbol, exchange)
             
             # For analysis mode, return more detailed response
-            return JSONResponse(content={
+            return FastJSONResponse(content={
                 "symbol": symbol,
                 "mode": "comprehensive_analysis",
                 "data": data,
@@ -215,6 +229,7 @@ async def get_order_flow(
                 "market_bias": data.get("market_bias", "neutral"),
                 "institutional_volume": data.get("institutional_volume", 0.0),
                 "exhaustion_signals": data.get("exhaustion_signals", []),
+                "data_age_ms": latency_tracker.record_served(exchange, data.get("latency")),
                 "session_id": session.id
             }
         )
@@ -226,8 +241,91 @@ async def get_order_flow(
         raise HTTPException(status_code=500, detail=f"Error retrieving order flow: {str(e)}")
 
 
+@router.post("/batch", response_model=BatchIndicatorResponse)
+async def get_indicators_batch(
+    batch: BatchIndicatorRequest,
+    session: SessionResponse = Depends(require_active_session)
+):
+    """
+    Resolve many indicators in one call
+    
+    **Requires active session** ($1 per 24h or 100k tokens)
+    
+    Each item names an indicator (volume_profile, order_flow, smc_analysis or
+    smc_bias), a symbol, an optional exchange and the params the single
+    endpoint takes (mode, timeframe). Auth and session are checked once, the
+    cache is read with one MGET and misses are computed concurrently. Items
+    fail individually: the batch itself succeeds.
+    """
+    results, stats = await batch_service.resolve([item.model_dump() for item in batch.items])
+    for item in results:
+        if item["status"] == "ok" and item["indicator"] in ("volume_profile", "order_flow"):
+            item["data"] = {**item["data"],
+                            "data_age_ms": latency_tracker.record_served(item["exchange"], item["data"].get("latency"))}
+    
+    return BatchIndicatorResponse(
+        results=results,
+        succeeded=stats["succeeded"],
+        failed=stats["failed"],
+        cache_hits=stats["cache_hits"],
+        duration_ms=stats["duration_ms"],
+        metadata={"computed": stats["computed"], "session_id": session.id}
+    )
+
+
+async def _history_page(service, symbol: str, start_time: Optional[datetime], end_time: Optional[datetime],
+                        per_page: int, cursor: Optional[str]) -> CursorPage:
+    if symbol not in Config.SYMBOLS:
+        raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
+    try:
+        page = await service.get_historical(symbol, start_time, end_time, per_page, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CursorPage(
+        data=page["data"],
+        per_page=per_page,
+        next_cursor=page["next_cursor"],
+        has_more=page["next_cursor"] is not None
+    )
+
+
+@router.get("/volume-profile/{symbol}/history", response_model=CursorPage)
+async def get_volume_profile_history(
+    symbol: str,
+    start_time: Optional[datetime] = Query(None, description="Start time (default: 24h ago)"),
+    end_time: Optional[datetime] = Query(None, description="End time (default: now)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    per_page: int = Query(100, ge=1, le=1000, description="Items per page"),
+    session: SessionResponse = Depends(require_active_session)
+):
+    """
+    Stored volume profiles, newest first, with keyset pagination
+    
+    **Requires active session** ($1 per 24h or 100k tokens)
+    """
+    return await _history_page(vp_service, symbol, start_time, end_time, per_page, cursor)
+
+
+@router.get("/order-flow/{symbol}/history", response_model=CursorPage)
+async def get_order_flow_history(
+    symbol: str,
+    start_time: Optional[datetime] = Query(None, description="Start time (default: 24h ago)"),
+    end_time: Optional[datetime] = Query(None, description="End time (default: now)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    per_page: int = Query(100, ge=1, le=1000, description="Items per page"),
+    session: SessionResponse = Depends(require_active_session)
+):
+    """
+    Stored order flows, newest first, with keyset pagination
+    
+    **Requires active session** ($1 per 24h or 100k tokens)
+    """
+    return await _history_page(of_service, symbol, start_time, end_time, per_page, cursor)
+
+
 @router.get("/smc/{symbol}/analysis", response_model=SMCAnalysisResponse)
 async def get_smc_analysis(
+    request: Request,
     symbol: str,
     timeframe: str = Query("15m", description="Analysis timeframe (5m, 15m, 1h, 4h)"),
     session: SessionResponse = Depends(require_active_session)
@@ -249,6 +347,11 @@ async def get_smc_analysis(
     if symbol not in Config.SYMBOLS:
         raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
     
+    response_key = cache_manager.get_cache_key("smc_analysis_body", symbol, timeframe, session.id)
+    cached_response = response_cache.get(request, response_key)
+    if cached_response:
+        return cached_response
+    
     try:
         # Get comprehensive SMC analysis
         analysis = await smc_service.get_comprehensive_analysis(symbol, timeframe)
@@ -307,7 +410,7 @@ async def get_smc_analysis(
             }
         )
         
-        return response
+        return response_cache.put(request, response_key, response)
         
     except Exception as e:
         logger.error(f"Error getting SMC analysis for {symbol}: {e}")
@@ -316,6 +419,7 @@ async def get_smc_analysis(
 
 @router.get("/smc/{symbol}/signals", response_model=SMCSignalsResponse)
 async def get_smc_signals(
+    request: Request,
     symbol: str,
     signal_type: Optional[str] = Query(None, enum=["long", "short"], description="Filter by signal type"),
     min_confidence: float = Query(70.0, ge=0, le=100, description="Minimum confidence score"),
@@ -338,6 +442,11 @@ async def get_smc_signals(
     if symbol not in Config.SYMBOLS:
         raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
     
+    response_key = cache_manager.get_cache_key("smc_signals_body", symbol, signal_type, min_confidence, session.id)
+    cached_response = response_cache.get(request, response_key)
+    if cached_response:
+        return cached_response
+    
     try:
         # Get trading signals
         signals_data = await smc_service.get_trading_signals(symbol, signal_type)
@@ -386,7 +495,7 @@ async def get_smc_signals(
             }
         )
         
-        return response
+        return response_cache.put(request, response_key, response)
         
     except Exception as e:
         logger.error(f"Error getting SMC signals for {symbol}: {e}")
@@ -395,6 +504,7 @@ async def get_smc_signals(
 
 @router.get("/smc/{symbol}/structure")
 async def get_market_structure(
+    request: Request,
     symbol: str,
     include_levels: bool = Query(True, description="Include key support/resistance levels"),
     session: SessionResponse = Depends(require_active_session)
@@ -416,10 +526,15 @@ async def get_market_structure(
     if symbol not in Config.SYMBOLS:
         raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
     
+    response_key = cache_manager.get_cache_key("smc_structure_body", symbol, include_levels, session.id)
+    cached_response = response_cache.get(request, response_key)
+    if cached_response:
+        return cached_response
+    
     try:
         structure = await smc_service.get_market_structure(symbol, include_levels)
-        structure["session_id"] = session.id
-        return JSONResponse(content=structure)
+        # The service hands back its cached dict, so copy rather than mutate it
+        return response_cache.put(request, response_key, {**structure, "session_id": session.id})
         
     except Exception as e:
         logger.error(f"Error getting market structure for {symbol}: {e}")
@@ -428,6 +543,7 @@ async def get_market_structure(
 
 @router.get("/smc/{symbol}/confluence")
 async def get_confluence_analysis(
+    request: Request,
     symbol: str,
     min_score: int = Query(70, ge=0, le=100, description="Minimum confluence score"),
     session: SessionResponse = Depends(require_active_session)
@@ -445,11 +561,196 @@ async def get_confluence_analysis(
     if symbol not in Config.SYMBOLS:
         raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
     
+    response_key = cache_manager.get_cache_key("smc_confluence_body", symbol, min_score, session.id)
+    cached_response = response_cache.get(request, response_key)
+    if cached_response:
+        return cached_response
+    
     try:
         confluence = await smc_service.get_confluence_analysis(symbol, min_score)
-        confluence["session_id"] = session.id
-        return JSONResponse(content=confluence)
+        return response_cache.put(request, response_key, {**confluence, "session_id": session.id})
         
     except Exception as e:
         logger.error(f"Error getting confluence analysis for {symbol}: {e}")
         raise HTTPException(status_code=500, detail=f"Error in confluence analysis: {str(e)}")
+
+
+@router.get("/smc/{symbol}/zones")
+async def get_smc_zones(
+    symbol: str,
+    price: Optional[float] = Query(None, gt=0, description="Reference price for nearest-zone lookup"),
+    distance_pct: float = Query(2.0, gt=0, le=50, description="Max distance from price (%)"),
+    kind: Optional[str] = Query(None, enum=["order_block", "fair_value_gap"], description="Zone kind"),
+    direction: Optional[str] = Query(None, enum=["bullish", "bearish"], description="Zone direction"),
+    limit: int = Query(20, ge=1, le=200, description="Maximum zones returned"),
+    session: SessionResponse = Depends(require_active_session)
+):
+    """
+    Get active SMC zones near a price
+    
+    **Requires active session** ($1 per 24h or 100k tokens)
+    
+    Order blocks and fair value gaps detected in the last 24 hours, served from
+    a price-sorted index: with a price, the zones within ``distance_pct`` are
+    returned nearest first.
+    """
+    
+    # Validate symbol
+    if symbol not in Config.SYMBOLS:
+        raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
+    
+    try:
+        zones = await smc_service.get_zones(symbol, price, distance_pct, kind, direction, limit)
+        return FastJSONResponse(content={**zones, "session_id": session.id})
+        
+    except Exception as e:
+        logger.error(f"Error getting SMC zones for {symbol}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error querying zones: {str(e)}")
+
+
+@router.get("/context/{symbol}")
+async def get_market_context(
+    symbol: str,
+    format: str = Query("text", enum=["text", "json"], description="Compact text or JSON sections"),
+    max_tokens: int = Query(Config.MARKET_CONTEXT_MAX_TOKENS, ge=50, le=4000, description="Token budget"),
+    session: SessionResponse = Depends(require_active_session)
+):
+    """
+    Get the compact market context snapshot for a symbol
+    
+    **Requires active session** ($1 per 24h or 100k tokens)
+    
+    Price and 24h range, SMC bias and levels, volume profile levels, order
+    flow delta/CVD and VWAP bands, kept current from indicator updates and
+    trimmed to ``max_tokens`` (lowest priority sections are listed in
+    ``omitted``). This is the context the LLM analysis sends.
+    """
+    if symbol not in Config.SYMBOLS:
+        raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
+    
+    snapshot = market_context.render(symbol, format, max_tokens)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No market context available for {symbol} yet")
+    return FastJSONResponse(content={**snapshot, "session_id": session.id})
+
+
+def _feed_capacity():
+    if len(indicator_feed.subscriptions) >= APIConfig.WS_MAX_CONNECTIONS:
+        raise HTTPException(status_code=503, detail="Too many indicator subscribers")
+
+
+@router.get("/stream")
+async def stream_indicator_updates(
+    request: Request,
+    symbols: Optional[str] = Query(None, description="Comma separated symbols (default all)"),
+    indicators: Optional[str] = Query(None, description="Comma separated: volume_profile, order_flow, smc"),
+    exchanges: Optional[str] = Query(None, description="Comma separated exchanges; SMC uses 'all'"),
+    timeframes: Optional[str] = Query(None, description="Comma separated timeframes"),
+    since: Optional[int] = Query(None, ge=0, description="Resume after this sequence number"),
+    max_rate: float = Query(Config.INDICATOR_FEED_MAX_RATE, gt=0, le=Config.INDICATOR_FEED_MAX_RATE,
+                            description="Maximum messages per second"),
+    session: SessionResponse = Depends(require_active_session)
+):
+    """
+    Server-sent indicator updates as the manager produces them
+    
+    **Requires active session** ($1 per 24h or 100k tokens)
+    
+    Each key (indicator, symbol, exchange, timeframe) is sent in full first,
+    then as a JSON merge patch of the changed fields. Event ids are sequence
+    numbers: reconnecting with ``Last-Event-ID`` (or ``since``) resumes with
+    the latest state of every key updated meanwhile, or a ``resync`` event and
+    a fresh snapshot when the server no longer holds that far back.
+    """
+    _feed_capacity()
+    last_event_id = request.headers.get("last-event-id")
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    filters = FeedFilter.from_params(symbols, indicators, exchanges, timeframes)
+    
+    async def events():
+        subscription = indicator_feed.subscribe(filters, since, max_rate)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.next_message(),
+                                                     APIConfig.WS_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                event_id = f"id: {message['seq']}\n" if "seq" in message else ""
+                yield f"{event_id}event: {message['type']}\ndata: ".encode() + dumps(message) + b"\n\n"
+        finally:
+            indicator_feed.unsubscribe(subscription)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/ws")
+async def indicator_updates_websocket(websocket: WebSocket):
+    """
+    WebSocket indicator updates, same messages and query parameters as /stream
+    
+    Authenticate with the X-API-Key header or an ``api_key`` query parameter.
+    Clients may send:
+    {"action": "filters", "symbols": [...], "indicators": [...], "exchanges": [...], "timeframes": [...]}
+    {"action": "ping"}
+    """
+    await websocket.accept()
+    params = websocket.query_params
+    api_key = websocket.headers.get("x-api-key") or params.get("api_key")
+    try:
+        await require_active_session(await verify_api_key(api_key, get_auth_service()))
+        _feed_capacity()
+        since = int(params["since"]) if params.get("since") else None
+        max_rate = min(float(params.get("max_rate", Config.INDICATOR_FEED_MAX_RATE)),
+                       Config.INDICATOR_FEED_MAX_RATE)
+        if max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+    except HTTPException as e:
+        await websocket.close(code=4000 + e.status_code, reason=str(e.detail))
+        return
+    except ValueError as e:
+        await websocket.close(code=4400, reason=f"Invalid parameter: {e}")
+        return
+    
+    subscription = indicator_feed.subscribe(
+        FeedFilter.from_params(params.get("symbols"), params.get("indicators"),
+                               params.get("exchanges"), params.get("timeframes")),
+        since, max_rate)
+    
+    async def send_updates():
+        while True:
+            await websocket.send_text(dumps(await subscription.next_message()).decode())
+    
+    async def receive_commands():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_text(dumps({"type": "error", "message": "Invalid JSON format"}).decode())
+                continue
+            action = message.get("action") if isinstance(message, dict) else None
+            if action == "filters":
+                filters = FeedFilter.from_params(message.get("symbols"), message.get("indicators"),
+                                                 message.get("exchanges"), message.get("timeframes"))
+                subscription.replace_filters(filters, indicator_feed.snapshot())
+                await websocket.send_text(dumps({"type": "status", "message": "Filters updated"}).decode())
+            elif action == "ping":
+                await websocket.send_text(dumps({"type": "pong", "seq": indicator_feed.last_seq}).decode())
+            else:
+                await websocket.send_text(dumps({"type": "error", "message": "Invalid action"}).decode())
+    
+    tasks = [asyncio.create_task(send_updates()), asyncio.create_task(receive_commands())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() and \
+                    not isinstance(task.exception(), WebSocketDisconnect):
+                logger.warning(f"Indicator feed WebSocket closed: {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        indicator_feed.unsubscribe(subscription)
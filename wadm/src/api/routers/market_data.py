@@ -4,13 +4,15 @@ Endpoints for trade data, candles, and orderbook
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pymongo import DESCENDING
 import asyncio
+import itertools
 import json
 
 from src.api.routers.auth import verify_api_key
@@ -18,10 +20,14 @@ from src.api.models.market import (
     Trade, Candle, OrderBook, MarketStats, 
     SymbolInfo, MarketSummary
 )
-from src.api.models import TimeFrame, Exchange, PaginatedResponse
+from src.api.models import TimeFrame, Exchange, CursorPage
 from src.storage.mongo_manager import MongoManager
+from src.storage.pagination import approximate_total, encode_cursor, fetch_page, iter_pages
 from src.api.cache import cache_manager
+from src.api.encoding import FastJSONResponse, ResponseFormat, dumps, response_cache, shape
 from src.config import Config
+from src.metrics import WEBSOCKET_CLIENTS
+from src.market_stats import TIMEFRAME_MINUTES, market_stats_mirror
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -77,24 +83,11 @@ class ConnectionManager:
 
 # Global connection manager
 manager = ConnectionManager()
+WEBSOCKET_CLIENTS.labels("market_trades").set_function(lambda: len(manager.active_connections))
 
 
-@router.get("/trades/{symbol}", response_model=PaginatedResponse)
-async def get_trades(
-    symbol: str = Path(..., description="Trading symbol (e.g., BTCUSDT)"),
-    exchange: Optional[Exchange] = Query(None, description="Filter by exchange"),
-    start_time: Optional[datetime] = Query(None, description="Start time (ISO format)"),
-    end_time: Optional[datetime] = Query(None, description="End time (ISO format)"),
-    page: int = Query(1, ge=1, description="Page number"),
-    per_page: int = Query(100, ge=1, le=1000, description="Items per page"),
-    api_key: str = Depends(verify_api_key)
-):
-    """
-    Get historical trades with pagination
-    """
-    mongo = MongoManager()
-    
-    # Build query
+def _trade_query(symbol: str, exchange: Optional[Exchange],
+                 start_time: Optional[datetime], end_time: Optional[datetime]) -> Dict[str, Any]:
     query = {"symbol": symbol.upper()}
     if exchange:
         query["exchange"] = exchange.value
@@ -107,48 +100,117 @@ async def get_trades(
         if end_time:
             time_filter["$lte"] = end_time
         query["timestamp"] = time_filter
+    return query
+
+
+def _trade_model(doc: Dict[str, Any]) -> Trade:
+    return Trade(
+        id=str(doc["_id"]),
+        symbol=doc["symbol"],
+        exchange=doc["exchange"],
+        price=Decimal(str(doc["price"])),
+        quantity=Decimal(str(doc["quantity"])),
+        side=doc["side"],
+        timestamp=doc["timestamp"]
+    )
+
+
+@router.get("/trades/{symbol}", response_model=CursorPage)
+def get_trades(
+    symbol: str = Path(..., description="Trading symbol (e.g., BTCUSDT)"),
+    exchange: Optional[Exchange] = Query(None, description="Filter by exchange"),
+    start_time: Optional[datetime] = Query(None, description="Start time (ISO format)"),
+    end_time: Optional[datetime] = Query(None, description="End time (ISO format)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    per_page: int = Query(100, ge=1, le=1000, description="Items per page"),
+    include_total: bool = Query(False, description="Add an approximate total (capped count)"),
+    format: ResponseFormat = Query(ResponseFormat.ROWS, description="rows, or columnar for parallel arrays in data"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Get historical trades, newest first, with keyset pagination.
+    Every page is one index range query after the cursor, however deep.
+    Defined as a sync endpoint: the blocking cursor runs in the threadpool.
+    """
+    mongo = MongoManager()
+    query = _trade_query(symbol, exchange, start_time, end_time)
     
-    # Count total
-    total = mongo.db.trades.count_documents(query)
-    
-    # Get paginated results
-    skip = (page - 1) * per_page
-    cursor = mongo.db.trades.find(query).sort("timestamp", DESCENDING).skip(skip).limit(per_page)
-    
-    trades = []
-    for doc in cursor:
-        trades.append(Trade(
-            id=str(doc["_id"]),
-            symbol=doc["symbol"],
-            exchange=doc["exchange"],
-            price=Decimal(str(doc["price"])),
-            quantity=Decimal(str(doc["quantity"])),
-            side=doc["side"],
-            timestamp=doc["timestamp"]
-        ))
+    try:
+        docs, next_cursor = fetch_page(mongo.db.trades, query, per_page, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return PaginatedResponse(
-        data=trades,
-        page=page,
+    total, capped = None, False
+    if include_total:
+        total, capped = approximate_total(mongo.db.trades, query)
+    
+    page = CursorPage(
+        data=[_trade_model(doc) for doc in docs],
         per_page=per_page,
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None,
         total=total,
-        pages=(total + per_page - 1) // per_page
+        total_is_lower_bound=capped
     )
+    if format == ResponseFormat.COLUMNAR:
+        content = page.model_dump(mode="json")
+        content["data"] = shape(content["data"], format)
+        return FastJSONResponse(content=content)
+    return page
+
+
+@router.get("/trades/{symbol}/stream")
+def stream_trades(
+    symbol: str = Path(..., description="Trading symbol (e.g., BTCUSDT)"),
+    exchange: Optional[Exchange] = Query(None, description="Filter by exchange"),
+    start_time: Optional[datetime] = Query(None, description="Start time (default: 24h ago)"),
+    end_time: Optional[datetime] = Query(None, description="End time (default: now)"),
+    cursor: Optional[str] = Query(None, description="Resume after this cursor"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Stream every trade in a range, oldest first, as NDJSON.
+    The range is walked in keyset pages, so a whole day costs one index range
+    scan; each line carries the cursor to resume from if the stream breaks.
+    """
+    mongo = MongoManager()
+    end_time = end_time or datetime.utcnow()
+    start_time = start_time or end_time - timedelta(hours=24)
+    query = _trade_query(symbol, exchange, start_time, end_time)
+    try:
+        pages = iter_pages(mongo.db.trades, query, page_size=1000, cursor=cursor)
+        first = next(pages, [])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def lines():
+        for page in itertools.chain([first], pages):
+            for doc in page:
+                item = _trade_model(doc).dict()
+                item["cursor"] = encode_cursor(doc)
+                yield dumps(item) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.get("/candles/{symbol}/{timeframe}", response_model=List[Candle])
 async def get_candles(
+    request: Request,
     symbol: str = Path(..., description="Trading symbol"),
     timeframe: TimeFrame = Path(..., description="Candle timeframe"),
     exchange: Optional[Exchange] = Query(None, description="Filter by exchange"),
     start_time: Optional[datetime] = Query(None, description="Start time"),
     end_time: Optional[datetime] = Query(None, description="End time"),
     limit: int = Query(500, ge=1, le=1000, description="Number of candles"),
+    format: ResponseFormat = Query(ResponseFormat.ROWS, description="rows, or columnar for parallel arrays"),
     api_key: str = Depends(verify_api_key)
 ):
     """
-    Get OHLCV candles aggregated from trades
-    Enhanced aggregation with optimized MongoDB pipeline and caching
+    Get OHLCV candles aggregated from trades, and from 1m trade bars for the
+    part of the range older than the raw trade retention
+    Enhanced aggregation with optimized MongoDB pipeline and caching.
+    The encoded (and compressed) body is cached too, so repeated polls skip
+    validation and serialization as well as the pipeline.
     """
     # Check cache first
     cache_key_params = {
@@ -157,13 +219,18 @@ async def get_candles(
         "end_time": end_time.isoformat() if end_time else None,
         "limit": limit
     }
+    response_key = cache_manager.get_cache_key("candles_body", symbol.upper(), timeframe.value,
+                                               format.value, *cache_key_params.values())
+    cached_response = response_cache.get(request, response_key)
+    if cached_response:
+        return cached_response
     
     cached_data = await cache_manager.get_candles(
         symbol.upper(), timeframe.value, **cache_key_params
     )
     if cached_data:
         logger.info(f"Cache hit for candles {symbol}/{timeframe}")
-        return [Candle(**candle) for candle in cached_data]
+        return response_cache.put(request, response_key, shape(cached_data, format))
     
     mongo = MongoManager()
     
@@ -181,66 +248,42 @@ async def get_candles(
         end_time = datetime.utcnow()
     if not start_time:
         start_time = end_time - timedelta(milliseconds=interval_ms * limit)
+    # Naive UTC throughout, as stored
+    start_time, end_time = (t.astimezone(timezone.utc).replace(tzinfo=None) if t.tzinfo else t
+                            for t in (start_time, end_time))
     
-    # Build aggregation pipeline
-    match_stage = {
-        "symbol": symbol.upper(),
-        "timestamp": {"$gte": start_time, "$lte": end_time}
-    }
+    # Raw trades only reach back TRADES_RETENTION; older buckets are read from
+    # the 1m roll-ups kept by the retention compactor
+    horizon = datetime.utcnow() - timedelta(seconds=Config.TRADES_RETENTION)
+    horizon = horizon.replace(second=0, microsecond=0)
+    
+    match_stage = {"symbol": symbol.upper()}
     if exchange:
         match_stage["exchange"] = exchange.value
     
-    pipeline = [
-        {"$match": match_stage},
-        # Convert timestamp to bucket
-        {
-            "$addFields": {
-                "bucket": {
-                    "$subtract": [
-                        {"$toLong": "$timestamp"},
-                        {"$mod": [{"$toLong": "$timestamp"}, interval_ms]}
-                    ]
-                }
-            }
-        },
-        # Sort to get proper first/last for open/close
-        {"$sort": {"bucket": 1, "timestamp": 1}},
-        # Group by bucket
-        {
-            "$group": {
-                "_id": "$bucket",
-                "open": {"$first": "$price"},
-                "high": {"$max": "$price"},
-                "low": {"$min": "$price"},
-                "close": {"$last": "$price"},
-                "volume": {"$sum": "$quantity"},
-                "trades": {"$sum": 1},
-                "buy_volume": {
-                    "$sum": {
-                        "$cond": [
-                            {"$eq": ["$side", "buy"]},
-                            "$quantity",
-                            0
-                        ]
-                    }
-                },
-                "sell_volume": {
-                    "$sum": {
-                        "$cond": [
-                            {"$eq": ["$side", "sell"]},
-                            "$quantity",
-                            0
-                        ]
-                    }
-                }
-            }
-        },
-        {"$sort": {"_id": 1}},
-        {"$limit": limit}
+    buckets: Dict[int, Dict[str, Any]] = {}
+    sources = [
+        (mongo.db.trade_bars_1m, start_time, min(end_time, horizon), "$lt", True),
+        (mongo.db.trades, max(start_time, horizon), end_time, "$lte", False),
     ]
+    for collection, low, high, upper_op, from_bars in sources:
+        if low > high or (low == high and upper_op == "$lt"):
+            continue
+        match = {**match_stage, "timestamp": {"$gte": low, upper_op: high}}
+        for doc in collection.aggregate(_candle_pipeline(match, interval_ms, limit, from_bars)):
+            bucket = buckets.get(doc["_id"])
+            if bucket is None:
+                buckets[doc["_id"]] = doc
+                continue
+            # A bucket straddling the horizon: bars hold its start, trades its end
+            bucket["high"] = max(bucket["high"], doc["high"])
+            bucket["low"] = min(bucket["low"], doc["low"])
+            bucket["close"] = doc["close"]
+            for field in ("volume", "trades", "buy_volume", "sell_volume"):
+                bucket[field] = bucket.get(field, 0) + doc.get(field, 0)
     
     candles = []
-    for doc in mongo.db.trades.aggregate(pipeline):
+    for doc in [buckets[key] for key in sorted(buckets)][:limit]:
         timestamp = datetime.fromtimestamp(doc["_id"] / 1000)
         
         candles.append(Candle(
@@ -255,14 +298,59 @@ async def get_candles(
             sell_volume=Decimal(str(doc.get("sell_volume", 0)))
         ))
     
-    # Cache the results (60 seconds TTL)
-    candles_data = [candle.dict() for candle in candles]
+    # Cache the results (60 seconds TTL) as JSON-ready rows
+    candles_data = [candle.model_dump(mode="json") for candle in candles]
     await cache_manager.set_candles(
         symbol.upper(), timeframe.value, candles_data, 
         ttl=60, **cache_key_params
     )
     
-    return candles
+    return response_cache.put(request, response_key, shape(candles_data, format))
+
+
+def _candle_pipeline(match: Dict[str, Any], interval_ms: int, limit: int,
+                     from_bars: bool) -> List[Dict[str, Any]]:
+    """OHLCV buckets of ``interval_ms`` from raw trades, or from 1m trade bars"""
+    if from_bars:
+        fields = {"open": "$open", "high": "$high", "low": "$low", "close": "$close",
+                  "volume": "$volume", "trades": "$trades",
+                  "buy_volume": "$buy_volume", "sell_volume": "$sell_volume"}
+    else:
+        fields = {"open": "$price", "high": "$price", "low": "$price", "close": "$price",
+                  "volume": "$quantity", "trades": 1,
+                  "buy_volume": {"$cond": [{"$eq": ["$side", "buy"]}, "$quantity", 0]},
+                  "sell_volume": {"$cond": [{"$eq": ["$side", "sell"]}, "$quantity", 0]}}
+    return [
+        {"$match": match},
+        # Convert timestamp to bucket
+        {
+            "$addFields": {
+                "bucket": {
+                    "$subtract": [
+                        {"$toLong": "$timestamp"},
+                        {"$mod": [{"$toLong": "$timestamp"}, interval_ms]}
+                    ]
+                }
+            }
+        },
+        # Sort to get proper first/last for open/close
+        {"$sort": {"bucket": 1, "timestamp": 1}},
+        {
+            "$group": {
+                "_id": "$bucket",
+                "open": {"$first": fields["open"]},
+                "high": {"$max": fields["high"]},
+                "low": {"$min": fields["low"]},
+                "close": {"$last": fields["close"]},
+                "volume": {"$sum": fields["volume"]},
+                "trades": {"$sum": fields["trades"]},
+                "buy_volume": {"$sum": fields["buy_volume"]},
+                "sell_volume": {"$sum": fields["sell_volume"]}
+            }
+        },
+        {"$sort": {"_id": 1}},
+        {"$limit": limit}
+    ]
 
 
 @router.get("/orderbook/{symbol}", response_model=OrderBook)
@@ -397,48 +485,55 @@ async def get_symbols(
     return symbols
 
 
-@router.get("/stats/{symbol}", response_model=MarketStats)
-async def get_market_stats(
-    symbol: str = Path(..., description="Trading symbol"),
-    timeframe: TimeFrame = Query(TimeFrame.D1, description="Stats timeframe"),
-    exchange: Optional[Exchange] = Query(None, description="Filter by exchange"),
-    api_key: str = Depends(verify_api_key)
-):
-    """
-    Get market statistics for a symbol
-    """
+def _window_range(timeframe: TimeFrame, now: datetime):
+    minutes = TIMEFRAME_MINUTES.get(timeframe.value, 7 * 24 * 60)
+    return now - timedelta(minutes=minutes)
+
+
+def _market_stats(symbol: str, exchange: Optional[Exchange], timeframe: TimeFrame,
+                  start_time: datetime, now: datetime, window: Dict[str, Any]) -> MarketStats:
+    volume = float(window["volume"]) if window["volume"] else 0
+    vwap = Decimal(str(window["notional"] / volume)) if volume > 0 else None
+    return MarketStats(
+        symbol=symbol,
+        exchange=exchange.value if exchange else "all",
+        timeframe=timeframe,
+        start_time=start_time,
+        end_time=now,
+        open=Decimal(str(window["open"])),
+        high=Decimal(str(window["high"])),
+        low=Decimal(str(window["low"])),
+        close=Decimal(str(window["close"])),
+        volume=Decimal(str(window["volume"])),
+        trades=window["trades"],
+        vwap=vwap
+    )
+
+
+def _aggregate_stats(symbols: List[str], exchange: Optional[Exchange],
+                     start_time: datetime, now: datetime) -> Dict[str, Dict[str, Any]]:
+    """Fallback: aggregate the window from stored trades"""
     mongo = MongoManager()
-    
-    # Calculate time range
-    now = datetime.utcnow()
-    timeframe_hours = {
-        "1h": 1, "4h": 4, "1d": 24, "1w": 168
-    }
-    hours = timeframe_hours.get(timeframe.value, 24)
-    start_time = now - timedelta(hours=hours)
-    
-    # Build query
     query = {
-        "symbol": symbol.upper(),
+        "symbol": {"$in": symbols},
         "timestamp": {"$gte": start_time, "$lte": now}
     }
     if exchange:
         query["exchange"] = exchange.value
     
-    # Aggregate stats
     pipeline = [
         {"$match": query},
-        {"$sort": {"timestamp": 1}},  # Sort for proper first/last
+        {"$sort": {"symbol": 1, "timestamp": 1}},  # Sort for proper first/last
         {
             "$group": {
-                "_id": None,
+                "_id": "$symbol",
                 "open": {"$first": "$price"},
                 "high": {"$max": "$price"},
                 "low": {"$min": "$price"},
                 "close": {"$last": "$price"},
                 "volume": {"$sum": "$quantity"},
                 "trades": {"$sum": 1},
-                "vwap_sum": {
+                "notional": {
                     "$sum": {
                         "$multiply": ["$price", "$quantity"]
                     }
@@ -446,43 +541,10 @@ async def get_market_stats(
             }
         }
     ]
-    
-    result = list(mongo.db.trades.aggregate(pipeline))
-    if not result:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No data found for {symbol}"
-        )
-    
-    stats = result[0]
-    volume = float(stats["volume"]) if stats["volume"] else 0
-    vwap = Decimal(str(stats["vwap_sum"] / volume)) if volume > 0 else None
-    
-    stats_data = MarketStats(
-        symbol=symbol.upper(),
-        exchange=exchange.value if exchange else "all",
-        timeframe=timeframe,
-        start_time=start_time,
-        end_time=now,
-        open=Decimal(str(stats["open"])),
-        high=Decimal(str(stats["high"])),
-        low=Decimal(str(stats["low"])),
-        close=Decimal(str(stats["close"])),
-        volume=Decimal(str(stats["volume"])),
-        trades=stats["trades"],
-        vwap=vwap
-    )
-    
-    # Cache the results (30 seconds TTL)
-    await cache_manager.set_market_stats(
-        symbol.upper(), timeframe.value, stats_data.dict(),
-        ttl=30, exchange=exchange.value if exchange else None
-    )
-    
-    return stats_data
+    return {doc["_id"]: doc for doc in mongo.db.trades.aggregate(pipeline)}
 
 
-@router.get("/stats/multi", response_model=Dict[str, MarketStats])
+@router.get("/stats/multi", response_model=Dict[str, Optional[MarketStats]])
 async def get_multi_symbol_stats(
     symbols: str = Query(..., description="Comma-separated list of symbols"),
     timeframe: TimeFrame = Query(TimeFrame.D1, description="Stats timeframe"),
@@ -491,10 +553,8 @@ async def get_multi_symbol_stats(
 ):
     """
     Get market statistics for multiple symbols
-    Enhanced for efficient multi-symbol queries
+    Served from the rolling in-memory stats; only symbols missing there hit Mongo
     """
-    mongo = MongoManager()
-    
     # Parse symbols
     symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
     if len(symbol_list) > 20:  # Limit to prevent abuse
@@ -503,71 +563,66 @@ async def get_multi_symbol_stats(
             detail="Maximum 20 symbols allowed per request"
         )
     
-    # Calculate time range
     now = datetime.utcnow()
-    timeframe_hours = {
-        "1h": 1, "4h": 4, "1d": 24, "1w": 168
-    }
-    hours = timeframe_hours.get(timeframe.value, 24)
-    start_time = now - timedelta(hours=hours)
+    start_time = _window_range(timeframe, now)
+    exchange_name = exchange.value if exchange else None
     
-    # Build query
-    query = {
-        "symbol": {"$in": symbol_list},
-        "timestamp": {"$gte": start_time, "$lte": now}
+    windows = {}
+    for symbol in symbol_list:
+        window = market_stats_mirror.get(symbol, timeframe.value, exchange_name)
+        if window:
+            windows[symbol] = window
+    
+    missing = [symbol for symbol in symbol_list if symbol not in windows]
+    if missing:
+        windows.update(_aggregate_stats(missing, exchange, start_time, now))
+    
+    return {
+        symbol: _market_stats(symbol, exchange, timeframe, start_time, now, windows[symbol])
+        if symbol in windows else None
+        for symbol in symbol_list
     }
-    if exchange:
-        query["exchange"] = exchange.value
+
+
+@router.get("/stats/{symbol}", response_model=MarketStats)
+async def get_market_stats(
+    symbol: str = Path(..., description="Trading symbol"),
+    timeframe: TimeFrame = Query(TimeFrame.D1, description="Stats timeframe"),
+    exchange: Optional[Exchange] = Query(None, description="Filter by exchange"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Get market statistics for a symbol
+    Served from the rolling in-memory stats, aggregated from Mongo only as a fallback
+    """
+    symbol = symbol.upper()
+    now = datetime.utcnow()
+    start_time = _window_range(timeframe, now)
     
-    # Aggregate stats for all symbols at once
-    pipeline = [
-        {"$match": query},
-        {"$sort": {"symbol": 1, "timestamp": 1}},
-        {
-            "$group": {
-                "_id": "$symbol",
-                "open": {"$first": "$price"},
-                "high": {"$max": "$price"},
-                "low": {"$min": "$price"},
-                "close": {"$last": "$price"},
-                "volume": {"$sum": "$quantity"},
-                "trades": {"$sum": 1},
-                "vwap_sum": {
-                    "$sum": {
-                        "$multiply": ["$price", "$quantity"]
-                    }
-                }
-            }
-        }
-    ]
+    exchange_name = exchange.value if exchange else None
+    window = market_stats_mirror.get(symbol, timeframe.value, exchange_name)
+    if window is not None:
+        return _market_stats(symbol, exchange, timeframe, start_time, now, window)
     
-    results = {}
-    for doc in mongo.db.trades.aggregate(pipeline):
-        symbol = doc["_id"]
-        volume = float(doc["volume"]) if doc["volume"] else 0
-        vwap = Decimal(str(doc["vwap_sum"] / volume)) if volume > 0 else None
-        
-        results[symbol] = MarketStats(
-            symbol=symbol,
-            exchange=exchange.value if exchange else "all",
-            timeframe=timeframe,
-            start_time=start_time,
-            end_time=now,
-            open=Decimal(str(doc["open"])),
-            high=Decimal(str(doc["high"])),
-            low=Decimal(str(doc["low"])),
-            close=Decimal(str(doc["close"])),
-            volume=Decimal(str(doc["volume"])),
-            trades=doc["trades"],
-            vwap=vwap
+    cached = await cache_manager.get_market_stats(symbol, timeframe.value, exchange=exchange_name)
+    if cached:
+        return MarketStats(**cached)
+    
+    window = _aggregate_stats([symbol], exchange, start_time, now).get(symbol)
+    if window is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No data found for {symbol}"
         )
+    stats_data = _market_stats(symbol, exchange, timeframe, start_time, now, window)
     
-    # Add empty results for symbols with no data
-    for symbol in symbol_list:
-        if symbol not in results:
-            results[symbol] = None
+    # Cache the fallback results (30 seconds TTL)
+    await cache_manager.set_market_stats(
+        symbol, timeframe.value, stats_data.dict(),
+        ttl=30, exchange=exchange_name
+    )
     
-    return results
+    return stats_data
 
 
 @router.get("/summary", response_model=MarketSummary)
@@ -575,37 +630,42 @@ async def get_market_summary(api_key: str = Depends(verify_api_key)):
     """
     Get overall market summary across all symbols and exchanges
     """
-    mongo = MongoManager()
     now = datetime.utcnow()
-    start_time = now - timedelta(hours=24)
     
-    # Get summary stats
-    pipeline = [
-        {"$match": {"timestamp": {"$gte": start_time}}},
-        {
-            "$group": {
-                "_id": "$exchange",
-                "trades": {"$sum": 1},
-                "volume": {"$sum": "$quantity"},
-                "symbols": {"$addToSet": "$symbol"}
+    exchanges = market_stats_mirror.summary()
+    if exchanges is None:
+        # Fallback: aggregate the last 24h of trades
+        mongo = MongoManager()
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": now - timedelta(hours=24)}}},
+            {
+                "$group": {
+                    "_id": "$exchange",
+                    "trades": {"$sum": 1},
+                    "volume": {"$sum": "$quantity"},
+                    "symbols": {"$addToSet": "$symbol"}
+                }
             }
+        ]
+        exchanges = {
+            doc["_id"]: {"trades": doc["trades"], "volume": doc["volume"], "symbols": set(doc["symbols"])}
+            for doc in mongo.db.trades.aggregate(pipeline)
         }
-    ]
     
     exchange_stats = {}
     total_trades = 0
     total_volume = Decimal("0")
     all_symbols = set()
     
-    for doc in mongo.db.trades.aggregate(pipeline):
-        exchange_stats[doc["_id"]] = {
-            "trades": doc["trades"],
-            "volume": float(doc["volume"]),
-            "active_symbols": len(doc["symbols"])
+    for name, entry in exchanges.items():
+        exchange_stats[name] = {
+            "trades": entry["trades"],
+            "volume": float(entry["volume"]),
+            "active_symbols": len(entry["symbols"])
         }
-        total_trades += doc["trades"]
-        total_volume += Decimal(str(doc["volume"]))
-        all_symbols.update(doc["symbols"])
+        total_trades += entry["trades"]
+        total_volume += Decimal(str(entry["volume"]))
+        all_symbols.update(entry["symbols"])
     
     return MarketSummary(
         timestamp=now,
@@ -11,6 +11,8 @@ from ..services.session_service import SessionService
 from ..models.session import SessionUsage, SessionResponse
 from ..models.auth import APIKeyInfo
 from src.storage.mongo_manager import MongoManager
+from src.market_context import market_context
+from src.config import Config
 
 
 logger = logging.getLogger(__name__)
@@ -208,3 +210,20 @@ async def get_analysis_context(
         session_id=session.id
     )
     return await call_mcp_tool(request, session, api_key)
+
+
+@router.get("/context/{symbol}")
+async def get_market_context_snapshot(
+    symbol: str,
+    format: str = Query("json", enum=["text", "json"], description="Compact text or JSON sections"),
+    max_tokens: int = Query(Config.MARKET_CONTEXT_MAX_TOKENS, ge=50, le=4000, description="Token budget"),
+    session: SessionResponse = Depends(require_active_session)
+):
+    """Compact live market context for MCP tools, served from memory without an MCP call."""
+    symbol = symbol.upper()
+    if symbol not in Config.SYMBOLS:
+        raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
+    snapshot = market_context.render(symbol, format, max_tokens)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No market context available for {symbol} yet")
+    return snapshot
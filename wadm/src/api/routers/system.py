@@ -5,15 +5,18 @@ Health checks, status, and monitoring endpoints
 
 import psutil
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
-from src.api.routers.auth import verify_api_key
-from src.storage.mongo_manager import MongoManager
+from src.api.routers.auth import verify_api_key, require_admin
+from src.storage.stats import stats_sampler
 from src.api.cache import cache_manager
+from src.latency import latency_tracker
+from src.config import Config
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -42,6 +45,7 @@ class DatabaseStats(BaseModel):
     collections: Dict[str, int]
     total_documents: int
     storage_size_mb: float
+    sampled_at: Optional[datetime] = None
 
 
 class ExchangeStatus(BaseModel):
@@ -49,6 +53,7 @@ class ExchangeStatus(BaseModel):
     connected: bool
     trades_collected: int
     last_trade_time: Optional[datetime]
+    sampled_at: Optional[datetime] = None
 
 
 class SystemStatus(BaseModel):
@@ -61,6 +66,9 @@ class SystemStatus(BaseModel):
 # Store startup time
 startup_time = datetime.utcnow()
 
+# Prime psutil so non-blocking cpu_percent() calls report usage since the previous call
+psutil.cpu_percent(interval=None)
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -82,7 +90,7 @@ async def system_metrics(api_key: str = Depends(verify_api_key)):
     Get system resource metrics
     """
     # CPU and Memory
-    cpu_percent = psutil.cpu_percent(interval=1)
+    cpu_percent = psutil.cpu_percent(interval=None)
     memory = psutil.virtual_memory()
     
     # Disk usage
@@ -102,81 +110,54 @@ async def system_metrics(api_key: str = Depends(verify_api_key)):
 @router.get("/database", response_model=DatabaseStats)
 async def database_status(api_key: str = Depends(verify_api_key)):
     """
-    Get database status and statistics
+    Get database status and statistics (sampled in the background, see sampled_at)
     """
-    mongo = MongoManager()
-    
-    try:
-        # Get collection stats
-        collections = {}
-        total_docs = 0
-        
-        for collection_name in ["trades", "volume_profiles", "order_flows", "smc_analyses"]:
-            try:
-                collection = mongo.db[collection_name]
-                count = collection.count_documents({})
-                collections[collection_name] = count
-                total_docs += count
-            except Exception as e:
-                logger.error(f"Error getting stats for {collection_name}: {e}")
-                collections[collection_name] = -1
-        
-        # Get database stats
-        stats = mongo.db.command("dbstats")
-        storage_size_mb = stats.get("storageSize", 0) / 1024 / 1024
-        
-        return DatabaseStats(
-            connected=True,
-            database=mongo.config.MONGO_DB,
-            collections=collections,
-            total_documents=total_docs,
-            storage_size_mb=storage_size_mb
-        )
-    except Exception as e:
-        logger.error(f"Database status error: {e}")
+    snapshot = stats_sampler.snapshot()
+    if snapshot["sampled_at"] is None:
+        # Attached but not sampled yet: the first background sample is still running
         return DatabaseStats(
             connected=False,
-            database="error",
+            database="pending" if stats_sampler.db is not None else "error",
             collections={},
             total_documents=0,
             storage_size_mb=0
         )
+    
+    collections = {name: stats["count"] for name, stats in snapshot["collections"].items()}
+    return DatabaseStats(
+        connected=True,
+        database=snapshot["db_stats"].get("db", "wadm"),
+        collections=collections,
+        total_documents=sum(count for count in collections.values() if count > 0),
+        storage_size_mb=snapshot["db_stats"].get("storageSize", 0) / 1024 / 1024,
+        sampled_at=snapshot["sampled_at"]
+    )
 
 
 @router.get("/exchanges", response_model=List[ExchangeStatus])
 async def exchange_status(api_key: str = Depends(verify_api_key)):
     """
-    Get exchange connection status
+    Get exchange ingest status from the collectors' persisted-trade counters
     """
-    mongo = MongoManager()
-    exchanges = ["bybit", "binance", "coinbase", "kraken"]
+    snapshot = stats_sampler.snapshot()
     status_list = []
+    # Collectors run in another process: an exchange counts as connected while its
+    # trades are fresher than the collector's own stale timeout (plus sampling lag)
+    fresh_after = datetime.now(timezone.utc) - timedelta(
+        seconds=Config.WS_STALE_TIMEOUT + stats_sampler.interval)
     
-    for exchange in exchanges:
-        try:
-            # Get latest trade
-            latest_trade = mongo.db.trades.find_one(
-                {"exchange": exchange},
-                sort=[("timestamp", -1)]
-            )
-            
-            # Count trades
-            trade_count = mongo.db.trades.count_documents({"exchange": exchange})
-            
-            status_list.append(ExchangeStatus(
-                name=exchange,
-                connected=latest_trade is not None,
-                trades_collected=trade_count,
-                last_trade_time=latest_trade["timestamp"] if latest_trade else None
-            ))
-        except Exception as e:
-            logger.error(f"Error getting status for {exchange}: {e}")
-            status_list.append(ExchangeStatus(
-                name=exchange,
-                connected=False,
-                trades_collected=0,
-                last_trade_time=None
-            ))
+    for exchange in ["bybit", "binance", "coinbase", "kraken"]:
+        ingest = snapshot["exchanges"].get(exchange, {})
+        last_trade_time = ingest.get("last_trade_time")
+        if last_trade_time is not None and last_trade_time.tzinfo is None:
+            last_trade_time = last_trade_time.replace(tzinfo=timezone.utc)
+        status_list.append(ExchangeStatus(
+            name=exchange,
+            connected=last_trade_time is not None and last_trade_time >= fresh_after,
+            trades_collected=ingest.get("trades", 0),
+            last_trade_time=last_trade_time,
+            sampled_at=snapshot["sampled_at"]
+        ))
     
     return status_list
 
@@ -252,3 +233,68 @@ async def recent_logs(
         "lines_requested": lines,
         "level_filter": level
     }
+
+
+@router.get("/latency")
+async def latency_summary(api_key: str = Depends(verify_api_key)):
+    """
+    Rolling latency percentiles per pipeline stage and exchange (this process)
+    """
+    return {
+        "timestamp": datetime.utcnow(),
+        "stages": latency_tracker.summary()
+    }
+
+
+def _loop_monitor(request: Request):
+    monitor = getattr(request.app.state, "loop_monitor", None)
+    if monitor is None or monitor.profiler is None:
+        raise HTTPException(status_code=503, detail="Loop monitor not running")
+    return monitor
+
+
+@router.get("/loop")
+async def loop_health(
+    request: Request,
+    stacks: bool = Query(True, description="Include captured stacks of slow callbacks"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Event loop lag percentiles and recent slow callbacks of the API process
+    """
+    return _loop_monitor(request).report(include_stacks=stacks)
+
+
+@router.post("/profiler/start")
+async def start_profiler(
+    request: Request,
+    hz: int = Query(100, ge=1, le=1000, description="Samples per second"),
+    duration: Optional[float] = Query(30, gt=0, le=600, description="Stop automatically after N seconds"),
+    verification=Depends(require_admin)
+):
+    """
+    Start the sampling profiler on the API event loop thread (admin only)
+    """
+    profiler = _loop_monitor(request).profiler
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Profiler already running")
+    profiler.start(hz=hz, duration=duration)
+    return profiler.status()
+
+
+@router.post("/profiler/stop")
+async def stop_profiler(request: Request, verification=Depends(require_admin)):
+    """
+    Stop the sampling profiler (admin only)
+    """
+    profiler = _loop_monitor(request).profiler
+    profiler.stop()
+    return profiler.status()
+
+
+@router.get("/profiler", response_class=PlainTextResponse)
+async def profiler_report(request: Request, verification=Depends(require_admin)):
+    """
+    Folded stacks from the last profiler run, ready for flamegraph.pl or speedscope (admin only)
+    """
+    return PlainTextResponse(_loop_monitor(request).profiler.folded())
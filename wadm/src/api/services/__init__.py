@@ -6,6 +6,7 @@ Production-ready services with real calculation logic
 from .volume_profile_service import VolumeProfileService
 from .order_flow_service import OrderFlowService
 from .smc_service import SMCService
+from .batch_service import IndicatorBatchService
 from .mcp import MCPClient
 from .llm import LLMService
 
@@ -13,6 +14,7 @@ __all__ = [
     "VolumeProfileService",
     "OrderFlowService",
     "SMCService",
+    "IndicatorBatchService",
     "MCPClient",
     "LLMService"
 ]
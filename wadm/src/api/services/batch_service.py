@@ -0,0 +1,208 @@
+"""
+Batch Indicator Service
+Resolves many (indicator, symbol, exchange, params) specs in one request: a
+single cache MGET over the keys the indicator services already cache under,
+then the misses computed with bounded concurrency. Failures are reported on
+their item and never fail the batch.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.api.cache import CacheManager
+from src.api.config import APIConfig
+from src.config import Config
+from src.api.services.volume_profile_service import VolumeProfileService
+from src.api.services.order_flow_service import OrderFlowService
+from src.api.services.smc_service import SMCService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXCHANGE = "bybit"  # Realtime fallback exchange, as on the single endpoints
+
+
+class BatchItemError(Exception):
+    """Item-level failure; ``kind`` is reported as the error type"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+@dataclass
+class _Resolver:
+    """How to serve one spec: cache keys in preference order, then a loader"""
+    keys: List[str]
+    load: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    project: Callable[[Dict[str, Any]], Dict[str, Any]] = field(default=lambda data: data)
+
+
+def smc_bias(analysis: Dict[str, Any], timeframe: str) -> Dict[str, Any]:
+    """Compact bias view of a comprehensive SMC analysis"""
+    institutional = analysis.get("institutional_metrics") or {}
+    return {
+        "symbol": analysis.get("symbol"),
+        "timeframe": analysis.get("timeframe", timeframe),
+        "timestamp": analysis.get("timestamp"),
+        "market_bias": analysis.get("market_bias", "neutral"),
+        "institutional_bias": institutional.get("bias", "neutral"),
+        "confluence_score": analysis.get("confluence_score", 0),
+        "wyckoff_phase": analysis.get("wyckoff_phase", "unknown"),
+        "trades_analyzed": analysis.get("trades_analyzed", 0),
+    }
+
+
+class IndicatorBatchService:
+    """Service resolving batches of indicator specs"""
+
+    def __init__(self, vp_service: VolumeProfileService, of_service: OrderFlowService,
+                 smc_service: SMCService, cache: CacheManager,
+                 concurrency: int = APIConfig.BATCH_CONCURRENCY,
+                 item_timeout: float = APIConfig.BATCH_ITEM_TIMEOUT):
+        self.vp = vp_service
+        self.of = of_service
+        self.smc = smc_service
+        self.cache = cache
+        self.concurrency = concurrency
+        self.item_timeout = item_timeout
+
+    def _resolver(self, indicator: str, symbol: str, exchange: Optional[str],
+                  params: Dict[str, Any]) -> _Resolver:
+        """
+        Raises:
+            BatchItemError: unknown symbol, indicator or mode
+        """
+        if symbol not in Config.SYMBOLS:
+            raise BatchItemError("not_found", f"Symbol {symbol} not found")
+        mode = params.get("mode", "latest")
+        timeframe = params.get("timeframe")
+
+        if indicator == "volume_profile":
+            service = self.vp
+            minutes = service.TIMEFRAME_MINUTES.get(timeframe, service.DEFAULT_MINUTES)
+            if mode == "latest":
+                fallback = service.realtime_key(symbol, exchange or DEFAULT_EXCHANGE, service.DEFAULT_MINUTES)
+
+                async def load():
+                    return (await service.get_latest(symbol, exchange)
+                            or await service.calculate_realtime(symbol, exchange or DEFAULT_EXCHANGE,
+                                                                service.DEFAULT_MINUTES))
+                return _Resolver([service.latest_key(symbol, exchange), fallback], load)
+            if mode == "realtime":
+                return _Resolver([service.realtime_key(symbol, exchange or DEFAULT_EXCHANGE, minutes)],
+                                 lambda: service.calculate_realtime(symbol, exchange or DEFAULT_EXCHANGE, minutes))
+            if mode == "multi-timeframe":
+                return _Resolver([service.multi_timeframe_key(symbol, exchange)],
+                                 lambda: service.get_multi_timeframe(symbol, exchange))
+            raise BatchItemError("invalid", "Mode must be: latest, realtime, or multi-timeframe")
+
+        if indicator == "order_flow":
+            service = self.of
+            minutes = service.TIMEFRAME_MINUTES.get(timeframe, service.DEFAULT_MINUTES)
+            if mode == "latest":
+                fallback = service.realtime_key(symbol, exchange or DEFAULT_EXCHANGE, service.DEFAULT_MINUTES)
+
+                async def load():
+                    return (await service.get_latest(symbol, exchange)
+                            or await service.calculate_realtime(symbol, exchange or DEFAULT_EXCHANGE,
+                                                                service.DEFAULT_MINUTES))
+                return _Resolver([service.latest_key(symbol, exchange), fallback], load)
+            if mode == "realtime":
+                return _Resolver([service.realtime_key(symbol, exchange or DEFAULT_EXCHANGE, minutes)],
+                                 lambda: service.calculate_realtime(symbol, exchange or DEFAULT_EXCHANGE, minutes))
+            if mode == "analysis":
+                return _Resolver([service.analysis_key(symbol, exchange)],
+                                 lambda: service.get_flow_analysis(symbol, exchange))
+            raise BatchItemError("invalid", "Mode must be: latest, realtime, or analysis")
+
+        if indicator in ("smc_analysis", "smc_bias"):
+            timeframe = timeframe or "15m"
+            return _Resolver([self.smc.analysis_key(symbol, timeframe)],
+                             lambda: self.smc.get_comprehensive_analysis(symbol, timeframe),
+                             (lambda data: smc_bias(data, timeframe)) if indicator == "smc_bias"
+                             else (lambda data: data))
+
+        raise BatchItemError("invalid", f"Unknown indicator {indicator}")
+
+    async def resolve(self, specs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Resolve specs (dicts with indicator, symbol, exchange, params)
+
+        Returns:
+            (one result per spec in order, batch stats)
+        """
+        started = time.perf_counter()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(specs)
+        resolvers: Dict[int, _Resolver] = {}
+
+        def result(spec, status, data=None, error=None, cached=False):
+            return {
+                "indicator": spec["indicator"],
+                "symbol": spec["symbol"],
+                "exchange": spec.get("exchange"),
+                "status": status,
+                "cached": cached,
+                "data": data,
+                "error": error,
+            }
+
+        for i, spec in enumerate(specs):
+            try:
+                resolvers[i] = self._resolver(spec["indicator"], spec["symbol"], spec.get("exchange"),
+                                              spec.get("params") or {})
+            except BatchItemError as e:
+                results[i] = result(spec, "error", error={"type": e.kind, "message": str(e)})
+
+        # One round trip for every candidate key
+        cached = await self.cache.get_many([key for r in resolvers.values() for key in r.keys])
+
+        # Identical specs share one computation
+        pending: Dict[str, List[int]] = {}
+        for i, resolver in resolvers.items():
+            hit = next((cached[key] for key in resolver.keys if key in cached), None)
+            if hit is not None:
+                results[i] = result(specs[i], "ok", data=resolver.project(hit), cached=True)
+            else:
+                pending.setdefault(resolver.keys[0], []).append(i)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def compute(indexes: List[int]):
+            resolver = resolvers[indexes[0]]
+            spec = specs[indexes[0]]
+            async with semaphore:
+                try:
+                    data = await asyncio.wait_for(resolver.load(), self.item_timeout)
+                    if not data:
+                        raise BatchItemError("not_found",
+                                             f"No {spec['indicator']} data available for {spec['symbol']}")
+                except BatchItemError as e:
+                    error = {"type": e.kind, "message": str(e)}
+                except asyncio.TimeoutError:
+                    error = {"type": "timeout", "message": f"Exceeded {self.item_timeout}s"}
+                except Exception as e:
+                    logger.error(f"Batch item {spec['indicator']} {spec['symbol']} failed: {e}")
+                    error = {"type": "internal", "message": str(e)}
+                else:
+                    error = None
+            # Specs sharing a computation may still project it differently (smc_analysis / smc_bias)
+            for i in indexes:
+                if error:
+                    results[i] = result(specs[i], "error", error=error)
+                else:
+                    results[i] = result(specs[i], "ok", data=resolvers[i].project(data))
+
+        await asyncio.gather(*(compute(indexes) for indexes in pending.values()))
+
+        succeeded = sum(1 for r in results if r["status"] == "ok")
+        stats = {
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "cache_hits": sum(1 for r in results if r["cached"]),
+            "computed": len(pending),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        return results, stats
@@ -56,6 +56,10 @@ class LLMConfig:
     # Cache settings (reuse existing cache config)
     CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
     CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL", "300"))  # 5 minutes
+    CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+    CACHE_MARKET_BUCKET_SECONDS: int = int(os.getenv("LLM_CACHE_MARKET_BUCKET", "60"))  # Market state granularity
+    CACHE_FINGERPRINT_TIMEFRAMES: str = os.getenv("LLM_CACHE_FINGERPRINT_TIMEFRAMES", "15m,1h,4h")
+    CACHE_SIMILARITY_THRESHOLD: float = float(os.getenv("LLM_CACHE_SIMILARITY", "0"))  # Jaccard; 0 = exact only
     
     # Validation
     @classmethod
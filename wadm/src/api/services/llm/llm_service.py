@@ -10,6 +10,9 @@ import logging
 
 from .config import LLMConfig
 from .models import ChatRequest, ChatResponse, LLMProvider, LLMUsageLog, LLMError
+from .response_cache import llm_response_cache, market_fingerprint
+from src.indicator_feed import indicator_feed
+from src.market_context import market_context
 from src.logger import get_logger
 
 logger = get_logger(__name__)
@@ -25,6 +28,7 @@ class LLMService:
         """Initialize LLM service"""
         self.config = LLMConfig()
         self.providers = {}
+        self.usage_tracker = {}  # Legacy per-user usage, also used for fallback rate limiting
         
         # Initialize security components (FASE 3)
         try:
@@ -39,13 +43,15 @@ class LLMService:
             logger.info("✅ FASE 3 security components initialized successfully")
         except Exception as e:
             logger.warning(f"FASE 3 security components failed, using fallback: {str(e)}")
-            self.usage_tracker = {}  # Fallback to in-memory
             self.rate_limiter = None
             self.audit_logger = None
             self.sanitizer = None
         
         self._initialize_providers()
         
+        # Shared across instances so every request in the process can reuse answers
+        self.response_cache = llm_response_cache if self.config.CACHE_ENABLED else None
+        
         logger.info(f"LLMService initialized with providers: {self.config.get_available_providers()}")
     
     def _initialize_providers(self):
@@ -106,7 +112,7 @@ class LLMService:
                     "include_market_data": request.include_market_data
                 }
                 
-                sanitized_dict = self.sanitizer.sanitize_request_data(request_dict)
+                sanitized_dict = await self.sanitizer.sanitize_request_data(request_dict)
                 
                 # Validate sanitization
                 validation = self.sanitizer.validate_clean_data(request.message, sanitized_dict["message"])
@@ -130,36 +136,59 @@ class LLMService:
         # Start audit logging (FASE 3)
         audit_id = ""
         if self.audit_logger:
-            audit_id = self.audit_logger.log_request(user_id, sanitized_request)
+            audit_id = await self.audit_logger.log_request(user_id, sanitized_request)
         
         try:
             # Rate limiting check (Redis-based for FASE 3)
             if self.rate_limiter:
-                is_allowed, limits_info = self.rate_limiter.check_limits(user_id)
+                is_allowed, limits_info = await self.rate_limiter.check_limits(user_id)
                 if not is_allowed:
                     # Log rate limit exceeded
                     if self.audit_logger:
-                        self.audit_logger.log_rate_limit_exceeded(user_id, "request_limit", limits_info)
+                        await self.audit_logger.log_rate_limit_exceeded(user_id, "request_limit", limits_info)
                     raise Exception(f"Rate limit exceeded: {limits_info}")
             else:
                 # Fallback to in-memory rate limiting
                 await self._check_rate_limits(user_id)
             
             # Build market context (placeholder for now)
-            context = await self._build_market_context(sanitized_request.symbol)
+            context = await self._build_market_context(
+                sanitized_request.symbol,
+                sanitized_request.include_indicators,
+                sanitized_request.include_market_data
+            )
             
             # Select provider
             provider = self._select_provider(sanitized_request.provider)
             
-            # Execute analysis (placeholder)
-            result = await self._execute_analysis(sanitized_request, context, provider)
+            # Reuse a recent answer to the same question on the same market state
+            if self.response_cache:
+                scope = self.response_cache.scope(
+                    sanitized_request.symbol,
+                    provider.value,
+                    market_fingerprint(context, self.config.CACHE_MARKET_BUCKET_SECONDS),
+                    sanitized_request.include_indicators,
+                    sanitized_request.include_market_data
+                )
+                result, match = await self.response_cache.get_or_compute(
+                    scope,
+                    sanitized_request.message,
+                    lambda: self._execute_analysis(sanitized_request, context, provider)
+                )
+            else:
+                result, match = await self._execute_analysis(sanitized_request, context, provider), "miss"
+            
+            cached = match != "miss"
+            if cached:
+                # Only the call that reached the provider is billed; hits still count as requests
+                result = {**result, "tokens_used": 0, "cost_usd": 0.0}
             
             # Calculate metrics
             processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
             
             # Update rate limiter usage (Redis-based for FASE 3)
             if self.rate_limiter:
-                self.rate_limiter.increment_usage(
+                await self.rate_limiter.increment_usage(
                     user_id,
                     result.get("tokens_used", 0),
                     result.get("cost_usd", 0.0),
@@ -173,12 +202,14 @@ class LLMService:
                 tokens_used=result.get("tokens_used", 0),
                 cost_usd=result.get("cost_usd", 0.0),
                 processing_time_ms=processing_time,
-                context_symbols=[sanitized_request.symbol]
+                context_symbols=[sanitized_request.symbol],
+                cached=cached,
+                cache_match=match if cached else None
             )
             
             # Log successful response (FASE 3)
             if self.audit_logger:
-                self.audit_logger.log_response(audit_id, user_id, response, True)
+                await self.audit_logger.log_response(audit_id, user_id, response, True)
             
             # Log usage (legacy)
             await self._log_usage(user_id, sanitized_request, result, processing_time, True)
@@ -191,7 +222,7 @@ class LLMService:
             
             # Log failed response (FASE 3)
             if self.audit_logger:
-                self.audit_logger.log_response(audit_id, user_id, None, False, str(e))
+                await self.audit_logger.log_response(audit_id, user_id, None, False, str(e))
             
             # Log failed usage (legacy)
             await self._log_usage(user_id, sanitized_request, {}, processing_time, False, str(e))
@@ -238,14 +269,30 @@ class LLMService:
         user_usage["daily_requests"].append(now)
         self.usage_tracker[user_id] = user_usage
     
-    async def _build_market_context(self, symbol: str) -> Dict[str, Any]:
-        """Build market context for LLM analysis"""
-        # Placeholder - will integrate with existing indicators in FASE 2
+    async def _build_market_context(
+        self,
+        symbol: str,
+        include_indicators: bool = True,
+        include_market_data: bool = True
+    ) -> Dict[str, Any]:
+        """Build market context for LLM analysis from the precomputed compact snapshot"""
+        # Budgeted sections in priority order, rebuilt only when indicators or market stats change
+        sections, _ = market_context.select(symbol)
         context = {
             "symbol": symbol,
             "timestamp": datetime.now().isoformat(),
-            "indicators": {},  # Will populate with real data
-            "market_data": {}  # Will populate with real data
+            "indicators": {
+                section.name: section.text for section in sections
+                if include_indicators and section.group == "indicators"
+            },
+            # Versions of the slower indicators, part of the response cache fingerprint
+            "indicator_versions": indicator_feed.versions(
+                symbol, self.config.CACHE_FINGERPRINT_TIMEFRAMES.split(",")
+            ),
+            "market_data": {
+                section.name: section.text for section in sections
+                if include_market_data and section.group == "market_data"
+            }
         }
         
         logger.debug(f"Built market context for {symbol}")
@@ -301,7 +348,7 @@ class LLMService:
         usage_log = LLMUsageLog(
             user_id=user_id,
             query_preview=request.message[:self.config.LOG_QUERY_PREVIEW_LENGTH],
-            provider=LLMProvider(result.get("provider", "unknown")),
+            provider=LLMProvider(result["provider"]) if result.get("provider") else None,
             tokens_used=result.get("tokens_used", 0),
             cost_usd=result.get("cost_usd", 0.0),
             success=success,
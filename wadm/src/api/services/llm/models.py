@@ -34,13 +34,15 @@ class ChatResponse(BaseModel):
     cost_usd: float = Field(..., description="Cost in USD")
     processing_time_ms: int = Field(..., description="Processing time in milliseconds")
     context_symbols: List[str] = Field(default_factory=list, description="Symbols included in context")
+    cached: bool = Field(False, description="Served from the response cache")
+    cache_match: Optional[str] = Field(None, description="exact, similar or coalesced when cached")
 
 
 class LLMUsageLog(BaseModel):
     """Usage logging model"""
     user_id: str
     query_preview: str = Field(..., max_length=100, description="First 100 chars of query")
-    provider: LLMProvider
+    provider: Optional[LLMProvider] = None  # None when the request failed before reaching one
     tokens_used: int
     cost_usd: float
     success: bool
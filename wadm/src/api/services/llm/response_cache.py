@@ -0,0 +1,162 @@
+"""
+LLM Response Cache
+Reuses provider answers for near-identical questions about the same market
+state. Entries are scoped by symbol, provider, context flags and a coarse
+market fingerprint, and keyed by the normalized prompt; concurrent identical
+requests share one provider call, and an optional token-set (Jaccard) match
+serves rephrasings within the same scope.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Tuple
+
+from .config import LLMConfig
+from src.metrics import LLM_CACHE_REQUESTS
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+# Filler words that do not change what is being asked
+_STOPWORDS = frozenset({
+    "a", "an", "the", "is", "are", "be", "of", "for", "on", "in", "at", "to", "and", "or", "me", "my",
+    "please", "can", "could", "you", "would", "what", "whats", "s", "about", "give", "tell", "show",
+    "current", "currently", "right", "now", "i", "it", "this", "with",
+})
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase words and numbers only, in order"""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def prompt_tokens(text: str) -> FrozenSet[str]:
+    """Normalized tokens without filler words, for similarity matching"""
+    return frozenset(token for token in _WORD.findall(text.lower()) if token not in _STOPWORDS)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def market_fingerprint(context: Dict[str, Any], bucket_seconds: int, now: Optional[float] = None) -> str:
+    """
+    Coarse market state: the indicator versions in ``context`` plus a time
+    bucket, so answers are reused until indicators move or the bucket turns.
+    """
+    now = time.time() if now is None else now
+    state = {
+        "bucket": int(now // bucket_seconds) if bucket_seconds > 0 else 0,
+        "versions": context.get("indicator_versions") or {},
+    }
+    return hashlib.sha1(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+@dataclass
+class _Entry:
+    result: Dict[str, Any]
+    tokens: FrozenSet[str]
+    expires: float
+
+
+class LLMResponseCache:
+    """
+    In-process TTL/LRU cache of provider results.
+
+    ``get_or_compute`` returns the result and how it was served: ``exact``,
+    ``similar``, ``coalesced`` (shared a call already in flight) or ``miss``.
+    Failed calls are never cached.
+    """
+
+    def __init__(self, ttl: int = LLMConfig.CACHE_TTL_SECONDS, max_entries: int = LLMConfig.CACHE_MAX_ENTRIES,
+                 similarity: float = LLMConfig.CACHE_SIMILARITY_THRESHOLD):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._scopes: "OrderedDict[str, OrderedDict[str, _Entry]]" = OrderedDict()
+        self._size = 0
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.stats = dict.fromkeys(("exact", "similar", "coalesced", "miss"), 0)
+
+    @staticmethod
+    def scope(symbol: str, provider: str, fingerprint: str, *flags: Any) -> str:
+        return ":".join([symbol.upper(), provider, fingerprint, *(str(flag) for flag in flags)])
+
+    def _lookup(self, scope: str, prompt: str, tokens: FrozenSet[str], now: float) -> Tuple[Optional[_Entry], str]:
+        entries = self._scopes.get(scope)
+        if not entries:
+            return None, "miss"
+        for key in [key for key, entry in entries.items() if entry.expires <= now]:
+            del entries[key]
+            self._size -= 1
+        self._scopes.move_to_end(scope)
+        entry = entries.get(prompt)
+        if entry is not None:
+            return entry, "exact"
+        if self.similarity > 0 and tokens:
+            best = max(entries.values(), key=lambda e: jaccard(tokens, e.tokens), default=None)
+            if best is not None and jaccard(tokens, best.tokens) >= self.similarity:
+                return best, "similar"
+        return None, "miss"
+
+    def _store(self, scope: str, prompt: str, tokens: FrozenSet[str], result: Dict[str, Any]):
+        entries = self._scopes.setdefault(scope, OrderedDict())
+        self._scopes.move_to_end(scope)
+        if prompt not in entries:
+            self._size += 1
+        entries[prompt] = _Entry(result, tokens, time.monotonic() + self.ttl)
+        # Evict least recently used scopes (each scope is one symbol/provider/market state)
+        while self._size > self.max_entries and self._scopes:
+            oldest, evicted = next(iter(self._scopes.items()))
+            if oldest == scope and len(self._scopes) == 1:
+                entries.popitem(last=False)
+                self._size -= 1
+                continue
+            self._size -= len(evicted)
+            del self._scopes[oldest]
+
+    async def get_or_compute(self, scope: str, message: str,
+                             compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], str]:
+        prompt = normalize_prompt(message)
+        tokens = prompt_tokens(message)
+        entry, match = self._lookup(scope, prompt, tokens, time.monotonic())
+        if entry is None and (scope, prompt) in self._inflight:
+            match = "coalesced"
+        self.stats[match] += 1
+        LLM_CACHE_REQUESTS.labels(match).inc()
+        if entry is not None:
+            return entry.result, match
+
+        future = self._inflight.get((scope, prompt))
+        if future is None:
+            # Own task: a cancelled caller does not cancel the call others wait on
+            future = asyncio.ensure_future(compute())
+            self._inflight[(scope, prompt)] = future
+
+            def done(task: asyncio.Future):
+                self._inflight.pop((scope, prompt), None)
+                if not task.cancelled() and task.exception() is None:
+                    self._store(scope, prompt, tokens, task.result())
+            future.add_done_callback(done)
+        return await asyncio.shield(future), match
+
+    def clear(self):
+        self._scopes.clear()
+        self._size = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": self._size, "scopes": len(self._scopes),
+                "in_flight": len(self._inflight)}
+
+
+# Shared by every LLMService instance in the process
+llm_response_cache = LLMResponseCache()
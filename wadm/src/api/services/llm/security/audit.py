@@ -125,7 +125,9 @@ class AuditLogger:
                     "tokens_used": response.tokens_used,
                     "cost_usd": float(response.cost_usd),
                     "processing_time_ms": response.processing_time_ms,
-                    "context_symbols": response.context_symbols
+                    "context_symbols": response.context_symbols,
+                    "cached": response.cached,
+                    "cache_match": response.cache_match
                 }
             
             # Update audit record
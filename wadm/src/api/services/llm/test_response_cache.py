@@ -0,0 +1,121 @@
+"""
+Tests for the LLM response cache
+"""
+
+import asyncio
+
+import pytest
+
+from .llm_service import LLMService
+from .models import ChatRequest, LLMProvider
+from .response_cache import LLMResponseCache, market_fingerprint, normalize_prompt
+
+
+class _Provider:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def analyze(self, request, context):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"response": f"analysis {self.calls}", "tokens_used": 500, "cost_usd": 0.01,
+                "provider": "anthropic"}
+
+
+class _RateLimiter:
+    def __init__(self):
+        self.checks = 0
+        self.usage = []
+
+    async def check_limits(self, user_id):
+        self.checks += 1
+        return True, {}
+
+    async def increment_usage(self, user_id, tokens_used, cost_usd, provider):
+        self.usage.append((tokens_used, cost_usd))
+
+
+class _AuditLogger:
+    def __init__(self):
+        self.responses = []
+
+    async def log_request(self, user_id, request):
+        return "audit"
+
+    async def log_response(self, audit_id, user_id, response, success, error_message=None):
+        self.responses.append(response)
+
+
+def _service(provider, cache):
+    service = LLMService()
+    service.providers = {"anthropic": provider}
+    service.response_cache = cache
+    service.rate_limiter = _RateLimiter()
+    service.audit_logger = _AuditLogger()
+    service.sanitizer = None
+    service._select_provider = lambda preferred: LLMProvider.anthropic
+    return service
+
+
+class TestLLMResponseCache:
+    """Test keying, similarity, coalescing and accounting of cached answers"""
+
+    def test_normalization_and_fingerprint(self):
+        assert normalize_prompt("  Analyze BTC, trend?? ") == normalize_prompt("analyze btc trend")
+        context = {"indicator_versions": {"smc:all:15m": 7}}
+        assert market_fingerprint(context, 60, now=120) == market_fingerprint(context, 60, now=179)
+        assert market_fingerprint(context, 60, now=120) != market_fingerprint(context, 60, now=180)
+        assert market_fingerprint(context, 60, now=120) != \
+            market_fingerprint({"indicator_versions": {"smc:all:15m": 8}}, 60, now=120)
+
+    def test_similarity_is_optional(self):
+        async def scenario(similarity):
+            cache = LLMResponseCache(similarity=similarity)
+            provider = _Provider()
+            compute = lambda: provider.analyze(None, None)
+            await cache.get_or_compute("BTCUSDT:anthropic:f", "What is the BTC trend right now?", compute)
+            _, match = await cache.get_or_compute("BTCUSDT:anthropic:f", "BTC trend please", compute)
+            return match, provider.calls
+
+        assert asyncio.run(scenario(0)) == ("miss", 2)
+        assert asyncio.run(scenario(0.8)) == ("similar", 1)
+
+    def test_coalescing_expiry_and_failures(self):
+        async def scenario():
+            cache = LLMResponseCache(ttl=0.05)
+            provider = _Provider(delay=0.02)
+            compute = lambda: provider.analyze(None, None)
+            results = await asyncio.gather(*(cache.get_or_compute("s", "analyze", compute) for _ in range(5)))
+            await asyncio.sleep(0.06)
+            await cache.get_or_compute("s", "analyze", compute)
+
+            async def fail():
+                raise RuntimeError("provider down")
+            with pytest.raises(RuntimeError):
+                await cache.get_or_compute("s", "other", fail)
+            _, match = await cache.get_or_compute("s", "other", compute)
+            return [m for _, m in results], provider.calls, match
+
+        matches, calls, after_failure = asyncio.run(scenario())
+        assert matches == ["miss"] + ["coalesced"] * 4
+        assert calls == 3
+        assert after_failure == "miss"
+
+    def test_hits_are_audited_and_rate_accounted(self):
+        async def scenario():
+            provider = _Provider()
+            service = _service(provider, LLMResponseCache())
+            request = ChatRequest(message="Analyze BTCUSDT trend", symbol="BTCUSDT")
+            first = await service.analyze_market(request, "user")
+            second = await service.analyze_market(request, "user")
+            return provider, service, first, second
+
+        provider, service, first, second = asyncio.run(scenario())
+        assert provider.calls == 1
+        assert not first.cached and first.tokens_used == 500
+        assert second.cached and second.cache_match == "exact"
+        assert second.response == first.response and second.cost_usd == 0.0
+        assert service.rate_limiter.checks == 2
+        assert service.rate_limiter.usage == [(500, 0.01), (0, 0.0)]
+        assert [r.cached for r in service.audit_logger.responses] == [False, True]
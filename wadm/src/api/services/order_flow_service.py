@@ -16,14 +16,30 @@ logger = logging.getLogger(__name__)
 class OrderFlowService:
     """Service for Order Flow calculations and data retrieval"""
     
+    # Realtime mode lookback per requested timeframe
+    TIMEFRAME_MINUTES = {"5m": 5, "15m": 15, "1h": 60, "4h": 240}
+    DEFAULT_MINUTES = 15
+    
     def __init__(self, mongo: MongoManager, cache: CacheManager):
         self.mongo = mongo
         self.cache = cache
         self.calculator = OrderFlowCalculator()
     
+    @staticmethod
+    def latest_key(symbol: str, exchange: Optional[str] = None) -> str:
+        return f"order_flow_latest:{symbol}:{exchange or 'all'}"
+    
+    @staticmethod
+    def realtime_key(symbol: str, exchange: str, minutes: int) -> str:
+        return f"order_flow_realtime:{symbol}:{exchange}:{minutes}"
+    
+    @staticmethod
+    def analysis_key(symbol: str, exchange: Optional[str] = None) -> str:
+        return f"order_flow_analysis:{symbol}:{exchange or 'all'}"
+    
     async def get_latest(self, symbol: str, exchange: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get latest order flow for symbol"""
-        cache_key = f"order_flow_latest:{symbol}:{exchange or 'all'}"
+        cache_key = self.latest_key(symbol, exchange)
         
         # Try cache first
         cached = await self.cache.get(cache_key)
@@ -49,7 +65,8 @@ class OrderFlowService:
                 "vwap_delta": getattr(flow, 'vwap_delta', 0.0),
                 "absorption_events": getattr(flow, 'absorption_events', []),
                 "flow_strength": self._calculate_flow_strength(flow),
-                "market_bias": self._determine_market_bias(flow)
+                "market_bias": self._determine_market_bias(flow),
+                "latency": getattr(flow, 'latency', None)
             }
             
             # Cache for 1 minute
@@ -61,14 +78,15 @@ class OrderFlowService:
     async def get_historical(self, symbol: str, 
                            start_time: Optional[datetime] = None,
                            end_time: Optional[datetime] = None,
-                           limit: int = 100) -> List[Dict[str, Any]]:
-        """Get historical order flows"""
+                           limit: int = 100,
+                           cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get one page of historical order flows, newest first, with the next page's cursor"""
         if not start_time:
             start_time = datetime.now(timezone.utc) - timedelta(hours=24)
         if not end_time:
             end_time = datetime.now(timezone.utc)
         
-        cache_key = f"order_flow_historical:{symbol}:{start_time.isoformat()}:{end_time.isoformat()}:{limit}"
+        cache_key = f"order_flow_historical:{symbol}:{start_time.isoformat()}:{end_time.isoformat()}:{limit}:{cursor}"
         
         # Try cache first
         cached = await self.cache.get(cache_key)
@@ -76,7 +94,7 @@ class OrderFlowService:
             return cached
         
         # Get from database
-        flows = await self.mongo.get_order_flows(symbol, start_time, end_time, limit)
+        flows, next_cursor = await self.mongo.get_order_flows(symbol, start_time, end_time, limit, cursor)
         
         result = []
         for flow in flows:
@@ -94,14 +112,16 @@ class OrderFlowService:
                 "flow_strength": self._calculate_flow_strength(flow)
             })
         
+        page = {"data": result, "next_cursor": next_cursor}
+        
         # Cache for 5 minutes
-        await self.cache.set(cache_key, result, ttl=300)
-        return result
+        await self.cache.set(cache_key, page, ttl=300)
+        return page
     
     async def calculate_realtime(self, symbol: str, exchange: str, 
                                minutes: int = 15) -> Optional[Dict[str, Any]]:
         """Calculate order flow from recent trades"""
-        cache_key = f"order_flow_realtime:{symbol}:{exchange}:{minutes}"
+        cache_key = self.realtime_key(symbol, exchange, minutes)
         
         # Try cache first (30 second TTL for realtime)
         cached = await self.cache.get(cache_key)
@@ -152,7 +172,7 @@ class OrderFlowService:
     
     async def get_flow_analysis(self, symbol: str, exchange: Optional[str] = None) -> Dict[str, Any]:
         """Get comprehensive order flow analysis"""
-        cache_key = f"order_flow_analysis:{symbol}:{exchange or 'all'}"
+        cache_key = self.analysis_key(symbol, exchange)
         
         # Try cache first
         cached = await self.cache.get(cache_key)
@@ -3,20 +3,77 @@ Smart Money Concepts (SMC) Service
 Integrates all SMC components for comprehensive market analysis
 """
 
+from collections import deque
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, Any, List
 import asyncio
-import json
 import logging
 
 from src.storage.mongo_manager import MongoManager
 from src.api.cache import CacheManager
 from src.smc import SMCDashboard
+from src.smc.candles import as_utc
+from src.smc.zone_index import ZoneIndex, record_zone
 from src.models import Trade
 
 logger = logging.getLogger(__name__)
 
 
+class StoredZones:
+    """
+    Zone index for one symbol fed from stored detection records.
+    
+    Each refresh only loads records saved since the previous one (records
+    sharing the last loaded timestamp are told apart by id); a zone that
+    is saved again replaces its earlier record, a record marking it mitigated
+    or filled removes it, and zones whose latest record is older than the
+    lookback are dropped.
+    """
+    
+    def __init__(self, symbol: str, lookback_hours: int):
+        self.index = ZoneIndex(symbol)
+        self.lookback = timedelta(hours=lookback_hours)
+        self.loaded_until: Optional[datetime] = None
+        self._order: deque = deque()  # (record time, zone key), oldest first
+        self._loaded_at_watermark: set = set()  # Records applied at loaded_until
+    
+    @staticmethod
+    def _record_key(record: Dict[str, Any]) -> Any:
+        return record.get("_id") or ((record.get("data") or {}).get("id"), record.get("type"))
+    
+    async def refresh(self, storage: MongoManager) -> ZoneIndex:
+        horizon = datetime.now(timezone.utc) - self.lookback
+        since = max(self.loaded_until, horizon) if self.loaded_until else horizon
+        
+        for record in await storage.get_smc_zone_records(self.index.symbol, since):
+            recorded = as_utc(record["timestamp"])
+            key = self._record_key(record)
+            if recorded == self.loaded_until and key in self._loaded_at_watermark:
+                continue
+            if recorded != self.loaded_until:
+                self._loaded_at_watermark = set()
+            self._loaded_at_watermark.add(key)
+            zone = record_zone(record)
+            if zone is None:
+                zone_id = (record.get("data") or {}).get("id")
+                if zone_id is not None:
+                    self.index.remove(zone_id)
+                self.loaded_until = recorded
+                continue
+            self.index.add(zone)
+            self._order.append((recorded, zone.key))
+            self.loaded_until = recorded
+        
+        while self._order and self._order[0][0] < horizon:
+            recorded, key = self._order.popleft()
+            zone = self.index.get(key)
+            # A zone saved again since stays until its latest record expires
+            if zone is not None and as_utc(zone.source["timestamp"]) < horizon:
+                self.index.remove(key)
+        
+        return self.index
+
+
 class SMCService:
     """Service for Smart Money Concepts analysis and signals."""
     
@@ -25,6 +82,11 @@ class SMCService:
         self.storage = storage
         self.cache = cache_manager
         self.smc_dashboard = SMCDashboard()
+        self.stored_zones: Dict[str, StoredZones] = {}
+        self.zone_lookback_hours = 24
+    
+    def analysis_key(self, symbol: str, timeframe: str = "15m") -> str:
+        return self.cache.get_cache_key("smc_analysis", symbol, timeframe)
         
     async def get_comprehensive_analysis(
         self, 
@@ -42,12 +104,12 @@ class SMCService:
         - Trading signals
         - Institutional metrics
         """
-        cache_key = self.cache.get_cache_key("smc_analysis", symbol, timeframe)
+        cache_key = self.analysis_key(symbol, timeframe)
         
         # Try cache first
         cached = await self.cache.get(cache_key)
         if cached:
-            return json.loads(cached)
+            return cached
         
         try:
             # Get recent trades for analysis
@@ -88,7 +150,7 @@ class SMCService:
             analysis["trades_analyzed"] = len(trades)
             
             # Cache for 2 minutes
-            await self.cache.set(cache_key, json.dumps(analysis, default=str), ttl=120)
+            await self.cache.set(cache_key, analysis, ttl=120)
             
             # Store in database for historical reference
             await self.storage.db.smc_analyses.insert_one({
@@ -126,7 +188,7 @@ class SMCService:
         # Try cache first
         cached = await self.cache.get(cache_key)
         if cached:
-            return json.loads(cached)
+            return cached
         
         try:
             # Get comprehensive analysis first
@@ -141,8 +203,8 @@ class SMCService:
             else:
                 signals = all_signals
             
-            # Sort by confidence
-            signals.sort(key=lambda x: x.get("confidence", 0), reverse=True)
+            # Sort by confidence (a new list: the analysis may be the cached one)
+            signals = sorted(signals, key=lambda x: x.get("confidence", 0), reverse=True)
             
             # Calculate summary metrics
             total_signals = len(signals)
@@ -163,7 +225,7 @@ class SMCService:
             }
             
             # Cache for 1 minute
-            await self.cache.set(cache_key, json.dumps(response, default=str), ttl=60)
+            await self.cache.set(cache_key, response, ttl=60)
             
             return response
             
@@ -192,7 +254,7 @@ class SMCService:
         # Try cache first
         cached = await self.cache.get(cache_key)
         if cached:
-            return json.loads(cached)
+            return cached
         
         try:
             # Get comprehensive analysis
@@ -222,7 +284,7 @@ class SMCService:
                 structure["liquidity_zones"] = self._extract_liquidity_zones(analysis)
             
             # Cache for 2 minutes
-            await self.cache.set(cache_key, json.dumps(structure, default=str), ttl=120)
+            await self.cache.set(cache_key, structure, ttl=120)
             
             return structure
             
@@ -254,7 +316,7 @@ class SMCService:
         # Try cache first
         cached = await self.cache.get(cache_key)
         if cached:
-            return json.loads(cached)
+            return cached
         
         try:
             # Get all data sources
@@ -335,7 +397,7 @@ class SMCService:
             }
             
             # Cache for 2 minutes
-            await self.cache.set(cache_key, json.dumps(response, default=str), ttl=120)
+            await self.cache.set(cache_key, response, ttl=120)
             
             return response
             
@@ -348,6 +410,58 @@ class SMCService:
                 "confluences": []
             }
     
+    async def get_zones(
+        self,
+        symbol: str,
+        price: Optional[float] = None,
+        distance_pct: float = 2.0,
+        kind: Optional[str] = None,
+        direction: Optional[str] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Get order block and FVG zones detected in the lookback window.
+        
+        Args:
+            symbol: Trading symbol
+            price: Reference price; zones within ``distance_pct`` of it are
+                returned nearest first. Without a price all zones are returned
+                in ascending price.
+            kind: "order_block" or "fair_value_gap"
+            direction: "bullish" or "bearish"
+            limit: Maximum zones returned
+        """
+        stored = self.stored_zones.get(symbol)
+        if stored is None:
+            stored = self.stored_zones[symbol] = StoredZones(symbol, self.zone_lookback_hours)
+        index = await stored.refresh(self.storage)
+        
+        if price:
+            distance = price * distance_pct / 100
+            zones = index.between(price - distance, price + distance, kind=kind, direction=direction)
+            zones.sort(key=lambda zone: abs(zone.price - price))
+        else:
+            zones = [zone for zone in index.zones(kind)
+                     if direction is None or zone.direction == direction]
+        
+        result = []
+        for zone in zones[:limit]:
+            item = zone.to_dict()
+            if price:
+                item["distance_pct"] = round(abs(zone.price - price) / price * 100, 3)
+            result.append(item)
+        
+        return {
+            "symbol": symbol,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "price": price,
+            "lookback_hours": self.zone_lookback_hours,
+            "total_zones": len(index),
+            "zones_above": index.count_above(price, kind=kind) if price else None,
+            "zones_below": index.count_below(price, kind=kind) if price else None,
+            "zones": result
+        }
+    
     # Helper methods
     
     async def _get_latest_smc_analysis(self, symbol: str) -> Optional[Dict[str, Any]]:
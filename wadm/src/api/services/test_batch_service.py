@@ -0,0 +1,105 @@
+"""
+Tests for batch indicator resolution
+"""
+import asyncio
+
+from .batch_service import IndicatorBatchService
+
+
+class _Cache:
+    def __init__(self, values):
+        self.values = values
+        self.mget_calls = []
+
+    async def get_many(self, keys):
+        self.mget_calls.append(list(keys))
+        return {key: self.values[key] for key in keys if key in self.values}
+
+
+class _VolumeProfile:
+    TIMEFRAME_MINUTES = {"1h": 60}
+    DEFAULT_MINUTES = 60
+
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = self.peak = 0
+
+    latest_key = staticmethod(lambda symbol, exchange=None: f"vp_latest:{symbol}:{exchange or 'all'}")
+    realtime_key = staticmethod(lambda symbol, exchange, minutes: f"vp_realtime:{symbol}:{exchange}:{minutes}")
+    multi_timeframe_key = staticmethod(lambda symbol, exchange=None: f"vp_multi:{symbol}")
+
+    async def get_latest(self, symbol, exchange=None):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if symbol == "ETHUSDT":
+            raise RuntimeError("storage down")
+        return {"symbol": symbol, "poc": 100.0}
+
+    async def calculate_realtime(self, symbol, exchange, minutes):
+        return None
+
+
+class _SMC:
+    def __init__(self):
+        self.calls = 0
+
+    def analysis_key(self, symbol, timeframe="15m"):
+        return f"smc:{symbol}:{timeframe}"
+
+    async def get_comprehensive_analysis(self, symbol, timeframe="15m"):
+        self.calls += 1
+        await asyncio.sleep(1 if symbol == "BTCUSDT" else 0)
+        return {"symbol": symbol, "market_bias": "bearish", "order_blocks": []}
+
+
+def _service(cache, vp=None, smc=None, **kwargs):
+    return IndicatorBatchService(vp or _VolumeProfile(), None, smc or _SMC(), cache, **kwargs)
+
+
+class TestIndicatorBatchService:
+    """Test shared cache lookup, bounded fan-out and per-item failures"""
+
+    def test_hits_misses_and_failures_in_order(self):
+        cache = _Cache({"smc:BTCUSDT:15m": {"symbol": "BTCUSDT", "market_bias": "bullish",
+                                             "institutional_metrics": {"bias": "bullish"}}})
+        vp = _VolumeProfile()
+        specs = [
+            {"indicator": "smc_bias", "symbol": "BTCUSDT"},
+            {"indicator": "volume_profile", "symbol": "BTCUSDT"},
+            {"indicator": "volume_profile", "symbol": "ETHUSDT"},
+            {"indicator": "volume_profile", "symbol": "NOPEUSDT"},
+            {"indicator": "volume_profile", "symbol": "BTCUSDT"},
+            {"indicator": "volume_profile", "symbol": "BTCUSDT", "params": {"mode": "sideways"}},
+        ]
+        results, stats = asyncio.run(_service(cache, vp).resolve(specs))
+
+        assert [r["status"] for r in results] == ["ok", "ok", "error", "error", "ok", "error"]
+        assert results[0]["cached"] and results[0]["data"]["institutional_bias"] == "bullish"
+        assert results[1]["data"]["poc"] == 100.0
+        assert [r["error"]["type"] for r in results if r["error"]] == ["internal", "not_found", "invalid"]
+        # One MGET for every item; duplicate specs computed once
+        assert len(cache.mget_calls) == 1
+        assert vp.calls == 2
+        assert stats["cache_hits"] == 1 and stats["succeeded"] == 3
+
+    def test_concurrency_and_timeout_are_bounded(self):
+        vp = _VolumeProfile()
+        symbols = ["BTCUSDT", "SOLUSDT", "TRXUSDT", "XRPUSDT"]
+        specs = [{"indicator": "volume_profile", "symbol": s, "exchange": e}
+                 for s in symbols for e in ("bybit", "kraken")]
+        specs.append({"indicator": "smc_analysis", "symbol": "BTCUSDT"})
+        results, _ = asyncio.run(_service(_Cache({}), vp, concurrency=2, item_timeout=0.1).resolve(specs))
+
+        assert vp.peak <= 2 and vp.calls == 8
+        assert results[-1]["error"]["type"] == "timeout"
+
+    def test_shared_computation_keeps_each_projection(self):
+        smc = _SMC()
+        specs = [{"indicator": "smc_analysis", "symbol": "SOLUSDT"}, {"indicator": "smc_bias", "symbol": "SOLUSDT"}]
+        results, _ = asyncio.run(_service(_Cache({}), smc=smc).resolve(specs))
+        assert smc.calls == 1
+        assert "order_blocks" in results[0]["data"]
+        assert results[1]["data"]["market_bias"] == "bearish" and "order_blocks" not in results[1]["data"]
@@ -0,0 +1,41 @@
+"""
+Tests for the stored SMC zone index
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from .smc_service import StoredZones
+
+
+class _Storage:
+    """Zone records at or after ``since``, as the inclusive Mongo query returns them"""
+
+    def __init__(self):
+        self.records = []
+
+    async def get_smc_zone_records(self, symbol, since, limit=5000):
+        return sorted((r for r in self.records if r["timestamp"] >= since), key=lambda r: r["timestamp"])
+
+
+def _record(_id, zone_id, timestamp, **data):
+    return {"_id": _id, "type": "order_block", "symbol": "BTCUSDT", "timestamp": timestamp,
+            "data": {"id": zone_id, "type": "bullish", "bottom": 90.0, "top": 92.0,
+                     "confidence_score": 70.0, "active": True, "mitigated": False, **data}}
+
+
+class TestStoredZones:
+    """Test incremental loading at the watermark"""
+
+    def test_record_written_late_at_the_watermark_is_applied(self):
+        at = datetime.now(timezone.utc) - timedelta(minutes=1)
+        storage = _Storage()
+        zones = StoredZones("BTCUSDT", lookback_hours=24)
+        storage.records.append(_record(1, "OB_1", at))
+        storage.records.append(_record(2, "OB_2", at))
+        assert len(asyncio.run(zones.refresh(storage))) == 2
+
+        # Retires OB_1 in the same millisecond as the records already loaded
+        storage.records.append(_record(3, "OB_1", at, active=False, mitigated=True))
+        index = asyncio.run(zones.refresh(storage))
+        assert [zone.id for zone in index.zones()] == ["OB_2"]
+        assert len(asyncio.run(zones.refresh(storage))) == 1
@@ -16,14 +16,30 @@ logger = logging.getLogger(__name__)
 class VolumeProfileService:
     """Service for Volume Profile calculations and data retrieval"""
     
+    # Realtime mode lookback per requested timeframe
+    TIMEFRAME_MINUTES = {"15m": 15, "1h": 60, "4h": 240, "1d": 1440}
+    DEFAULT_MINUTES = 60
+    
     def __init__(self, mongo: MongoManager, cache: CacheManager):
         self.mongo = mongo
         self.cache = cache
         self.calculator = VolumeProfileCalculator()
     
+    @staticmethod
+    def latest_key(symbol: str, exchange: Optional[str] = None) -> str:
+        return f"volume_profile_latest:{symbol}:{exchange or 'all'}"
+    
+    @staticmethod
+    def realtime_key(symbol: str, exchange: str, minutes: int) -> str:
+        return f"volume_profile_realtime:{symbol}:{exchange}:{minutes}"
+    
+    @staticmethod
+    def multi_timeframe_key(symbol: str, exchange: Optional[str] = None) -> str:
+        return f"volume_profile_multi:{symbol}:{exchange or 'all'}"
+    
     async def get_latest(self, symbol: str, exchange: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get latest volume profile for symbol"""
-        cache_key = f"volume_profile_latest:{symbol}:{exchange or 'all'}"
+        cache_key = self.latest_key(symbol, exchange)
         
         # Try cache first
         cached = await self.cache.get(cache_key)
@@ -43,7 +59,8 @@ class VolumeProfileService:
                 "total_volume": profile.total_volume,
                 "volume_nodes": self._format_volume_nodes(profile.volume_nodes),
                 "value_area_percentage": 70.0,
-                "profile_strength": self._calculate_profile_strength(profile)
+                "profile_strength": self._calculate_profile_strength(profile),
+                "latency": getattr(profile, 'latency', None)
             }
             
             # Cache for 2 minutes
@@ -55,14 +72,15 @@ class VolumeProfileService:
     async def get_historical(self, symbol: str, 
                            start_time: Optional[datetime] = None,
                            end_time: Optional[datetime] = None,
-                           limit: int = 100) -> List[Dict[str, Any]]:
-        """Get historical volume profiles"""
+                           limit: int = 100,
+                           cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get one page of historical volume profiles, newest first, with the next page's cursor"""
         if not start_time:
             start_time = datetime.now(timezone.utc) - timedelta(hours=24)
         if not end_time:
             end_time = datetime.now(timezone.utc)
         
-        cache_key = f"volume_profile_historical:{symbol}:{start_time.isoformat()}:{end_time.isoformat()}:{limit}"
+        cache_key = f"volume_profile_historical:{symbol}:{start_time.isoformat()}:{end_time.isoformat()}:{limit}:{cursor}"
         
         # Try cache first
         cached = await self.cache.get(cache_key)
@@ -70,7 +88,7 @@ class VolumeProfileService:
             return cached
         
         # Get from database
-        profiles = await self.mongo.get_volume_profiles(symbol, start_time, end_time, limit)
+        profiles, next_cursor = await self.mongo.get_volume_profiles(symbol, start_time, end_time, limit, cursor)
         
         result = []
         for profile in profiles:
@@ -85,14 +103,16 @@ class VolumeProfileService:
                 "profile_strength": self._calculate_profile_strength(profile)
             })
         
+        page = {"data": result, "next_cursor": next_cursor}
+        
         # Cache for 5 minutes
-        await self.cache.set(cache_key, result, ttl=300)
-        return result
+        await self.cache.set(cache_key, page, ttl=300)
+        return page
     
     async def calculate_realtime(self, symbol: str, exchange: str, 
                                minutes: int = 60) -> Optional[Dict[str, Any]]:
         """Calculate volume profile from recent trades"""
-        cache_key = f"volume_profile_realtime:{symbol}:{exchange}:{minutes}"
+        cache_key = self.realtime_key(symbol, exchange, minutes)
         
         # Try cache first (30 second TTL for realtime)
         cached = await self.cache.get(cache_key)
@@ -133,7 +153,7 @@ class VolumeProfileService:
     
     async def get_multi_timeframe(self, symbol: str, exchange: Optional[str] = None) -> Dict[str, Any]:
         """Get volume profiles for multiple timeframes"""
-        cache_key = f"volume_profile_multi:{symbol}:{exchange or 'all'}"
+        cache_key = self.multi_timeframe_key(symbol, exchange)
         
         # Try cache first
         cached = await self.cache.get(cache_key)
@@ -0,0 +1,71 @@
+"""
+Tests for response encoding and the encoded response cache
+"""
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+
+from .encoding import EncodedResponseCache, FastJSONResponse, columnar, dumps, negotiate
+
+
+def _request(accept_encoding=None):
+    headers = {"accept-encoding": accept_encoding} if accept_encoding else {}
+    return SimpleNamespace(headers=headers)
+
+
+def _rows(n):
+    return [{"timestamp": datetime(2025, 1, 1, 0, i % 60), "open": Decimal("100.5") + i,
+             "volume": np.float64(i) / 4, "trades": i} for i in range(n)]
+
+
+class TestEncoding:
+    """Test orjson output against the stdlib and the columnar layout"""
+
+    def test_matches_stdlib_encoding(self):
+        rows = _rows(3)
+        decoded = json.loads(FastJSONResponse(content=rows).body)
+        assert decoded[1] == {"timestamp": "2025-01-01T00:01:00", "open": 101.5, "volume": 0.25, "trades": 1}
+
+    def test_columnar_keeps_every_field(self):
+        rows = [{"a": 1, "b": 2}, {"a": 3, "c": 4}]
+        assert columnar(rows) == {"a": [1, 3], "b": [2, None], "c": [None, 4]}
+        assert columnar([]) == {}
+        assert len(dumps(columnar(_rows(200)))) < len(dumps(_rows(200)))
+
+    def test_negotiate(self):
+        assert negotiate("gzip, deflate") == "gzip"
+        assert negotiate("gzip;q=0, deflate") == "identity"
+        assert negotiate(None) == "identity"
+
+
+class TestEncodedResponseCache:
+    """Test that bodies are encoded once and served per coding"""
+
+    def test_compressed_body_round_trips(self):
+        cache = EncodedResponseCache(min_size=64)
+        rows = _rows(100)
+        response = cache.put(_request("gzip"), "k", rows)
+        assert response.headers["content-encoding"] == "gzip"
+        assert json.loads(gzip.decompress(response.body)) == json.loads(dumps(rows))
+
+        plain = cache.get(_request(), "k")
+        assert "content-encoding" not in plain.headers
+        assert plain.body == dumps(rows)
+        assert cache.hits == 1
+
+    def test_small_bodies_and_expiry(self):
+        cache = EncodedResponseCache(min_size=1024)
+        assert "content-encoding" not in cache.put(_request("gzip"), "small", {"a": 1}).headers
+        cache.put(_request(), "gone", {"a": 1}, ttl=0)
+        assert cache.get(_request(), "gone") is None
+
+    def test_lru_bound(self):
+        cache = EncodedResponseCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(_request(), key, [key])
+        assert cache.get(_request(), "a") is None
+        assert cache.get(_request(), "c").body == b'["c"]'
@@ -1,29 +1,129 @@
 """
 Base WebSocket collector
+Shared ingest core for every exchange: one or more connections with streams
+spread across them, exponential reconnect backoff with jitter, heartbeats and
+stale-connection detection, precomputed symbol lookups, trade ID gap detection
+and a reader/parse/dispatch pipeline connected by bounded queues (see pipeline.py).
+
+In redundant mode every stream group has a primary and a hot-standby connection
+subscribed to the same streams. Both feed the pipeline and duplicates are dropped
+by trade ID, so losing either connection loses no trades while it reconnects.
 """
 import asyncio
 import json
+import random
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional, Callable
 import websockets
 from websockets.client import WebSocketClientProtocol
+from websockets.protocol import State
 from src.logger import get_logger
-from src.config import WS_RECONNECT_INTERVAL, WS_PING_INTERVAL
+from src.config import (
+    WS_RECONNECT_INTERVAL, WS_RECONNECT_MAX, WS_PING_INTERVAL, WS_STALE_TIMEOUT,
+    WS_CONNECTIONS_PER_EXCHANGE, WS_REDUNDANT, WS_DEDUP_CAPACITY,
+    COLLECTOR_RAW_QUEUE_SIZE, COLLECTOR_RAW_POLICY,
+    COLLECTOR_DISPATCH_QUEUE_SIZE, COLLECTOR_DISPATCH_POLICY, COLLECTOR_DISPATCH_BATCH,
+    COLLECTOR_DISPATCH_LINGER
+)
 from src.models import Trade, Exchange
+from src.metrics import (
+    COLLECTOR_MESSAGES, COLLECTOR_TRADES, COLLECTOR_PARSE_SECONDS, COLLECTOR_DISPATCH_SECONDS,
+    COLLECTOR_RECONNECTS, COLLECTOR_DUPLICATES, COLLECTOR_FAILOVERS
+)
+from src.collectors.pipeline import StageQueue
+from src.collectors.sequence import TradeSequenceTracker, RecentTradeIds
+from src.latency import latency_tracker
 
 logger = get_logger(__name__)
 
+
+def backoff_delay(attempt: int, base: float = WS_RECONNECT_INTERVAL, cap: float = WS_RECONNECT_MAX) -> float:
+    """Exponential backoff with equal jitter: uniform in [d/2, d], d = min(cap, base * 2^attempt)"""
+    delay = min(cap, base * (2 ** min(attempt, 16)))
+    return random.uniform(delay / 2, delay)
+
+
+class Connection:
+    """One WebSocket connection and the symbols streamed over it"""
+    
+    def __init__(self, index: int, symbols: List[str], role: str = "primary"):
+        self.index = index
+        self.symbols = symbols
+        self.role = role
+        self.ws: Optional[WebSocketClientProtocol] = None
+        self.attempt = 0
+        self.last_message = 0.0
+        self.connected_at: Optional[datetime] = None
+    
+    @property
+    def is_open(self) -> bool:
+        # websockets >= 14 dropped ``.closed``; ``.state`` exists on both implementations
+        return self.ws is not None and self.ws.state is State.OPEN
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "role": self.role,
+            "symbols": self.symbols,
+            "connected": self.is_open,
+            "connected_at": self.connected_at,
+            "reconnect_attempt": self.attempt,
+            "idle_seconds": round(time.monotonic() - self.last_message, 1) if self.last_message else None,
+        }
+
+
 class BaseCollector(ABC):
     """Base class for exchange WebSocket collectors"""
     
-    def __init__(self, exchange: Exchange, symbols: List[str], on_trade: Callable):
+    # Application-level ping (seconds, None = rely on WebSocket protocol pings)
+    heartbeat_interval: Optional[float] = None
+    # Whether trade IDs are per-symbol sequential integers (enables gap detection)
+    sequential_trade_ids = False
+    
+    def __init__(self, exchange: Exchange, symbols: List[str], on_trade: Callable,
+                 connections: Optional[int] = None, redundant: Optional[bool] = None):
+        """
+        Args:
+            exchange: Exchange enum
+            symbols: Symbols in the exchange's own format
+            on_trade: Async callback receiving lists of trades
+            connections: WebSocket connections to spread the symbols over
+            redundant: Pair every connection with a hot standby (WS_REDUNDANT by default)
+        """
         self.exchange = exchange
         self.symbols = symbols
         self.on_trade = on_trade
-        self.ws: Optional[WebSocketClientProtocol] = None
         self.running = False
         self.reconnect_count = 0
+        self.connection_count = max(1, min(connections or WS_CONNECTIONS_PER_EXCHANGE, len(symbols) or 1))
+        self.connections: List[Connection] = []
+        self.stale_timeout = WS_STALE_TIMEOUT
+        
+        # Exchange symbol -> canonical (BTCUSDT) computed once, not per trade
+        self.symbol_map: Dict[str, str] = {symbol: self.to_canonical(symbol) for symbol in symbols}
+        self.sequence = TradeSequenceTracker(exchange.value) if self.sequential_trade_ids else None
+        self.redundant = WS_REDUNDANT if redundant is None else redundant
+        self.recent_ids = RecentTradeIds(WS_DEDUP_CAPACITY) if self.redundant else None
+        self.failovers = 0
+        self._reconnects_metric = COLLECTOR_RECONNECTS.labels(exchange.value)
+        self._duplicates_metric = COLLECTOR_DUPLICATES.labels(exchange.value)
+        self._failovers_metric = COLLECTOR_FAILOVERS.labels(exchange.value)
+        
+        # Metric children bound once so the message path only does increments
+        self._messages_metric = COLLECTOR_MESSAGES.labels(exchange.value)
+        self._trades_metric = COLLECTOR_TRADES.labels(exchange.value)
+        self._parse_metric = COLLECTOR_PARSE_SECONDS.labels(exchange.value)
+        self._dispatch_metric = COLLECTOR_DISPATCH_SECONDS.labels(exchange.value)
+        
+        # Pipeline: reader -> raw frames -> parser -> trade batches -> dispatcher
+        self.raw_queue = StageQueue(exchange.value, "raw", COLLECTOR_RAW_QUEUE_SIZE, COLLECTOR_RAW_POLICY)
+        self.dispatch_queue = StageQueue(
+            exchange.value, "dispatch", COLLECTOR_DISPATCH_QUEUE_SIZE, COLLECTOR_DISPATCH_POLICY)
+        self.dispatch_batch = COLLECTOR_DISPATCH_BATCH
+        self.dispatch_linger = COLLECTOR_DISPATCH_LINGER
+        self._stage_tasks: List[asyncio.Task] = []
         
     @abstractmethod
     def get_ws_url(self) -> str:
@@ -31,105 +131,251 @@ class BaseCollector(ABC):
         pass
     
     @abstractmethod
-    def get_subscribe_message(self) -> Dict[str, Any]:
-        """Get subscription message"""
+    def get_subscribe_message(self, symbols: List[str]) -> Dict[str, Any]:
+        """Get subscription message for the symbols of one connection"""
         pass
     
     @abstractmethod
-    def parse_message(self, message: Dict[str, Any]) -> Optional[List[Trade]]:
+    def parse_message(self, message: Any) -> Optional[List[Trade]]:
         """Parse WebSocket message to trades"""
         pass
     
-    async def connect(self):
-        """Connect to WebSocket"""
+    def to_canonical(self, symbol: str) -> str:
+        """Exchange symbol -> WADM symbol (BTCUSDT); used to build symbol_map"""
+        return symbol.upper()
+    
+    def canonical_symbol(self, symbol: str) -> str:
+        """Lookup with a cached fallback for symbols not subscribed explicitly"""
+        canonical = self.symbol_map.get(symbol)
+        if canonical is None:
+            canonical = self.symbol_map[symbol] = self.to_canonical(symbol)
+        return canonical
+    
+    def heartbeat_message(self) -> Optional[Dict[str, Any]]:
+        """Application-level ping payload, if the exchange expects one"""
+        return None
+    
+    def split_symbols(self) -> List[List[str]]:
+        """Spread symbols round-robin over the configured connections"""
+        return [self.symbols[i::self.connection_count] for i in range(self.connection_count)]
+    
+    async def subscribe(self, ws: WebSocketClientProtocol, symbols: List[str]):
+        """Send subscriptions for one connection (override for chunked subscriptions)"""
+        await ws.send(json.dumps(self.get_subscribe_message(symbols)))
+    
+    async def connect(self, connection: Connection) -> bool:
+        """Open and subscribe one connection"""
         try:
-            self.ws = await websockets.connect(self.get_ws_url())
-            logger.info(f"{self.exchange.value}: Connected to WebSocket")
-            
-            # Subscribe to streams
-            await self.ws.send(json.dumps(self.get_subscribe_message()))
-            logger.info(f"{self.exchange.value}: Subscribed to {self.symbols}")
-            
-            self.reconnect_count = 0
+            connection.ws = await websockets.connect(
+                self.get_ws_url(), ping_interval=WS_PING_INTERVAL, ping_timeout=10)
+            await self.subscribe(connection.ws, connection.symbols)
+            connection.connected_at = datetime.now(timezone.utc)
+            connection.last_message = time.monotonic()
+            logger.info(f"{self.exchange.value}[{connection.index}]: Connected and subscribed to "
+                        f"{connection.symbols}")
             return True
         except Exception as e:
-            logger.error(f"{self.exchange.value}: Connection error: {e}")
+            logger.error(f"{self.exchange.value}[{connection.index}]: Connection error: {e}")
             return False
     
     async def disconnect(self):
-        """Disconnect from WebSocket"""
-        if self.ws:
-            await self.ws.close()
-            self.ws = None
+        """Disconnect all connections"""
+        for connection in self.connections:
+            if connection.ws:
+                await connection.ws.close()
+                connection.ws = None
     
-    async def handle_message(self, message: str):
-        """Handle incoming message"""
+    def parse_frame(self, message: str, received_at: datetime) -> Optional[List[Trade]]:
+        """Decode and parse one raw frame, stamping receive time and recording parse latency"""
         try:
+            started = time.perf_counter()
             data = json.loads(message)
             trades = self.parse_message(data)
-            
-            if trades:
-                # Send trades to callback
-                await self.on_trade(trades)
-                
+            self._parse_metric.observe(time.perf_counter() - started)
         except json.JSONDecodeError as e:
             logger.error(f"{self.exchange.value}: JSON decode error: {e}")
+            return None
         except Exception as e:
             logger.error(f"{self.exchange.value}: Message handling error: {e}")
+            return None
+        
+        if trades and self.recent_ids is not None:
+            trades = self._drop_duplicates(trades)
+        
+        if trades:
+            self._trades_metric.inc(len(trades))
+            for trade in trades:
+                trade.received_at = received_at
+            if self.sequence:
+                self.sequence.check(trades)
+            latency_tracker.record_trades(self.exchange.value, trades, time.time())
+        return trades
+    
+    def _drop_duplicates(self, trades: List[Trade]) -> List[Trade]:
+        """Keep only trades not already delivered by the partner connection"""
+        add = self.recent_ids.add
+        unique = [trade for trade in trades if add(trade.symbol, trade.trade_id)]
+        if len(unique) != len(trades):
+            self._duplicates_metric.inc(len(trades) - len(unique))
+        return unique
+    
+    async def handle_message(self, message: str):
+        """Parse and dispatch one message inline (bypasses the pipeline queues)"""
+        self._messages_metric.inc()
+        trades = self.parse_frame(message, datetime.now(timezone.utc))
+        if trades:
+            await self._dispatch(trades)
+    
+    async def _dispatch(self, trades: List[Trade]):
+        started = time.perf_counter()
+        try:
+            await self.on_trade(trades)
+        except Exception as e:
+            logger.error(f"{self.exchange.value}: Trade callback error: {e}")
+        finally:
+            self._dispatch_metric.observe(time.perf_counter() - started)
+    
+    async def _parse_stage(self):
+        """Raw frames -> parsed trade batches"""
+        while True:
+            received_at, message = await self.raw_queue.get()
+            trades = self.parse_frame(message, received_at)
+            if trades:
+                await self.dispatch_queue.put(trades)
+    
+    async def _dispatch_stage(self):
+        """Trade batches -> on_trade, coalescing whatever queued up during a slow callback"""
+        while True:
+            trades = await self.dispatch_queue.get()
+            if self.dispatch_linger and len(trades) < self.dispatch_batch:
+                # Give one-trade-per-message feeds a moment to fill the batch
+                await asyncio.sleep(self.dispatch_linger)
+            while len(trades) < self.dispatch_batch:
+                try:
+                    trades = trades + self.dispatch_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            await self._dispatch(trades)
+    
+    def _start_stages(self):
+        if not self._stage_tasks:
+            self._stage_tasks = [
+                asyncio.create_task(self._parse_stage()),
+                asyncio.create_task(self._dispatch_stage()),
+            ]
+    
+    async def _stop_stages(self, drain_timeout: float = 5.0):
+        """Let queued frames flush through on_trade, then cancel the stage tasks"""
+        deadline = time.monotonic() + drain_timeout
+        while (self.raw_queue.qsize() or self.dispatch_queue.qsize()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._stage_tasks:
+            task.cancel()
+        await asyncio.gather(*self._stage_tasks, return_exceptions=True)
+        self._stage_tasks = []
+    
+    def pipeline_status(self) -> Dict[str, Any]:
+        """Queue depths, high-water marks and drop counts per stage"""
+        return {
+            "raw": self.raw_queue.status(),
+            "dispatch": self.dispatch_queue.status(),
+            "connections": [connection.status() for connection in self.connections],
+            "reconnects": self.reconnect_count,
+            "redundant": self.redundant,
+            "failovers": self.failovers,
+            "sequence": self.sequence.status() if self.sequence else None,
+        }
     
     async def run(self):
-        """Main run loop"""
+        """Run every connection until stop()"""
         self.running = True
-        
+        self._start_stages()
+        self.connections = []
+        for i, symbols in enumerate(self.split_symbols()):
+            self.connections.append(Connection(i, symbols, "primary"))
+            if self.redundant:
+                self.connections.append(Connection(i, symbols, "standby"))
+        await asyncio.gather(*(self._connection_loop(c) for c in self.connections))
+    
+    async def _connection_loop(self, connection: Connection):
+        """Connect, read and reconnect one connection with backoff"""
+        name = f"{self.exchange.value}[{connection.index}/{connection.role}]"
+        if connection.role == "standby":
+            # Stagger so both connections never reconnect in the same instant
+            await asyncio.sleep(random.uniform(0.5, 1.5))
         while self.running:
+            keepalive_task = None
             try:
-                if not self.ws or self.ws.closed:
-                    if not await self.connect():
-                        await asyncio.sleep(WS_RECONNECT_INTERVAL)
-                        continue
-                
-                # Start heartbeat task for Bybit (requires ping every 20s)
-                heartbeat_task = None
-                if self.exchange == Exchange.BYBIT:
-                    heartbeat_task = asyncio.create_task(self._heartbeat_loop())
-                
-                # Listen for messages
-                try:
-                    async for message in self.ws:
-                        await self.handle_message(message)
-                finally:
-                    # Cancel heartbeat task when connection ends
-                    if heartbeat_task:
-                        heartbeat_task.cancel()
-                        try:
-                            await heartbeat_task
-                        except asyncio.CancelledError:
-                            pass
-                    
+                if await self.connect(connection):
+                    keepalive_task = asyncio.create_task(self._keepalive(connection))
+                    # Reader: only stamp and enqueue, so the socket keeps draining during bursts
+                    async for message in connection.ws:
+                        connection.last_message = time.monotonic()
+                        connection.attempt = 0
+                        self._messages_metric.inc()
+                        await self.raw_queue.put((datetime.now(timezone.utc), message))
             except websockets.exceptions.ConnectionClosed:
-                logger.warning(f"{self.exchange.value}: Connection closed")
-                self.reconnect_count += 1
-                await asyncio.sleep(WS_RECONNECT_INTERVAL)
-                
+                logger.warning(f"{name}: Connection closed")
             except Exception as e:
-                logger.error(f"{self.exchange.value}: Unexpected error: {e}")
-                await asyncio.sleep(WS_RECONNECT_INTERVAL)
+                logger.error(f"{name}: Unexpected error: {e}")
+            finally:
+                if keepalive_task:
+                    keepalive_task.cancel()
+                    try:
+                        await keepalive_task
+                    except asyncio.CancelledError:
+                        pass
+                    except Exception as e:
+                        logger.debug(f"{name}: Keepalive ended with error: {e}")
+            
+            if self.running and self.redundant:
+                self._promote_standby(connection)
+            
+            if self.running:
+                delay = backoff_delay(connection.attempt)
+                connection.attempt += 1
+                self.reconnect_count += 1
+                self._reconnects_metric.inc()
+                logger.info(f"{name}: Reconnecting in {delay:.1f}s (attempt {connection.attempt})")
+                await asyncio.sleep(delay)
+    
+    def _promote_standby(self, failed: Connection):
+        """Swap roles when a primary drops and its standby is live; trades keep flowing meanwhile"""
+        if failed.role != "primary":
+            return
+        for partner in self.connections:
+            if partner is not failed and partner.index == failed.index and partner.is_open:
+                partner.role, failed.role = "primary", "standby"
+                self.failovers += 1
+                self._failovers_metric.inc()
+                logger.warning(f"{self.exchange.value}[{failed.index}]: Primary dropped, standby promoted")
+                return
     
-    async def _heartbeat_loop(self):
-        """Send ping every 20 seconds for Bybit (as per documentation)"""
-        while self.running and self.ws and not self.ws.closed:
+    async def _keepalive(self, connection: Connection):
+        """Send application pings and recycle connections that went silent"""
+        interval = self.heartbeat_interval or self.stale_timeout / 2
+        last_ping = time.monotonic()
+        while self.running and connection.is_open:
+            await asyncio.sleep(min(interval, 5))
+            now = time.monotonic()
             try:
-                await asyncio.sleep(20)  # Bybit docs recommend 20 seconds
-                if self.ws and not self.ws.closed:
-                    ping_message = {"op": "ping"}
-                    await self.ws.send(json.dumps(ping_message))
-                    logger.debug(f"{self.exchange.value}: Sent heartbeat ping")
+                payload = self.heartbeat_message()
+                if payload and now - last_ping >= interval:
+                    await connection.ws.send(json.dumps(payload))
+                    last_ping = now
+                    logger.debug(f"{self.exchange.value}[{connection.index}]: Sent heartbeat ping")
+                if now - connection.last_message > self.stale_timeout:
+                    logger.warning(f"{self.exchange.value}[{connection.index}]: No data for "
+                                   f"{self.stale_timeout}s, recycling connection")
+                    await connection.ws.close()
+                    return
             except Exception as e:
-                logger.warning(f"{self.exchange.value}: Heartbeat error: {e}")
-                break
+                logger.warning(f"{self.exchange.value}[{connection.index}]: Heartbeat error: {e}")
+                return
     
     async def stop(self):
         """Stop the collector"""
         self.running = False
         await self.disconnect()
+        await self._stop_stages()
         logger.info(f"{self.exchange.value}: Collector stopped")
@@ -14,18 +14,21 @@ logger = get_logger(__name__)
 class BinanceCollector(BaseCollector):
     """Binance WebSocket collector for trades"""
     
-    def __init__(self, symbols: List[str], on_trade):
-        super().__init__(Exchange.BINANCE, symbols, on_trade)
+    # aggTrade IDs are contiguous per symbol
+    sequential_trade_ids = True
+    
+    def __init__(self, symbols: List[str], on_trade, connections: Optional[int] = None,
+                 redundant: Optional[bool] = None):
         # Binance uses lowercase symbols
-        self.symbols = [s.lower() for s in symbols]
+        super().__init__(Exchange.BINANCE, [s.lower() for s in symbols], on_trade, connections, redundant)
     
     def get_ws_url(self) -> str:
         # Binance uses single connection with subscribe message
         return BINANCE_WS_URL
     
-    def get_subscribe_message(self) -> Dict[str, Any]:
-        """Subscribe to aggTrade streams for all symbols"""
-        streams = [f"{symbol}@aggTrade" for symbol in self.symbols]
+    def get_subscribe_message(self, symbols: List[str]) -> Dict[str, Any]:
+        """Subscribe to aggTrade streams for the connection's symbols"""
+        streams = [f"{symbol}@aggTrade" for symbol in symbols]
         return {
             "method": "SUBSCRIBE",
             "params": streams,
@@ -53,7 +56,7 @@ class BinanceCollector(BaseCollector):
                 symbol=data["s"],  # Already uppercase from Binance
                 price=float(data["p"]),
                 quantity=float(data["q"]),
-                side=Side.BUY if data["m"] else Side.SELL,  # m=true means seller is maker
+                side=Side.SELL if data["m"] else Side.BUY,  # m=true: buyer is maker, the seller aggressed
                 timestamp=datetime.fromtimestamp(data["T"] / 1000, tz=timezone.utc),
                 trade_id=str(data["a"])  # Binance uses 'a' for aggregated trade ID
             )
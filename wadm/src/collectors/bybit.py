@@ -16,57 +16,39 @@ logger = get_logger(__name__)
 class BybitCollector(BaseCollector):
     """Bybit WebSocket collector for trades"""
     
-    def __init__(self, symbols: List[str], on_trade):
-        super().__init__(Exchange.BYBIT, symbols, on_trade)
+    # Bybit drops connections without an application ping (docs recommend 20s)
+    heartbeat_interval = 20
+    
+    def __init__(self, symbols: List[str], on_trade, connections: Optional[int] = None,
+                 redundant: Optional[bool] = None):
+        super().__init__(Exchange.BYBIT, symbols, on_trade, connections, redundant)
         self.debug_message_count = 0
-        self.remaining_chunks = []
         self.subscribed_chunks = 0
         logger.info(f"Bybit collector initialized with symbols: {symbols}")
     
     def get_ws_url(self) -> str:
         return BYBIT_WS_URL
     
-    def get_subscribe_message(self) -> Dict[str, Any]:
-        """Subscribe to trade streams for all symbols - Bybit limits to 10 symbols per subscription"""
-        # Split symbols into chunks of 10 (Bybit's limit)
-        symbol_chunks = [self.symbols[i:i+10] for i in range(0, len(self.symbols), 10)]
-        
-        # Return first chunk - will need multiple subscriptions for more symbols
-        first_chunk = symbol_chunks[0]
-        topics = [f"publicTrade.{symbol}" for symbol in first_chunk]
-        message = {
+    def get_subscribe_message(self, symbols: List[str]) -> Dict[str, Any]:
+        """Subscription for up to 10 symbols (Bybit's per-request limit)"""
+        return {
             "op": "subscribe",
-            "args": topics
+            "args": [f"publicTrade.{symbol}" for symbol in symbols]
         }
-        logger.info(f"Bybit subscription message (chunk 1/{len(symbol_chunks)}): {message}")
-        
-        # Store remaining chunks for later subscription
-        if len(symbol_chunks) > 1:
-            self.remaining_chunks = symbol_chunks[1:]
-            logger.info(f"Bybit will subscribe to {len(symbol_chunks)-1} additional chunks after first subscription")
-        else:
-            self.remaining_chunks = []
-            
-        return message
     
-    async def subscribe_remaining_chunks(self):
-        """Subscribe to remaining symbol chunks (beyond the first 10)"""
-        if not self.remaining_chunks:
-            return
-            
-        for i, chunk in enumerate(self.remaining_chunks):
-            try:
-                topics = [f"publicTrade.{symbol}" for symbol in chunk]
-                message = {
-                    "op": "subscribe",
-                    "args": topics
-                }
-                await self.ws.send(json.dumps(message))
-                logger.info(f"Bybit subscribed to chunk {i+2}: {topics}")
+    def heartbeat_message(self) -> Optional[Dict[str, Any]]:
+        return {"op": "ping"}
+    
+    async def subscribe(self, ws, symbols: List[str]):
+        """Subscribe in chunks of 10 symbols - Bybit limits symbols per subscription"""
+        symbol_chunks = [symbols[i:i+10] for i in range(0, len(symbols), 10)]
+        for i, chunk in enumerate(symbol_chunks):
+            message = self.get_subscribe_message(chunk)
+            await ws.send(json.dumps(message))
+            logger.info(f"Bybit subscription message (chunk {i+1}/{len(symbol_chunks)}): {message}")
+            if i + 1 < len(symbol_chunks):
                 # Small delay between subscriptions
                 await asyncio.sleep(0.1)
-            except Exception as e:
-                logger.error(f"Error subscribing to Bybit chunk {i+2}: {e}")
     
     def parse_message(self, message: Dict[str, Any]) -> Optional[List[Trade]]:
         """Parse Bybit trade message with extensive debugging"""
@@ -83,10 +65,6 @@ class BybitCollector(BaseCollector):
             if message.get("success"):
                 self.subscribed_chunks += 1
                 logger.info(f"Bybit subscription confirmed (chunk {self.subscribed_chunks}): {message}")
-                
-                # Subscribe to remaining chunks after first success
-                if self.subscribed_chunks == 1 and self.remaining_chunks:
-                    asyncio.create_task(self.subscribe_remaining_chunks())
             else:
                 logger.error(f"Bybit subscription failed: {message}")
             return None
@@ -110,11 +88,11 @@ class BybitCollector(BaseCollector):
             logger.warning(f"Bybit unexpected topic: {topic}")
             return None
         
-        symbol = topic.replace("publicTrade.", "")
+        symbol = self.canonical_symbol(topic[12:])  # len("publicTrade.")
         trades = []
         
         # Debug: Log trade data structure
-        logger.info(f"Bybit processing {len(message['data'])} trades for {symbol}")
+        logger.debug(f"Bybit processing {len(message['data'])} trades for {symbol}")
         
         for trade_data in message["data"]:
             try:
@@ -133,6 +111,6 @@ class BybitCollector(BaseCollector):
                 logger.error(f"Error parsing Bybit trade: {e}, data: {trade_data}")
         
         if trades:
-            logger.info(f"Bybit returning {len(trades)} trades for {symbol}")
+            logger.debug(f"Bybit returning {len(trades)} trades for {symbol}")
         
         return trades if trades else None
@@ -0,0 +1,90 @@
+"""
+Collector pipeline stages
+Bounded queues between the socket reader, the parser and the trade dispatcher,
+so a slow consumer (Mongo insert, indicator buffering) never stops the socket
+from being drained.
+
+    reader --raw frames--> parser --trade batches--> dispatcher --> on_trade
+
+Each queue applies a backpressure policy when full:
+    block        the producer waits (a full raw queue eventually pushes back on TCP)
+    drop_newest  the incoming item is discarded
+    drop_oldest  the oldest queued item is discarded to make room
+"""
+import asyncio
+import time
+from enum import Enum
+from typing import Any, Dict, Tuple
+
+from src.metrics import COLLECTOR_DROPPED, COLLECTOR_QUEUE_WAIT_SECONDS, QUEUE_DEPTH
+
+
+class BackpressurePolicy(str, Enum):
+    """What a full stage queue does with new items"""
+    BLOCK = "block"
+    DROP_NEWEST = "drop_newest"
+    DROP_OLDEST = "drop_oldest"
+
+
+class StageQueue:
+    """Bounded asyncio queue with a backpressure policy, drop counter and wait-time metric"""
+
+    def __init__(self, exchange: str, stage: str, maxsize: int,
+                 policy: BackpressurePolicy = BackpressurePolicy.BLOCK):
+        self.exchange = exchange
+        self.stage = stage
+        self.policy = BackpressurePolicy(policy)
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.high_water = 0
+        self._queue: "asyncio.Queue[Tuple[float, Any]]" = asyncio.Queue(maxsize)
+        self._dropped_metric = COLLECTOR_DROPPED.labels(exchange, stage)
+        self._wait_metric = COLLECTOR_QUEUE_WAIT_SECONDS.labels(exchange, stage)
+        QUEUE_DEPTH.labels(f"{exchange}_{stage}").set_function(self._queue.qsize)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def _drop(self):
+        self.dropped += 1
+        self._dropped_metric.inc()
+
+    async def put(self, item: Any) -> bool:
+        """Enqueue ``item``; returns False if it was dropped"""
+        entry = (time.perf_counter(), item)
+        if self.policy is BackpressurePolicy.BLOCK:
+            await self._queue.put(entry)
+        else:
+            try:
+                self._queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                if self.policy is BackpressurePolicy.DROP_NEWEST:
+                    self._drop()
+                    return False
+                self._queue.get_nowait()
+                self._drop()
+                self._queue.put_nowait(entry)
+        size = self._queue.qsize()
+        if size > self.high_water:
+            self.high_water = size
+        return True
+
+    async def get(self) -> Any:
+        enqueued, item = await self._queue.get()
+        self._wait_metric.observe(time.perf_counter() - enqueued)
+        return item
+
+    def get_nowait(self) -> Any:
+        """Raises asyncio.QueueEmpty when nothing is queued"""
+        enqueued, item = self._queue.get_nowait()
+        self._wait_metric.observe(time.perf_counter() - enqueued)
+        return item
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "depth": self._queue.qsize(),
+            "maxsize": self.maxsize,
+            "high_water": self.high_water,
+            "policy": self.policy.value,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,101 @@
+"""
+Trade ID tracking
+Exchanges with per-symbol sequential trade IDs (Coinbase matches, Binance aggTrade)
+let us detect trades lost to disconnects or dropped frames. Redundant connections
+deliver every trade twice; a bounded set of recent IDs drops the copies in memory.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Set, Tuple
+
+from src.metrics import COLLECTOR_SEQUENCE_GAPS, COLLECTOR_MISSING_TRADES, COLLECTOR_OUT_OF_ORDER
+
+
+class _SymbolSequence:
+    __slots__ = ("last_id", "gaps", "missing", "out_of_order")
+
+    def __init__(self):
+        self.last_id = -1
+        self.gaps = 0
+        self.missing = 0
+        self.out_of_order = 0
+
+
+class TradeSequenceTracker:
+    """Per-symbol last trade ID with gap and out-of-order counters"""
+
+    def __init__(self, exchange: str):
+        self.exchange = exchange
+        self._symbols: Dict[str, _SymbolSequence] = {}
+        self._gaps_metric = COLLECTOR_SEQUENCE_GAPS.labels(exchange)
+        self._missing_metric = COLLECTOR_MISSING_TRADES.labels(exchange)
+        self._out_of_order_metric = COLLECTOR_OUT_OF_ORDER.labels(exchange)
+
+    def check(self, trades: List[Any]) -> int:
+        """
+        Advance the sequences with a parsed batch.
+
+        Returns:
+            Number of trade IDs missing before this batch (0 when contiguous)
+        """
+        missing_total = 0
+        for trade in trades:
+            try:
+                trade_id = int(trade.trade_id)
+            except (TypeError, ValueError):
+                continue
+            seq = self._symbols.get(trade.symbol)
+            if seq is None:
+                seq = self._symbols[trade.symbol] = _SymbolSequence()
+            if seq.last_id < 0:
+                seq.last_id = trade_id
+                continue
+            if trade_id <= seq.last_id:
+                seq.out_of_order += 1
+                self._out_of_order_metric.inc()
+                continue
+            missing = trade_id - seq.last_id - 1
+            if missing:
+                seq.gaps += 1
+                seq.missing += missing
+                missing_total += missing
+                self._gaps_metric.inc()
+                self._missing_metric.inc(missing)
+            seq.last_id = trade_id
+        return missing_total
+
+    def status(self) -> Dict[str, Dict[str, int]]:
+        return {
+            symbol: {"last_id": s.last_id, "gaps": s.gaps, "missing": s.missing,
+                     "out_of_order": s.out_of_order}
+            for symbol, s in self._symbols.items()
+        }
+
+
+class RecentTradeIds:
+    """
+    Bounded set of recently seen (symbol, trade_id) keys with FIFO eviction.
+
+    Keys are stored whole, so distinct trades never collide; ``capacity``
+    bounds memory. The window only needs to cover the delivery skew between
+    redundant connections.
+    """
+    __slots__ = ("capacity", "_seen", "_order")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._seen: Set[Tuple[str, str]] = set()
+        self._order: Deque[Tuple[str, str]] = deque()
+
+    def add(self, symbol: str, trade_id: str) -> bool:
+        """Remember a trade; returns False if it was already seen"""
+        key = (symbol, trade_id)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._order.append(key)
+        if len(self._order) > self.capacity:
+            self._seen.discard(self._order.popleft())
+        return True
+
+    def __len__(self) -> int:
+        return len(self._order)
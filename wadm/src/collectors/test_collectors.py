@@ -0,0 +1,166 @@
+"""
+Tests for the shared collector core and the exchange parsers
+"""
+
+import json
+from datetime import datetime, timezone
+
+from websockets.protocol import State
+
+from src.collectors import BinanceCollector, CoinbaseCollector, KrakenCollector
+from src.collectors.base import Connection, backoff_delay
+from src.collectors.sequence import RecentTradeIds
+
+
+async def _noop(trades):
+    pass
+
+
+def _coinbase_match(trade_id, product_id="BTC-USD"):
+    return {
+        "type": "match", "trade_id": trade_id, "product_id": product_id, "size": "0.5",
+        "price": "50000.00", "side": "buy", "time": "2025-01-01T12:00:00.000000Z",
+    }
+
+
+class TestCollectorCore:
+    """Test backoff, symbol tables, connection split and gap detection"""
+
+    def test_backoff_grows_with_jitter_and_caps(self):
+        for attempt in range(10):
+            delay = backoff_delay(attempt, base=1, cap=30)
+            expected = min(30, 2 ** attempt)
+            assert expected / 2 <= delay <= expected
+
+    def test_symbol_tables_are_precomputed(self):
+        coinbase = CoinbaseCollector(["BTC-USD", "ETH-USD"], _noop)
+        kraken = KrakenCollector(["XBT/USD", "XRP/USD"], _noop)
+
+        assert coinbase.symbol_map == {"BTC-USD": "BTCUSDT", "ETH-USD": "ETHUSDT"}
+        assert kraken.symbol_map == {"XBT/USD": "BTCUSDT", "XRP/USD": "XRPUSDT"}
+
+    def test_symbols_split_across_connections(self):
+        collector = BinanceCollector(["BTCUSDT", "ETHUSDT", "SOLUSDT"], _noop, connections=2)
+
+        groups = collector.split_symbols()
+
+        assert groups == [["btcusdt", "solusdt"], ["ethusdt"]]
+
+    def test_sequence_gap_detection(self):
+        collector = CoinbaseCollector(["BTC-USD"], _noop)
+        for trade_id in (100, 101, 105, 104):
+            collector.sequence.check(collector.parse_message(_coinbase_match(trade_id)))
+
+        status = collector.sequence.status()["BTCUSDT"]
+        assert status["last_id"] == 105
+        assert status["gaps"] == 1
+        assert status["missing"] == 3
+        assert status["out_of_order"] == 1
+
+
+class TestExchangeParsers:
+    """Test Binance, Coinbase and Kraken message parsing"""
+
+    def test_coinbase_match(self):
+        collector = CoinbaseCollector(["BTC-USD"], _noop)
+
+        trades = collector.parse_message(_coinbase_match(7))
+
+        assert trades[0].symbol == "BTCUSDT"
+        assert trades[0].trade_id == "7"
+        # "side" is the maker's; the taker that printed the trade sold into a resting bid
+        assert trades[0].side.value == "sell"
+        taker_buy = collector.parse_message({**_coinbase_match(8), "side": "sell"})
+        assert taker_buy[0].side.value == "buy"
+        assert collector.parse_message({"type": "subscriptions", "channels": []}) is None
+
+    def test_binance_agg_trade_side_is_the_taker(self):
+        collector = BinanceCollector(["BTCUSDT"], _noop)
+
+        def agg_trade(buyer_is_maker):
+            return {"stream": "btcusdt@aggTrade", "data": {
+                "e": "aggTrade", "s": "BTCUSDT", "a": 9, "p": "50000.0", "q": "0.1",
+                "T": 1735732800123, "m": buyer_is_maker}}
+
+        assert collector.parse_message(agg_trade(True))[0].side.value == "sell"
+        assert collector.parse_message(agg_trade(False))[0].side.value == "buy"
+
+    def test_kraken_trades(self):
+        collector = KrakenCollector(["XBT/USD"], _noop)
+        message = [0, [["50000.1", "0.25", "1735732800.123456", "s", "m", ""]], "trade", "XBT/USD"]
+
+        trades = collector.parse_message(message)
+
+        assert len(trades) == 1
+        assert trades[0].symbol == "BTCUSDT"
+        assert trades[0].side.value == "sell"
+        assert collector.parse_message({"event": "heartbeat"}) is None
+
+
+class _OpenSocket:
+    state = State.OPEN
+
+
+class TestRedundantConnections:
+    """Test hot-standby deduplication and promotion"""
+
+    def test_duplicate_frames_are_dropped(self):
+        collector = CoinbaseCollector(["BTC-USD"], _noop, redundant=True)
+        frame = json.dumps(_coinbase_match(42))
+        now = datetime.now(timezone.utc)
+
+        first = collector.parse_frame(frame, now)
+        second = collector.parse_frame(frame, now)
+
+        assert len(first) == 1
+        assert not second
+        assert collector.sequence.status()["BTCUSDT"]["out_of_order"] == 0
+
+    def test_kraken_fills_at_same_time_and_price_are_kept(self):
+        collector = KrakenCollector(["XBT/USD"], _noop, redundant=True)
+        fill = ["50000.1", "0.25", "1735732800.123456", "b", "m", ""]
+        frame = json.dumps([0, [fill, list(fill)], "trade", "XBT/USD"])
+        now = datetime.now(timezone.utc)
+
+        first = collector.parse_frame(frame, now)
+        second = collector.parse_frame(frame, now)
+
+        assert len(first) == 2
+        assert first[0].trade_id != first[1].trade_id
+        assert not second
+
+    def test_recent_ids_are_bounded(self):
+        ids = RecentTradeIds(capacity=3)
+        for i in range(5):
+            assert ids.add("BTCUSDT", str(i))
+
+        assert len(ids) == 3
+        assert ids.add("BTCUSDT", "0")  # Evicted, so accepted again
+        assert not ids.add("BTCUSDT", "4")
+        assert ids.add("ETHUSDT", "4")  # Keyed by symbol too
+
+    def test_standby_promoted_when_primary_drops(self):
+        collector = CoinbaseCollector(["BTC-USD"], _noop, redundant=True)
+        primary = Connection(0, ["BTC-USD"], "primary")
+        standby = Connection(0, ["BTC-USD"], "standby")
+        standby.ws = _OpenSocket()
+        collector.connections = [primary, standby]
+
+        collector._promote_standby(primary)
+
+        assert standby.role == "primary"
+        assert primary.role == "standby"
+        assert collector.failovers == 1
+
+    def test_closing_standby_is_not_promoted(self):
+        collector = CoinbaseCollector(["BTC-USD"], _noop, redundant=True)
+        primary = Connection(0, ["BTC-USD"], "primary")
+        standby = Connection(0, ["BTC-USD"], "standby")
+        standby.ws = _OpenSocket()
+        standby.ws.state = State.CLOSING
+        collector.connections = [primary, standby]
+
+        collector._promote_standby(primary)
+
+        assert primary.role == "primary"
+        assert not standby.status()["connected"]
@@ -0,0 +1,79 @@
+"""
+Tests for the collector receive/parse/dispatch pipeline
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+from src.collectors.base import BaseCollector
+from src.collectors.pipeline import StageQueue, BackpressurePolicy
+from src.models import Trade, Exchange, Side
+
+
+class _EchoCollector(BaseCollector):
+    """Parses {"p": price} frames into one trade each"""
+
+    def get_ws_url(self):
+        return "ws://localhost"
+
+    def get_subscribe_message(self, symbols):
+        return {}
+
+    def parse_message(self, message):
+        return [Trade(exchange=Exchange.BYBIT, symbol="BTCUSDT", price=message["p"], quantity=1.0,
+                      side=Side.BUY, timestamp=datetime.now(timezone.utc), trade_id=str(message["p"]))]
+
+
+class TestStageQueue:
+    """Test backpressure policies"""
+
+    def test_drop_newest(self):
+        async def scenario():
+            q = StageQueue("test", "drop_newest", 2, BackpressurePolicy.DROP_NEWEST)
+            results = [await q.put(i) for i in range(4)]
+            return results, [q.get_nowait(), q.get_nowait()], q.dropped
+
+        results, items, dropped = asyncio.run(scenario())
+        assert results == [True, True, False, False]
+        assert items == [0, 1]
+        assert dropped == 2
+
+    def test_drop_oldest(self):
+        async def scenario():
+            q = StageQueue("test", "drop_oldest", 2, BackpressurePolicy.DROP_OLDEST)
+            for i in range(4):
+                await q.put(i)
+            return [q.get_nowait(), q.get_nowait()], q.dropped
+
+        items, dropped = asyncio.run(scenario())
+        assert items == [2, 3]
+        assert dropped == 2
+
+
+class TestCollectorPipeline:
+    """Test that a slow consumer does not stall the reader"""
+
+    def test_slow_callback_does_not_block_reader_and_batches_coalesce(self):
+        batches = []
+
+        async def slow_on_trade(trades):
+            batches.append(len(trades))
+            await asyncio.sleep(0.05)
+
+        async def scenario():
+            collector = _EchoCollector(Exchange.BYBIT, ["BTCUSDT"], slow_on_trade)
+            collector._start_stages()
+            started = time.perf_counter()
+            for i in range(200):
+                await collector.raw_queue.put((None, json.dumps({"p": 100.0 + i})))
+            enqueue_time = time.perf_counter() - started
+            await collector._stop_stages(drain_timeout=5)
+            return enqueue_time
+
+        enqueue_time = asyncio.run(scenario())
+
+        assert enqueue_time < 0.05
+        assert sum(batches) == 200
+        assert len(batches) < 200
@@ -73,15 +73,66 @@ BYBIT_WS_URL = "wss://stream.bybit.com/v5/public/spot"
 BINANCE_WS_URL = "wss://stream.binance.com/stream"
 
 # Data retention (seconds)
-TRADES_RETENTION = int(os.getenv("TRADES_RETENTION", "3600"))  # 1 hour
+TRADES_RETENTION = int(os.getenv("TRADES_RETENTION", "3600"))  # 1 hour of raw trades
 INDICATORS_RETENTION = int(os.getenv("INDICATORS_RETENTION", "86400"))  # 24 hours
+BARS_1S_RETENTION = int(os.getenv("BARS_1S_RETENTION", str(7 * 86400)))  # 1s bars with order flow, 7 days
+BARS_1M_RETENTION = int(os.getenv("BARS_1M_RETENTION", str(180 * 86400)))  # 1m bars, profiles and CVD, ~6 months
+COMPACTION_INTERVAL = int(os.getenv("COMPACTION_INTERVAL", "60"))  # Seconds between roll-up/expiry passes
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "5000"))  # Documents read or deleted per batch
+COMPACTION_MAX_BATCHES = int(os.getenv("COMPACTION_MAX_BATCHES", "50"))  # Per symbol/exchange and tier in one pass
+STATS_SAMPLE_INTERVAL = int(os.getenv("STATS_SAMPLE_INTERVAL", "15"))  # Seconds between storage stats samples
+MARKET_STATS_PUBLISH_INTERVAL = float(os.getenv("MARKET_STATS_PUBLISH_INTERVAL", "2"))  # Rolling 24h stats publish/refresh
+MARKET_STATS_STALE_SECONDS = float(os.getenv("MARKET_STATS_STALE_SECONDS", "30"))  # Older published stats fall back to Mongo
+PAGINATION_COUNT_LIMIT = int(os.getenv("PAGINATION_COUNT_LIMIT", "100000"))  # Cap on approximate page totals
+INDICATOR_FEED_INTERVAL = float(os.getenv("INDICATOR_FEED_INTERVAL", "0.5"))  # Indicator update publish/poll period
+INDICATOR_FEED_BUFFER = int(os.getenv("INDICATOR_FEED_BUFFER", "10000"))  # Updates kept in memory for resume
+INDICATOR_FEED_CAP_BYTES = int(os.getenv("INDICATOR_FEED_CAP_BYTES", str(64 * 1024 * 1024)))  # Capped collection size
+INDICATOR_FEED_GAP_TIMEOUT = float(os.getenv("INDICATOR_FEED_GAP_TIMEOUT", "2"))  # Wait for a missing sequence number
+INDICATOR_FEED_MAX_RATE = float(os.getenv("INDICATOR_FEED_MAX_RATE", "10"))  # Messages per second per subscriber
+MARKET_CONTEXT_TIMEFRAMES = os.getenv("MARKET_CONTEXT_TIMEFRAMES", "1h,4h,15m,5m,1d").split(",")  # By priority
+MARKET_CONTEXT_MAX_TOKENS = int(os.getenv("MARKET_CONTEXT_MAX_TOKENS", "400"))  # Default snapshot budget
 
 # Collector settings
-WS_RECONNECT_INTERVAL = int(os.getenv("WS_RECONNECT_INTERVAL", "5"))
+WS_RECONNECT_INTERVAL = int(os.getenv("WS_RECONNECT_INTERVAL", "5"))  # First reconnect delay, doubles per attempt
+WS_RECONNECT_MAX = int(os.getenv("WS_RECONNECT_MAX", "60"))  # Backoff ceiling
 WS_PING_INTERVAL = int(os.getenv("WS_PING_INTERVAL", "30"))
+WS_STALE_TIMEOUT = int(os.getenv("WS_STALE_TIMEOUT", "60"))  # Recycle a connection silent for this long
+WS_CONNECTIONS_PER_EXCHANGE = int(os.getenv("WS_CONNECTIONS_PER_EXCHANGE", "1"))
+WS_REDUNDANT = os.getenv("WS_REDUNDANT", "false").lower() == "true"  # Hot-standby connection per stream group
+WS_DEDUP_CAPACITY = int(os.getenv("WS_DEDUP_CAPACITY", "50000"))  # Recent trade IDs kept for deduplication
+COLLECTOR_RAW_QUEUE_SIZE = int(os.getenv("COLLECTOR_RAW_QUEUE_SIZE", "10000"))  # Frames buffered between socket and parser
+COLLECTOR_RAW_POLICY = os.getenv("COLLECTOR_RAW_POLICY", "block")  # block | drop_newest | drop_oldest
+COLLECTOR_DISPATCH_QUEUE_SIZE = int(os.getenv("COLLECTOR_DISPATCH_QUEUE_SIZE", "2000"))  # Parsed batches awaiting on_trade
+COLLECTOR_DISPATCH_POLICY = os.getenv("COLLECTOR_DISPATCH_POLICY", "block")
+COLLECTOR_DISPATCH_BATCH = int(os.getenv("COLLECTOR_DISPATCH_BATCH", "1000"))  # Max trades coalesced per on_trade call
+COLLECTOR_DISPATCH_LINGER = float(os.getenv("COLLECTOR_DISPATCH_LINGER", "0.01"))  # Seconds to wait for a fuller batch
 BUFFER_SIZE = int(os.getenv("BUFFER_SIZE", "10000"))
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "50"))  # Reduced for faster processing
 
+# Sharding (multi-process ingest, 1 = single process)
+SHARD_COUNT = int(os.getenv("WADM_SHARDS", "1"))
+SHARD_VIRTUAL_NODES = int(os.getenv("SHARD_VIRTUAL_NODES", "64"))  # Hash ring points per shard
+SHARD_REPORT_INTERVAL = float(os.getenv("SHARD_REPORT_INTERVAL", "5"))  # Seconds between status/checkpoints
+SHARD_RESTART_BACKOFF_MAX = float(os.getenv("SHARD_RESTART_BACKOFF_MAX", "60"))
+
+# SMC execution
+SMC_WORKERS = int(os.getenv("SMC_WORKERS", "2"))  # Analysis processes, 0 runs SMC on the event loop
+SMC_MIN_TRADES = int(os.getenv("SMC_MIN_TRADES", "100"))  # Trades in the last hour needed to analyze a symbol
+SMC_HISTORY_HOURS = int(os.getenv("SMC_HISTORY_HOURS", "48"))  # Trade history mirrored into each worker
+SMC_MAX_SIGNALS_PER_SYMBOL = int(os.getenv("SMC_MAX_SIGNALS_PER_SYMBOL", "50"))  # Signal history kept per symbol
+SMC_COLD_ZONE_HOURS = int(os.getenv("SMC_COLD_ZONE_HOURS", "12"))  # Zones price has not approached for this long move to storage
+SMC_MAINTENANCE_SECONDS = int(os.getenv("SMC_MAINTENANCE_SECONDS", "60"))  # Interval between expiry/compaction passes
+
+# Observability
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))  # Collector process /metrics, 0 disables
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "2048"))  # Samples kept per stage/exchange
+LATENCY_OTEL_ENABLED = os.getenv("LATENCY_OTEL_ENABLED", "false").lower() == "true"
+LATENCY_OTEL_SAMPLE_RATE = float(os.getenv("LATENCY_OTEL_SAMPLE_RATE", "0.01"))  # Fraction of batches exported as spans
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))  # Seconds between lag ticks
+LOOP_SLOW_CALLBACK_THRESHOLD = float(os.getenv("LOOP_SLOW_CALLBACK_THRESHOLD", "0.1"))  # Stall (s) that captures a stack
+LOOP_MONITOR_ASYNCIO_DEBUG = os.getenv("LOOP_MONITOR_ASYNCIO_DEBUG", "false").lower() == "true"
+
 # Indicator settings with PRECISION
 VOLUME_PROFILE_BINS = 50  # Number of price bins for volume profile
 ORDER_FLOW_WINDOW = 60  # Seconds to calculate order flow delta
@@ -165,9 +216,63 @@ class Config:
     BYBIT_WS_URL = BYBIT_WS_URL
     BINANCE_WS_URL = BINANCE_WS_URL
     
+    # Collector connections and pipeline
+    WS_RECONNECT_INTERVAL = WS_RECONNECT_INTERVAL
+    WS_RECONNECT_MAX = WS_RECONNECT_MAX
+    WS_STALE_TIMEOUT = WS_STALE_TIMEOUT
+    WS_CONNECTIONS_PER_EXCHANGE = WS_CONNECTIONS_PER_EXCHANGE
+    WS_REDUNDANT = WS_REDUNDANT
+    WS_DEDUP_CAPACITY = WS_DEDUP_CAPACITY
+    COLLECTOR_RAW_QUEUE_SIZE = COLLECTOR_RAW_QUEUE_SIZE
+    COLLECTOR_RAW_POLICY = COLLECTOR_RAW_POLICY
+    COLLECTOR_DISPATCH_QUEUE_SIZE = COLLECTOR_DISPATCH_QUEUE_SIZE
+    COLLECTOR_DISPATCH_POLICY = COLLECTOR_DISPATCH_POLICY
+    COLLECTOR_DISPATCH_BATCH = COLLECTOR_DISPATCH_BATCH
+    COLLECTOR_DISPATCH_LINGER = COLLECTOR_DISPATCH_LINGER
+    
     # Data retention
     TRADES_RETENTION = TRADES_RETENTION
     INDICATORS_RETENTION = INDICATORS_RETENTION
+    BARS_1S_RETENTION = BARS_1S_RETENTION
+    BARS_1M_RETENTION = BARS_1M_RETENTION
+    COMPACTION_INTERVAL = COMPACTION_INTERVAL
+    COMPACTION_BATCH_SIZE = COMPACTION_BATCH_SIZE
+    COMPACTION_MAX_BATCHES = COMPACTION_MAX_BATCHES
+    STATS_SAMPLE_INTERVAL = STATS_SAMPLE_INTERVAL
+    MARKET_STATS_PUBLISH_INTERVAL = MARKET_STATS_PUBLISH_INTERVAL
+    MARKET_STATS_STALE_SECONDS = MARKET_STATS_STALE_SECONDS
+    PAGINATION_COUNT_LIMIT = PAGINATION_COUNT_LIMIT
+    INDICATOR_FEED_INTERVAL = INDICATOR_FEED_INTERVAL
+    INDICATOR_FEED_BUFFER = INDICATOR_FEED_BUFFER
+    INDICATOR_FEED_CAP_BYTES = INDICATOR_FEED_CAP_BYTES
+    INDICATOR_FEED_GAP_TIMEOUT = INDICATOR_FEED_GAP_TIMEOUT
+    INDICATOR_FEED_MAX_RATE = INDICATOR_FEED_MAX_RATE
+    MARKET_CONTEXT_TIMEFRAMES = MARKET_CONTEXT_TIMEFRAMES
+    MARKET_CONTEXT_MAX_TOKENS = MARKET_CONTEXT_MAX_TOKENS
+    
+    # Sharding
+    SHARD_COUNT = SHARD_COUNT
+    SHARD_VIRTUAL_NODES = SHARD_VIRTUAL_NODES
+    SHARD_REPORT_INTERVAL = SHARD_REPORT_INTERVAL
+    SHARD_RESTART_BACKOFF_MAX = SHARD_RESTART_BACKOFF_MAX
+    
+    # SMC execution
+    SMC_WORKERS = SMC_WORKERS
+    SMC_MIN_TRADES = SMC_MIN_TRADES
+    SMC_HISTORY_HOURS = SMC_HISTORY_HOURS
+    SMC_MAX_SIGNALS_PER_SYMBOL = SMC_MAX_SIGNALS_PER_SYMBOL
+    SMC_COLD_ZONE_HOURS = SMC_COLD_ZONE_HOURS
+    SMC_MAINTENANCE_SECONDS = SMC_MAINTENANCE_SECONDS
+    
+    # Observability
+    METRICS_PORT = METRICS_PORT
+    LATENCY_WINDOW = LATENCY_WINDOW
+    LATENCY_OTEL_ENABLED = LATENCY_OTEL_ENABLED
+    LATENCY_OTEL_SAMPLE_RATE = LATENCY_OTEL_SAMPLE_RATE
+    LOOP_MONITOR_ENABLED = LOOP_MONITOR_ENABLED
+    LOOP_MONITOR_INTERVAL = LOOP_MONITOR_INTERVAL
+    LOOP_SLOW_CALLBACK_THRESHOLD = LOOP_SLOW_CALLBACK_THRESHOLD
+    LOOP_MONITOR_ASYNCIO_DEBUG = LOOP_MONITOR_ASYNCIO_DEBUG
     
     # Institutional settings
     FOOTPRINT_TICK_SIZE = FOOTPRINT_TICK_SIZE
@@ -0,0 +1,389 @@
+"""
+Indicator update feed
+The manager appends every volume profile, order flow and SMC result it
+produces to the capped ``indicator_updates`` collection under one global
+sequence number (reserved atomically, so shard processes never collide); API
+processes tail the collection and push updates to SSE/WebSocket subscribers.
+
+Per subscriber the feed applies filters (symbols, indicators, exchanges,
+timeframes), coalesces pending updates per indicator key so a slow or
+rate-capped client always receives the latest state, and sends each key as a
+full payload first and as a JSON merge patch (changed fields and bins only,
+``null`` for removed ones) after that. Every message carries its sequence
+number; a client reconnecting with ``since`` gets the current state of every
+key updated after it, or a ``resync`` and a snapshot when it is too far behind.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from pymongo import ReturnDocument
+from pymongo.errors import CollectionInvalid
+
+from src.config import (
+    INDICATOR_FEED_BUFFER, INDICATOR_FEED_CAP_BYTES, INDICATOR_FEED_GAP_TIMEOUT,
+    INDICATOR_FEED_INTERVAL, INDICATOR_FEED_MAX_RATE
+)
+from src.latency import as_utc
+from src.logger import get_logger
+from src.metrics import INDICATOR_FEED_MESSAGES, INDICATOR_FEED_PUBLISHED
+
+logger = get_logger(__name__)
+
+FEED_COLLECTION = "indicator_updates"
+
+_KEY_FIELDS = ("indicator", "symbol", "exchange", "timeframe")
+_ENVELOPE_FIELDS = ("symbol", "exchange", "latency")
+_MISSING = object()
+
+_coalesced = INDICATOR_FEED_MESSAGES.labels("coalesced")
+
+
+def feed_key(doc: Dict[str, Any]) -> str:
+    return ":".join(str(doc[field]) for field in _KEY_FIELDS)
+
+
+def indicator_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Indicator ``to_dict`` output without the fields the feed envelope already carries"""
+    return {key: value for key, value in data.items() if key not in _ENVELOPE_FIELDS}
+
+
+def merge_patch(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    JSON merge patch (RFC 7386) turning ``previous`` into ``current``.
+
+    Nested objects such as ``volume_distribution`` are diffed per key, so only
+    changed bins travel; lists and scalars are replaced whole.
+    """
+    patch: Dict[str, Any] = {}
+    for key, value in current.items():
+        old = previous.get(key, _MISSING)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = merge_patch(old, value)
+            if nested:
+                patch[key] = nested
+        elif old is _MISSING or old != value:
+            patch[key] = value
+    for key in previous:
+        if key not in current:
+            patch[key] = None
+    return patch
+
+
+def apply_patch(target: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a merge patch, as a client would; returns a new dict"""
+    result = dict(target)
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = apply_patch(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def ensure_collection(db, cap_bytes: int = INDICATOR_FEED_CAP_BYTES):
+    """Create the capped feed collection and its sequence index if missing (blocking)"""
+    if FEED_COLLECTION not in db.list_collection_names():
+        try:
+            db.create_collection(FEED_COLLECTION, capped=True, size=cap_bytes)
+        except CollectionInvalid:
+            pass  # Another shard created it first
+    db[FEED_COLLECTION].create_index("seq", unique=True)
+
+
+class IndicatorFeedPublisher:
+    """
+    Buffers indicator results between flushes (manager side).
+
+    Results for the same key published within one flush interval collapse
+    into the latest, so the feed never carries states nobody could see.
+    """
+
+    def __init__(self):
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, indicator: str, symbol: str, exchange: str, timeframe: str, data: Dict[str, Any]):
+        doc = {
+            "indicator": indicator,
+            "symbol": symbol,
+            "exchange": exchange,
+            "timeframe": timeframe,
+            "data": data,
+            "published_at": datetime.now(timezone.utc),
+        }
+        key = feed_key(doc)
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = doc
+
+    def flush(self, db) -> int:
+        """Number pending results and append them to the feed (blocking)"""
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+        if not pending:
+            return 0
+        docs = list(pending.values())
+        try:
+            counter = db.counters.find_one_and_update(
+                {"_id": FEED_COLLECTION}, {"$inc": {"seq": len(docs)}},
+                upsert=True, return_document=ReturnDocument.AFTER)
+            first = counter["seq"] - len(docs) + 1
+            for offset, doc in enumerate(docs):
+                doc["seq"] = first + offset
+            db[FEED_COLLECTION].insert_many(docs, ordered=False)
+        except Exception:
+            # Put results back unless a newer one arrived meanwhile; readers skip the reserved gap
+            with self._lock:
+                for key, doc in pending.items():
+                    if key not in self._pending:
+                        doc.pop("seq", None)
+                        doc.pop("_id", None)
+                        self._pending[key] = doc
+            raise
+        for doc in docs:
+            INDICATOR_FEED_PUBLISHED.labels(doc["indicator"]).inc()
+        return len(docs)
+
+
+@dataclass(frozen=True)
+class FeedFilter:
+    """Subscriber filters; None matches everything"""
+    symbols: Optional[FrozenSet[str]] = None
+    indicators: Optional[FrozenSet[str]] = None
+    exchanges: Optional[FrozenSet[str]] = None
+    timeframes: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def from_params(cls, symbols: Optional[Iterable[str]] = None, indicators: Optional[Iterable[str]] = None,
+                    exchanges: Optional[Iterable[str]] = None,
+                    timeframes: Optional[Iterable[str]] = None) -> "FeedFilter":
+        """Build from lists or comma separated strings"""
+        def parse(values):
+            if values is None:
+                return None
+            if isinstance(values, str):
+                values = values.split(",")
+            values = frozenset(v.strip() for v in values if v and v.strip())
+            return values or None
+        return cls(parse(symbols), parse(indicators), parse(exchanges), parse(timeframes))
+
+    def matches(self, doc: Dict[str, Any]) -> bool:
+        return ((self.symbols is None or doc["symbol"] in self.symbols)
+                and (self.indicators is None or doc["indicator"] in self.indicators)
+                and (self.exchanges is None or doc["exchange"] in self.exchanges)
+                and (self.timeframes is None or doc["timeframe"] in self.timeframes))
+
+
+class Subscription:
+    """
+    One client's view of the feed.
+
+    Pending updates are kept per key (newer replaces older) and sent in
+    sequence order, at most ``max_rate`` messages per second, so the ``seq``
+    of every message sent is a safe resume point.
+    """
+
+    def __init__(self, filters: FeedFilter, max_rate: float = INDICATOR_FEED_MAX_RATE):
+        self.filters = filters
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.sent: Dict[str, Dict[str, Any]] = {}
+        self.resync = False
+        self._ready = asyncio.Event()
+        self._next_at = 0.0
+
+    def offer(self, doc: Dict[str, Any]):
+        if not self.filters.matches(doc):
+            return
+        key = feed_key(doc)
+        if key in self.pending:
+            _coalesced.inc()
+        self.pending[key] = doc
+        self._ready.set()
+
+    def replace_filters(self, filters: FeedFilter, snapshot: Iterable[Dict[str, Any]]):
+        """Switch filters; pending updates outside them are dropped and new keys start from ``snapshot``"""
+        self.filters = filters
+        self.pending = {key: doc for key, doc in self.pending.items() if filters.matches(doc)}
+        for doc in snapshot:
+            if filters.matches(doc) and feed_key(doc) not in self.sent:
+                self.offer(doc)
+
+    async def next_message(self) -> Dict[str, Any]:
+        """Wait for the next message; cancelling it never loses an update"""
+        if self.resync:
+            self.resync = False
+            return {"type": "resync"}
+        while not self.pending:
+            self._ready.clear()
+            await self._ready.wait()
+        loop = asyncio.get_running_loop()
+        delay = self._next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)  # Updates arriving meanwhile coalesce
+        key = min(self.pending, key=lambda k: self.pending[k]["seq"])
+        doc = self.pending.pop(key)
+        self._next_at = loop.time() + self.min_interval
+        return self._encode(key, doc)
+
+    def _encode(self, key: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+        message = {field: doc[field] for field in _KEY_FIELDS}
+        message["seq"] = doc["seq"]
+        message["published_at"] = doc["published_at"]
+        previous = self.sent.get(key)
+        if previous is None:
+            message["type"] = "full"
+            message["data"] = doc["data"]
+        else:
+            message["type"] = "delta"
+            message["patch"] = merge_patch(previous, doc["data"])
+        self.sent[key] = doc["data"]
+        INDICATOR_FEED_MESSAGES.labels(message["type"]).inc()
+        return message
+
+
+class IndicatorFeed:
+    """
+    Tails ``indicator_updates`` and fans updates out to subscriptions (API side).
+
+    Updates are delivered in sequence order. A missing number (a publisher
+    between reserving and inserting, or a failed insert) holds delivery for
+    up to ``gap_timeout`` seconds before it is skipped.
+    """
+
+    def __init__(self, interval: float = INDICATOR_FEED_INTERVAL, buffer_size: int = INDICATOR_FEED_BUFFER,
+                 gap_timeout: float = INDICATOR_FEED_GAP_TIMEOUT):
+        self.interval = interval
+        self.gap_timeout = gap_timeout
+        self.db = None
+        self.buffer: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self.last_seq = 0
+        self.subscriptions: Set[Subscription] = set()
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._gap_since: Optional[float] = None
+        self._loaded = False
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, db):
+        if self.db is None:
+            self.db = db
+
+    def _find(self, query: Dict[str, Any], direction: int, limit: int) -> List[Dict[str, Any]]:
+        docs = list(self.db[FEED_COLLECTION].find(query, {"_id": 0}).sort("seq", direction).limit(limit))
+        for doc in docs:
+            doc["published_at"] = as_utc(doc["published_at"])
+        return docs
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Most recent updates, oldest first, to seed the buffer (blocking)"""
+        docs = self._find({}, -1, self.buffer.maxlen)
+        docs.reverse()
+        if docs:
+            self.last_seq = docs[-1]["seq"]
+        return docs
+
+    def poll(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Updates after ``last_seq`` that can be delivered in order (blocking)"""
+        now = time.monotonic() if now is None else now
+        accepted = []
+        for doc in self._find({"seq": {"$gt": self.last_seq}}, 1, self.buffer.maxlen):
+            if doc["seq"] != self.last_seq + 1:
+                if self._gap_since is None:
+                    self._gap_since = now
+                if now - self._gap_since < self.gap_timeout:
+                    break
+                logger.warning(f"Indicator feed skipped seq {self.last_seq + 1}..{doc['seq'] - 1}")
+            self._gap_since = None
+            self.last_seq = doc["seq"]
+            accepted.append(doc)
+        return accepted
+
+    def ingest(self, docs: Iterable[Dict[str, Any]]):
+        """Record updates and offer them to every subscription (event loop thread)"""
+        for doc in docs:
+            self.buffer.append(doc)
+            self.latest[feed_key(doc)] = doc
+            for listener in self.listeners:
+                try:
+                    listener(doc)
+                except Exception as e:
+                    # A failing listener must not cut the update off from subscribers
+                    logger.error(f"Indicator feed listener {listener!r} failed: {e}", exc_info=True)
+            for subscription in self.subscriptions:
+                subscription.offer(doc)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Latest update of every key, in sequence order"""
+        return sorted(self.latest.values(), key=lambda doc: doc["seq"])
+
+    def versions(self, symbol: str, timeframes: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Sequence number of the latest update per indicator/exchange/timeframe of ``symbol``"""
+        timeframes = set(timeframes) if timeframes is not None else None
+        return {
+            f"{doc['indicator']}:{doc['exchange']}:{doc['timeframe']}": doc["seq"]
+            for doc in self.latest.values()
+            if doc["symbol"] == symbol and (timeframes is None or doc["timeframe"] in timeframes)
+        }
+
+    def subscribe(self, filters: FeedFilter, since: Optional[int] = None,
+                  max_rate: float = INDICATOR_FEED_MAX_RATE) -> Subscription:
+        """
+        New subscription, primed with what the client is missing: a snapshot
+        without ``since``, the latest state of keys updated after ``since``
+        when the buffer still covers it, else a resync and a snapshot.
+        """
+        subscription = Subscription(filters, max_rate)
+        oldest = self.buffer[0]["seq"] if self.buffer else self.last_seq + 1
+        if since is not None and since >= oldest - 1:
+            replay = (doc for doc in self.buffer if doc["seq"] > since)
+        else:
+            subscription.resync = since is not None
+            replay = self.snapshot()
+        for doc in replay:
+            subscription.offer(doc)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call ``listener`` with every update, on the event loop, before subscribers see it"""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    def start(self):
+        """Tail the feed in the background on the running loop"""
+        if self._task is None and self.db is not None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                if not self._loaded:
+                    self.ingest(await asyncio.to_thread(self.load))
+                    self._loaded = True
+                self.ingest(await asyncio.to_thread(self.poll))
+            except Exception as e:
+                logger.error(f"Indicator feed poll error: {e}")
+            await asyncio.sleep(self.interval)
+
+
+indicator_feed = IndicatorFeed()
@@ -0,0 +1,210 @@
+"""
+End-to-end latency tracking
+Rolling percentile summaries of the time a trade spends in each pipeline stage,
+from exchange timestamp to a served indicator, with optional OpenTelemetry export.
+
+Stages:
+    network    exchange trade time -> message received by the collector
+    parse      message received -> trades parsed
+    persist    message received -> trades written to MongoDB
+    indicator  newest input trade persisted -> indicator published (scheduler wait + compute)
+    end_to_end exchange trade time -> indicator published
+    serve      indicator published -> returned by the API (staleness at read time)
+"""
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.config import LATENCY_WINDOW, LATENCY_OTEL_ENABLED, LATENCY_OTEL_SAMPLE_RATE
+from src.logger import get_logger
+from src.metrics import Gauge
+
+logger = get_logger(__name__)
+
+STAGES = ("network", "parse", "persist", "indicator", "end_to_end", "serve")
+QUANTILES = (0.5, 0.9, 0.99)
+
+LATENCY_QUANTILE = Gauge(
+    "wadm_latency_seconds", "Rolling latency percentiles per pipeline stage",
+    ["stage", "exchange", "quantile"])
+
+
+def as_utc(value: Any) -> Optional[datetime]:
+    """Normalise stored timestamps (naive UTC from Mongo, ISO strings) to aware UTC"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class _Window:
+    """Fixed-size ring of recent samples with lazily sorted percentiles"""
+    __slots__ = ("samples", "_sorted", "_dirty")
+
+    def __init__(self, size: int):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self._sorted: List[float] = []
+        self._dirty = False
+
+    def add(self, value: float):
+        self.samples.append(value)
+        self._dirty = True
+
+    def quantile(self, q: float) -> float:
+        if self._dirty:
+            self._sorted = sorted(self.samples)
+            self._dirty = False
+        if not self._sorted:
+            return float("nan")
+        index = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+        return self._sorted[index]
+
+
+class LatencyTracker:
+    """Per stage/exchange rolling latency windows"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._windows: Dict[Tuple[str, str], _Window] = {}
+        self._tracer = _init_tracer() if LATENCY_OTEL_ENABLED else None
+
+    def record(self, stage: str, exchange: str, seconds: float):
+        """Add one latency sample (seconds)"""
+        window = self._windows.get((stage, exchange))
+        if window is None:
+            window = self._windows[(stage, exchange)] = _Window(self.window)
+            for q in QUANTILES:
+                LATENCY_QUANTILE.labels(stage, exchange, str(q)).set_function(
+                    lambda window=window, q=q: window.quantile(q))
+        window.add(seconds)
+
+    def record_trades(self, exchange: str, trades: List[Any], parsed_at: float):
+        """
+        Record network and parse latency for one parsed message.
+
+        Args:
+            exchange: Exchange name
+            trades: Trades parsed from the message (carry ``received_at``)
+            parsed_at: time.time() when parsing finished
+        """
+        if not trades:
+            return
+        received = trades[0].received_at
+        if received is None:
+            return
+        received_ts = received.timestamp()
+        self.record("parse", exchange, parsed_at - received_ts)
+        for trade in trades:
+            self.record("network", exchange, received_ts - trade.timestamp.timestamp())
+
+        if self._tracer and random.random() < LATENCY_OTEL_SAMPLE_RATE:
+            newest = max(trades, key=lambda t: t.timestamp)
+            self._export("trade.network", exchange, newest.timestamp.timestamp(), received_ts,
+                         symbol=newest.symbol)
+            self._export("trade.parse", exchange, received_ts, parsed_at, symbol=newest.symbol)
+
+    def record_persist(self, exchange: str, trades: List[Any], persisted_at: datetime):
+        """Record receive -> MongoDB write latency for one batch"""
+        received = [t.received_at for t in trades if t.received_at is not None]
+        if not received:
+            return
+        start = min(received).timestamp()
+        end = persisted_at.timestamp()
+        self.record("persist", exchange, end - start)
+        if self._tracer and random.random() < LATENCY_OTEL_SAMPLE_RATE:
+            self._export("trade.persist", exchange, start, end, symbol=trades[0].symbol)
+
+    def stamp_indicator(self, trades: List[Dict[str, Any]], indicator: str,
+                        exchange: str) -> Optional[Dict[str, Any]]:
+        """
+        Build the latency stamp stored with an indicator and record its stages.
+
+        Args:
+            trades: Trade documents the indicator was computed from
+            indicator: Indicator name (used for span names)
+            exchange: Exchange name
+
+        Returns:
+            Dict with source_time, received_at, persisted_at and published_at
+        """
+        if not trades:
+            return None
+        newest = max(trades, key=lambda t: as_utc(t["timestamp"]))
+        published_at = datetime.now(timezone.utc)
+        source_time = as_utc(newest["timestamp"])
+        persisted_at = as_utc(newest.get("persisted_at"))
+
+        self.record("end_to_end", exchange, (published_at - source_time).total_seconds())
+        if persisted_at:
+            self.record("indicator", exchange, (published_at - persisted_at).total_seconds())
+
+        if self._tracer and random.random() < LATENCY_OTEL_SAMPLE_RATE:
+            self._export(f"indicator.{indicator}", exchange, source_time.timestamp(),
+                         published_at.timestamp(), symbol=newest.get("symbol"))
+
+        return {
+            "source_time": source_time,
+            "received_at": as_utc(newest.get("received_at")),
+            "persisted_at": persisted_at,
+            "published_at": published_at,
+        }
+
+    def record_served(self, exchange: Optional[str], stamp: Optional[Dict[str, Any]]) -> Optional[float]:
+        """Record and return the age (ms) of an indicator at the time it is served"""
+        if not stamp or not stamp.get("published_at"):
+            return None
+        age = (datetime.now(timezone.utc) - as_utc(stamp["published_at"])).total_seconds()
+        self.record("serve", exchange or "all", age)
+        return round(age * 1000, 1)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Percentiles in milliseconds keyed by stage then exchange"""
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (stage, exchange), window in list(self._windows.items()):
+            if not window.samples:
+                continue
+            result.setdefault(stage, {})[exchange] = {
+                "count": len(window.samples),
+                "p50_ms": round(window.quantile(0.5) * 1000, 2),
+                "p90_ms": round(window.quantile(0.9) * 1000, 2),
+                "p99_ms": round(window.quantile(0.99) * 1000, 2),
+                "max_ms": round(max(window.samples) * 1000, 2),
+            }
+        return result
+
+    def _export(self, name: str, exchange: str, start: float, end: float, **attributes):
+        try:
+            span = self._tracer.start_span(name, start_time=int(start * 1e9))
+            span.set_attribute("wadm.exchange", exchange)
+            for key, value in attributes.items():
+                if value is not None:
+                    span.set_attribute(f"wadm.{key}", value)
+            span.end(end_time=int(end * 1e9))
+        except Exception as e:
+            logger.debug(f"Span export failed: {e}")
+
+
+def _init_tracer():
+    """OTLP tracer for a local collector, or None if the SDK is not installed"""
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        logger.warning("LATENCY_OTEL_ENABLED set but opentelemetry-sdk / OTLP exporter not installed")
+        return None
+
+    # Endpoint comes from the standard OTEL_EXPORTER_OTLP_ENDPOINT variable
+    provider = TracerProvider(resource=Resource.create({"service.name": "wadm"}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    logger.info("Latency spans exported via OTLP")
+    return provider.get_tracer("wadm.latency")
+
+
+latency_tracker = LatencyTracker()
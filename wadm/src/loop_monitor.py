@@ -0,0 +1,289 @@
+"""
+Event loop health monitoring
+Tick drift, slow-callback capture with stack attribution and an on-demand
+sampling profiler producing flamegraph-ready folded stacks.
+
+A ticker coroutine measures how late the loop wakes it up. A watchdog thread
+notices when the ticker is overdue and snapshots the loop thread's stack at that
+moment, which attributes blocking work (pymongo calls, CPU-bound detectors) to
+the code actually holding the loop. asyncio's own debug-mode slow callback
+warnings can be captured as well, but debug mode has a real cost and is off by
+default.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as StackCounter, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from src.config import (
+    LOOP_MONITOR_INTERVAL, LOOP_SLOW_CALLBACK_THRESHOLD, LOOP_MONITOR_ASYNCIO_DEBUG
+)
+from src.logger import get_logger
+from src.metrics import Counter, Gauge, Histogram
+
+logger = get_logger(__name__)
+
+LOOP_LAG_SECONDS = Histogram(
+    "wadm_event_loop_lag_seconds", "Delay between scheduled and actual monitor tick", ["process"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+LOOP_LAG_MAX = Gauge(
+    "wadm_event_loop_lag_max_seconds", "Largest tick delay since the previous scrape", ["process"])
+LOOP_SLOW_CALLBACKS = Counter(
+    "wadm_event_loop_slow_callbacks_total", "Loop stalls longer than the slow callback threshold",
+    ["process", "source"])
+PROFILER_SAMPLES = Counter(
+    "wadm_profiler_samples_total", "Stack samples taken by the sampling profiler", ["process"])
+
+MAX_STACK_DEPTH = 64
+MAX_SLOW_CALLBACKS = 100
+MAX_PROFILE_STACKS = 20_000
+
+
+def _format_stack(frame, limit: int = MAX_STACK_DEPTH) -> List[str]:
+    """Outermost-first list of 'file:line function' entries"""
+    entries = traceback.extract_stack(frame, limit=limit)
+    return [f"{e.filename}:{e.lineno} {e.name}" for e in entries]
+
+
+def _folded(frame, limit: int = MAX_STACK_DEPTH) -> str:
+    """Collapsed stack (root;...;leaf) as consumed by flamegraph.pl / speedscope"""
+    names = []
+    while frame is not None and len(names) < limit:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling one thread's stack from a background thread.
+
+    Aggregates collapsed stacks in memory, so cost is one frame walk per sample and
+    the output is bounded by MAX_PROFILE_STACKS distinct stacks.
+    """
+
+    def __init__(self, process: str, thread_id: int):
+        self.process = process
+        self.thread_id = thread_id
+        self.stacks: StackCounter = StackCounter()
+        self.samples = 0
+        self.hz = 0
+        self.started_at: Optional[datetime] = None
+        self.stopped_at: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._samples_metric = PROFILER_SAMPLES.labels(process)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, hz: int = 100, duration: Optional[float] = None):
+        """Start sampling (resets previous results). Stops by itself after ``duration`` seconds."""
+        if self.running:
+            return
+        self.stacks = StackCounter()
+        self.samples = 0
+        self.hz = hz
+        self.started_at = datetime.now(timezone.utc)
+        self.stopped_at = None
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(1.0 / hz, duration), name="wadm-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started at {hz} Hz" + (f" for {duration}s" if duration else ""))
+
+    def stop(self):
+        if self._thread:
+            self._stop.set()
+            self._thread.join(timeout=2)
+            self._thread = None
+        logger.info(f"Sampling profiler stopped after {self.samples} samples")
+
+    def _run(self, period: float, duration: Optional[float]):
+        deadline = time.monotonic() + duration if duration else None
+        while not self._stop.wait(period):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = _folded(frame)
+                if stack in self.stacks or len(self.stacks) < MAX_PROFILE_STACKS:
+                    self.stacks[stack] += 1
+                self.samples += 1
+                self._samples_metric.inc()
+            if deadline and time.monotonic() >= deadline:
+                break
+        self.stopped_at = datetime.now(timezone.utc)
+
+    def folded(self) -> str:
+        """Folded stacks, one 'stack count' line each, hottest first"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "hz": self.hz,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks),
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+
+class _AsyncioSlowCallbackHandler(logging.Handler):
+    """Captures asyncio debug-mode 'Executing ... took N seconds' warnings"""
+
+    def __init__(self, monitor: "LoopMonitor"):
+        super().__init__(level=logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record: logging.LogRecord):
+        message = record.getMessage()
+        if message.startswith("Executing ") and " took " in message:
+            try:
+                duration = float(message.rsplit(" took ", 1)[1].split()[0])
+            except (ValueError, IndexError):
+                duration = 0.0
+            self.monitor._add_slow_callback("asyncio_debug", duration, [message])
+
+
+class LoopMonitor:
+    """
+    Event loop health monitor for one process.
+
+    Usage:
+        monitor = LoopMonitor("manager")
+        monitor.start()          # from inside the running loop
+        monitor.report()         # lag statistics and recent slow callbacks
+        monitor.profiler.start() # on demand
+    """
+
+    def __init__(self, process: str, interval: float = LOOP_MONITOR_INTERVAL,
+                 slow_threshold: float = LOOP_SLOW_CALLBACK_THRESHOLD,
+                 asyncio_debug: bool = LOOP_MONITOR_ASYNCIO_DEBUG):
+        self.process = process
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.asyncio_debug = asyncio_debug
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.profiler: Optional[SamplingProfiler] = None
+
+        self.slow_callbacks: Deque[Dict[str, Any]] = deque(maxlen=MAX_SLOW_CALLBACKS)
+        self.recent_lags: Deque[float] = deque(maxlen=600)
+        self._max_lag = 0.0
+        self._last_tick = 0.0
+        self._ticker: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._debug_handler: Optional[_AsyncioSlowCallbackHandler] = None
+
+        self._lag_metric = LOOP_LAG_SECONDS.labels(process)
+        LOOP_LAG_MAX.labels(process).set_function(self._take_max_lag)
+
+    def start(self):
+        """Start monitoring the running loop"""
+        if self._ticker:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.profiler = SamplingProfiler(self.process, self.loop_thread_id)
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+
+        self._ticker = self.loop.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="wadm-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+        if self.asyncio_debug:
+            self.loop.set_debug(True)
+            self.loop.slow_callback_duration = self.slow_threshold
+            self._debug_handler = _AsyncioSlowCallbackHandler(self)
+            logging.getLogger("asyncio").addHandler(self._debug_handler)
+
+        logger.info(f"Loop monitor started for {self.process} "
+                    f"(tick {self.interval * 1000:.0f} ms, slow threshold {self.slow_threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        self._stop.set()
+        if self.profiler and self.profiler.running:
+            self.profiler.stop()
+        if self._ticker:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        if self._debug_handler:
+            logging.getLogger("asyncio").removeHandler(self._debug_handler)
+            self._debug_handler = None
+
+    async def _tick(self):
+        loop = self.loop
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_tick = time.monotonic()
+            self._lag_metric.observe(lag)
+            self.recent_lags.append(lag)
+            if lag > self._max_lag:
+                self._max_lag = lag
+
+    def _watch(self):
+        """Snapshot the loop thread's stack once per stall"""
+        check = min(self.slow_threshold / 2, 0.05)
+        captured_for = None
+        while not self._stop.wait(check):
+            overdue = time.monotonic() - self._last_tick - self.interval
+            if overdue < self.slow_threshold:
+                captured_for = None
+                continue
+            if captured_for == self._last_tick:
+                continue  # Same stall, already captured
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            captured_for = self._last_tick
+            self._add_slow_callback("watchdog", overdue, _format_stack(frame))
+
+    def _add_slow_callback(self, source: str, duration: float, stack: List[str]):
+        LOOP_SLOW_CALLBACKS.labels(self.process, source).inc()
+        self.slow_callbacks.append({
+            "timestamp": datetime.now(timezone.utc),
+            "source": source,
+            "stalled_ms": round(duration * 1000, 1),
+            "stack": stack,
+        })
+
+    def _take_max_lag(self) -> float:
+        value, self._max_lag = self._max_lag, 0.0
+        return value
+
+    def report(self, include_stacks: bool = True) -> Dict[str, Any]:
+        """Lag percentiles over the recent window and the captured slow callbacks"""
+        lags = sorted(self.recent_lags)
+
+        def pct(q):
+            return round(lags[min(len(lags) - 1, int(q * len(lags)))] * 1000, 2) if lags else None
+
+        slow = list(self.slow_callbacks)
+        if not include_stacks:
+            slow = [{k: v for k, v in entry.items() if k != "stack"} for entry in slow]
+        return {
+            "process": self.process,
+            "interval_ms": self.interval * 1000,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "asyncio_debug": self.asyncio_debug,
+            "lag_ms": {"p50": pct(0.5), "p90": pct(0.9), "p99": pct(0.99),
+                       "max": round(lags[-1] * 1000, 2) if lags else None, "samples": len(lags)},
+            "slow_callbacks": slow,
+            "profiler": self.profiler.status() if self.profiler else None,
+        }
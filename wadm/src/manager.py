@@ -3,19 +3,34 @@ Main WADM Manager - Coordinates collectors and indicators
 UPDATED: Time-based indicator calculation instead of trade count
 """
 import asyncio
+import json
+import time
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 from collections import defaultdict
 from src.collectors import BybitCollector, BinanceCollector, CoinbaseCollector, KrakenCollector
 from src.indicators import VolumeProfileCalculator, OrderFlowCalculator
 from src.storage import StorageManager
+from src.storage.retention import RetentionCompactor
+from src.storage.stats import ingest_counters, stats_sampler
+from src.market_stats import MarketStatsEngine, publish_documents
+from src.indicator_feed import IndicatorFeedPublisher, ensure_collection, indicator_payload
 from src.models import Trade
 from src.config import (
     BYBIT_SYMBOLS, BINANCE_SYMBOLS, COINBASE_SYMBOLS, KRAKEN_SYMBOLS, 
-    BATCH_SIZE, ORDER_FLOW_WINDOW, BUFFER_SIZE
+    BATCH_SIZE, ORDER_FLOW_WINDOW, BUFFER_SIZE, METRICS_PORT, LOOP_MONITOR_ENABLED,
+    BASE_SYMBOLS, COMPACTION_INTERVAL, MARKET_STATS_PUBLISH_INTERVAL, INDICATOR_FEED_INTERVAL,
+    convert_symbol_format
 )
 from src.smc import SMCDashboard
+from src.smc.executor import SMCExecutor
 from src.logger import get_logger
+from src.metrics import (
+    PERSIST_BATCH_SECONDS, TRADES_PERSISTED, QUEUE_DEPTH,
+    INDICATOR_SECONDS, INDICATOR_SKIPPED, INDICATOR_ERRORS, BadRequest, start_metrics_server
+)
+from src.latency import latency_tracker
+from src.loop_monitor import LoopMonitor
 
 logger = get_logger(__name__)
 
@@ -86,10 +101,41 @@ PRIORITY_LEVELS = {
 class WADMManager:
     """Main manager for WADM system with time-based calculations"""
     
-    def __init__(self):
+    def __init__(self, symbols: Optional[List[str]] = None, shard_id: Optional[int] = None,
+                 metrics_port: int = METRICS_PORT):
+        """
+        Args:
+            symbols: Base symbols (BTCUSDT format) handled by this manager; all configured if None
+            shard_id: Shard number when running under the ShardSupervisor
+            metrics_port: Port for /metrics (0 disables)
+        """
+        self.shard_id = shard_id
+        self.metrics_port = metrics_port
+        if symbols is None:
+            self.symbols = {
+                "bybit": BYBIT_SYMBOLS,
+                "binance": BINANCE_SYMBOLS,
+                "coinbase": COINBASE_SYMBOLS,
+                "kraken": KRAKEN_SYMBOLS,
+            }
+        else:
+            self.symbols = {
+                "bybit": list(symbols),
+                "binance": list(symbols),
+                "coinbase": convert_symbol_format(symbols, "coinbase"),
+                "kraken": convert_symbol_format(symbols, "kraken"),
+            }
+        
         self.storage = StorageManager()
         self.order_flow_calc = OrderFlowCalculator()
         self.smc_dashboard = SMCDashboard(self.storage)
+        self.smc_executor = SMCExecutor(self.storage, self.smc_dashboard)
+        # Trades are stored under the base symbol whatever the exchange's format
+        self.retention = RetentionCompactor(self.storage.db, symbols if symbols is not None else BASE_SYMBOLS)
+        self.retention.ensure_indexes()
+        self.market_stats = MarketStatsEngine()
+        self.indicator_feed = IndicatorFeedPublisher()
+        ensure_collection(self.storage.db)
         
         # Trade buffers per symbol/exchange
         self.trade_buffers = defaultdict(list)
@@ -120,6 +166,16 @@ class WADMManager:
             "market_profiles": 0
         }
         
+        # Queue depths are read when /metrics is scraped, not on every trade
+        QUEUE_DEPTH.labels("trade_buffers").set_function(
+            lambda: sum(len(buffer) for buffer in self.trade_buffers.values()))
+        QUEUE_DEPTH.labels("indicator_calculations").set_function(lambda: self.running_calculations)
+        self.metrics_server = None
+        # Due calculations already counted as deferred, until they are scheduled
+        self.deferred_tasks: Set[Tuple[str, str, str, str]] = set()
+        process_name = "manager" if shard_id is None else f"shard-{shard_id}"
+        self.loop_monitor = LoopMonitor(process_name) if LOOP_MONITOR_ENABLED else None
+        
         logger.info("WADM Manager initialized with complete timeframe system")
         logger.info(f"Available timeframes: {list(STANDARD_TIMEFRAMES.keys())}")
         logger.info(f"Configured indicators: {list(INDICATOR_TIMEFRAMES.keys())}")
@@ -132,19 +188,34 @@ class WADMManager:
     async def on_trades(self, trades: List[Trade]):
         """Handle incoming trades from collectors"""
         self.stats["trades_received"] += len(trades)
+        self.market_stats.record(trades)
         
         # Save trades immediately
-        saved = self.storage.save_trades(trades)
+        exchange = trades[0].exchange.value if trades else "unknown"
+        started = time.perf_counter()
+        # Blocking insert_many runs off the event loop so collectors keep reading
+        saved = await asyncio.to_thread(self.storage.save_trades, trades)
+        PERSIST_BATCH_SECONDS.labels(exchange).observe(time.perf_counter() - started)
+        TRADES_PERSISTED.labels(exchange).inc(saved)
+        if saved:
+            latency_tracker.record_persist(exchange, trades, datetime.now(timezone.utc))
+            ingest_counters.record(exchange, saved, max(trade.timestamp for trade in trades))
         self.stats["trades_processed"] += saved
         
         # Buffer trades for indicator calculation
+        batch_counts = defaultdict(int)
         for trade in trades:
+            batch_counts[trade.symbol] += 1
             key = f"{trade.exchange.value}:{trade.symbol}"
             self.trade_buffers[key].append(trade)
             
             # Limit buffer size
             if len(self.trade_buffers[key]) > BUFFER_SIZE:
                 self.trade_buffers[key] = self.trade_buffers[key][-BUFFER_SIZE:]
+        
+        # Activity counters for the SMC pre-check
+        for symbol, count in batch_counts.items():
+            self.smc_executor.record(symbol, count)
     
     def should_calculate_indicator(self, indicator: str, symbol: str, 
                                   exchange: str, timeframe: str) -> bool:
@@ -168,6 +239,10 @@ class WADMManager:
         
         return elapsed >= interval_seconds
     
+    @staticmethod
+    def _task_key(task_info: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        return task_info["indicator"], task_info["symbol"], task_info["exchange"], task_info["timeframe"]
+    
     def get_indicator_priority(self, indicator: str) -> int:
         """Get priority level for an indicator (lower = higher priority)"""
         config = INDICATOR_TIMEFRAMES.get(indicator, {})
@@ -180,12 +255,16 @@ class WADMManager:
         if not self.should_calculate_indicator(indicator, symbol, exchange, timeframe):
             return
         
-        # Check resource limits
-        if self.running_calculations >= self.max_concurrent_calculations:
+        # SMC has its own budget (worker slots); everything else shares the calculation slots
+        smc = indicator == "smc"
+        if not self._has_capacity(indicator, symbol):
             logger.warning(f"Resource limit hit, skipping {indicator} calculation")
+            INDICATOR_SKIPPED.labels(indicator, "resource_limit").inc()
             return
         
-        self.running_calculations += 1
+        if not smc:
+            self.running_calculations += 1
+        started = time.perf_counter()
         
         try:
             if indicator == "volume_profile":
@@ -193,10 +272,11 @@ class WADMManager:
             elif indicator == "order_flow":
                 await self.calculate_order_flow(symbol, exchange, timeframe)
             elif indicator == "smc":
-                await self.calculate_smc_analysis(symbol)
+                await self.calculate_smc_analysis(symbol, timeframe)
             # TODO: Add other indicators as they are implemented
             else:
                 logger.debug(f"Indicator {indicator} not yet implemented")
+                INDICATOR_SKIPPED.labels(indicator, "not_implemented").inc()
             
             # Mark as completed
             key = f"{indicator}:{symbol}:{exchange}:{timeframe}"
@@ -205,8 +285,11 @@ class WADMManager:
         except Exception as e:
             logger.error(f"Error calculating {indicator} for {symbol}/{exchange} at {timeframe}: {e}")
             self.stats["errors"] += 1
+            INDICATOR_ERRORS.labels(indicator).inc()
         finally:
-            self.running_calculations -= 1
+            if not smc:
+                self.running_calculations -= 1
+            INDICATOR_SECONDS.labels(indicator, timeframe).observe(time.perf_counter() - started)
     
     async def calculate_volume_profile(self, symbol: str, exchange: str, timeframe: str):
         """Calculate Volume Profile for specific timeframe"""
@@ -216,11 +299,15 @@ class WADMManager:
             trades = self.storage.get_recent_trades(symbol, exchange, minutes=minutes)
             
             if len(trades) < 20:
+                INDICATOR_SKIPPED.labels("volume_profile", "insufficient_data").inc()
                 return
             
             valid_trades = self._validate_and_format_trades(trades)
             vp = VolumeProfileCalculator.calculate(valid_trades, symbol, exchange)
+            vp.latency = latency_tracker.stamp_indicator(trades, "volume_profile", exchange)
             self.storage.save_volume_profile(vp)
+            self.indicator_feed.publish("volume_profile", symbol, exchange, timeframe,
+                                        indicator_payload(vp.to_dict()))
             self.stats["volume_profiles"] += 1
             
             logger.debug(f"[VP-{timeframe}] {symbol}/{exchange}: POC={vp.poc:.2f}")
@@ -237,12 +324,16 @@ class WADMManager:
             trades = self.storage.get_recent_trades(symbol, exchange, minutes=minutes)
             
             if len(trades) < 10:
+                INDICATOR_SKIPPED.labels("order_flow", "insufficient_data").inc()
                 return
             
             valid_trades = self._validate_and_format_trades(trades)
             prev_flow = self.storage.get_latest_order_flow(symbol, exchange)
             of = self.order_flow_calc.calculate(valid_trades[-100:], symbol, exchange, prev_flow)
+            of.latency = latency_tracker.stamp_indicator(trades, "order_flow", exchange)
             self.storage.save_order_flow(of)
+            self.indicator_feed.publish("order_flow", symbol, exchange, timeframe,
+                                        indicator_payload(of.to_dict()))
             self.stats["order_flows"] += 1
             
             logger.debug(f"[OF-{timeframe}] {symbol}/{exchange}: Delta={of.delta:.2f}")
@@ -277,14 +368,7 @@ class WADMManager:
                 
                 # Get all active symbol/exchange pairs
                 active_pairs = set()
-                for exchange in ["bybit", "binance", "coinbase", "kraken"]:
-                    symbols = {
-                        "bybit": BYBIT_SYMBOLS,
-                        "binance": BINANCE_SYMBOLS,  
-                        "coinbase": COINBASE_SYMBOLS,
-                        "kraken": KRAKEN_SYMBOLS
-                    }.get(exchange, [])
-                    
+                for exchange, symbols in self.symbols.items():
                     for symbol in symbols:
                         active_pairs.add((symbol, exchange))
                 
@@ -314,8 +398,13 @@ class WADMManager:
                 executed_tasks = 0
                 max_tasks_per_cycle = 20  # Prevent overwhelming the system
                 
-                for task_info in calculation_tasks[:max_tasks_per_cycle]:
-                    if self.running_calculations < self.max_concurrent_calculations:
+                due = {self._task_key(task_info) for task_info in calculation_tasks}
+                self.deferred_tasks &= due
+                for task_info in calculation_tasks:
+                    key = self._task_key(task_info)
+                    if executed_tasks < max_tasks_per_cycle and \
+                            self._has_capacity(task_info["indicator"], task_info["symbol"]):
+                        self.deferred_tasks.discard(key)
                         asyncio.create_task(
                             self.calculate_indicator_for_timeframe(
                                 task_info["indicator"],
@@ -325,8 +414,10 @@ class WADMManager:
                             )
                         )
                         executed_tasks += 1
-                    else:
-                        break
+                    elif key not in self.deferred_tasks:
+                        # Due but not scheduled; retried every cycle, counted once until it runs
+                        self.deferred_tasks.add(key)
+                        INDICATOR_SKIPPED.labels(task_info["indicator"], "deferred").inc()
                 
                 if executed_tasks > 0:
                     logger.debug(f"Scheduled {executed_tasks} calculation tasks "
@@ -346,6 +437,9 @@ class WADMManager:
                 
                 current_time = int(datetime.now().timestamp())
                 
+                # Per-exchange ingest counts read by the status endpoints
+                await asyncio.to_thread(ingest_counters.flush, self.storage.db)
+                
                 # Log stats every 30 seconds
                 if current_time % 30 == 0 and current_time != last_stats_time:
                     logger.info("=== WADM Stats (Dynamic Timeframes) ===")
@@ -368,32 +462,64 @@ class WADMManager:
                     
                 # Cleanup old data every hour
                 if current_time - last_cleanup_time > 3600:
-                    self.storage.cleanup_old_data()
+                    await asyncio.to_thread(self.storage.cleanup_old_data)
                     last_cleanup_time = current_time
                     logger.info("Cleaned up old data")
                     
             except Exception as e:
                 logger.error(f"Error in periodic tasks: {e}", exc_info=True)
     
-    async def calculate_smc_analysis(self, symbol: str):
+    async def publish_market_stats(self):
+        """Publish rolling 24h stats for the API; windows are built here, written in a thread"""
+        while self.running:
+            try:
+                await asyncio.sleep(MARKET_STATS_PUBLISH_INTERVAL)
+                docs = self.market_stats.documents()
+                await asyncio.to_thread(publish_documents, self.storage.db, docs)
+            except Exception as e:
+                logger.error(f"Error publishing market stats: {e}", exc_info=True)
+    
+    async def publish_indicator_updates(self):
+        """Append indicator results to the update feed the API pushes to subscribers"""
+        while self.running:
+            try:
+                await asyncio.sleep(INDICATOR_FEED_INTERVAL)
+                await asyncio.to_thread(self.indicator_feed.flush, self.storage.db)
+            except Exception as e:
+                logger.error(f"Error publishing indicator updates: {e}", exc_info=True)
+    
+    async def retention_compaction(self):
+        """Roll trades up into bars and expire old tiers, in a thread off the ingest path"""
+        while self.running:
+            try:
+                await asyncio.sleep(COMPACTION_INTERVAL)
+                await asyncio.to_thread(self.retention.run_pass)
+            except Exception as e:
+                logger.error(f"Error in retention compaction: {e}", exc_info=True)
+    
+    def _has_capacity(self, indicator: str, symbol: str) -> bool:
+        """Whether the scheduler may start ``indicator`` for ``symbol`` now"""
+        if indicator == "smc":
+            return self.smc_executor.has_capacity(symbol)
+        return self.running_calculations < self.max_concurrent_calculations
+    
+    async def calculate_smc_analysis(self, symbol: str, timeframe: str = "15m"):
         """Calculate Smart Money Concepts analysis for a symbol"""
         try:
-            # Check if we have sufficient data
-            total_trades = 0
-            for exchange in ["bybit", "binance", "coinbase", "kraken"]:
-                recent_trades = self.storage.get_recent_trades(symbol, exchange, minutes=60)
-                total_trades += len(recent_trades)
-            
-            if total_trades < 100:
+            # Check if we have sufficient data (in-memory counts, no database round trip)
+            if not self.smc_executor.ready(symbol):
+                INDICATOR_SKIPPED.labels("smc", "insufficient_data").inc()
                 return
             
-            # Get comprehensive SMC analysis
-            smc_analysis = await self.smc_dashboard.get_comprehensive_analysis(symbol)
+            # Get comprehensive SMC analysis (worker process, or joins one already running)
+            smc_analysis = await self.smc_executor.analyze(symbol)
+            # SMC analyses every exchange together
+            self.indicator_feed.publish("smc", symbol, "all", timeframe, indicator_payload(smc_analysis))
             
             self.stats["smc_analyses"] += 1
             
-            logger.info(f"[SMC] {symbol}: {smc_analysis.smc_bias.value} bias, "
-                       f"{smc_analysis.confluence_score:.1f}% confluence")
+            logger.info(f"[SMC] {symbol}: {smc_analysis['smc_bias']} bias, "
+                       f"{smc_analysis['confluence_score']:.1f}% confluence")
             
         except Exception as e:
             logger.error(f"Error in SMC analysis for {symbol}: {e}")
@@ -437,19 +563,27 @@ class WADMManager:
         """Start the manager"""
         logger.info("Starting WADM Manager with time-based calculations...")
         self.running = True
+        if self.loop_monitor:
+            self.loop_monitor.start()
+        stats_sampler.start()
+        # Debug routes expose stacks and start the profiler; only answer them on this host
+        self.metrics_server = await start_metrics_server(self.metrics_port, local_routes={
+            "/debug/loop": self._loop_report_route,
+            "/debug/profile": self._profile_route,
+        })
         
         # Create collectors
-        if BYBIT_SYMBOLS:
-            self.collectors.append(BybitCollector(BYBIT_SYMBOLS, self.on_trades))
+        if self.symbols["bybit"]:
+            self.collectors.append(BybitCollector(self.symbols["bybit"], self.on_trades))
         
-        if BINANCE_SYMBOLS:
-            self.collectors.append(BinanceCollector(BINANCE_SYMBOLS, self.on_trades))
+        if self.symbols["binance"]:
+            self.collectors.append(BinanceCollector(self.symbols["binance"], self.on_trades))
         
-        if COINBASE_SYMBOLS:
-            self.collectors.append(CoinbaseCollector(COINBASE_SYMBOLS, self.on_trades))
+        if self.symbols["coinbase"]:
+            self.collectors.append(CoinbaseCollector(self.symbols["coinbase"], self.on_trades))
         
-        if KRAKEN_SYMBOLS:
-            self.collectors.append(KrakenCollector(KRAKEN_SYMBOLS, self.on_trades))
+        if self.symbols["kraken"]:
+            self.collectors.append(KrakenCollector(self.symbols["kraken"], self.on_trades))
         
         # Start all tasks
         tasks = []
@@ -461,6 +595,9 @@ class WADMManager:
         # Start calculation loops
         tasks.append(asyncio.create_task(self.periodic_calculations()))
         tasks.append(asyncio.create_task(self.periodic_tasks()))
+        tasks.append(asyncio.create_task(self.retention_compaction()))
+        tasks.append(asyncio.create_task(self.publish_market_stats()))
+        tasks.append(asyncio.create_task(self.publish_indicator_updates()))
         
         logger.info(f"Started {len(self.collectors)} collectors")
         logger.info("Dynamic timeframe calculations active:")
@@ -483,11 +620,70 @@ class WADMManager:
         for collector in self.collectors:
             await collector.stop()
         
+        if self.metrics_server:
+            self.metrics_server.close()
+        if self.loop_monitor:
+            await self.loop_monitor.stop()
+        await stats_sampler.stop()
+        self.smc_executor.shutdown()
+        
         # Close storage
         self.storage.close()
         
         logger.info("WADM Manager stopped")
     
+    async def _loop_report_route(self, query: Dict[str, str]):
+        """GET /debug/loop on the metrics port (loopback only): loop lag and slow callback report"""
+        if not self.loop_monitor:
+            return "application/json", b'{"enabled": false}'
+        return "application/json", json.dumps(self.loop_monitor.report(), default=str).encode()
+    
+    async def _profile_route(self, query: Dict[str, str]):
+        """GET /debug/profile?seconds=10&hz=100 on the metrics port (loopback only): folded stacks"""
+        if not self.loop_monitor:
+            return "text/plain", b"loop monitor disabled\n"
+        try:
+            seconds = float(query.get("seconds", "10"))
+            hz = int(query.get("hz", "100"))
+        except ValueError:
+            raise BadRequest("seconds and hz must be numbers")
+        if not (0 < seconds < float("inf")) or hz <= 0:
+            raise BadRequest("seconds and hz must be positive")
+        seconds = min(seconds, 120.0)
+        hz = min(hz, 1000)
+        profiler = self.loop_monitor.profiler
+        if profiler.running:
+            return "text/plain", b"profiler already running\n"
+        profiler.start(hz=hz, duration=seconds)
+        await asyncio.sleep(seconds + 0.1)
+        profiler.stop()
+        return "text/plain", profiler.folded().encode()
+    
+    def export_state(self) -> Dict[str, Any]:
+        """Checkpoint handed to a replacement process when a shard restarts"""
+        return {
+            "last_calc_times": {key: ts.isoformat() for key, ts in self.last_calc_times.items()},
+            "stats": dict(self.stats),
+        }
+    
+    def restore_state(self, state: Dict[str, Any]):
+        """Resume the indicator schedule and counters from export_state()"""
+        for key, ts in state.get("last_calc_times", {}).items():
+            self.last_calc_times[key] = datetime.fromisoformat(ts)
+        for key, value in state.get("stats", {}).items():
+            if key in self.stats:
+                self.stats[key] = value
+        logger.info(f"Restored state: {len(self.last_calc_times)} scheduled calculations")
+    
+    def get_shard_status(self) -> Dict[str, Any]:
+        """Lightweight status reported to the shard supervisor (no database round trips)"""
+        return {
+            "running": self.running,
+            "collectors": len(self.collectors),
+            "stats": dict(self.stats),
+            "running_calculations": self.running_calculations,
+        }
+    
     def get_status(self) -> Dict[str, Any]:
         """Get system status"""
         now = datetime.now(timezone.utc)
@@ -502,8 +698,13 @@ class WADMManager:
         return {
             "running": self.running,
             "collectors": len(self.collectors),
+            "pipelines": {
+                collector.exchange.value: collector.pipeline_status()
+                for collector in self.collectors if hasattr(collector, "pipeline_status")
+            },
             "stats": self.stats,
             "storage": self.storage.get_stats(),
+            "retention": self.retention.status(),
             "timeframes": {
                 "available": list(STANDARD_TIMEFRAMES.keys()),
                 "indicators": list(INDICATOR_TIMEFRAMES.keys())
@@ -513,6 +714,7 @@ class WADMManager:
                 "max_concurrent": self.max_concurrent_calculations,
                 "utilization": f"{(self.running_calculations / self.max_concurrent_calculations * 100):.1f}%"
             },
+            "smc_executor": self.smc_executor.status(),
             "recent_calculations": recent_by_indicator,
             "total_scheduled_combinations": sum(len(config["timeframes"]) for config in INDICATOR_TIMEFRAMES.values())
         }
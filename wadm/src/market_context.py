@@ -0,0 +1,287 @@
+"""
+Compact market context snapshots
+Per symbol, the latest key levels an analyst (human, LLM or MCP tool) needs:
+price and 24h range, SMC bias and support/resistance, volume profile POC /
+value area / high volume nodes, order flow delta and CVD across exchanges,
+and VWAP with one and two standard deviation bands.
+
+The snapshot follows the indicator feed (every update replaces one small
+per-key summary) and the mirrored market stats, and renders into sections
+kept in priority order under a token budget, as compact text or JSON. A
+rendering is cached until the next update, so reads are O(1).
+"""
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from math import sqrt
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config import MARKET_CONTEXT_MAX_TOKENS, MARKET_CONTEXT_TIMEFRAMES
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+HVN_COUNT = 3  # High volume nodes kept per volume profile
+SMC_LEVELS = 3  # Support/resistance levels kept per side
+FORMATS = ("text", "json")
+
+
+def estimate_tokens(text: str) -> int:
+    """Same estimate the LLM providers bill with"""
+    return len(text) // 4
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _num(value: Optional[float]) -> Optional[float]:
+    """Six significant digits: enough for levels, half the characters of a raw float"""
+    return float(f"{value:.6g}") if value is not None else None
+
+
+def _fmt(value: Optional[float], signed: bool = False) -> str:
+    if value is None:
+        return "n/a"
+    return f"{value:+.6g}" if signed else f"{value:.6g}"
+
+
+@dataclass
+class Section:
+    """One line of context; lower ``rank`` survives a tighter budget"""
+    name: str
+    group: str  # "market_data" or "indicators"
+    rank: Tuple[int, int]
+    data: Dict[str, Any]
+    text: str
+
+
+class _SymbolState:
+    __slots__ = ("volume_profile", "order_flow", "smc", "version", "updated_at", "stamp", "sections", "renders")
+
+    def __init__(self):
+        self.volume_profile: Dict[str, Dict[str, Dict[str, Any]]] = {}  # timeframe -> exchange -> levels
+        self.order_flow: Dict[str, Dict[str, Dict[str, Any]]] = {}  # timeframe -> exchange -> flow
+        self.smc: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.updated_at: Optional[datetime] = None
+        self.stamp = None
+        self.sections: List[Section] = []
+        self.renders: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+
+def _volume_profile_levels(data: Dict[str, Any]) -> Dict[str, Any]:
+    distribution = data.get("volume_distribution") or {}
+    nodes = sorted(distribution.items(), key=lambda item: item[1], reverse=True)[:HVN_COUNT]
+    return {
+        "poc": _num(data.get("poc")),
+        "vah": _num(data.get("vah")),
+        "val": _num(data.get("val")),
+        "hvn": [_num(float(price)) for price, _ in nodes],
+        "total_volume": data.get("total_volume") or 0.0,
+    }
+
+
+def _order_flow_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: data.get(field) or 0.0 for field in ("buy_volume", "sell_volume", "delta", "cumulative_delta")}
+
+
+def _smc_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "bias": data.get("smc_bias"),
+        "trend": data.get("trend_direction"),
+        "confluence": _num(data.get("confluence_score")),
+        "setup": data.get("setup_quality"),
+        "price": _num(data.get("current_price")),
+        "support": [_num(level) for level in (data.get("key_support_levels") or [])[:SMC_LEVELS]],
+        "resistance": [_num(level) for level in (data.get("key_resistance_levels") or [])[:SMC_LEVELS]],
+    }
+
+
+class MarketContextService:
+    """
+    Rolling compact context per symbol (API side).
+
+    ``on_update`` is an indicator feed listener; ``market_stats`` is anything
+    with ``get(symbol, timeframe)`` and ``refreshed_at`` (the market stats
+    mirror), read when a snapshot is rebuilt.
+    """
+
+    def __init__(self, timeframes: List[str] = MARKET_CONTEXT_TIMEFRAMES,
+                 max_tokens: int = MARKET_CONTEXT_MAX_TOKENS):
+        self.timeframes = [timeframe.strip() for timeframe in timeframes if timeframe.strip()]
+        self.max_tokens = max_tokens
+        self.market_stats = None
+        self.states: Dict[str, _SymbolState] = {}
+
+    def attach(self, feed, market_stats):
+        """Follow ``feed`` (an IndicatorFeed) and read VWAP and ranges from ``market_stats``"""
+        self.market_stats = market_stats
+        feed.add_listener(self.on_update)
+
+    def _state(self, symbol: str) -> _SymbolState:
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = _SymbolState()
+        return state
+
+    def on_update(self, doc: Dict[str, Any]):
+        """Fold one indicator feed update into its symbol's state"""
+        indicator, timeframe, data = doc["indicator"], doc["timeframe"], doc["data"]
+        if indicator == "smc":
+            summary = _smc_summary(data)
+        elif timeframe not in self.timeframes:
+            return
+        elif indicator == "volume_profile":
+            summary = _volume_profile_levels(data)
+        elif indicator == "order_flow":
+            summary = _order_flow_summary(data)
+        else:
+            return
+        state = self._state(doc["symbol"])
+        if indicator == "smc":
+            state.smc = summary
+        else:
+            by_timeframe = state.volume_profile if indicator == "volume_profile" else state.order_flow
+            by_timeframe.setdefault(timeframe, {})[doc["exchange"]] = summary
+        state.version += 1
+        state.updated_at = doc.get("published_at")
+
+    # Sections
+
+    def _price_section(self, symbol: str, smc: Optional[Dict[str, Any]]) -> Optional[Section]:
+        day = self.market_stats.get(symbol, "1d") if self.market_stats else None
+        if day:
+            data = {"price": _num(day["close"]), "high_24h": _num(day["high"]), "low_24h": _num(day["low"]),
+                    "volume_24h": _num(day["volume"])}
+            text = (f"{_fmt(data['price'])} | 24h H {_fmt(data['high_24h'])} L {_fmt(data['low_24h'])} "
+                    f"vol {_fmt(data['volume_24h'])}")
+        elif smc and smc["price"] is not None:
+            data = {"price": smc["price"]}
+            text = _fmt(smc["price"])
+        else:
+            return None
+        return Section("price", "market_data", (0, 0), data, text)
+
+    @staticmethod
+    def _smc_section(smc: Dict[str, Any]) -> Section:
+        data = {key: value for key, value in smc.items() if key != "price"}
+        text = (f"{smc['bias']} (trend {smc['trend']}), confluence {_fmt(smc['confluence'])}, "
+                f"setup {smc['setup']} | S {' '.join(_fmt(level) for level in smc['support']) or 'n/a'} "
+                f"| R {' '.join(_fmt(level) for level in smc['resistance']) or 'n/a'}")
+        return Section("smc", "indicators", (0, 1), data, text)
+
+    @staticmethod
+    def _volume_profile_section(timeframe: str, rank: int, by_exchange: Dict[str, Dict[str, Any]]) -> Section:
+        # Levels of the most liquid venue
+        levels = max(by_exchange.values(), key=lambda entry: entry["total_volume"])
+        data = {key: levels[key] for key in ("poc", "vah", "val", "hvn")}
+        text = (f"POC {_fmt(data['poc'])} VA {_fmt(data['val'])}-{_fmt(data['vah'])} "
+                f"HVN {' '.join(_fmt(price) for price in data['hvn'])}")
+        return Section(f"volume_profile_{timeframe}", "indicators", (rank, 2), data, text)
+
+    @staticmethod
+    def _order_flow_section(timeframe: str, rank: int, by_exchange: Dict[str, Dict[str, Any]]) -> Section:
+        totals = {field: sum(entry[field] for entry in by_exchange.values())
+                  for field in ("buy_volume", "sell_volume", "delta", "cumulative_delta")}
+        volume = totals["buy_volume"] + totals["sell_volume"]
+        data = {
+            "delta": _num(totals["delta"]),
+            "cvd": _num(totals["cumulative_delta"]),
+            "buy_pct": round(100 * totals["buy_volume"] / volume, 1) if volume else None,
+            "exchanges": len(by_exchange),
+        }
+        text = (f"delta {_fmt(data['delta'], True)} CVD {_fmt(data['cvd'], True)} "
+                f"buy {_fmt(data['buy_pct'])}% ({data['exchanges']} exchanges)")
+        return Section(f"order_flow_{timeframe}", "indicators", (rank, 3), data, text)
+
+    def _vwap_section(self, symbol: str, timeframe: str, rank: int) -> Optional[Section]:
+        window = self.market_stats.get(symbol, timeframe) if self.market_stats else None
+        if not window or not window.get("volume") or "notional_sq" not in window:
+            return None
+        vwap = window["notional"] / window["volume"]
+        sd = sqrt(max(window["notional_sq"] / window["volume"] - vwap * vwap, 0.0))
+        data = {"vwap": _num(vwap), "sd": _num(sd),
+                "band1": [_num(vwap - sd), _num(vwap + sd)], "band2": [_num(vwap - 2 * sd), _num(vwap + 2 * sd)]}
+        text = (f"{_fmt(vwap)} ±1σ {_fmt(vwap - sd)}-{_fmt(vwap + sd)} "
+                f"±2σ {_fmt(vwap - 2 * sd)}-{_fmt(vwap + 2 * sd)}")
+        return Section(f"vwap_{timeframe}", "market_data", (rank, 4), data, text)
+
+    def _build(self, symbol: str, state: _SymbolState) -> List[Section]:
+        sections = [self._price_section(symbol, state.smc)]
+        if state.smc:
+            sections.append(self._smc_section(state.smc))
+        for rank, timeframe in enumerate(self.timeframes, start=1):
+            if state.volume_profile.get(timeframe):
+                sections.append(self._volume_profile_section(timeframe, rank, state.volume_profile[timeframe]))
+            if state.order_flow.get(timeframe):
+                sections.append(self._order_flow_section(timeframe, rank, state.order_flow[timeframe]))
+            sections.append(self._vwap_section(symbol, timeframe, rank))
+        return sorted((section for section in sections if section), key=lambda section: section.rank)
+
+    def sections(self, symbol: str) -> List[Section]:
+        """Every section for ``symbol`` in priority order, rebuilt only after an update"""
+        state = self.states.get(symbol)
+        if state is None:
+            # Only symbols the feed or the market stats know get a state
+            if not (self.market_stats and self.market_stats.get(symbol, "1d")):
+                return []
+            state = self._state(symbol)
+        stamp = (state.version, getattr(self.market_stats, "refreshed_at", None))
+        if state.stamp != stamp:
+            state.sections = self._build(symbol, state)
+            state.renders = {}
+            state.stamp = stamp
+        return state.sections
+
+    def select(self, symbol: str, max_tokens: Optional[int] = None,
+               cost: Callable[[Section], int] = lambda s: estimate_tokens(f"{s.name}: {s.text}\n")
+               ) -> Tuple[List[Section], List[str]]:
+        """Sections that fit ``max_tokens`` in priority order, and the names left out"""
+        budget = max_tokens or self.max_tokens
+        kept, dropped, used = [], [], 0
+        for section in self.sections(symbol):
+            tokens = cost(section)
+            if used + tokens <= budget:
+                kept.append(section)
+                used += tokens
+            else:
+                dropped.append(section.name)
+        return kept, dropped
+
+    def render(self, symbol: str, fmt: str = "text", max_tokens: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Budgeted snapshot, or None when nothing is known about ``symbol``
+
+        Returns:
+            {"symbol", "format", "as_of", "tokens", "omitted", "content"} with
+            ``content`` a string (text) or a dict of section data (json)
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Format must be one of: {', '.join(FORMATS)}")
+        budget = max_tokens or self.max_tokens
+        if not self.sections(symbol):
+            return None
+        state = self.states[symbol]
+        cached = state.renders.get((fmt, budget))
+        if cached is not None:
+            return cached
+
+        header = f"{symbol} context"
+        if fmt == "text":
+            kept, dropped = self.select(symbol, budget - estimate_tokens(header + "\n"))
+            content = "\n".join([header] + [f"{section.name}: {section.text}" for section in kept])
+            tokens = estimate_tokens(content)
+        else:
+            kept, dropped = self.select(
+                symbol, budget - estimate_tokens(_compact_json({"symbol": symbol})),
+                cost=lambda section: estimate_tokens(f'"{section.name}":{_compact_json(section.data)},'))
+            content = {"symbol": symbol, **{section.name: section.data for section in kept}}
+            tokens = estimate_tokens(_compact_json(content))
+        rendered = {"symbol": symbol, "format": fmt, "as_of": state.updated_at, "tokens": tokens,
+                    "omitted": dropped, "content": content}
+        state.renders[(fmt, budget)] = rendered
+        return rendered
+
+
+market_context = MarketContextService()
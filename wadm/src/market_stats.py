@@ -0,0 +1,352 @@
+"""
+Rolling 24h market statistics
+Last price, open/high/low, volume, buy/sell volume, trade count and VWAP per
+symbol and exchange, maintained from ingest over per-minute sub-buckets: a
+trade updates one bucket and the running totals, and expiring a minute
+subtracts one bucket, so the window never rescans trades.
+
+The manager feeds the engine and publishes one small document per
+symbol/exchange to ``market_stats``; API processes mirror those documents in
+memory and answer the stats endpoints without aggregating trades.
+"""
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne
+
+from src.config import MARKET_STATS_PUBLISH_INTERVAL, MARKET_STATS_STALE_SECONDS
+from src.latency import as_utc
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+WINDOW_MINUTES = 24 * 60
+
+# Published windows by timeframe; longer timeframes are served from Mongo
+TIMEFRAME_MINUTES = {"1m": 1, "5m": 5, "15m": 15, "30m": 30, "1h": 60, "4h": 240, "1d": WINDOW_MINUTES}
+
+# notional_sq (sum of price^2 * quantity) gives the volume-weighted price variance for VWAP bands
+_SUMS = ("volume", "buy_volume", "sell_volume", "notional", "notional_sq", "trades")
+
+
+class _Bucket:
+    __slots__ = ("minute", "open", "high", "low", "close", "volume", "buy_volume", "sell_volume",
+                 "notional", "notional_sq", "trades", "first_ts", "last_ts")
+
+    def __init__(self, minute: int, price: float, ts: float):
+        self.minute = minute
+        self.open = self.high = self.low = self.close = price
+        self.volume = self.buy_volume = self.sell_volume = self.notional = self.notional_sq = 0.0
+        self.trades = 0
+        self.first_ts = self.last_ts = ts
+
+
+class RollingStats:
+    """
+    One symbol/exchange over a rolling window of per-minute buckets.
+
+    Sums are running totals. High and low are monotonic deques over bucket
+    extremes, so both stay O(1) amortized as minutes expire; a trade landing
+    in an older bucket (late delivery) marks them for a rebuild on next read.
+    """
+
+    def __init__(self, window_minutes: int = WINDOW_MINUTES):
+        self.window_minutes = window_minutes
+        self.buckets: Deque[_Bucket] = deque()
+        self.totals = dict.fromkeys(_SUMS, 0.0)
+        self.last_price: Optional[float] = None
+        self.last_ts = 0.0
+        self._highs: Deque[Tuple[int, float]] = deque()
+        self._lows: Deque[Tuple[int, float]] = deque()
+        self._extremes_dirty = False
+
+    def add(self, ts: float, price: float, quantity: float, is_buy: bool):
+        minute = int(ts // 60)
+        buckets = self.buckets
+        if buckets and minute < buckets[-1].minute:
+            bucket = self._late_bucket(minute, price, ts)
+            if bucket is None:
+                return  # Older than the window
+        else:
+            if not buckets or minute > buckets[-1].minute:
+                buckets.append(_Bucket(minute, price, ts))
+                self.expire(minute)
+            bucket = buckets[-1]
+
+        if ts < bucket.first_ts:
+            bucket.first_ts, bucket.open = ts, price
+        if ts >= bucket.last_ts:
+            bucket.last_ts, bucket.close = ts, price
+        if price > bucket.high:
+            bucket.high = price
+        if price < bucket.low:
+            bucket.low = price
+        notional = price * quantity
+        bucket.volume += quantity
+        bucket.notional += notional
+        bucket.notional_sq += notional * price
+        bucket.trades += 1
+        totals = self.totals
+        totals["volume"] += quantity
+        totals["notional"] += notional
+        totals["notional_sq"] += notional * price
+        totals["trades"] += 1
+        if is_buy:
+            bucket.buy_volume += quantity
+            totals["buy_volume"] += quantity
+        else:
+            bucket.sell_volume += quantity
+            totals["sell_volume"] += quantity
+        if ts >= self.last_ts:
+            self.last_ts, self.last_price = ts, price
+
+        if bucket is buckets[-1] and not self._extremes_dirty:
+            self._push(bucket)
+        else:
+            self._extremes_dirty = True
+
+    def _late_bucket(self, minute: int, price: float, ts: float) -> Optional[_Bucket]:
+        if minute <= self.buckets[-1].minute - self.window_minutes:
+            return None
+        # Late trades are recent: walk back from the newest bucket
+        for i in range(len(self.buckets) - 1, -1, -1):
+            bucket = self.buckets[i]
+            if bucket.minute == minute:
+                return bucket
+            if bucket.minute < minute:
+                self.buckets.insert(i + 1, _Bucket(minute, price, ts))
+                return self.buckets[i + 1]
+        self.buckets.appendleft(_Bucket(minute, price, ts))
+        return self.buckets[0]
+
+    def _push(self, bucket: _Bucket):
+        highs, lows = self._highs, self._lows
+        while highs and highs[-1][1] <= bucket.high:
+            highs.pop()
+        highs.append((bucket.minute, bucket.high))
+        while lows and lows[-1][1] >= bucket.low:
+            lows.pop()
+        lows.append((bucket.minute, bucket.low))
+
+    def expire(self, now_minute: int):
+        """Drop buckets that left the window"""
+        oldest = now_minute - self.window_minutes
+        buckets, totals = self.buckets, self.totals
+        while buckets and buckets[0].minute <= oldest:
+            bucket = buckets.popleft()
+            for field in _SUMS:
+                totals[field] -= getattr(bucket, field)
+        while self._highs and self._highs[0][0] <= oldest:
+            self._highs.popleft()
+        while self._lows and self._lows[0][0] <= oldest:
+            self._lows.popleft()
+
+    def window(self, minutes: int, now_minute: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Statistics over the last ``minutes`` minutes; the full window reads
+        the running totals, shorter ones sum their buckets
+        """
+        if now_minute is not None:
+            self.expire(now_minute)
+        if not self.buckets:
+            return None
+        end_minute = now_minute if now_minute is not None else self.buckets[-1].minute
+        if minutes >= self.window_minutes:
+            if self._extremes_dirty:
+                self._highs.clear()
+                self._lows.clear()
+                for bucket in self.buckets:
+                    self._push(bucket)
+                self._extremes_dirty = False
+            first = self.buckets[0]
+            stats = {field: self.totals[field] for field in _SUMS}
+            stats.update(open=first.open, high=self._highs[0][1], low=self._lows[0][1],
+                         first_ts=first.first_ts)
+        else:
+            start = end_minute - minutes
+            recent = []
+            for bucket in reversed(self.buckets):
+                if bucket.minute <= start:
+                    break
+                recent.append(bucket)
+            if not recent:
+                return None
+            recent.reverse()
+            stats = {field: sum(getattr(b, field) for b in recent) for field in _SUMS}
+            stats.update(open=recent[0].open, high=max(b.high for b in recent),
+                         low=min(b.low for b in recent), first_ts=recent[0].first_ts)
+        stats["trades"] = int(round(stats["trades"]))
+        stats["close"] = self.last_price
+        stats["first_trade_time"] = datetime.fromtimestamp(stats.pop("first_ts"), timezone.utc)
+        stats["last_trade_time"] = datetime.fromtimestamp(self.last_ts, timezone.utc)
+        return stats
+
+
+def merge_windows(windows: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Combine the same window across exchanges (open of the earliest, close of the latest)"""
+    windows = [w for w in windows if w]
+    if not windows:
+        return None
+    merged = {field: sum(w.get(field, 0.0) for w in windows) for field in _SUMS}
+    merged["high"] = max(w["high"] for w in windows)
+    merged["low"] = min(w["low"] for w in windows)
+    merged["open"] = min(windows, key=lambda w: w["first_trade_time"])["open"]
+    latest = max(windows, key=lambda w: w["last_trade_time"])
+    merged["close"] = latest["close"]
+    merged["last_trade_time"] = latest["last_trade_time"]
+    return merged
+
+
+class MarketStatsEngine:
+    """Rolling statistics for every symbol/exchange seen by this process (manager side)"""
+
+    def __init__(self, window_minutes: int = WINDOW_MINUTES):
+        self.window_minutes = window_minutes
+        self.stats: Dict[Tuple[str, str], RollingStats] = {}
+
+    def record(self, trades: Iterable[Any]):
+        """Add a batch of models.Trade"""
+        for trade in trades:
+            key = (trade.symbol, trade.exchange.value)
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = RollingStats(self.window_minutes)
+            stats.add(trade.timestamp.timestamp(), float(trade.price), float(trade.quantity),
+                      trade.side.value == "buy")
+
+    def documents(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """One document per symbol/exchange with every published window"""
+        now = now or datetime.now(timezone.utc)
+        now_minute = int(now.timestamp() // 60)
+        docs = []
+        for (symbol, exchange), stats in self.stats.items():
+            windows = {}
+            for timeframe, minutes in TIMEFRAME_MINUTES.items():
+                window = stats.window(minutes, now_minute)
+                if window:
+                    window["start_time"] = now - timedelta(minutes=minutes)
+                    windows[timeframe] = window
+            docs.append({
+                "_id": f"{symbol}:{exchange}",
+                "symbol": symbol,
+                "exchange": exchange,
+                "published_at": now,
+                "windows": windows,
+            })
+        return docs
+
+def publish_documents(db, docs: List[Dict[str, Any]]) -> int:
+    """
+    Replace the published documents (blocking). Build ``docs`` with
+    ``MarketStatsEngine.documents`` on the thread that records trades.
+    """
+    if docs:
+        db.market_stats.bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs],
+                                   ordered=False)
+    return len(docs)
+
+
+class MarketStatsMirror:
+    """
+    In-memory copy of the published ``market_stats`` documents (API side).
+
+    Reads never touch Mongo; they return None when the symbol is unknown,
+    the timeframe is not published or the publisher has gone quiet, and the
+    caller falls back to aggregating trades.
+    """
+
+    def __init__(self, interval: float = MARKET_STATS_PUBLISH_INTERVAL,
+                 stale_seconds: float = MARKET_STATS_STALE_SECONDS):
+        self.interval = interval
+        self.stale_seconds = stale_seconds
+        self.db = None
+        self.docs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, db):
+        if self.db is None:
+            self.db = db
+
+    def refresh(self):
+        """Reload every published document (blocking, a few dozen small documents)"""
+        docs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for doc in self.db.market_stats.find({}):
+            doc["published_at"] = as_utc(doc["published_at"])
+            for window in doc.get("windows", {}).values():
+                for field in ("start_time", "first_trade_time", "last_trade_time"):
+                    window[field] = as_utc(window.get(field))
+            docs.setdefault(doc["symbol"], {})[doc["exchange"]] = doc
+        with self._lock:
+            self.docs = docs
+            self.refreshed_at = datetime.now(timezone.utc)
+
+    def _fresh(self, now: datetime) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            docs = self.docs
+        cutoff = now - timedelta(seconds=self.stale_seconds)
+        return {
+            symbol: {exchange: doc for exchange, doc in by_exchange.items() if doc["published_at"] >= cutoff}
+            for symbol, by_exchange in docs.items()
+        }
+
+    def get(self, symbol: str, timeframe: str, exchange: Optional[str] = None,
+            now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Window statistics for a symbol on one exchange or all of them"""
+        if timeframe not in TIMEFRAME_MINUTES:
+            return None
+        now = now or datetime.now(timezone.utc)
+        by_exchange = self._fresh(now).get(symbol)
+        if not by_exchange:
+            return None
+        if exchange:
+            doc = by_exchange.get(exchange)
+            return doc["windows"].get(timeframe) if doc else None
+        return merge_windows(doc["windows"].get(timeframe) for doc in by_exchange.values())
+
+    def summary(self, now: Optional[datetime] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+        """24h trades, volume and active symbols per exchange"""
+        now = now or datetime.now(timezone.utc)
+        docs = self._fresh(now)
+        if not any(docs.values()):
+            return None
+        exchanges: Dict[str, Dict[str, Any]] = {}
+        for symbol, by_exchange in docs.items():
+            for exchange, doc in by_exchange.items():
+                window = doc["windows"].get("1d")
+                if not window:
+                    continue
+                entry = exchanges.setdefault(exchange, {"trades": 0, "volume": 0.0, "symbols": set()})
+                entry["trades"] += window["trades"]
+                entry["volume"] += window["volume"]
+                entry["symbols"].add(symbol)
+        return exchanges
+
+    def start(self):
+        """Refresh in the background on the running loop"""
+        if self._task is None and self.db is not None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Market stats refresh error: {e}")
+            await asyncio.sleep(self.interval)
+
+
+market_stats_mirror = MarketStatsMirror()
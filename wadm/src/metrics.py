@@ -0,0 +1,450 @@
+"""
+Lightweight Prometheus metrics
+In-process counters, gauges and histograms rendered in the text exposition format.
+
+Hot-path cost is a dict-free attribute update: callers bind labelled children once
+(``COLLECTOR_MESSAGES.labels("bybit")``) and then only call ``inc``/``observe``.
+Derived values (rates, hit ratios, percentiles) are left to Prometheus queries.
+
+prometheus_client is deliberately not used: it is not a dependency of this
+project, and its metrics take a lock on every ``inc``/``observe``, which the
+collectors pay per message. The exposition format is small enough to render
+here, and the scrape server runs on the loop that already owns the metrics.
+"""
+import asyncio
+import ipaddress
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default latency buckets (seconds), from sub-millisecond parsing to slow analyses
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+FAST_BUCKETS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """Base for labelled metric families"""
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["MetricsRegistry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return (and cache) the child for a label combination"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _unlabelled(self):
+        return self._children[()]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self.samples())
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from ``function`` at scrape time instead of storing it"""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception as e:
+                logger.debug(f"Gauge callback failed: {e}")
+                return float("nan")
+        return self.value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at scrape time"""
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._unlabelled().set_function(function)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["MetricsRegistry"] = None):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (float("inf"),), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# Collectors
+COLLECTOR_MESSAGES = Counter(
+    "wadm_collector_messages_total", "WebSocket messages received", ["exchange"])
+COLLECTOR_TRADES = Counter(
+    "wadm_collector_trades_total", "Trades parsed from exchange messages", ["exchange"])
+COLLECTOR_PARSE_SECONDS = Histogram(
+    "wadm_collector_parse_seconds", "Time to decode and parse one message", ["exchange"],
+    buckets=FAST_BUCKETS)
+COLLECTOR_DROPPED = Counter(
+    "wadm_collector_dropped_total", "Items dropped by a full collector pipeline queue", ["exchange", "stage"])
+COLLECTOR_QUEUE_WAIT_SECONDS = Histogram(
+    "wadm_collector_queue_wait_seconds", "Time items wait in a collector pipeline queue", ["exchange", "stage"])
+COLLECTOR_DISPATCH_SECONDS = Histogram(
+    "wadm_collector_dispatch_seconds", "Time spent in the on_trade callback per batch", ["exchange"])
+COLLECTOR_RECONNECTS = Counter(
+    "wadm_collector_reconnects_total", "WebSocket reconnect attempts", ["exchange"])
+COLLECTOR_DUPLICATES = Counter(
+    "wadm_collector_duplicate_trades_total", "Trades dropped as already seen on another connection", ["exchange"])
+COLLECTOR_FAILOVERS = Counter(
+    "wadm_collector_failovers_total", "Standby connections promoted after a primary dropped", ["exchange"])
+COLLECTOR_SEQUENCE_GAPS = Counter(
+    "wadm_collector_sequence_gaps_total", "Breaks in per-symbol trade ID sequences", ["exchange"])
+COLLECTOR_MISSING_TRADES = Counter(
+    "wadm_collector_missing_trades_total", "Trade IDs skipped in per-symbol sequences", ["exchange"])
+COLLECTOR_OUT_OF_ORDER = Counter(
+    "wadm_collector_out_of_order_trades_total", "Trades with an ID at or below the last seen", ["exchange"])
+
+# Persistence and buffering
+PERSIST_BATCH_SECONDS = Histogram(
+    "wadm_persist_batch_seconds", "Latency of one trade batch insert", ["exchange"])
+TRADES_PERSISTED = Counter(
+    "wadm_trades_persisted_total", "Trades written to MongoDB", ["exchange"])
+QUEUE_DEPTH = Gauge(
+    "wadm_queue_depth", "Items waiting in internal queues and buffers", ["queue"])
+
+# Indicators
+INDICATOR_SECONDS = Histogram(
+    "wadm_indicator_duration_seconds", "Indicator computation time", ["indicator", "timeframe"])
+INDICATOR_SKIPPED = Counter(
+    "wadm_indicator_skipped_total", "Indicator runs skipped or dropped (deferred: once per due run put off)", ["indicator", "reason"])
+INDICATOR_ERRORS = Counter(
+    "wadm_indicator_errors_total", "Indicator computations that raised", ["indicator"])
+SMC_TRADES_SHIPPED = Counter(
+    "wadm_smc_trades_shipped_total", "Trades copied into SMC worker processes")
+SMC_WORKER_RESTARTS = Counter(
+    "wadm_smc_worker_restarts_total", "SMC worker processes replaced after a crash")
+SMC_STATE_BYTES = Gauge(
+    "wadm_smc_state_bytes", "Estimated memory held by live SMC zones, blocks, gaps and signals",
+    ["symbol"])
+
+# API cache
+CACHE_REQUESTS = Counter(
+    "wadm_cache_requests_total", "API cache lookups by result", ["result"])
+
+# LLM response cache
+LLM_CACHE_REQUESTS = Counter(
+    "wadm_llm_cache_requests_total", "LLM analyses by how they were served", ["result"])
+
+# Tiered retention
+RETENTION_ROLLED_UP = Counter(
+    "wadm_retention_rolled_up_total", "Documents rolled up into the next retention tier", ["tier"])
+RETENTION_DELETED = Counter(
+    "wadm_retention_deleted_total", "Expired documents deleted by the compactor", ["collection"])
+RETENTION_LAG = Gauge(
+    "wadm_retention_lag_seconds", "Age of the oldest roll-up watermark per target tier", ["tier"])
+RETENTION_PASS_SECONDS = Histogram(
+    "wadm_retention_pass_seconds", "Duration of one compaction pass")
+
+# MongoDB (fed by a pymongo command listener)
+MONGO_OPERATION_SECONDS = Histogram(
+    "wadm_mongo_operation_seconds", "MongoDB command latency", ["command"])
+MONGO_OPERATION_FAILURES = Counter(
+    "wadm_mongo_operation_failures_total", "MongoDB commands that failed", ["command"])
+
+# Indicator update feed
+INDICATOR_FEED_PUBLISHED = Counter(
+    "wadm_indicator_feed_published_total", "Indicator updates published to the feed", ["indicator"])
+INDICATOR_FEED_MESSAGES = Counter(
+    "wadm_indicator_feed_messages_total", "Feed messages sent to subscribers, and updates coalesced away",
+    ["type"])
+
+# WebSocket clients of the API
+WEBSOCKET_CLIENTS = Gauge(
+    "wadm_websocket_clients", "Connected API WebSocket clients", ["endpoint"])
+
+
+try:
+    from pymongo import monitoring
+
+    class MongoCommandMetrics(monitoring.CommandListener):
+        """Records per-command latency for every MongoClient it is attached to"""
+
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            MONGO_OPERATION_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+        def failed(self, event):
+            MONGO_OPERATION_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+            MONGO_OPERATION_FAILURES.labels(event.command_name).inc()
+
+except ImportError:  # pragma: no cover - pymongo is a core dependency
+    MongoCommandMetrics = None
+
+
+def render_metrics() -> str:
+    """Render the default registry in Prometheus text format"""
+    return REGISTRY.render()
+
+
+ScrapeRoute = Callable[[Dict[str, str]], Awaitable[Tuple[str, bytes]]]
+
+
+class BadRequest(ValueError):
+    """Raised by a scrape route to answer 400 with the message as body"""
+
+
+async def _metrics_route(query: Dict[str, str]) -> Tuple[str, bytes]:
+    return CONTENT_TYPE, render_metrics().encode("utf-8")
+
+
+def _is_loopback(writer: asyncio.StreamWriter) -> bool:
+    peer = writer.get_extra_info("peername")
+    try:
+        return bool(peer) and ipaddress.ip_address(peer[0]).is_loopback
+    except ValueError:
+        return False
+
+
+def _scrape_handler(routes: Dict[str, ScrapeRoute], local_routes: Optional[Dict[str, ScrapeRoute]] = None):
+    local_routes = local_routes or {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain headers
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.decode("latin-1").split()
+            path, _, query_string = (parts[1] if len(parts) >= 2 else "").partition("?")
+            query = dict(p.split("=", 1) for p in query_string.split("&") if "=" in p)
+            is_get = bool(parts) and parts[0] == "GET"
+            route = routes.get(path) if is_get else None
+            if is_get and route is None and path in local_routes:
+                route = local_routes[path] if _is_loopback(writer) else None
+
+            if route:
+                try:
+                    content_type, body = await route(query)
+                    status = "200 OK"
+                except BadRequest as e:
+                    content_type, body = "text/plain", f"{e}\n".encode()
+                    status = "400 Bad Request"
+                except Exception as e:
+                    logger.error(f"Metrics route {path} failed: {e}", exc_info=True)
+                    content_type, body = "text/plain", b"Internal Server Error\n"
+                    status = "500 Internal Server Error"
+            else:
+                content_type, body, status = "text/plain", b"Not Found\n", "404 Not Found"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except Exception as e:
+            # Client went away or sent garbage; nothing left to answer
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+    return handle
+
+
+async def start_metrics_server(port: int, host: str = "0.0.0.0",
+                               routes: Optional[Dict[str, ScrapeRoute]] = None,
+                               local_routes: Optional[Dict[str, ScrapeRoute]] = None) -> Optional[asyncio.AbstractServer]:
+    """
+    Serve /metrics on ``port`` from the running event loop (0 disables).
+
+    Args:
+        routes: Extra GET paths mapped to ``async handler(query) -> (content_type, body)``
+        local_routes: Like ``routes`` but only answered to loopback clients (404 to
+            anyone else), for debug endpoints that must not be reachable off-host
+    """
+    if not port:
+        return None
+    all_routes: Dict[str, ScrapeRoute] = {"/metrics": _metrics_route}
+    all_routes.update(routes or {})
+    try:
+        server = await asyncio.start_server(_scrape_handler(all_routes, local_routes), host, port)
+        logger.info(f"Prometheus metrics available on http://{host}:{port}/metrics")
+        return server
+    except OSError as e:
+        logger.warning(f"Metrics server could not bind port {port}: {e}")
+        return None
@@ -47,6 +47,7 @@ class Trade:
     side: Side
     timestamp: datetime
     trade_id: str
+    received_at: Optional[datetime] = None  # Local wall-clock time the message arrived
     
     def __post_init__(self):
         """Ensure timestamp is timezone-aware and values have proper precision"""
@@ -60,7 +61,7 @@ class Trade:
             self.quantity = round_quantity(self.quantity)
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        data = {
             "exchange": self.exchange.value,
             "symbol": self.symbol,
             "price": float(self.price),  # Convert to float for JSON
@@ -69,6 +70,9 @@ class Trade:
             "timestamp": self.timestamp,
             "trade_id": self.trade_id
         }
+        if self.received_at is not None:
+            data["received_at"] = self.received_at
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Trade':
@@ -80,7 +84,8 @@ class Trade:
             quantity=round_quantity(data["quantity"]),
             side=Side(data["side"]),
             timestamp=data["timestamp"],
-            trade_id=data["trade_id"]
+            trade_id=data["trade_id"],
+            received_at=data.get("received_at")
         )
 
 @dataclass
@@ -125,6 +130,7 @@ class VolumeProfile:
     val: Decimal  # Value Area Low
     volume_distribution: Dict[Decimal, Decimal]  # price -> volume
     total_volume: Decimal
+    latency: Optional[Dict[str, Any]] = None  # Source/receive/persist/publish stamps
     
     def __post_init__(self):
         """Ensure proper precision"""
@@ -148,7 +154,8 @@ class VolumeProfile:
             "volume_distribution": {
                 str(float(k)): float(v) for k, v in self.volume_distribution.items()
             },
-            "total_volume": float(self.total_volume)
+            "total_volume": float(self.total_volume),
+            "latency": self.latency
         }
 
 @dataclass
@@ -168,6 +175,7 @@ class OrderFlow:
     institutional_volume: Decimal = Decimal("0.0")  # Volume from large trades
     vwap_delta: Decimal = Decimal("0.0")  # Delta above/below VWAP
     absorption_events: List[Dict[str, Any]] = None  # Detailed absorption events
+    latency: Optional[Dict[str, Any]] = None  # Source/receive/persist/publish stamps
     
     def __post_init__(self):
         """Initialize optional fields and ensure precision"""
@@ -211,7 +219,8 @@ class OrderFlow:
             "momentum_score": float(self.momentum_score),
             "institutional_volume": float(self.institutional_volume),
             "vwap_delta": float(self.vwap_delta),
-            "absorption_events": self.absorption_events or []
+            "absorption_events": self.absorption_events or [],
+            "latency": self.latency
         }
 
 # New models for institutional features
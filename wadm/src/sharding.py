@@ -0,0 +1,297 @@
+"""
+Symbol-sharded ingest
+A supervisor partitions symbols across worker processes with a consistent-hash
+ring. Each worker runs a full WADMManager (collectors, persistence, indicators,
+SMC) for its own symbols, so throughput scales with cores.
+
+Workers report status and a small checkpoint (indicator schedule, counters) to the
+supervisor every few seconds. When a worker dies it is restarted with its last
+checkpoint, so it resumes its calculation schedule instead of recomputing every
+indicator at once. Trades themselves are already durable in MongoDB.
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import multiprocessing as mp
+import queue
+import signal
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from src.config import (
+    BASE_SYMBOLS, METRICS_PORT, SHARD_REPORT_INTERVAL, SHARD_RESTART_BACKOFF_MAX, SHARD_VIRTUAL_NODES
+)
+from src.logger import get_logger
+from src.metrics import Counter, Gauge, start_metrics_server
+
+logger = get_logger(__name__)
+
+SHARD_RESTARTS = Counter(
+    "wadm_shard_restarts_total", "Worker processes restarted by the supervisor", ["shard"])
+SHARD_UP = Gauge(
+    "wadm_shard_up", "Whether a shard worker process is alive", ["shard"])
+SHARD_SYMBOLS = Gauge(
+    "wadm_shard_symbols", "Symbols assigned to a shard", ["shard"])
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+
+    Adding or removing a shard only moves the symbols that hash to its arcs
+    (roughly 1/N of them); every other symbol keeps its owner.
+    """
+
+    def __init__(self, nodes: List[int], virtual_nodes: int = SHARD_VIRTUAL_NODES):
+        self.virtual_nodes = virtual_nodes
+        self._ring: List[int] = []
+        self._owners: Dict[int, int] = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: int):
+        for replica in range(self.virtual_nodes):
+            point = _hash(f"shard-{node}#{replica}")
+            self._owners[point] = node
+            bisect.insort(self._ring, point)
+
+    def remove(self, node: int):
+        self._ring = [p for p in self._ring if self._owners[p] != node]
+        self._owners = {p: n for p, n in self._owners.items() if n != node}
+
+    def node_for(self, key: str) -> int:
+        if not self._ring:
+            raise ValueError("Hash ring has no nodes")
+        index = bisect.bisect(self._ring, _hash(key)) % len(self._ring)
+        return self._owners[self._ring[index]]
+
+
+def assign_symbols(symbols: List[str], shard_count: int,
+                   virtual_nodes: int = SHARD_VIRTUAL_NODES) -> Dict[int, List[str]]:
+    """
+    Partition base symbols (BTCUSDT format) across shards.
+
+    Returns:
+        Dict shard_id -> symbols; every shard is present, possibly empty
+    """
+    ring = ConsistentHashRing(list(range(shard_count)), virtual_nodes)
+    assignment: Dict[int, List[str]] = {shard: [] for shard in range(shard_count)}
+    for symbol in symbols:
+        assignment[ring.node_for(symbol)].append(symbol)
+    return assignment
+
+
+def run_shard(shard_id: int, symbols: List[str], state: Optional[Dict[str, Any]],
+              reports: "mp.Queue", metrics_port: int):
+    """Worker process entry point (must stay importable for the spawn start method)"""
+    # The supervisor owns Ctrl+C; workers stop on SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_shard_main(shard_id, symbols, state, reports, metrics_port))
+
+
+async def _shard_main(shard_id: int, symbols: List[str], state: Optional[Dict[str, Any]],
+                      reports: "mp.Queue", metrics_port: int):
+    # Imported here so the supervisor process never opens Mongo connections
+    from src.manager import WADMManager
+
+    manager = WADMManager(symbols=symbols, shard_id=shard_id, metrics_port=metrics_port)
+    if state:
+        manager.restore_state(state)
+
+    stop_event = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop_event.set)
+
+    async def report():
+        while True:
+            await asyncio.sleep(SHARD_REPORT_INTERVAL)
+            try:
+                reports.put_nowait({
+                    "shard_id": shard_id,
+                    "status": manager.get_shard_status(),
+                    "state": manager.export_state(),
+                })
+            except queue.Full:
+                pass
+
+    manager_task = asyncio.create_task(manager.start())
+    report_task = asyncio.create_task(report())
+    stop_task = asyncio.create_task(stop_event.wait())
+    try:
+        await asyncio.wait([manager_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        report_task.cancel()
+        await manager.stop()
+        # Final checkpoint so a planned restart loses nothing
+        try:
+            reports.put_nowait({"shard_id": shard_id, "status": manager.get_shard_status(),
+                                "state": manager.export_state()})
+        except queue.Full:
+            pass
+
+
+class _Shard:
+    """Supervisor-side bookkeeping for one worker"""
+
+    def __init__(self, shard_id: int, symbols: List[str]):
+        self.shard_id = shard_id
+        self.symbols = symbols
+        self.process: Optional[mp.Process] = None
+        self.state: Optional[Dict[str, Any]] = None
+        self.status: Dict[str, Any] = {}
+        self.reported_at: Optional[datetime] = None
+        self.restarts = 0
+        self.started_at = 0.0
+        self.next_start = 0.0
+        self.backoff = 1.0
+
+
+class ShardSupervisor:
+    """
+    Runs and watches one worker process per shard.
+
+    Usage:
+        supervisor = ShardSupervisor(shard_count=4)
+        await supervisor.run()   # until stop() is called
+    """
+
+    def __init__(self, shard_count: int, symbols: Optional[List[str]] = None,
+                 metrics_port: int = METRICS_PORT):
+        self.shard_count = shard_count
+        self.metrics_port = metrics_port
+        self.context = mp.get_context("spawn")
+        self.reports = self.context.Queue(maxsize=shard_count * 16)
+        self.shards = {
+            shard_id: _Shard(shard_id, shard_symbols)
+            for shard_id, shard_symbols in assign_symbols(symbols or BASE_SYMBOLS, shard_count).items()
+        }
+        self.running = False
+        self.metrics_server = None
+
+        for shard in self.shards.values():
+            label = str(shard.shard_id)
+            SHARD_SYMBOLS.labels(label).set(len(shard.symbols))
+            SHARD_UP.labels(label).set_function(
+                lambda shard=shard: 1.0 if shard.process and shard.process.is_alive() else 0.0)
+
+    def _worker_metrics_port(self, shard_id: int) -> int:
+        # Supervisor keeps METRICS_PORT, shard N scrapes on METRICS_PORT + 1 + N
+        return self.metrics_port + 1 + shard_id if self.metrics_port else 0
+
+    def _start(self, shard: _Shard):
+        shard.process = self.context.Process(
+            target=run_shard,
+            args=(shard.shard_id, shard.symbols, shard.state, self.reports,
+                  self._worker_metrics_port(shard.shard_id)),
+            name=f"wadm-shard-{shard.shard_id}",
+            daemon=False,
+        )
+        shard.process.start()
+        shard.started_at = time.monotonic()
+        logger.info(f"Shard {shard.shard_id} started (pid {shard.process.pid}): {shard.symbols}")
+
+    async def run(self):
+        """Start all shards and supervise them until stop()"""
+        self.running = True
+        self.metrics_server = await start_metrics_server(self.metrics_port, routes={
+            "/status": self._status_route,
+        })
+        for shard in self.shards.values():
+            if shard.symbols:
+                self._start(shard)
+            else:
+                logger.warning(f"Shard {shard.shard_id} has no symbols assigned, not started")
+
+        while self.running:
+            self._drain_reports()
+            self._check_workers()
+            await asyncio.sleep(1)
+
+    def _drain_reports(self):
+        while True:
+            try:
+                report = self.reports.get_nowait()
+            except queue.Empty:
+                return
+            shard = self.shards.get(report["shard_id"])
+            if shard:
+                shard.status = report["status"]
+                shard.state = report["state"]
+                shard.reported_at = datetime.now(timezone.utc)
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for shard in self.shards.values():
+            if not shard.symbols or shard.process is None:
+                continue
+            if shard.process.is_alive():
+                # Workers that stay up for a while earn their backoff back
+                if now - shard.started_at > SHARD_RESTART_BACKOFF_MAX:
+                    shard.backoff = 1.0
+                continue
+            if shard.next_start == 0.0:
+                shard.next_start = now + shard.backoff
+                logger.error(f"Shard {shard.shard_id} exited with code {shard.process.exitcode}, "
+                             f"restarting in {shard.backoff:.0f}s")
+                shard.backoff = min(shard.backoff * 2, SHARD_RESTART_BACKOFF_MAX)
+            elif now >= shard.next_start:
+                shard.next_start = 0.0
+                shard.restarts += 1
+                SHARD_RESTARTS.labels(str(shard.shard_id)).inc()
+                self._start(shard)
+
+    async def stop(self, timeout: float = 15.0):
+        """Terminate all workers, waiting for their final checkpoint"""
+        self.running = False
+        for shard in self.shards.values():
+            if shard.process and shard.process.is_alive():
+                shard.process.terminate()
+        deadline = time.monotonic() + timeout
+        for shard in self.shards.values():
+            if shard.process:
+                while shard.process.is_alive() and time.monotonic() < deadline:
+                    await asyncio.sleep(0.1)
+                if shard.process.is_alive():
+                    logger.warning(f"Shard {shard.shard_id} did not stop in time, killing")
+                    shard.process.kill()
+        self._drain_reports()
+        if self.metrics_server:
+            self.metrics_server.close()
+        logger.info("Shard supervisor stopped")
+
+    def aggregate_status(self) -> Dict[str, Any]:
+        """Combined stats across shards plus per-shard health"""
+        totals: Dict[str, int] = defaultdict(int)
+        running_calculations = 0
+        shards = []
+        for shard in self.shards.values():
+            stats = shard.status.get("stats", {})
+            for key, value in stats.items():
+                totals[key] += value
+            running_calculations += shard.status.get("running_calculations", 0)
+            shards.append({
+                "shard_id": shard.shard_id,
+                "pid": shard.process.pid if shard.process else None,
+                "alive": bool(shard.process and shard.process.is_alive()),
+                "symbols": shard.symbols,
+                "restarts": shard.restarts,
+                "reported_at": shard.reported_at,
+                "metrics_port": self._worker_metrics_port(shard.shard_id),
+                "stats": stats,
+            })
+        return {
+            "shards": len(self.shards),
+            "alive": sum(1 for s in shards if s["alive"]),
+            "stats": dict(totals),
+            "running_calculations": running_calculations,
+            "shard_status": shards,
+        }
+
+    async def _status_route(self, query: Dict[str, str]):
+        return "application/json", json.dumps(self.aggregate_status(), default=str).encode()
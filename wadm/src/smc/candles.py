@@ -0,0 +1,188 @@
+"""
+Shared multi-exchange candles for SMC analysis
+One candle format carrying every field the detectors use (OHLCV, buy/sell volume,
+institutional/retail volume, confirming exchanges), built once per symbol and
+extended incrementally as candles close instead of being rebuilt by every
+detector from the full lookback of trades.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+EXCHANGES = ["bybit", "binance", "coinbase", "kraken"]
+INSTITUTIONAL_EXCHANGES = {"coinbase", "kraken"}
+
+TIMEFRAME_MINUTES = {
+    "1min": 1, "5min": 5, "15min": 15, "30min": 30,
+    "1h": 60, "4h": 240, "1d": 1440
+}
+
+
+def timeframe_minutes(timeframe: str) -> int:
+    return TIMEFRAME_MINUTES.get(timeframe, 15)
+
+
+def as_utc(value: Any) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        # Mongo hands back naive UTC datetimes
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def bucket_start(ts: datetime, tf_seconds: int) -> datetime:
+    """Start of the candle containing ``ts``"""
+    epoch = int(as_utc(ts).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % tf_seconds, timezone.utc)
+
+
+def build_exchange_candles(trades: List[Dict[str, Any]], tf_minutes: int) -> List[Dict[str, Any]]:
+    """Aggregate one exchange's trades (any order) into time-ordered candles"""
+    tf_seconds = tf_minutes * 60
+    candles: Dict[int, Dict[str, Any]] = {}
+
+    for trade in trades:
+        trade_time = as_utc(trade['timestamp'])
+        epoch = trade_time.timestamp()
+        period = int(epoch) - int(epoch) % tf_seconds
+        price = float(trade['price'])
+        volume = float(trade['quantity'])
+
+        candle = candles.get(period)
+        if candle is None:
+            candle = candles[period] = {
+                'timestamp': datetime.fromtimestamp(period, timezone.utc),
+                'open': price, 'high': price, 'low': price, 'close': price,
+                'volume': 0.0, 'buy_volume': 0.0, 'sell_volume': 0.0, 'trades': 0,
+                '_first': epoch, '_last': epoch,
+            }
+        else:
+            if price > candle['high']:
+                candle['high'] = price
+            if price < candle['low']:
+                candle['low'] = price
+            if epoch < candle['_first']:
+                candle['_first'] = epoch
+                candle['open'] = price
+            if epoch >= candle['_last']:
+                candle['_last'] = epoch
+                candle['close'] = price
+
+        candle['volume'] += volume
+        candle['trades'] += 1
+        if trade.get('side', '').lower() == 'buy':
+            candle['buy_volume'] += volume
+        else:
+            candle['sell_volume'] += volume
+
+    return [candles[period] for period in sorted(candles)]
+
+
+def merge_exchange_candles(exchange_candles: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Merge per-exchange candles by period. Open and close come from the exchange
+    with the earliest and latest trade in the period.
+    """
+    groups: Dict[datetime, List[tuple]] = {}
+    for exchange, candles in exchange_candles.items():
+        for candle in candles:
+            groups.setdefault(candle['timestamp'], []).append((exchange, candle))
+
+    merged = []
+    for timestamp in sorted(groups):
+        group = groups[timestamp]
+        first = min(group, key=lambda item: item[1]['_first'])[1]
+        last = max(group, key=lambda item: item[1]['_last'])[1]
+        exchanges = [exchange for exchange, _ in group]
+        institutional = sum(c['volume'] for exchange, c in group if exchange in INSTITUTIONAL_EXCHANGES)
+        volume = sum(c['volume'] for _, c in group)
+        merged.append({
+            'timestamp': timestamp,
+            'open': first['open'],
+            'high': max(c['high'] for _, c in group),
+            'low': min(c['low'] for _, c in group),
+            'close': last['close'],
+            'volume': volume,
+            'buy_volume': sum(c['buy_volume'] for _, c in group),
+            'sell_volume': sum(c['sell_volume'] for _, c in group),
+            'trades': sum(c['trades'] for _, c in group),
+            'institutional_volume': institutional,
+            'retail_volume': volume - institutional,
+            'exchanges': exchanges,
+            'exchange_count': len(exchanges),
+        })
+    return merged
+
+
+class CandleSeries:
+    """
+    Closed multi-exchange candles for one symbol, extended as candles close.
+
+    The first update loads the full lookback; later updates only fetch the
+    trades of the candles that closed since. The still-forming candle is never
+    included, so detector output only changes when a candle closes.
+    """
+
+    # Grace period after a candle closes for in-flight trades to be persisted
+    settle_seconds = 5
+
+    def __init__(self, symbol: str, timeframe: str = "15min", lookback_periods: int = 100):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.tf_minutes = timeframe_minutes(timeframe)
+        self.tf_seconds = self.tf_minutes * 60
+        self.lookback_periods = lookback_periods
+        self.candles: List[Dict[str, Any]] = []
+        self.closed_until: Optional[datetime] = None
+        self.trades_loaded = 0
+
+    def update(self, storage, now: Optional[datetime] = None) -> bool:
+        """
+        Append candles closed since the last update.
+
+        Returns:
+            True if new candles were added
+        """
+        if storage is None:
+            return False
+        now = now or datetime.now(timezone.utc)
+        closed_until = bucket_start(now - timedelta(seconds=self.settle_seconds), self.tf_seconds)
+        if self.closed_until is not None and closed_until <= self.closed_until:
+            return False
+
+        since = self.closed_until or closed_until - timedelta(seconds=self.tf_seconds * self.lookback_periods)
+        minutes = math.ceil((now - since).total_seconds() / 60)
+
+        exchange_candles = {}
+        for exchange in EXCHANGES:
+            trades = [
+                t for t in storage.get_recent_trades(self.symbol, exchange, minutes=minutes)
+                if since <= as_utc(t['timestamp']) < closed_until
+            ]
+            self.trades_loaded += len(trades)
+            if trades:
+                exchange_candles[exchange] = build_exchange_candles(trades, self.tf_minutes)
+
+        self.closed_until = closed_until
+        new_candles = merge_exchange_candles(exchange_candles)
+        if not new_candles:
+            return False
+
+        self.candles.extend(new_candles)
+        horizon = closed_until - timedelta(seconds=self.tf_seconds * self.lookback_periods)
+        expired = 0
+        while expired < len(self.candles) and self.candles[expired]['timestamp'] < horizon:
+            expired += 1
+        del self.candles[:expired]
+        logger.debug(f"{self.symbol} {self.timeframe}: {len(new_candles)} new candles "
+                     f"({len(self.candles)} held)")
+        return True
+
+    @property
+    def last_close(self) -> Optional[datetime]:
+        return self.candles[-1]['timestamp'] if self.candles else None
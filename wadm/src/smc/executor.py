@@ -0,0 +1,389 @@
+"""
+SMC execution backend
+The SMC detectors are CPU-bound, so running them on the event loop serializes
+every symbol and stalls ingest. SMCExecutor runs per-symbol analyses in worker
+processes instead.
+
+Each symbol is pinned to one worker slot (consistent hashing), so the worker
+keeps that symbol's trade history, candles and analysis graph warm between
+runs. Only trades newer than the last shipment are sent, packed into a NumPy
+record array in shared memory; the worker copies them into its own
+TradeHistory and runs an SMCDashboard against it. Results and the SMC records
+to persist come back as plain dicts and are written to MongoDB by the parent.
+
+Symbols are pre-checked against in-memory trade counters fed by the collectors,
+so idle symbols never touch the database.
+"""
+import asyncio
+import math
+import multiprocessing as mp
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from multiprocessing import shared_memory
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..config import SMC_HISTORY_HOURS, SMC_MIN_TRADES, SMC_WORKERS
+from ..logger import get_logger
+from ..metrics import QUEUE_DEPTH, SMC_STATE_BYTES, SMC_TRADES_SHIPPED, SMC_WORKER_RESTARTS
+from ..sharding import ConsistentHashRing
+from .candles import EXCHANGES, as_utc
+from .tape import trade_key
+
+logger = get_logger(__name__)
+
+# Row layout of shipped trades
+TRADE_DTYPE = np.dtype([
+    ("ts", "f8"),          # epoch seconds
+    ("price", "f8"),
+    ("quantity", "f8"),
+    ("is_buy", "u1"),
+    ("exchange", "u1"),    # index into EXCHANGES
+])
+
+
+class TradeCounter:
+    """Per-symbol trade counts over a rolling window, in one-minute buckets"""
+
+    def __init__(self, window_minutes: int = 60):
+        self.window_minutes = window_minutes
+        self._buckets: Dict[str, Deque[List[int]]] = defaultdict(deque)
+
+    def add(self, symbol: str, count: int = 1, now: Optional[float] = None):
+        minute = int((now if now is not None else datetime.now(timezone.utc).timestamp()) // 60)
+        buckets = self._buckets[symbol]
+        if buckets and buckets[-1][0] == minute:
+            buckets[-1][1] += count
+        else:
+            buckets.append([minute, count])
+        self._expire(buckets, minute)
+
+    def total(self, symbol: str, now: Optional[float] = None) -> int:
+        buckets = self._buckets.get(symbol)
+        if not buckets:
+            return 0
+        minute = int((now if now is not None else datetime.now(timezone.utc).timestamp()) // 60)
+        self._expire(buckets, minute)
+        return sum(count for _, count in buckets)
+
+    def _expire(self, buckets: Deque[List[int]], minute: int):
+        while buckets and buckets[0][0] <= minute - self.window_minutes:
+            buckets.popleft()
+
+
+class TradeHistory:
+    """
+    Worker-side trade store with the StorageManager read interface the SMC
+    components use. Holds a sorted record array per (symbol, exchange) trimmed
+    to the history window. SMC records the components save are collected for
+    the parent to persist.
+    """
+
+    def __init__(self, history_hours: int = SMC_HISTORY_HOURS):
+        self.history = timedelta(hours=history_hours)
+        self._trades: Dict[Tuple[str, str], np.ndarray] = {}
+        self.saved: List[Dict[str, Any]] = []
+
+    def extend(self, symbol: str, rows: np.ndarray):
+        horizon = (datetime.now(timezone.utc) - self.history).timestamp()
+        for code, exchange in enumerate(EXCHANGES):
+            key = (symbol, exchange)
+            new = rows[rows["exchange"] == code]
+            current = self._trades.get(key)
+            if len(new):
+                new = np.sort(new, order="ts")
+                current = new if current is None else np.concatenate([current, new])
+            if current is not None:
+                self._trades[key] = current[np.searchsorted(current["ts"], horizon):]
+
+    def count(self, symbol: str) -> int:
+        return sum(len(self._trades.get((symbol, exchange), ())) for exchange in EXCHANGES)
+
+    def get_recent_trades(self, symbol: str, exchange: str, minutes: int = 5) -> List[Dict[str, Any]]:
+        """Newest first, like StorageManager.get_recent_trades"""
+        rows = self._trades.get((symbol, exchange))
+        if rows is None:
+            return []
+        since = (datetime.now(timezone.utc) - timedelta(minutes=minutes)).timestamp()
+        rows = rows[np.searchsorted(rows["ts"], since):][::-1]
+        return [
+            {
+                "symbol": symbol,
+                "exchange": exchange,
+                "timestamp": datetime.fromtimestamp(ts, timezone.utc),
+                "price": price,
+                "quantity": quantity,
+                "side": "buy" if is_buy else "sell",
+            }
+            for ts, price, quantity, is_buy in zip(
+                rows["ts"].tolist(), rows["price"].tolist(),
+                rows["quantity"].tolist(), rows["is_buy"].tolist())
+        ]
+
+    def save_smc_analysis(self, analysis: Dict[str, Any]):
+        self.saved.append(analysis)
+
+
+def pack_trades(trades_by_exchange: Dict[str, List[Dict[str, Any]]]) -> np.ndarray:
+    """Trade dicts (Mongo documents) to a TRADE_DTYPE record array"""
+    total = sum(len(trades) for trades in trades_by_exchange.values())
+    rows = np.empty(total, dtype=TRADE_DTYPE)
+    offset = 0
+    for exchange, trades in trades_by_exchange.items():
+        n = len(trades)
+        if not n:
+            continue
+        chunk = rows[offset:offset + n]
+        chunk["ts"] = [as_utc(t["timestamp"]).timestamp() for t in trades]
+        chunk["price"] = [float(t["price"]) for t in trades]
+        chunk["quantity"] = [float(t["quantity"]) for t in trades]
+        chunk["is_buy"] = [str(t.get("side", "")).lower() == "buy" for t in trades]
+        chunk["exchange"] = EXCHANGES.index(exchange)
+        offset += n
+    return rows
+
+
+# Worker process state (one dashboard, history and event loop per worker)
+_history: Optional[TradeHistory] = None
+_dashboard = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _worker_init(history_hours: int):
+    global _history, _dashboard, _loop
+    from .smc_dashboard import SMCDashboard
+
+    _history = TradeHistory(history_hours)
+    _dashboard = SMCDashboard(_history)
+    _loop = asyncio.new_event_loop()
+
+
+def _worker_analyze(symbol: str, shm_name: Optional[str], rows: int) -> Dict[str, Any]:
+    """Worker entry point: ingest the shipped trades, then run the analysis"""
+    if shm_name:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            shipped = np.ndarray((rows,), dtype=TRADE_DTYPE, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+        _history.extend(symbol, shipped)
+    else:
+        _history.extend(symbol, np.empty(0, dtype=TRADE_DTYPE))
+
+    _history.saved = []
+    analysis = _loop.run_until_complete(_dashboard.get_comprehensive_analysis(symbol))
+    return {
+        "analysis": analysis.to_dict(),
+        "saved": _history.saved,
+        "history_trades": _history.count(symbol),
+        "graph": _dashboard.get_graph_status(symbol),
+        "memory": _dashboard.get_memory_usage(symbol),
+    }
+
+
+class _Slot:
+    """One single-process pool; symbols hashed to it always run there"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.busy = False
+        self.runs = 0
+        self.restarts = 0
+
+
+class SMCExecutor:
+    """
+    Runs SMC analyses for many symbols in parallel.
+
+    Usage:
+        executor = SMCExecutor(storage, dashboard)
+        executor.record(symbol, count)          # from the trade handler
+        if executor.ready(symbol) and executor.has_capacity(symbol):
+            summary = await executor.analyze(symbol)
+
+    With ``workers=0`` analyses run in-process on ``dashboard``.
+    """
+
+    def __init__(self, storage, dashboard=None, workers: int = SMC_WORKERS,
+                 min_trades: int = SMC_MIN_TRADES, history_hours: int = SMC_HISTORY_HOURS):
+        self.storage = storage
+        self.dashboard = dashboard
+        self.workers = max(0, workers)
+        self.min_trades = min_trades
+        self.history_hours = history_hours
+        self.counter = TradeCounter(window_minutes=60)
+        self.context = mp.get_context("spawn")
+        self.slots = [_Slot(i) for i in range(self.workers)]
+        self._ring = ConsistentHashRing(list(range(self.workers))) if self.workers else None
+        # Per symbol and exchange: newest trade timestamp already shipped, and the
+        # keys of the trades shipped at exactly that timestamp
+        self._shipped: Dict[str, Dict[str, Tuple[datetime, Set[Any]]]] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.last_results: Dict[str, Dict[str, Any]] = {}
+        # Per symbol: SMC state held by the process that analyzes it
+        self.memory: Dict[str, Dict[str, Any]] = {}
+        QUEUE_DEPTH.labels("smc_in_flight").set_function(lambda: len(self._in_flight))
+
+    # Pre-checks and budget
+
+    def record(self, symbol: str, count: int = 1):
+        """Count trades as they arrive (cheap, called for every batch)"""
+        self.counter.add(symbol, count)
+
+    def ready(self, symbol: str) -> bool:
+        """Enough recent trades to be worth analyzing"""
+        return self.counter.total(symbol) >= self.min_trades
+
+    @property
+    def budget(self) -> int:
+        """Analyses that can run at once"""
+        return self.workers or 1
+
+    def has_capacity(self, symbol: str) -> bool:
+        """Whether the scheduler should hand ``symbol`` over now"""
+        if symbol in self._in_flight:
+            return True  # joins the running analysis
+        if self.workers:
+            return not self._slot_for(symbol).busy
+        return len(self._in_flight) < self.budget
+
+    def _slot_for(self, symbol: str) -> _Slot:
+        return self.slots[self._ring.node_for(symbol)]
+
+    # Execution
+
+    async def analyze(self, symbol: str) -> Dict[str, Any]:
+        """
+        Run (or join) the analysis for a symbol.
+
+        Returns:
+            SMCAnalysis.to_dict() of the result
+        """
+        running = self._in_flight.get(symbol)
+        if running:
+            return await asyncio.shield(running)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[symbol] = future
+        try:
+            if self.workers:
+                result = await self._analyze_in_worker(symbol)
+            else:
+                analysis = await self.dashboard.get_comprehensive_analysis(symbol)
+                result = analysis.to_dict()
+                self._record_memory(symbol, self.dashboard.get_memory_usage(symbol))
+            future.set_result(result)
+            self.last_results[symbol] = result
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # joined callers re-raise; nobody else needs to retrieve it
+            raise
+        finally:
+            del self._in_flight[symbol]
+
+    async def _analyze_in_worker(self, symbol: str) -> Dict[str, Any]:
+        slot = self._slot_for(symbol)
+        slot.busy = True
+        shm = None
+        try:
+            rows = await asyncio.to_thread(self._load_new_trades, symbol)
+            shm_name = None
+            if len(rows):
+                shm = shared_memory.SharedMemory(create=True, size=rows.nbytes)
+                np.ndarray(rows.shape, dtype=TRADE_DTYPE, buffer=shm.buf)[:] = rows
+                shm_name = shm.name
+                SMC_TRADES_SHIPPED.inc(len(rows))
+
+            pool = self._pool(slot)
+            try:
+                output = await asyncio.wrap_future(
+                    pool.submit(_worker_analyze, symbol, shm_name, len(rows)))
+            except BrokenProcessPool:
+                self._reset_slot(slot)
+                raise
+            slot.runs += 1
+        finally:
+            slot.busy = False
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+        self._record_memory(symbol, output["memory"])
+        if output["saved"] and self.storage:
+            await asyncio.to_thread(self._persist, output["saved"])
+        return output["analysis"]
+
+    def _record_memory(self, symbol: str, usage: Dict[str, Any]):
+        self.memory[symbol] = usage
+        SMC_STATE_BYTES.labels(symbol).set(usage["bytes"])
+
+    def _load_new_trades(self, symbol: str) -> np.ndarray:
+        """Trades stored since the last shipment of this symbol (full history the first time)"""
+        now = datetime.now(timezone.utc)
+        shipped = self._shipped.setdefault(symbol, {})
+        fresh = {}
+        for exchange in EXCHANGES:
+            since, seen = shipped.get(exchange, (now - timedelta(hours=self.history_hours), set()))
+            minutes = math.ceil((now - since).total_seconds() / 60) + 1
+            # Inclusive: a trade sharing the watermark timestamp may have been persisted since
+            trades = [
+                t for t in self.storage.get_recent_trades(symbol, exchange, minutes=minutes)
+                if as_utc(t["timestamp"]) > since
+                or (as_utc(t["timestamp"]) == since and trade_key(t) not in seen)
+            ]
+            if trades:
+                fresh[exchange] = trades
+                # Newest first
+                newest = as_utc(trades[0]["timestamp"])
+                keys = {trade_key(t) for t in trades if as_utc(t["timestamp"]) == newest}
+                shipped[exchange] = (newest, keys | seen if newest == since else keys)
+        return pack_trades(fresh)
+
+    def _persist(self, records: Iterable[Dict[str, Any]]):
+        for record in records:
+            self.storage.save_smc_analysis(record)
+
+    def _pool(self, slot: _Slot) -> ProcessPoolExecutor:
+        if slot.pool is None:
+            slot.pool = ProcessPoolExecutor(
+                max_workers=1, mp_context=self.context,
+                initializer=_worker_init, initargs=(self.history_hours,))
+        return slot.pool
+
+    def _reset_slot(self, slot: _Slot):
+        """A worker died: replace it and resend full history for its symbols"""
+        logger.error(f"SMC worker {slot.index} crashed, restarting")
+        SMC_WORKER_RESTARTS.inc()
+        slot.restarts += 1
+        if slot.pool:
+            slot.pool.shutdown(wait=False, cancel_futures=True)
+        slot.pool = None
+        for symbol in list(self._shipped):
+            if self._slot_for(symbol) is slot:
+                del self._shipped[symbol]
+
+    def shutdown(self):
+        for slot in self.slots:
+            if slot.pool:
+                slot.pool.shutdown(wait=False, cancel_futures=True)
+                slot.pool = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "budget": self.budget,
+            "in_flight": sorted(self._in_flight),
+            "slots": [
+                {"slot": s.index, "busy": s.busy, "runs": s.runs, "restarts": s.restarts,
+                 "alive": s.pool is not None}
+                for s in self.slots
+            ],
+            "symbols": len(self.last_results),
+            "state_bytes": sum(usage["bytes"] for usage in self.memory.values()),
+            "memory": {symbol: usage["bytes"] for symbol, usage in sorted(self.memory.items())},
+        }
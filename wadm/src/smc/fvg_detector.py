@@ -6,11 +6,16 @@ Detects actual FVGs from candle data with institutional validation
 """
 
 import asyncio
+import bisect
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from enum import Enum
 import numpy as np
+from .candles import as_utc
+from .lifecycle import StateStore
+from .zone_index import FAIR_VALUE_GAP, ZoneRegistry, fvg_zone
 from ..logger import get_logger
 
 logger = get_logger(__name__)
@@ -26,7 +31,7 @@ class FVGStatus(str, Enum):
     PARTIALLY_FILLED = "partially_filled"
     FILLED = "filled"
 
-@dataclass
+@dataclass(slots=True)
 class FairValueGap:
     """Fair Value Gap with institutional validation"""
     
@@ -129,17 +134,56 @@ class FairValueGap:
         """Get gap low (for compatibility)"""
         return self.bottom
 
+def _gap_candidates(candles: List[Dict[str, Any]], first: int,
+                    min_gap_percentage: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Middle-candle indices of the bullish and bearish gaps completed by the candles
+    from ``first`` on, and the mean volume of the 20 candles before every candle
+    """
+    high, low, open_, close, volume = (
+        np.array([c[f] for c in candles], dtype=float)
+        for f in ('high', 'low', 'open', 'close', 'volume')
+    )
+    before, middle, after = slice(None, -2), slice(1, -1), slice(2, None)
+    
+    # Bullish: gap between C1 high and C3 low, bullish middle candle
+    bull_size = low[after] - high[before]
+    bullish = (bull_size > 0) & (bull_size / close[middle] * 100 >= min_gap_percentage) \
+        & (close[middle] > open_[middle])
+    # Bearish: gap between C3 high and C1 low, bearish middle candle
+    bear_size = low[before] - high[after]
+    bearish = (bear_size > 0) & (bear_size / close[middle] * 100 >= min_gap_percentage) \
+        & (close[middle] < open_[middle])
+    
+    bullish[:max(0, first - 2)] = False
+    bearish[:max(0, first - 2)] = False
+    
+    sums = np.concatenate(([0.0], np.cumsum(volume)))
+    index = np.arange(len(candles))
+    start = np.maximum(index - 20, 0)
+    counts = np.maximum(index - start, 1)
+    avg_volume = np.where(index > 0, (sums[index] - sums[start]) / counts, volume)
+    
+    return np.flatnonzero(bullish) + 1, np.flatnonzero(bearish) + 1, avg_volume
+
+
 class FVGDetector:
     """Advanced Fair Value Gap detector with multi-exchange confirmation"""
     
-    def __init__(self, storage_manager=None):
+    def __init__(self, storage_manager=None, zones: Optional[ZoneRegistry] = None):
         self.storage = storage_manager
+        self.zones = zones if zones is not None else ZoneRegistry()
         self.min_gap_percentage = 0.1  # Minimum 0.1% gap
         self.lookback_periods = 100
         self.min_volume_surge = 1.5  # 1.5x average volume
+        self.filled_retention_periods = 20  # Candles a filled gap stays visible
+        self.max_fvgs_per_symbol = 50  # Lowest quality gaps are evicted beyond this
         
-        # Cache for FVGs
-        self.active_fvgs: Dict[str, List[FairValueGap]] = {}
+        # Cache for FVGs; gaps of symbols no longer analyzed expire once they
+        # would have left the candle window
+        self.active_fvgs = StateStore(
+            "fair_value_gaps", cap=self.max_fvgs_per_symbol, on_drop=self._gap_dropped)
+        self.trackers: Dict[Tuple[str, str], FVGTracker] = {}
         
         logger.info("FVGDetector initialized with multi-exchange validation")
     
@@ -157,52 +201,52 @@ class FVGDetector:
         try:
             # Get candles from all exchanges
             all_candles = await self._get_multi_exchange_candles(symbol, timeframe)
+        except Exception as e:
+            logger.error(f"Error building candles for {symbol}: {e}", exc_info=True)
+            return []
+        
+        return await self.analyze_candles(symbol, all_candles, timeframe)
+    
+    async def analyze_candles(self, symbol: str, all_candles: List[Dict[str, Any]],
+                              timeframe: str = "15min") -> List[FairValueGap]:
+        """
+        Detect Fair Value Gaps on prepared multi-exchange candles
+        
+        Gaps are tracked per symbol and timeframe: repeated calls with the same
+        window only scan candles that closed since the last call.
+        
+        Args:
+            symbol: Trading pair (e.g., "BTCUSDT")
+            all_candles: Time-ordered candles with exchange and institutional volume info
+            timeframe: Candle timeframe of ``all_candles``
             
+        Returns:
+            Unfilled and recently filled FVGs inside the candle window
+        """
+        try:
             if len(all_candles) < 3:
                 logger.debug(f"Not enough candles for FVG detection: {len(all_candles)}")
                 return []
             
-            detected_fvgs = []
-            
-            # Scan for FVGs (need 3 candles)
-            for i in range(1, len(all_candles) - 1):
-                candle_1 = all_candles[i-1]
-                candle_2 = all_candles[i]
-                candle_3 = all_candles[i+1]
-                
-                # Check for bullish FVG
-                bullish_gap = self._check_bullish_fvg(candle_1, candle_2, candle_3)
-                if bullish_gap:
-                    fvg = await self._create_fvg(
-                        symbol, candle_1, candle_2, candle_3,
-                        FVGType.BULLISH, bullish_gap, all_candles[:i]
-                    )
-                    if fvg and fvg.actionable:
-                        detected_fvgs.append(fvg)
-                        logger.info(f"[FVG] {symbol}: Bullish FVG at {fvg.bottom:.2f}-{fvg.top:.2f}, "
-                                  f"gap={fvg.gap_percentage:.2f}%, fill_prob={fvg.fill_probability:.1f}%")
-                
-                # Check for bearish FVG
-                bearish_gap = self._check_bearish_fvg(candle_1, candle_2, candle_3)
-                if bearish_gap:
-                    fvg = await self._create_fvg(
-                        symbol, candle_1, candle_2, candle_3,
-                        FVGType.BEARISH, bearish_gap, all_candles[:i]
-                    )
-                    if fvg and fvg.actionable:
-                        detected_fvgs.append(fvg)
-                        logger.info(f"[FVG] {symbol}: Bearish FVG at {fvg.bottom:.2f}-{fvg.top:.2f}, "
-                                  f"gap={fvg.gap_percentage:.2f}%, fill_prob={fvg.fill_probability:.1f}%")
-            
-            # Update active FVGs status
-            self._update_fvg_status(symbol, detected_fvgs, all_candles[-1])
-            
-            # Cache results
-            self.active_fvgs[symbol] = detected_fvgs
-            
-            # Save to storage
-            if self.storage and detected_fvgs:
-                for fvg in detected_fvgs:
+            tracker = self.trackers.get((symbol, timeframe))
+            if tracker is None:
+                tracker = self.trackers[(symbol, timeframe)] = FVGTracker(self, symbol)
+            new_fvgs = tracker.update(all_candles)
+            
+            window = as_utc(all_candles[-1]['timestamp']) - as_utc(all_candles[0]['timestamp'])
+            self.active_fvgs.replace(symbol, (
+                (fvg.id, fvg, as_utc(fvg.candle_1_time) + window, fvg.quality_score)
+                for fvg in tracker.fvgs()
+            ))
+            detected_fvgs = self.active_fvgs.get(symbol, [])
+            self.zones.get(symbol).sync(
+                FAIR_VALUE_GAP, (fvg for fvg in detected_fvgs if fvg.status != FVGStatus.FILLED), fvg_zone)
+            
+            # Save new gaps and fill status changes, so stored zones retire filled gaps
+            changed = {fvg.id: fvg for fvg in new_fvgs}
+            changed.update(tracker.transitions)
+            if self.storage and changed:
+                for fvg in changed.values():
                     self.storage.save_smc_analysis({
                         "type": "fair_value_gap",
                         "symbol": symbol,
@@ -349,56 +393,10 @@ class FVGDetector:
         
         return merged
     
-    def _check_bullish_fvg(self, c1: Dict, c2: Dict, c3: Dict) -> Optional[Tuple[float, float]]:
-        """Check for bullish FVG pattern"""
-        # Bullish FVG: Gap between C1 high and C3 low
-        gap_bottom = c1['high']
-        gap_top = c3['low']
-        
-        # Must have a real gap
-        if gap_top <= gap_bottom:
-            return None
-        
-        # Check minimum gap size
-        gap_size = gap_top - gap_bottom
-        gap_percentage = (gap_size / c2['close']) * 100
-        
-        if gap_percentage < self.min_gap_percentage:
-            return None
-        
-        # Middle candle should be bullish and strong
-        if c2['close'] <= c2['open']:
-            return None
-        
-        return (gap_bottom, gap_top)
-    
-    def _check_bearish_fvg(self, c1: Dict, c2: Dict, c3: Dict) -> Optional[Tuple[float, float]]:
-        """Check for bearish FVG pattern"""
-        # Bearish FVG: Gap between C1 low and C3 high
-        gap_top = c1['low']
-        gap_bottom = c3['high']
-        
-        # Must have a real gap
-        if gap_bottom >= gap_top:
-            return None
-        
-        # Check minimum gap size
-        gap_size = gap_top - gap_bottom
-        gap_percentage = (gap_size / c2['close']) * 100
-        
-        if gap_percentage < self.min_gap_percentage:
-            return None
-        
-        # Middle candle should be bearish and strong
-        if c2['close'] >= c2['open']:
-            return None
-        
-        return (gap_bottom, gap_top)
-    
-    async def _create_fvg(self, symbol: str, c1: Dict, c2: Dict, c3: Dict,
-                         fvg_type: FVGType, gap_levels: Tuple[float, float],
-                         historical_candles: List[Dict]) -> Optional[FairValueGap]:
-        """Create FVG with quality analysis"""
+    def _create_fvg(self, symbol: str, c1: Dict, c2: Dict, c3: Dict,
+                    fvg_type: FVGType, gap_levels: Tuple[float, float],
+                    avg_volume: float) -> Optional[FairValueGap]:
+        """Create FVG with quality analysis (``avg_volume``: mean of the 20 candles before c2)"""
         try:
             bottom, top = gap_levels
             gap_size = top - bottom
@@ -406,7 +404,6 @@ class FVGDetector:
             gap_percentage = (gap_size / c2['close']) * 100
             
             # Calculate volume metrics
-            avg_volume = np.mean([c['volume'] for c in historical_candles[-20:]]) if historical_candles else c2['volume']
             volume_surge = c2['volume'] / avg_volume if avg_volume > 0 else 1.0
             
             # Institutional volume ratio
@@ -532,48 +529,8 @@ class FVGDetector:
         # Clamp to valid range
         return max(0, min(100, base_prob))
     
-    def _update_fvg_status(self, symbol: str, fvgs: List[FairValueGap], 
-                          current_candle: Dict):
-        """Update FVG fill status"""
-        current_price = current_candle['close']
-        current_time = current_candle['timestamp']
-        
-        for fvg in fvgs:
-            if fvg.status == FVGStatus.FILLED:
-                continue
-            
-            # Check if price entered the gap
-            if fvg.type == FVGType.BULLISH:
-                # Bullish FVG fills from above
-                if current_price <= fvg.top:
-                    if fvg.status == FVGStatus.UNFILLED:
-                        fvg.status = FVGStatus.PARTIALLY_FILLED
-                        fvg.fill_start_time = current_time
-                    
-                    # Calculate fill percentage
-                    if current_price <= fvg.bottom:
-                        fvg.fill_percentage = 100.0
-                        fvg.status = FVGStatus.FILLED
-                        fvg.fill_complete_time = current_time
-                    else:
-                        fill_depth = fvg.top - current_price
-                        fvg.fill_percentage = (fill_depth / fvg.gap_size) * 100
-            
-            else:  # Bearish FVG
-                # Bearish FVG fills from below
-                if current_price >= fvg.bottom:
-                    if fvg.status == FVGStatus.UNFILLED:
-                        fvg.status = FVGStatus.PARTIALLY_FILLED
-                        fvg.fill_start_time = current_time
-                    
-                    # Calculate fill percentage
-                    if current_price >= fvg.top:
-                        fvg.fill_percentage = 100.0
-                        fvg.status = FVGStatus.FILLED
-                        fvg.fill_complete_time = current_time
-                    else:
-                        fill_depth = current_price - fvg.bottom
-                        fvg.fill_percentage = (fill_depth / fvg.gap_size) * 100
+    def _gap_dropped(self, symbol: str, fvg: FairValueGap, reason: str):
+        self.zones.get(symbol).discard(fvg)
     
     def get_unfilled_fvgs(self, symbol: str) -> List[FairValueGap]:
         """Get unfilled FVGs for a symbol"""
@@ -584,3 +541,171 @@ class FVGDetector:
         """Get high quality actionable FVGs"""
         return [fvg for fvg in self.active_fvgs.get(symbol, [])
                 if fvg.actionable and fvg.status != FVGStatus.FILLED]
+
+
+class _GapIndex:
+    """Gaps kept sorted by one edge price, for range lookups by bisection"""
+    
+    def __init__(self, edge: str):
+        self.edge = edge
+        self.keys: List[float] = []
+        self.gaps: List[FairValueGap] = []
+    
+    def __len__(self) -> int:
+        return len(self.gaps)
+    
+    def add(self, fvg: FairValueGap):
+        key = getattr(fvg, self.edge)
+        i = bisect.bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.gaps.insert(i, fvg)
+    
+    def remove(self, fvg: FairValueGap):
+        i = bisect.bisect_left(self.keys, getattr(fvg, self.edge))
+        while self.gaps[i] is not fvg:
+            i += 1
+        del self.keys[i]
+        del self.gaps[i]
+    
+    def at_or_above(self, price: float) -> List[FairValueGap]:
+        return self.gaps[bisect.bisect_left(self.keys, price):]
+    
+    def at_or_below(self, price: float) -> List[FairValueGap]:
+        return self.gaps[:bisect.bisect_right(self.keys, price)]
+
+
+class FVGTracker:
+    """
+    Fair Value Gaps for one symbol, maintained as candles close.
+    
+    Gap detection runs as array comparisons over the candles added since the
+    last update. Open gaps sit in price-sorted indexes, so each new candle only
+    visits the gaps its range reaches: bullish gaps by top (reached when the low
+    trades down to it), bearish gaps by bottom (reached when the high trades up
+    to it). Filled gaps leave the indexes and stay visible for
+    ``filled_retention_periods`` candles; every gap is dropped once its first
+    candle leaves the window.
+    """
+    
+    def __init__(self, detector: FVGDetector, symbol: str):
+        self.detector = detector
+        self.symbol = symbol
+        self.candles: List[Dict[str, Any]] = []
+        self._times: List[datetime] = []
+        self._seen = 0  # Candles processed since the tracker was created
+        self.open: Dict[str, FairValueGap] = {}  # Formation order
+        self.filled: deque = deque()  # (candle count at fill, gap) in fill order
+        self.transitions: Dict[str, FairValueGap] = {}  # Gaps whose status changed in the last update
+        self._bullish = _GapIndex('top')
+        self._bearish = _GapIndex('bottom')
+    
+    def fvgs(self) -> List[FairValueGap]:
+        gaps = list(self.open.values()) + [fvg for _, fvg in self.filled]
+        return sorted(gaps, key=lambda fvg: fvg.candle_2_time)
+    
+    def update(self, candles: List[Dict[str, Any]]) -> List[FairValueGap]:
+        """
+        Take in candles closed since the last update (``candles`` is the full window)
+        
+        Returns:
+            Newly detected actionable gaps
+        """
+        self.transitions = {}
+        if not candles:
+            return []
+        
+        last = self._times[-1] if self._times else None
+        start = 0 if last is None else bisect.bisect_right(
+            candles, last, key=lambda c: c['timestamp'])
+        new = candles[start:]
+        
+        window_start = candles[0]['timestamp']
+        expired = bisect.bisect_left(self._times, window_start)
+        del self.candles[:expired]
+        del self._times[:expired]
+        self._expire(window_start)
+        
+        if not new:
+            return []
+        first = len(self.candles)
+        self.candles.extend(new)
+        self._times.extend(c['timestamp'] for c in new)
+        
+        detector = self.detector
+        # Enough history before the first new triple for the volume average
+        offset = max(0, first - 21)
+        bullish, bearish, avg_volume = _gap_candidates(
+            self.candles[offset:], first - offset, detector.min_gap_percentage)
+        # Gaps keyed by the index of their third candle
+        formed: Dict[int, List[FairValueGap]] = {}
+        for indices, fvg_type in ((bullish, FVGType.BULLISH), (bearish, FVGType.BEARISH)):
+            for i in indices.tolist():
+                c1, c2, c3 = self.candles[offset + i - 1:offset + i + 2]
+                levels = (c1['high'], c3['low']) if fvg_type == FVGType.BULLISH else (c3['high'], c1['low'])
+                fvg = detector._create_fvg(self.symbol, c1, c2, c3, fvg_type, levels,
+                                           float(avg_volume[i]))
+                if fvg and fvg.actionable:
+                    formed.setdefault(offset + i + 1, []).append(fvg)
+        
+        detected = []
+        for index in range(max(first, 2), len(self.candles)):
+            candle = self.candles[index]
+            self._seen += 1
+            self._fill(candle)
+            for fvg in formed.get(index, ()):
+                self.open[fvg.id] = fvg
+                (self._bullish if fvg.type == FVGType.BULLISH else self._bearish).add(fvg)
+                detected.append(fvg)
+                logger.info(f"[FVG] {self.symbol}: {fvg.type.value.capitalize()} FVG at "
+                            f"{fvg.bottom:.2f}-{fvg.top:.2f}, gap={fvg.gap_percentage:.2f}%, "
+                            f"fill_prob={fvg.fill_probability:.1f}%")
+        
+        retention = detector.filled_retention_periods
+        while self.filled and self._seen - self.filled[0][0] > retention:
+            self.filled.popleft()
+        return detected
+    
+    def _fill(self, candle: Dict[str, Any]):
+        """Advance the fill state of the gaps this candle's range reaches"""
+        low, high, current_time = candle['low'], candle['high'], candle['timestamp']
+        
+        # Bullish FVGs fill from above
+        for fvg in self._bullish.at_or_above(low):
+            if fvg.status == FVGStatus.UNFILLED:
+                fvg.status = FVGStatus.PARTIALLY_FILLED
+                fvg.fill_start_time = current_time
+                self.transitions[fvg.id] = fvg
+            if low <= fvg.bottom:
+                self._complete(fvg, current_time)
+            else:
+                fvg.fill_percentage = max(fvg.fill_percentage, (fvg.top - low) / fvg.gap_size * 100)
+        
+        # Bearish FVGs fill from below
+        for fvg in self._bearish.at_or_below(high):
+            if fvg.status == FVGStatus.UNFILLED:
+                fvg.status = FVGStatus.PARTIALLY_FILLED
+                fvg.fill_start_time = current_time
+                self.transitions[fvg.id] = fvg
+            if high >= fvg.top:
+                self._complete(fvg, current_time)
+            else:
+                fvg.fill_percentage = max(fvg.fill_percentage, (high - fvg.bottom) / fvg.gap_size * 100)
+    
+    def _complete(self, fvg: FairValueGap, current_time: datetime):
+        fvg.fill_percentage = 100.0
+        fvg.status = FVGStatus.FILLED
+        fvg.fill_complete_time = current_time
+        self.transitions[fvg.id] = fvg
+        (self._bullish if fvg.type == FVGType.BULLISH else self._bearish).remove(fvg)
+        del self.open[fvg.id]
+        self.filled.append((self._seen, fvg))
+    
+    def _expire(self, window_start: datetime):
+        while self.open:
+            fvg = next(iter(self.open.values()))
+            if fvg.candle_1_time >= window_start:
+                break
+            (self._bullish if fvg.type == FVGType.BULLISH else self._bearish).remove(fvg)
+            del self.open[fvg.id]
+        self.filled = deque((seen, fvg) for seen, fvg in self.filled
+                            if fvg.candle_1_time >= window_start)
@@ -0,0 +1,139 @@
+"""
+Incremental SMC computation graph
+Each analysis step is a node that memoizes its output on the versions of its
+inputs. Evaluating a node only recomputes it when one of its dependencies has a
+new version, so a fresh price tick reruns confluence and signals but not order
+block or FVG detection, and nothing reruns at all when no input changed.
+
+Nodes may supply a fingerprint of their output. When a recompute produces the
+same fingerprint the node keeps its version, which stops the change from
+propagating further downstream.
+"""
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class GraphNode:
+    """One memoized step: an input (no compute) or a derived value"""
+    __slots__ = ("name", "deps", "compute", "fingerprint", "value", "version", "key",
+                 "input_versions", "computes", "last_compute_ms")
+
+    def __init__(self, name: str, deps: Sequence[str] = (), compute: Optional[Callable] = None,
+                 fingerprint: Optional[Callable[[Any], Hashable]] = None):
+        self.name = name
+        self.deps = tuple(deps)
+        self.compute = compute
+        self.fingerprint = fingerprint
+        self.value: Any = None
+        self.version = 0
+        self.key: Hashable = None
+        self.input_versions: Optional[Tuple[int, ...]] = None
+        self.computes = 0
+        self.last_compute_ms = 0.0
+
+    @property
+    def is_input(self) -> bool:
+        return self.compute is None
+
+
+class DependencyGraph:
+    """
+    Versioned dependency graph with per-node memoization.
+
+    Usage:
+        graph = DependencyGraph()
+        graph.add_input("candles")
+        graph.add_node("swings", ["candles"], detect_swings)
+        graph.set_input("candles", candles, key=last_close_time)
+        swings = await graph.evaluate("swings")
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.nodes: Dict[str, GraphNode] = {}
+        self._lock = asyncio.Lock()
+
+    def add_input(self, name: str):
+        self.nodes[name] = GraphNode(name)
+
+    def add_node(self, name: str, deps: Sequence[str], compute: Callable,
+                 fingerprint: Optional[Callable[[Any], Hashable]] = None):
+        """Register a derived node; ``compute`` gets the dependency values positionally and may be async"""
+        missing = [dep for dep in deps if dep not in self.nodes]
+        if missing:
+            raise KeyError(f"Unknown dependencies for {name}: {missing}")
+        self.nodes[name] = GraphNode(name, deps, compute, fingerprint)
+
+    def set_input(self, name: str, value: Any, key: Hashable = None) -> bool:
+        """
+        Update an input node. ``key`` identifies the input's content (defaults to the
+        value itself); the version only advances when the key changes.
+
+        Returns:
+            True if the input changed
+        """
+        node = self.nodes[name]
+        key = value if key is None else key
+        if node.version and key == node.key:
+            return False
+        node.value = value
+        node.key = key
+        node.version += 1
+        return True
+
+    def version(self, name: str) -> int:
+        return self.nodes[name].version
+
+    async def evaluate(self, name: str) -> Any:
+        """Bring ``name`` and everything it depends on up to date and return its value"""
+        async with self._lock:
+            return await self._evaluate(self.nodes[name], set())
+
+    async def _evaluate(self, node: GraphNode, visited: set) -> Any:
+        if node.is_input or node.name in visited:
+            return node.value
+
+        values: List[Any] = []
+        for dep in node.deps:
+            values.append(await self._evaluate(self.nodes[dep], visited))
+        visited.add(node.name)
+
+        versions = tuple(self.nodes[dep].version for dep in node.deps)
+        if versions == node.input_versions:
+            return node.value
+
+        started = time.perf_counter()
+        value = node.compute(*values)
+        if inspect.isawaitable(value):
+            value = await value
+        node.last_compute_ms = (time.perf_counter() - started) * 1000
+        node.computes += 1
+        node.input_versions = versions
+
+        key = node.fingerprint(value) if node.fingerprint else None
+        if node.fingerprint and node.version and key == node.key:
+            # Same result as last time: downstream nodes stay valid
+            return node.value
+        node.value = value
+        node.key = key
+        node.version += 1
+        return value
+
+    def invalidate(self):
+        """Forget every memoized result (inputs keep their values)"""
+        for node in self.nodes.values():
+            if not node.is_input:
+                node.input_versions = None
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            node.name: {
+                "version": node.version,
+                "computes": node.computes,
+                "last_compute_ms": round(node.last_compute_ms, 3),
+                "deps": list(node.deps),
+            }
+            for node in self.nodes.values()
+        }
@@ -0,0 +1,274 @@
+"""
+Bounded lifecycle for long-lived SMC state
+Detected zones, blocks, gaps and signals are kept per symbol in StateStores:
+entries leave through an expiry heap ordered by invalidation time, a hard
+per-symbol cap evicts the lowest-scoring entry, and entries nobody has touched
+for a while can be compacted out to storage. Memory is accounted per symbol so
+a weeks-long process can show that its SMC state stays flat.
+"""
+import heapq
+import sys
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+# Why an entry left the store, passed to ``on_drop``
+EXPIRED = "expired"
+EVICTED = "evicted"
+COLD = "cold"
+REMOVED = "removed"
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+def estimate_size(obj: Any) -> int:
+    """Shallow size of an object plus its fields and their direct contents"""
+    size = sys.getsizeof(obj)
+    fields = getattr(type(obj), '__slots__', None)
+    if fields is not None:
+        values = [getattr(obj, name, None) for name in fields]
+    elif hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+        values = list(vars(obj).values())
+    else:
+        values = []
+    for value in values:
+        size += sys.getsizeof(value)
+        if isinstance(value, (list, tuple, set)):
+            size += sum(sys.getsizeof(v) for v in value)
+        elif isinstance(value, dict):
+            size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+class _Entry:
+    __slots__ = ("item", "expires_at", "score", "seq", "size")
+
+    def __init__(self, item: Any, expires_at: float, score: float, seq: int, size: int):
+        self.item = item
+        self.expires_at = expires_at
+        self.score = score
+        self.seq = seq
+        self.size = size
+
+
+class _Symbol:
+    """Entries of one symbol"""
+
+    __slots__ = ("entries", "touched", "by_score", "bytes")
+
+    def __init__(self):
+        self.entries: Dict[Hashable, _Entry] = {}  # Insertion order
+        self.touched: "OrderedDict[Hashable, float]" = OrderedDict()  # Least recently touched first
+        self.by_score: List[Tuple[float, int, Hashable]] = []  # Lazy min-heap
+        self.bytes = 0
+
+
+class StateStore:
+    """
+    Per-symbol store for one kind of SMC object.
+
+    Removal is lazy: superseded heap entries are skipped when they surface, and
+    a symbol's score heap is rebuilt once stale entries outnumber live ones.
+    Symbols with no entries left are forgotten entirely.
+
+    Reads are list-like per symbol (``store.get(symbol, [])``, ``store[symbol]``,
+    ``symbol in store``) in insertion order.
+
+    Usage:
+        store = StateStore("liquidity_zones", cap=20, cold_after=timedelta(hours=12),
+                           on_drop=lambda symbol, zone, reason: ...)
+        store.put(symbol, key, zone, expires_at=zone.formation_start + ttl, score=zone.confluence_score)
+        store.expire()
+        store.compact()
+    """
+
+    def __init__(self, name: str, cap: int, cold_after: Optional[timedelta] = None,
+                 on_drop: Optional[Callable[[str, Any, str], None]] = None):
+        self.name = name
+        self.cap = cap
+        self.cold_after = cold_after
+        self.on_drop = on_drop
+        self._symbols: Dict[str, _Symbol] = {}
+        self._expiry: List[Tuple[float, int, str, Hashable]] = []
+        self._seq = 0
+        self.dropped = {EXPIRED: 0, EVICTED: 0, COLD: 0, REMOVED: 0}
+
+    # Reads
+
+    def get(self, symbol: str, default: Any = None) -> Any:
+        state = self._symbols.get(symbol)
+        if state is None:
+            return default
+        return [entry.item for entry in state.entries.values()]
+
+    def __getitem__(self, symbol: str) -> List[Any]:
+        if symbol not in self._symbols:
+            raise KeyError(symbol)
+        return self.get(symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def __len__(self) -> int:
+        return sum(len(state.entries) for state in self._symbols.values())
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    # Writes
+
+    def put(self, symbol: str, key: Hashable, item: Any, expires_at: Any, score: float,
+            now: Optional[float] = None) -> List[Any]:
+        """
+        Insert or replace an entry, then enforce the symbol's cap.
+
+        Returns:
+            Items evicted to make room (possibly the new one)
+        """
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = _Symbol()
+        old = state.entries.pop(key, None)
+        if old is not None:
+            state.bytes -= old.size
+
+        self._seq += 1
+        entry = _Entry(item, _timestamp(expires_at), score, self._seq, estimate_size(item))
+        state.entries[key] = entry
+        state.bytes += entry.size
+        state.touched[key] = now
+        state.touched.move_to_end(key)
+        heapq.heappush(self._expiry, (entry.expires_at, entry.seq, symbol, key))
+        heapq.heappush(state.by_score, (score, entry.seq, key))
+
+        evicted = []
+        while len(state.entries) > self.cap:
+            score_, seq, victim = heapq.heappop(state.by_score)
+            current = state.entries.get(victim)
+            if current is not None and current.seq == seq:
+                evicted.append(self._drop(symbol, state, victim, EVICTED))
+        if len(state.by_score) > 2 * len(state.entries) + 16:
+            state.by_score = [(e.score, e.seq, k) for k, e in state.entries.items()]
+            heapq.heapify(state.by_score)
+        return evicted
+
+    def replace(self, symbol: str, entries: Iterable[Tuple[Hashable, Any, Any, float]],
+                now: Optional[float] = None) -> List[Any]:
+        """Make a symbol hold exactly ``entries`` ((key, item, expires_at, score)), capped"""
+        entries = list(entries)
+        wanted = {key for key, _, _, _ in entries}
+        state = self._symbols.get(symbol)
+        if state is not None:
+            for key in [key for key in state.entries if key not in wanted]:
+                self._drop(symbol, state, key, REMOVED, notify=False)
+        evicted = []
+        for key, item, expires_at, score in entries:
+            evicted.extend(self.put(symbol, key, item, expires_at, score, now))
+        if symbol in self._symbols and not self._symbols[symbol].entries:
+            del self._symbols[symbol]
+        return evicted
+
+    def touch(self, symbol: str, key: Hashable, now: Optional[float] = None):
+        """Mark an entry as in use so it is not compacted"""
+        state = self._symbols.get(symbol)
+        if state is not None and key in state.entries:
+            state.touched[key] = now if now is not None else datetime.now(timezone.utc).timestamp()
+            state.touched.move_to_end(key)
+
+    def discard(self, symbol: str, key: Hashable) -> Optional[Any]:
+        state = self._symbols.get(symbol)
+        if state is None or key not in state.entries:
+            return None
+        return self._drop(symbol, state, key, REMOVED, notify=False)
+
+    def clear(self, symbol: Optional[str] = None):
+        if symbol is None:
+            self._symbols.clear()
+            self._expiry.clear()
+        else:
+            self._symbols.pop(symbol, None)
+
+    # Lifecycle
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop entries whose invalidation time has passed"""
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, seq, symbol, key = heapq.heappop(self._expiry)
+            state = self._symbols.get(symbol)
+            entry = state.entries.get(key) if state else None
+            if entry is not None and entry.seq == seq:
+                self._drop(symbol, state, key, EXPIRED)
+                expired += 1
+        live = len(self)
+        if len(self._expiry) > 2 * live + 64:
+            self._expiry = [(e.expires_at, e.seq, symbol, key)
+                            for symbol, state in self._symbols.items()
+                            for key, e in state.entries.items()]
+            heapq.heapify(self._expiry)
+        return expired
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Hand entries untouched for ``cold_after`` to ``on_drop`` and forget them"""
+        if self.cold_after is None:
+            return 0
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        cutoff = now - self.cold_after.total_seconds()
+        compacted = 0
+        for symbol, state in list(self._symbols.items()):
+            while state.touched:
+                key, touched = next(iter(state.touched.items()))
+                if touched > cutoff:
+                    break
+                self._drop(symbol, state, key, COLD)
+                compacted += 1
+        return compacted
+
+    def _drop(self, symbol: str, state: _Symbol, key: Hashable, reason: str,
+              notify: bool = True) -> Any:
+        entry = state.entries.pop(key)
+        state.touched.pop(key, None)
+        state.bytes -= entry.size
+        self.dropped[reason] += 1
+        if not state.entries:
+            del self._symbols[symbol]
+        if notify and self.on_drop:
+            try:
+                self.on_drop(symbol, entry.item, reason)
+            except Exception as e:
+                logger.error(f"Error dropping {self.name} entry for {symbol}: {e}")
+        return entry.item
+
+    # Accounting
+
+    def memory(self, symbol: Optional[str] = None) -> Dict[str, int]:
+        """Entries and estimated bytes held, for one symbol or all"""
+        states = [self._symbols[symbol]] if symbol in self._symbols else [] if symbol else \
+            list(self._symbols.values())
+        return {
+            "objects": sum(len(state.entries) for state in states),
+            "bytes": sum(state.bytes for state in states),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "cap_per_symbol": self.cap,
+            "symbols": len(self._symbols),
+            **self.memory(),
+            "heap_entries": len(self._expiry),
+            "dropped": dict(self.dropped),
+        }
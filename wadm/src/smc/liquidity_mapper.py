@@ -27,7 +27,12 @@ from enum import Enum
 import statistics
 import numpy as np
 from collections import defaultdict
+from ..config import SMC_COLD_ZONE_HOURS
 from ..models import Trade, Exchange
+from .candles import INSTITUTIONAL_EXCHANGES
+from .lifecycle import COLD, StateStore
+from .tape import ConsolidatedTape
+from .zone_index import LIQUIDITY, ZoneRegistry, liquidity_zone
 from ..logger import get_logger
 
 logger = get_logger(__name__)
@@ -54,7 +59,7 @@ class LiquidityDirection(str, Enum):
     BEARISH = "bearish"
     NEUTRAL = "neutral"
 
-@dataclass
+@dataclass(slots=True)
 class LiquidityZone:
     """Enhanced liquidity zone with institutional validation"""
     
@@ -185,10 +190,10 @@ class LiquidityZone:
 class LiquidityMapper:
     """Enhanced Liquidity Mapper with Smart Money Positioning"""
     
-    def __init__(self, storage_manager=None):
+    def __init__(self, storage_manager=None, zones: Optional[ZoneRegistry] = None):
         self.storage = storage_manager
-        self.active_zones: Dict[str, List[LiquidityZone]] = {}
-        self.zone_history: List[LiquidityZone] = []
+        self.zones = zones if zones is not None else ZoneRegistry()
+        self.tapes: Dict[str, ConsolidatedTape] = {}
         
         # Configuration
         self.min_volume_threshold = 100.0        # Minimum volume for zone creation
@@ -198,6 +203,13 @@ class LiquidityMapper:
         self.zone_expiry_hours = 72              # Hours after which zones expire
         self.max_zones_per_symbol = 20           # Maximum active zones per symbol
         self.price_precision = 0.001             # Price precision for clustering (0.1%)
+        self.touch_distance_pct = 1.0            # Price this close to a zone keeps it warm
+        
+        # Active zones keyed by (type, lower, upper): expire by formation age,
+        # evict by confluence, compact to storage when price stays away
+        self.active_zones = StateStore(
+            "liquidity_zones", cap=self.max_zones_per_symbol,
+            cold_after=timedelta(hours=SMC_COLD_ZONE_HOURS), on_drop=self._zone_dropped)
         
         # Detection parameters
         self.order_block_lookback = 20           # Candles to look back for order blocks
@@ -222,23 +234,23 @@ class LiquidityMapper:
             logger.info(f"Mapping liquidity zones for {symbol} (lookback: {lookback_hours}h)")
             
             # Get multi-exchange data
-            trade_data = await self._get_multi_exchange_trades(symbol, lookback_hours)
+            tape = await self._get_multi_exchange_trades(symbol, lookback_hours)
             
-            if not trade_data:
+            if not tape:
                 logger.warning(f"No trade data available for {symbol}")
                 return []
             
             # Detect different types of liquidity zones
-            hvn_lvn_zones = await self._detect_volume_nodes(trade_data, symbol)
-            order_block_zones = await self._detect_order_block_liquidity(trade_data, symbol)
-            sweep_zones = await self._identify_sweep_zones(trade_data, symbol)
-            injection_zones = await self._detect_injection_zones(trade_data, symbol)
+            hvn_lvn_zones = await self._detect_volume_nodes(tape, symbol)
+            order_block_zones = await self._detect_order_block_liquidity(tape, symbol)
+            sweep_zones = await self._identify_sweep_zones(tape, symbol)
+            injection_zones = await self._detect_injection_zones(tape, symbol)
             
             # Combine all zones
             all_zones = hvn_lvn_zones + order_block_zones + sweep_zones + injection_zones
             
             # Apply institutional validation
-            validated_zones = await self._apply_institutional_validation(all_zones, trade_data)
+            validated_zones = await self._apply_institutional_validation(all_zones, tape)
             
             # Calculate confluence scores
             scored_zones = await self._calculate_confluence_scores(validated_zones)
@@ -258,65 +270,28 @@ class LiquidityMapper:
             logger.error(f"Error mapping liquidity zones for {symbol}: {e}", exc_info=True)
             return []
     
-    async def _get_multi_exchange_trades(self, symbol: str, lookback_hours: int) -> Dict[str, List[Dict]]:
-        """Get trade data from all exchanges"""
+    async def _get_multi_exchange_trades(self, symbol: str, lookback_hours: int) -> Optional[ConsolidatedTape]:
+        """Consolidated trade tape of all exchanges, brought up to date"""
         if not self.storage:
             logger.warning("No storage manager available")
-            return {}
-        
-        exchanges = ["bybit", "binance", "coinbase", "kraken"]
-        trade_data = {}
-        
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
+            return None
         
-        for exchange in exchanges:
-            try:
-                # Get trades from storage
-                trades = self.storage.get_recent_trades(symbol, exchange, minutes=lookback_hours * 60)
-                
-                # Filter and format trades
-                filtered_trades = []
-                for trade in trades:
-                    timestamp = trade.get('timestamp')
-                    if isinstance(timestamp, str):
-                        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    elif isinstance(timestamp, datetime) and timestamp.tzinfo is None:
-                        timestamp = timestamp.replace(tzinfo=timezone.utc)
-                    
-                    if timestamp and timestamp > cutoff_time:
-                        filtered_trades.append({
-                            'price': float(trade['price']),
-                            'quantity': float(trade['quantity']),
-                            'side': trade['side'],
-                            'timestamp': timestamp,
-                            'exchange': exchange,
-                            'is_institutional': exchange in ['coinbase', 'kraken']
-                        })
-                
-                trade_data[exchange] = sorted(filtered_trades, key=lambda x: x['timestamp'])
-                logger.debug(f"Loaded {len(filtered_trades)} trades from {exchange}")
-                
-            except Exception as e:
-                logger.error(f"Error loading trades from {exchange}: {e}")
-                trade_data[exchange] = []
+        tape = self.tapes.get(symbol)
+        if tape is None or tape.lookback_hours != lookback_hours:
+            tape = self.tapes[symbol] = ConsolidatedTape(symbol, lookback_hours)
+        added = tape.update(self.storage)
+        logger.debug(f"Loaded {added} new trades for {symbol} ({len(tape)} on the tape)")
         
-        return trade_data
+        return tape
     
-    async def _detect_volume_nodes(self, trade_data: Dict[str, List[Dict]], symbol: str) -> List[LiquidityZone]:
+    async def _detect_volume_nodes(self, tape: ConsolidatedTape, symbol: str) -> List[LiquidityZone]:
         """Detect High Volume Nodes (HVN) and Low Volume Nodes (LVN)"""
         zones = []
         
-        # Combine all trades
-        all_trades = []
-        for exchange, trades in trade_data.items():
-            all_trades.extend(trades)
-        
+        all_trades = tape.trades
         if not all_trades:
             return zones
         
-        # Sort by price for volume profile
-        all_trades.sort(key=lambda x: x['price'])
-        
         # Create price buckets
         min_price = min(t['price'] for t in all_trades)
         max_price = max(t['price'] for t in all_trades)
@@ -355,9 +330,10 @@ class LiquidityMapper:
         hvn_threshold = np.percentile(volumes, self.hvn_percentile)
         lvn_threshold = np.percentile(volumes, self.lvn_percentile)
         
-        # Create zones
+        # Create zones, lowest price level first
         zone_id = 0
-        for price, data in volume_by_level.items():
+        for price in sorted(volume_by_level):
+            data = volume_by_level[price]
             if data['total'] < self.min_volume_threshold:
                 continue
             
@@ -428,22 +404,16 @@ class LiquidityMapper:
         
         return zones
     
-    async def _detect_order_block_liquidity(self, trade_data: Dict[str, List[Dict]], symbol: str) -> List[LiquidityZone]:
+    async def _detect_order_block_liquidity(self, tape: ConsolidatedTape, symbol: str) -> List[LiquidityZone]:
         """Detect unmitigated order block liquidity zones"""
         zones = []
         
-        # Focus on institutional exchanges
-        institutional_trades = []
-        for exchange in ['coinbase', 'kraken']:
-            if exchange in trade_data:
-                institutional_trades.extend(trade_data[exchange])
+        # Focus on institutional exchanges, in time order
+        institutional_trades = tape.view(INSTITUTIONAL_EXCHANGES).trades()
         
         if not institutional_trades:
             return zones
         
-        # Sort by timestamp
-        institutional_trades.sort(key=lambda x: x['timestamp'])
-        
         # Look for large institutional orders
         avg_size = statistics.mean(t['quantity'] for t in institutional_trades)
         large_threshold = avg_size * 3  # 3x average size
@@ -529,24 +499,20 @@ class LiquidityMapper:
         
         return zones
     
-    async def _identify_sweep_zones(self, trade_data: Dict[str, List[Dict]], symbol: str) -> List[LiquidityZone]:
+    async def _identify_sweep_zones(self, tape: ConsolidatedTape, symbol: str) -> List[LiquidityZone]:
         """Identify liquidity sweep zones (stop hunts)"""
         zones = []
         
-        # Combine all trades
-        all_trades = []
-        for exchange, trades in trade_data.items():
-            all_trades.extend(trades)
+        # All exchanges, in time order
+        all_trades = tape.trades
         
         if not all_trades:
             return zones
         
-        # Sort by timestamp
-        all_trades.sort(key=lambda x: x['timestamp'])
-        
         # Look for rapid price moves with high volume
         zone_id = 0
         window_size = 50  # Look at 50 trades at a time
+        avg_volume = statistics.mean(t['quantity'] for t in all_trades)
         
         for i in range(0, len(all_trades) - window_size):
             window_trades = all_trades[i:i+window_size]
@@ -564,7 +530,6 @@ class LiquidityMapper:
             
             # Calculate volume metrics
             total_volume = sum(t['quantity'] for t in window_trades)
-            avg_volume = statistics.mean(t['quantity'] for t in all_trades)
             
             # Check if volume is abnormal
             if total_volume < avg_volume * window_size * 1.5:
@@ -628,22 +593,16 @@ class LiquidityMapper:
         
         return zones
     
-    async def _detect_injection_zones(self, trade_data: Dict[str, List[Dict]], symbol: str) -> List[LiquidityZone]:
+    async def _detect_injection_zones(self, tape: ConsolidatedTape, symbol: str) -> List[LiquidityZone]:
         """Detect liquidity injection zones (fresh institutional capital)"""
         zones = []
         
-        # Focus on institutional exchanges
-        institutional_trades = []
-        for exchange in ['coinbase', 'kraken']:
-            if exchange in trade_data:
-                institutional_trades.extend(trade_data[exchange])
+        # Focus on institutional exchanges, in time order
+        institutional_trades = tape.view(INSTITUTIONAL_EXCHANGES)
         
         if not institutional_trades:
             return zones
         
-        # Sort by timestamp
-        institutional_trades.sort(key=lambda x: x['timestamp'])
-        
         # Look for sudden increases in institutional volume
         window_minutes = 30
         zone_id = 0
@@ -732,7 +691,7 @@ class LiquidityMapper:
         
         return zones
     
-    async def _apply_institutional_validation(self, zones: List[LiquidityZone], trade_data: Dict[str, List[Dict]]) -> List[LiquidityZone]:
+    async def _apply_institutional_validation(self, zones: List[LiquidityZone], tape: ConsolidatedTape) -> List[LiquidityZone]:
         """Apply institutional validation to liquidity zones"""
         validated_zones = []
         
@@ -747,10 +706,7 @@ class LiquidityMapper:
             total_activity = 0
             
             for exchange in ['coinbase', 'kraken']:
-                if exchange not in trade_data:
-                    continue
-                
-                for trade in trade_data[exchange]:
+                for trade in tape.view([exchange]):
                     # Check if trade is near zone
                     if zone.lower_bound <= trade['price'] <= zone.upper_bound:
                         institutional_activity += trade['quantity']
@@ -820,23 +776,36 @@ class LiquidityMapper:
     
     def _update_active_zones(self, symbol: str, new_zones: List[LiquidityZone]):
         """Update active liquidity zones for a symbol"""
-        if symbol not in self.active_zones:
-            self.active_zones[symbol] = []
-        
-        # Add new zones
-        self.active_zones[symbol].extend(new_zones)
-        
-        # Remove expired zones
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=self.zone_expiry_hours)
-        self.active_zones[symbol] = [
-            zone for zone in self.active_zones[symbol]
-            if zone.formation_start > cutoff_time
-        ]
-        
-        # Limit number of active zones
-        if len(self.active_zones[symbol]) > self.max_zones_per_symbol:
-            self.active_zones[symbol].sort(key=lambda x: x.confluence_score, reverse=True)
-            self.active_zones[symbol] = self.active_zones[symbol][:self.max_zones_per_symbol]
+        # A zone re-detected at the same levels replaces the old one
+        expiry = timedelta(hours=self.zone_expiry_hours)
+        for zone in new_zones:
+            self.active_zones.put(
+                symbol, (zone.type, zone.lower_bound, zone.upper_bound), zone,
+                expires_at=zone.formation_start + expiry, score=zone.confluence_score)
+        self.active_zones.expire()
+        
+        self.zones.get(symbol).sync(LIQUIDITY, self.active_zones.get(symbol, []), liquidity_zone)
+    
+    def _zone_dropped(self, symbol: str, zone: LiquidityZone, reason: str):
+        """Expired, evicted or cold zone left the active set"""
+        self.zones.get(symbol).discard(zone)
+        if reason == COLD and self.storage:
+            # Still valid, just not near price: keep it queryable from storage
+            self.storage.save_smc_analysis({
+                "type": "liquidity_zone",
+                "symbol": symbol,
+                "timestamp": datetime.now(timezone.utc),
+                "reason": reason,
+                "data": zone.to_dict()
+            })
+    
+    def touch_price(self, symbol: str, current_price: float):
+        """Keep zones near the current price from being compacted"""
+        distance = current_price * self.touch_distance_pct / 100
+        for zone in self.zones.get(symbol).between(
+                current_price - distance, current_price + distance, kind=LIQUIDITY):
+            source = zone.source
+            self.active_zones.touch(symbol, (source.type, source.lower_bound, source.upper_bound))
     
     def get_active_liquidity_zones(self, symbol: str, min_confluence: float = 60.0) -> List[LiquidityZone]:
         """Get active liquidity zones for a symbol"""
@@ -850,17 +819,14 @@ class LiquidityMapper:
     
     def get_zones_near_price(self, symbol: str, current_price: float, max_distance_pct: float = 5.0) -> List[LiquidityZone]:
         """Get liquidity zones near current price"""
-        active_zones = self.get_active_liquidity_zones(symbol)
-        
-        nearby_zones = []
-        for zone in active_zones:
-            distance = zone.get_distance_from_price(current_price)
-            if distance <= max_distance_pct:
-                nearby_zones.append((zone, distance))
+        distance = current_price * max_distance_pct / 100
+        nearby_zones = self.zones.get(symbol).between(
+            current_price - distance, current_price + distance, kind=LIQUIDITY, min_strength=60.0
+        )
         
         # Sort by distance and confluence
-        nearby_zones.sort(key=lambda x: (x[1], -x[0].confluence_score))
-        return [zone for zone, _ in nearby_zones]
+        nearby_zones.sort(key=lambda z: (abs(current_price - z.price), -z.strength))
+        return [zone.source for zone in nearby_zones]
     
     def get_liquidity_summary(self, symbol: str, current_price: float) -> Dict[str, Any]:
         """Get comprehensive liquidity summary for a symbol"""
@@ -875,22 +841,19 @@ class LiquidityMapper:
             }
         
         # Categorize zones
-        hvn_zones = [z for z in active_zones if z.type == LiquidityType.HVN]
-        lvn_zones = [z for z in active_zones if z.type == LiquidityType.LVN]
-        order_block_zones = [z for z in active_zones if z.type == LiquidityType.ORDER_BLOCK]
-        sweep_zones = [z for z in active_zones if z.type == LiquidityType.SWEEP_ZONE]
-        injection_zones = [z for z in active_zones if z.type == LiquidityType.INJECTION_ZONE]
+        index = self.zones.get(symbol)
+        counts = {t: index.count(LIQUIDITY, type=t.value) for t in LiquidityType}
         
         # Find zones above and below current price
-        zones_above = [z for z in active_zones if z.price > current_price]
-        zones_below = [z for z in active_zones if z.price < current_price]
+        zones_above = index.count_above(current_price, kind=LIQUIDITY)
+        zones_below = index.count_below(current_price, kind=LIQUIDITY)
         
         # Get nearest zones
         nearby_zones = self.get_zones_near_price(symbol, current_price, max_distance_pct=3.0)
         
         # Determine bias
-        bullish_zones = len([z for z in active_zones if z.direction == LiquidityDirection.BULLISH])
-        bearish_zones = len([z for z in active_zones if z.direction == LiquidityDirection.BEARISH])
+        bullish_zones = index.count(LIQUIDITY, direction=LiquidityDirection.BULLISH.value)
+        bearish_zones = index.count(LIQUIDITY, direction=LiquidityDirection.BEARISH.value)
         
         if bullish_zones > bearish_zones * 1.5:
             liquidity_bias = "bullish"
@@ -903,13 +866,13 @@ class LiquidityMapper:
             'symbol': symbol,
             'current_price': current_price,
             'total_zones': len(active_zones),
-            'hvn_count': len(hvn_zones),
-            'lvn_count': len(lvn_zones),
-            'order_block_count': len(order_block_zones),
-            'sweep_count': len(sweep_zones),
-            'injection_count': len(injection_zones),
-            'zones_above': len(zones_above),
-            'zones_below': len(zones_below),
+            'hvn_count': counts[LiquidityType.HVN],
+            'lvn_count': counts[LiquidityType.LVN],
+            'order_block_count': counts[LiquidityType.ORDER_BLOCK],
+            'sweep_count': counts[LiquidityType.SWEEP_ZONE],
+            'injection_count': counts[LiquidityType.INJECTION_ZONE],
+            'zones_above': zones_above,
+            'zones_below': zones_below,
             'nearby_zones_count': len(nearby_zones),
             'liquidity_bias': liquidity_bias,
             'key_zones': [self._zone_to_summary(zone) for zone in nearby_zones[:5]],
@@ -12,6 +12,9 @@ from typing import List, Dict, Any, Optional, Tuple
 from enum import Enum
 from collections import defaultdict
 import numpy as np
+from .candles import as_utc
+from .lifecycle import StateStore
+from .zone_index import ORDER_BLOCK, ZoneRegistry, order_block_zone
 from ..logger import get_logger
 
 logger = get_logger(__name__)
@@ -29,7 +32,7 @@ class OrderBlockStrength(str, Enum):
     STRONG = "strong"
     VERY_STRONG = "very_strong"
 
-@dataclass
+@dataclass(slots=True)
 class OrderBlock:
     """Order Block with institutional validation"""
     
@@ -144,15 +147,20 @@ class OrderBlock:
 class OrderBlockDetector:
     """Enhanced Order Block detector with institutional validation"""
     
-    def __init__(self, storage_manager=None):
+    def __init__(self, storage_manager=None, zones: Optional[ZoneRegistry] = None):
         self.storage = storage_manager
+        self.zones = zones if zones is not None else ZoneRegistry()
         self.min_volume_multiplier = 2.0  # Minimum volume spike for OB
         self.min_candles = 3  # Minimum candles for valid OB
         self.institutional_weight = 2.0  # Weight for institutional volume
         self.lookback_periods = 100  # Candles to analyze
+        self.max_blocks_per_symbol = 50  # Lowest confidence blocks are evicted beyond this
         
-        # Cache detected blocks
-        self.active_blocks: Dict[str, List[OrderBlock]] = defaultdict(list)
+        # Cache detected blocks; blocks of symbols no longer analyzed expire
+        # once they would have left the candle window
+        self.active_blocks = StateStore(
+            "order_blocks", cap=self.max_blocks_per_symbol, on_drop=self._block_dropped)
+        self._saved_inactive: set = set()  # Mitigated block ids whose final state is stored
         
         logger.info("OrderBlockDetector initialized with institutional validation")
     
@@ -170,7 +178,26 @@ class OrderBlockDetector:
         try:
             # Get candles from trades
             candles = await self._build_candles_from_trades(symbol, timeframe)
+        except Exception as e:
+            logger.error(f"Error building candles for {symbol}: {e}", exc_info=True)
+            return []
+        
+        return await self.analyze_candles(symbol, candles, timeframe)
+    
+    async def analyze_candles(self, symbol: str, candles: List[Dict[str, Any]],
+                              timeframe: str = "15min") -> List[OrderBlock]:
+        """
+        Detect Order Blocks on prepared multi-exchange candles
+        
+        Args:
+            symbol: Trading pair (e.g., "BTCUSDT")
+            candles: Time-ordered candles with buy/sell and institutional/retail volume
+            timeframe: Candle timeframe of ``candles``
             
+        Returns:
+            List of detected Order Blocks
+        """
+        try:
             if len(candles) < self.min_candles:
                 logger.debug(f"Not enough candles for OB detection: {len(candles)}")
                 return []
@@ -216,11 +243,25 @@ class OrderBlockDetector:
                                   f"confidence={ob.confidence_score:.1f}%, strength={ob.strength.value}")
             
             # Update cache
-            self.active_blocks[symbol] = detected_blocks
+            window = as_utc(candles[-1]['timestamp']) - as_utc(candles[0]['timestamp'])
+            self.active_blocks.replace(symbol, (
+                (ob.id, ob, as_utc(ob.formation_time) + window, ob.confidence_score)
+                for ob in detected_blocks
+            ))
+            detected_blocks = self.active_blocks.get(symbol, [])
+            self.zones.get(symbol).sync(
+                ORDER_BLOCK, (ob for ob in detected_blocks if ob.is_active), order_block_zone)
             
-            # Save to storage if available
+            # Save to storage if available; a mitigated block is stored once, so
+            # readers see it retired, and not re-saved on every later pass
             if self.storage and detected_blocks:
+                cached_ids = {ob.id for ob in detected_blocks}
+                self._saved_inactive &= cached_ids
                 for ob in detected_blocks:
+                    if not ob.is_active:
+                        if ob.id in self._saved_inactive:
+                            continue
+                        self._saved_inactive.add(ob.id)
                     self.storage.save_smc_analysis({
                         "type": "order_block",
                         "symbol": symbol,
@@ -541,6 +582,7 @@ class OrderBlockDetector:
                 ob.mitigation_time = datetime.now(timezone.utc)
                 ob.mitigation_price = current_price
                 ob.active = False
+                self.zones.get(ob.symbol).discard(ob)
                 return False
         else:  # Bearish
             if current_price > ob.top:
@@ -548,6 +590,7 @@ class OrderBlockDetector:
                 ob.mitigation_time = datetime.now(timezone.utc)
                 ob.mitigation_price = current_price
                 ob.active = False
+                self.zones.get(ob.symbol).discard(ob)
                 return False
         
         # Check if OB was touched
@@ -560,6 +603,9 @@ class OrderBlockDetector:
         
         return ob.active
     
+    def _block_dropped(self, symbol: str, ob: OrderBlock, reason: str):
+        self.zones.get(symbol).discard(ob)
+    
     def get_active_order_blocks(self, symbol: str) -> List[OrderBlock]:
         """Get active Order Blocks for a symbol"""
         return [ob for ob in self.active_blocks.get(symbol, []) if ob.active]
@@ -567,15 +613,7 @@ class OrderBlockDetector:
     def get_nearest_order_block(self, symbol: str, current_price: float, 
                                ob_type: Optional[OrderBlockType] = None) -> Optional[OrderBlock]:
         """Get nearest Order Block to current price"""
-        active_obs = self.get_active_order_blocks(symbol)
-        
-        if ob_type:
-            active_obs = [ob for ob in active_obs if ob.type == ob_type]
-        
-        if not active_obs:
-            return None
-        
-        # Sort by distance to current price
-        active_obs.sort(key=lambda ob: abs(ob.midpoint - current_price))
-        
-        return active_obs[0]
+        zone = self.zones.get(symbol).nearest(
+            current_price, kind=ORDER_BLOCK, direction=ob_type.value if ob_type else None
+        )
+        return zone.source if zone else None
@@ -13,20 +13,38 @@ Value Proposition:
 """
 
 import asyncio
+import heapq
+import itertools
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from enum import Enum
 import statistics
 import uuid
+from ..config import SMC_MAINTENANCE_SECONDS, SMC_MAX_SIGNALS_PER_SYMBOL
 from ..logger import get_logger
 from .order_blocks import OrderBlockDetector, OrderBlock
 from .fvg_detector import FVGDetector, FairValueGap
-from .structure_analyzer import StructureAnalyzer, StructureBreak, TrendDirection
+from .structure_analyzer import StructureAnalyzer, StructureBreak, StructureTracker, TrendDirection
 from .liquidity_mapper import LiquidityMapper, LiquidityZone
+from .candles import CandleSeries
+from .graph import DependencyGraph
+from .lifecycle import StateStore
+from .zone_index import FAIR_VALUE_GAP, LIQUIDITY, ORDER_BLOCK, ZoneRegistry
 
 logger = get_logger(__name__)
 
+
+def _nearest_levels(levels: Iterable[float], limit: int) -> List[float]:
+    """First ``limit`` distinct values of an already distance-ordered stream"""
+    result: List[float] = []
+    for level in levels:
+        if level not in result:
+            result.append(level)
+            if len(result) == limit:
+                break
+    return result
+
 class SMCBias(str, Enum):
     """Overall SMC market bias"""
     STRONG_BULLISH = "strong_bullish"
@@ -124,7 +142,7 @@ class SMCAnalysis:
             "risk_warnings": self.risk_warnings
         }
 
-@dataclass
+@dataclass(slots=True)
 class SMCSignal:
     """Trading signal based on SMC analysis"""
     
@@ -193,22 +211,35 @@ class SMCDashboard:
     def __init__(self, storage_manager=None):
         self.storage = storage_manager
         
-        # Initialize all SMC components
-        self.order_block_detector = OrderBlockDetector(storage_manager)
-        self.fvg_detector = FVGDetector(storage_manager)
+        # Initialize all SMC components; detectors publish their active zones to
+        # one price-sorted index per symbol
+        self.zones = ZoneRegistry()
+        self.order_block_detector = OrderBlockDetector(storage_manager, self.zones)
+        self.fvg_detector = FVGDetector(storage_manager, self.zones)
         self.structure_analyzer = StructureAnalyzer(storage_manager)
-        self.liquidity_mapper = LiquidityMapper(storage_manager)
+        self.liquidity_mapper = LiquidityMapper(storage_manager, self.zones)
         
-        # Cache for analysis results
+        # Incremental analysis state per symbol
+        self.timeframe = "15min"
+        self.graphs: Dict[str, DependencyGraph] = {}
+        self.candle_series: Dict[str, CandleSeries] = {}
+        
+        # Latest analysis per symbol
         self.analysis_cache: Dict[str, Tuple[SMCAnalysis, datetime]] = {}
-        self.cache_ttl = timedelta(minutes=5)
         
-        # Signal tracking
-        self.signal_cache: Dict[str, List[SMCSignal]] = {}
-        self.signal_history: List[SMCSignal] = []
+        # Signal tracking: active signals expire at their expiry time, the
+        # history keeps the newest signals of the last day per symbol
         self.signal_expiry_hours = 4
+        self.signal_history_hours = 24
+        self.max_signals_per_symbol = SMC_MAX_SIGNALS_PER_SYMBOL
+        self.signal_cache = StateStore("signals", cap=self.max_signals_per_symbol)
+        self.signal_history = StateStore("signal_history", cap=self.max_signals_per_symbol)
         self.min_confluence_for_signal = 70.0
         
+        # Expiry and cold-zone compaction piggyback on analysis calls
+        self.maintenance_interval = SMC_MAINTENANCE_SECONDS
+        self._last_maintenance = 0.0
+        
         # Performance tracking
         self.performance_metrics = {
             'total_signals': 0,
@@ -224,6 +255,10 @@ class SMCDashboard:
         """
         Get comprehensive SMC analysis for a symbol
         
+        Detection runs on the symbol's dependency graph, so only the steps whose
+        inputs changed since the last call are recomputed: a new closed candle
+        reruns detection, a new price only reruns confluence and signals.
+        
         Args:
             symbol: Trading pair (e.g., "BTCUSDT")
             
@@ -231,106 +266,26 @@ class SMCDashboard:
             Complete SMC analysis with institutional validation
         """
         try:
-            # Check cache first
-            if symbol in self.analysis_cache:
-                cached_analysis, cached_time = self.analysis_cache[symbol]
-                if datetime.now(timezone.utc) - cached_time < self.cache_ttl:
-                    logger.debug(f"Returning cached SMC analysis for {symbol}")
-                    return cached_analysis
-            
-            logger.info(f"Performing comprehensive SMC analysis for {symbol}")
-            
-            # Get current price (would come from market data in production)
-            current_price = await self._get_current_price(symbol)
-            
-            # Run all SMC components in parallel
-            results = await asyncio.gather(
-                self.order_block_detector.detect_order_blocks(symbol),
-                self.fvg_detector.detect_fair_value_gaps(symbol),
-                self.structure_analyzer.analyze_market_structure(symbol),
-                self.liquidity_mapper.map_liquidity_zones(symbol),
-                return_exceptions=True
-            )
-            
-            # Parse results
-            order_blocks = results[0] if not isinstance(results[0], Exception) else []
-            fair_value_gaps = results[1] if not isinstance(results[1], Exception) else []
-            structure_analysis = results[2] if not isinstance(results[2], Exception) else None
-            liquidity_zones = results[3] if not isinstance(results[3], Exception) else []
-            
-            # Log any errors
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    component_names = ['order_blocks', 'fair_value_gaps', 'structure', 'liquidity']
-                    logger.error(f"Error in {component_names[i]}: {result}")
-            
-            # Calculate confluence and bias
-            confluence_data = await self._calculate_confluence(
-                order_blocks, fair_value_gaps, structure_analysis, liquidity_zones, current_price
-            )
-            
-            # Generate trading signals if confluence is high
-            active_signals = []
-            if confluence_data['confluence_score'] >= self.min_confluence_for_signal:
-                active_signals = await self._generate_trading_signals(
-                    symbol, current_price, order_blocks, fair_value_gaps, 
-                    structure_analysis, liquidity_zones, confluence_data
+            graph = self.graphs.get(symbol)
+            if graph is None:
+                graph = self.graphs[symbol] = self._build_graph(symbol)
+                self.candle_series[symbol] = CandleSeries(
+                    symbol, self.timeframe, self.order_block_detector.lookback_periods
                 )
             
-            # Extract key levels
-            key_levels = self._extract_key_levels(order_blocks, liquidity_zones, structure_analysis)
-            
-            # Calculate institutional metrics
-            institutional_metrics = self._calculate_institutional_metrics(
-                order_blocks, fair_value_gaps, liquidity_zones
-            )
-            
-            # Generate analysis narrative
-            narrative_data = self._generate_analysis_narrative(
-                symbol, current_price, confluence_data, institutional_metrics,
-                order_blocks, fair_value_gaps, structure_analysis, liquidity_zones
-            )
-            
-            # Create comprehensive analysis
-            analysis = SMCAnalysis(
-                symbol=symbol,
-                timestamp=datetime.now(timezone.utc),
-                current_price=current_price,
-                smc_bias=confluence_data['smc_bias'],
-                trend_direction=confluence_data['trend_direction'],
-                institutional_bias=confluence_data['institutional_bias'],
-                confluence_score=confluence_data['confluence_score'],
-                order_blocks=order_blocks,
-                fair_value_gaps=fair_value_gaps,
-                structure_breaks=structure_analysis.structure_breaks if structure_analysis else [],
-                liquidity_zones=liquidity_zones,
-                key_support_levels=key_levels['support'],
-                key_resistance_levels=key_levels['resistance'],
-                immediate_support=key_levels['immediate_support'],
-                immediate_resistance=key_levels['immediate_resistance'],
-                active_signals=active_signals,
-                setup_quality=confluence_data['setup_quality'],
-                next_targets=confluence_data['next_targets'],
-                invalidation_levels=confluence_data['invalidation_levels'],
-                institutional_activity_score=institutional_metrics['activity_score'],
-                smart_money_positioning=institutional_metrics['positioning'],
-                institutional_sentiment=institutional_metrics['sentiment'],
-                signal_accuracy_24h=self._get_recent_accuracy(),
-                institutional_confirmation_rate=institutional_metrics['confirmation_rate'],
-                multi_exchange_validation_rate=institutional_metrics['validation_rate'],
-                market_narrative=narrative_data['narrative'],
-                key_insights=narrative_data['insights'],
-                trading_recommendations=narrative_data['recommendations'],
-                risk_warnings=narrative_data['warnings']
-            )
-            
-            # Cache the analysis
-            self.analysis_cache[symbol] = (analysis, datetime.now(timezone.utc))
+            series = self.candle_series[symbol]
+            if series.update(self.storage):
+                logger.info(f"New closed candles for {symbol}, refreshing SMC detection")
+            graph.set_input("candles", series.candles, key=series.last_close)
+            current_price = await self._get_current_price(symbol)
+            graph.set_input("price", current_price)
+            self.liquidity_mapper.touch_price(symbol, current_price)
             
-            # Store in database if available
-            if self.storage:
-                await self._save_analysis(analysis)
+            analysis = await graph.evaluate("analysis")
+            self.analysis_cache[symbol] = (analysis, analysis.timestamp)
             
+            if datetime.now(timezone.utc).timestamp() - self._last_maintenance >= self.maintenance_interval:
+                self.maintain()
             return analysis
             
         except Exception as e:
@@ -338,18 +293,182 @@ class SMCDashboard:
             # Return a minimal analysis on error
             return self._create_error_analysis(symbol, str(e))
     
+    def _build_graph(self, symbol: str) -> DependencyGraph:
+        """
+        Per-symbol analysis graph
+        
+            candles -> swings -> breaks -> structure ----------.
+            candles -> order blocks, fair value gaps ----------+--> confluence -> signals
+            candles (on close) -> liquidity -------------------'        |
+            price ------------------------------------------------------'--> key levels, narrative
+        """
+        graph = DependencyGraph(symbol)
+        graph.add_input("candles")
+        graph.add_input("price")
+        
+        # Swings and breaks are extended as candles close rather than redetected
+        tracker = StructureTracker(self.structure_analyzer, symbol)
+        
+        def swings(candles):
+            tracker.update(candles)
+            return tracker.swings()
+        
+        graph.add_node(
+            "swings", ["candles"], swings,
+            fingerprint=lambda swings: tuple((s.price, s.timestamp) for side in swings for s in side),
+        )
+        graph.add_node(
+            "structure_breaks", ["swings", "candles"],
+            lambda swings, candles: list(tracker.breaks),
+            fingerprint=lambda breaks: tuple(b.id for b in breaks),
+        )
+        graph.add_node(
+            "structure", ["candles", "swings", "structure_breaks"],
+            lambda candles, swings, breaks: self.structure_analyzer.analyze_candles(
+                symbol, candles, swings, breaks),
+        )
+        graph.add_node(
+            "order_blocks", ["candles"],
+            lambda candles: self.order_block_detector.analyze_candles(symbol, candles, self.timeframe),
+            fingerprint=lambda blocks: tuple((ob.type, ob.bottom, ob.top, ob.mitigated) for ob in blocks),
+        )
+        graph.add_node(
+            "fair_value_gaps", ["candles"],
+            lambda candles: self.fvg_detector.analyze_candles(symbol, candles, self.timeframe),
+            fingerprint=lambda fvgs: tuple((f.type, f.bottom, f.top, f.status) for f in fvgs),
+        )
+        # Liquidity works on raw trades over a longer window; remapping it once per
+        # closed candle is plenty
+        graph.add_node(
+            "liquidity", ["candles"],
+            lambda candles: self._map_liquidity(symbol),
+            fingerprint=lambda zones: tuple((z.type, z.lower_bound, z.upper_bound) for z in zones),
+        )
+        graph.add_node(
+            "confluence", ["order_blocks", "fair_value_gaps", "structure", "liquidity", "price"],
+            lambda *args: self._calculate_confluence(symbol, *args),
+        )
+        
+        async def signals(confluence_data, order_blocks, fair_value_gaps, structure_analysis,
+                          liquidity_zones, current_price):
+            if confluence_data['confluence_score'] < self.min_confluence_for_signal:
+                return []
+            return await self._generate_trading_signals(
+                symbol, current_price, order_blocks, fair_value_gaps,
+                structure_analysis, liquidity_zones, confluence_data
+            )
+        
+        graph.add_node(
+            "signals",
+            ["confluence", "order_blocks", "fair_value_gaps", "structure", "liquidity", "price"],
+            signals,
+        )
+        graph.add_node(
+            "key_levels", ["price", "order_blocks", "liquidity", "structure"],
+            lambda *args: self._extract_key_levels(symbol, *args),
+        )
+        graph.add_node(
+            "institutional", ["order_blocks", "fair_value_gaps", "liquidity"],
+            self._calculate_institutional_metrics,
+        )
+        graph.add_node(
+            "narrative",
+            ["price", "confluence", "institutional", "order_blocks", "fair_value_gaps",
+             "structure", "liquidity"],
+            lambda *args: self._generate_analysis_narrative(symbol, *args),
+        )
+        graph.add_node(
+            "analysis",
+            ["price", "confluence", "order_blocks", "fair_value_gaps", "structure", "liquidity",
+             "key_levels", "signals", "institutional", "narrative"],
+            lambda *args: self._assemble_analysis(symbol, *args),
+        )
+        return graph
+    
+    async def _map_liquidity(self, symbol: str) -> List[LiquidityZone]:
+        try:
+            return await self.liquidity_mapper.map_liquidity_zones(symbol)
+        except Exception as e:
+            logger.error(f"Error in liquidity: {e}")
+            return []
+    
+    async def _assemble_analysis(self, symbol: str, current_price: float,
+                                 confluence_data: Dict[str, Any],
+                                 order_blocks: List[OrderBlock],
+                                 fair_value_gaps: List[FairValueGap],
+                                 structure_analysis: Any,
+                                 liquidity_zones: List[LiquidityZone],
+                                 key_levels: Dict[str, Any],
+                                 active_signals: List[SMCSignal],
+                                 institutional_metrics: Dict[str, Any],
+                                 narrative_data: Dict[str, Any]) -> SMCAnalysis:
+        """Create the analysis record from the graph outputs and persist it"""
+        analysis = SMCAnalysis(
+            symbol=symbol,
+            timestamp=datetime.now(timezone.utc),
+            current_price=current_price,
+            smc_bias=confluence_data['smc_bias'],
+            trend_direction=confluence_data['trend_direction'],
+            institutional_bias=confluence_data['institutional_bias'],
+            confluence_score=confluence_data['confluence_score'],
+            order_blocks=order_blocks,
+            fair_value_gaps=fair_value_gaps,
+            structure_breaks=structure_analysis.structure_breaks if structure_analysis else [],
+            liquidity_zones=liquidity_zones,
+            key_support_levels=key_levels['support'],
+            key_resistance_levels=key_levels['resistance'],
+            immediate_support=key_levels['immediate_support'],
+            immediate_resistance=key_levels['immediate_resistance'],
+            active_signals=active_signals,
+            setup_quality=confluence_data['setup_quality'],
+            next_targets=confluence_data['next_targets'],
+            invalidation_levels=confluence_data['invalidation_levels'],
+            institutional_activity_score=institutional_metrics['activity_score'],
+            smart_money_positioning=institutional_metrics['positioning'],
+            institutional_sentiment=institutional_metrics['sentiment'],
+            signal_accuracy_24h=self._get_recent_accuracy(),
+            institutional_confirmation_rate=institutional_metrics['confirmation_rate'],
+            multi_exchange_validation_rate=institutional_metrics['validation_rate'],
+            market_narrative=narrative_data['narrative'],
+            key_insights=narrative_data['insights'],
+            trading_recommendations=narrative_data['recommendations'],
+            risk_warnings=narrative_data['warnings']
+        )
+        
+        # Only new results are stored; an unchanged graph returns the previous record
+        if self.storage:
+            await self._save_analysis(analysis)
+        
+        return analysis
+    
+    def get_graph_status(self, symbol: str) -> Dict[str, Any]:
+        """Per-node versions and recompute counts for a symbol's analysis graph"""
+        graph = self.graphs.get(symbol)
+        if graph is None:
+            return {}
+        series = self.candle_series[symbol]
+        return {
+            "symbol": symbol,
+            "timeframe": self.timeframe,
+            "candles": len(series.candles),
+            "last_close": series.last_close,
+            "trades_loaded": series.trades_loaded,
+            "nodes": graph.status(),
+        }
+    
     async def _get_current_price(self, symbol: str) -> float:
         """Get current price for symbol"""
         if self.storage:
             # Get latest trade price
             recent_trades = self.storage.get_recent_trades(symbol, "bybit", minutes=1)
             if recent_trades:
-                return float(recent_trades[-1]['price'])
+                # Newest first
+                return float(recent_trades[0]['price'])
         
         # Default fallback
         return 0.0
     
-    async def _calculate_confluence(self, order_blocks: List[OrderBlock], 
+    async def _calculate_confluence(self, symbol: str, order_blocks: List[OrderBlock], 
                                   fair_value_gaps: List[FairValueGap],
                                   structure_analysis: Any,
                                   liquidity_zones: List[LiquidityZone],
@@ -451,32 +570,34 @@ class SMCDashboard:
         # Calculate targets and invalidation levels
         next_targets = []
         invalidation_levels = []
+        zones = self.zones.get(symbol)
         
         # Bullish targets
         if trend_direction == "bullish":
             # Use liquidity zones and FVGs as targets
-            targets_above = sorted([lz.price for lz in liquidity_zones if lz.price > current_price])
-            fvg_targets = sorted([fvg.gap_high for fvg in fair_value_gaps if fvg.gap_high > current_price])
-            
-            all_targets = sorted(list(set(targets_above + fvg_targets)))
-            next_targets = [{"price": price, "type": "resistance"} for price in all_targets[:3]]
+            targets = heapq.merge(
+                (lz.price for lz in zones.iter_above(current_price, kind=LIQUIDITY)),
+                (fvg.upper for fvg in zones.iter_above(current_price, edge="upper", kind=FAIR_VALUE_GAP)),
+            )
+            next_targets = [{"price": price, "type": "resistance"} for price in _nearest_levels(targets, 3)]
             
             # Invalidation is below recent lows or order blocks
-            inv_levels = sorted([ob.low_price for ob in order_blocks if ob.low_price < current_price], reverse=True)
-            invalidation_levels = [{"price": price, "type": "support_break"} for price in inv_levels[:2]]
+            inv_levels = itertools.islice(zones.iter_below(current_price, edge="lower", kind=ORDER_BLOCK), 2)
+            invalidation_levels = [{"price": ob.lower, "type": "support_break"} for ob in inv_levels]
         
         # Bearish targets
         elif trend_direction == "bearish":
             # Use liquidity zones and FVGs as targets
-            targets_below = sorted([lz.price for lz in liquidity_zones if lz.price < current_price], reverse=True)
-            fvg_targets = sorted([fvg.gap_low for fvg in fair_value_gaps if fvg.gap_low < current_price], reverse=True)
-            
-            all_targets = sorted(list(set(targets_below + fvg_targets)), reverse=True)
-            next_targets = [{"price": price, "type": "support"} for price in all_targets[:3]]
+            targets = heapq.merge(
+                (lz.price for lz in zones.iter_below(current_price, kind=LIQUIDITY)),
+                (fvg.lower for fvg in zones.iter_below(current_price, edge="lower", kind=FAIR_VALUE_GAP)),
+                reverse=True,
+            )
+            next_targets = [{"price": price, "type": "support"} for price in _nearest_levels(targets, 3)]
             
             # Invalidation is above recent highs or order blocks
-            inv_levels = sorted([ob.high_price for ob in order_blocks if ob.high_price > current_price])
-            invalidation_levels = [{"price": price, "type": "resistance_break"} for price in inv_levels[:2]]
+            inv_levels = itertools.islice(zones.iter_above(current_price, edge="upper", kind=ORDER_BLOCK), 2)
+            invalidation_levels = [{"price": ob.upper, "type": "resistance_break"} for ob in inv_levels]
         
         return {
             'smc_bias': smc_bias,
@@ -506,35 +627,32 @@ class SMCDashboard:
         # Determine signal type
         signal_type = "long" if "bullish" in confluence_data['smc_bias'].value else "short"
         
-        # Find entry zone
+        # Find entry zone: nearest order block, else liquidity zone, on the entry side
+        zones = self.zones.get(symbol)
         if signal_type == "long":
-            # Look for nearest bullish order block or support
-            entry_candidates = [ob.zone_low for ob in order_blocks 
-                              if ob.direction == "bullish" and ob.zone_low < current_price]
-            if not entry_candidates:
-                entry_candidates = [lz.lower_bound for lz in liquidity_zones 
-                                  if lz.direction == "bullish" and lz.lower_bound < current_price]
+            entry = next(zones.iter_below(current_price, edge="lower", kind=ORDER_BLOCK,
+                                          direction="bullish"), None) \
+                or next(zones.iter_below(current_price, edge="lower", kind=LIQUIDITY,
+                                         direction="bullish"), None)
         else:
-            # Look for nearest bearish order block or resistance
-            entry_candidates = [ob.zone_high for ob in order_blocks 
-                              if ob.direction == "bearish" and ob.zone_high > current_price]
-            if not entry_candidates:
-                entry_candidates = [lz.upper_bound for lz in liquidity_zones 
-                                  if lz.direction == "bearish" and lz.upper_bound > current_price]
-        
-        if not entry_candidates:
+            entry = next(zones.iter_above(current_price, edge="upper", kind=ORDER_BLOCK,
+                                          direction="bearish"), None) \
+                or next(zones.iter_above(current_price, edge="upper", kind=LIQUIDITY,
+                                         direction="bearish"), None)
+        
+        if entry is None:
             return signals
         
         # Calculate entry price
-        entry_price = sorted(entry_candidates, key=lambda x: abs(x - current_price))[0]
+        entry_price = entry.lower if signal_type == "long" else entry.upper
         
-        # Calculate stop loss
+        # Calculate stop loss beyond the furthest order block
         if signal_type == "long":
-            stop_candidates = [ob.low_price for ob in order_blocks if ob.low_price < entry_price]
-            stop_loss = min(stop_candidates) * 0.998 if stop_candidates else entry_price * 0.97
+            furthest = zones.lowest(edge="lower", kind=ORDER_BLOCK)
+            stop_loss = furthest.lower * 0.998 if furthest and furthest.lower < entry_price else entry_price * 0.97
         else:
-            stop_candidates = [ob.high_price for ob in order_blocks if ob.high_price > entry_price]
-            stop_loss = max(stop_candidates) * 1.002 if stop_candidates else entry_price * 1.03
+            furthest = zones.highest(edge="upper", kind=ORDER_BLOCK)
+            stop_loss = furthest.upper * 1.002 if furthest and furthest.upper > entry_price else entry_price * 1.03
         
         # Calculate take profits using Fibonacci extensions
         risk = abs(entry_price - stop_loss)
@@ -608,59 +726,51 @@ class SMCDashboard:
         signals.append(signal)
         
         # Update signal cache
-        if symbol not in self.signal_cache:
-            self.signal_cache[symbol] = []
-        self.signal_cache[symbol].append(signal)
-        self.signal_history.append(signal)
+        self.signal_cache.put(symbol, signal.id, signal,
+                              expires_at=signal.expiry_time, score=signal.confidence)
+        self.signal_history.put(
+            symbol, signal.id, signal,
+            expires_at=signal.formation_time + timedelta(hours=self.signal_history_hours),
+            score=signal.formation_time.timestamp()
+        )
         
         # Update performance metrics
         self.performance_metrics['total_signals'] += 1
         
         return signals
     
-    def _extract_key_levels(self, order_blocks: List[OrderBlock], 
+    def _extract_key_levels(self, symbol: str, current_price: float,
+                           order_blocks: List[OrderBlock], 
                            liquidity_zones: List[LiquidityZone],
                            structure_analysis: Any) -> Dict[str, Any]:
-        """Extract key support and resistance levels"""
-        
-        support_levels = []
-        resistance_levels = []
-        
-        # Extract from order blocks
-        for ob in order_blocks:
-            if ob.is_active:
-                if ob.direction == "bullish":
-                    support_levels.append(ob.zone_low)
-                else:
-                    resistance_levels.append(ob.zone_high)
-        
-        # Extract from liquidity zones
-        for lz in liquidity_zones:
-            if lz.is_active:
-                if lz.type in ["high_volume_node", "order_block"]:
-                    if lz.direction == "bullish":
-                        support_levels.append(lz.lower_bound)
-                    else:
-                        resistance_levels.append(lz.upper_bound)
-        
-        # Extract from structure
-        if structure_analysis:
-            support_levels.extend([s.price for s in structure_analysis.support_levels])
-            resistance_levels.extend([r.price for r in structure_analysis.resistance_levels])
-        
-        # Remove duplicates and sort
-        support_levels = sorted(list(set(support_levels)), reverse=True)
-        resistance_levels = sorted(list(set(resistance_levels)))
-        
-        # Get immediate levels (closest to current price)
-        immediate_support = support_levels[0] if support_levels else None
-        immediate_resistance = resistance_levels[0] if resistance_levels else None
+        """Extract the nearest support levels below and resistance levels above price"""
+        zones = self.zones.get(symbol)
+        key_liquidity = lambda lz: lz.type in ("high_volume_node", "order_block") and lz.source.is_active
+        swing_lows = structure_analysis.swing_lows[-5:] if structure_analysis else []
+        swing_highs = structure_analysis.swing_highs[-5:] if structure_analysis else []
+        
+        # Order blocks, key liquidity zones and recent swings, nearest first
+        support_levels = _nearest_levels(heapq.merge(
+            (ob.lower for ob in zones.iter_below(current_price, edge="lower", kind=ORDER_BLOCK,
+                                                 direction="bullish")),
+            (lz.lower for lz in zones.iter_below(current_price, edge="lower", kind=LIQUIDITY,
+                                                 direction="bullish", where=key_liquidity)),
+            sorted((s.price for s in swing_lows if s.price < current_price), reverse=True),
+            reverse=True,
+        ), 5)
+        resistance_levels = _nearest_levels(heapq.merge(
+            (ob.upper for ob in zones.iter_above(current_price, edge="upper", kind=ORDER_BLOCK,
+                                                 direction=("bearish", "breaker"))),
+            (lz.upper for lz in zones.iter_above(current_price, edge="upper", kind=LIQUIDITY,
+                                                 direction=("bearish", "neutral"), where=key_liquidity)),
+            sorted(r.price for r in swing_highs if r.price > current_price),
+        ), 5)
         
         return {
-            'support': support_levels[:5],  # Top 5 support levels
-            'resistance': resistance_levels[:5],  # Top 5 resistance levels
-            'immediate_support': immediate_support,
-            'immediate_resistance': immediate_resistance
+            'support': support_levels,
+            'resistance': resistance_levels,
+            'immediate_support': support_levels[0] if support_levels else None,
+            'immediate_resistance': resistance_levels[0] if resistance_levels else None
         }
     
     def _calculate_institutional_metrics(self, order_blocks: List[OrderBlock],
@@ -823,7 +933,7 @@ class SMCDashboard:
         """Save analysis to storage"""
         if self.storage:
             try:
-                await self.storage.save_smc_analysis(analysis.to_dict())
+                self.storage.save_smc_analysis(analysis.to_dict())
                 logger.debug(f"Saved SMC analysis for {analysis.symbol}")
             except Exception as e:
                 logger.error(f"Error saving SMC analysis: {e}")
@@ -888,23 +998,51 @@ class SMCDashboard:
     
     def get_active_signals(self, symbol: str) -> List[SMCSignal]:
         """Get active trading signals for a symbol"""
-        if symbol not in self.signal_cache:
-            return []
-        
-        # Filter expired signals
-        current_time = datetime.now(timezone.utc)
-        active_signals = [
-            signal for signal in self.signal_cache[symbol]
-            if signal.expiry_time > current_time
+        self.signal_cache.expire()
+        return self.signal_cache.get(symbol, [])
+    
+    def _state_stores(self) -> List[StateStore]:
+        return [
+            self.order_block_detector.active_blocks,
+            self.fvg_detector.active_fvgs,
+            self.liquidity_mapper.active_zones,
+            self.signal_cache,
+            self.signal_history,
         ]
+    
+    def maintain(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Expire invalidated state and compact cold liquidity zones to storage
         
-        # Update cache
-        self.signal_cache[symbol] = active_signals
-        
-        return active_signals
+        Returns:
+            Entries expired per store, plus zones compacted
+        """
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        result = {store.name: store.expire(now) for store in self._state_stores()}
+        result['compacted'] = self.liquidity_mapper.active_zones.compact(now)
+        self._last_maintenance = now
+        return result
+    
+    def get_memory_usage(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """Live SMC objects and their estimated bytes, for one symbol or all"""
+        stores = {store.name: store.memory(symbol) for store in self._state_stores()}
+        return {
+            "symbol": symbol,
+            "objects": sum(usage["objects"] for usage in stores.values()),
+            "bytes": sum(usage["bytes"] for usage in stores.values()),
+            "stores": stores,
+        }
+    
+    def get_state_status(self) -> Dict[str, Any]:
+        """Caps, sizes and drop counters of every SMC state store"""
+        return {store.name: store.status() for store in self._state_stores()}
     
     def clear_cache(self):
         """Clear analysis and signal cache"""
         self.analysis_cache.clear()
         self.signal_cache.clear()
+        self.signal_history.clear()
+        self.graphs.clear()
+        self.candle_series.clear()
+        self.zones.clear()
         logger.info("SMC Dashboard cache cleared")
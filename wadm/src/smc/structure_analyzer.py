@@ -6,11 +6,13 @@ Detects swing highs/lows, BOS, CHoCH with institutional confirmation
 """
 
 import asyncio
+import bisect
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from enum import Enum
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from ..logger import get_logger
 
 logger = get_logger(__name__)
@@ -31,7 +33,7 @@ class TrendDirection(str, Enum):
     BEARISH = "bearish"
     RANGING = "ranging"
 
-@dataclass
+@dataclass(slots=True)
 class SwingPoint:
     """Market structure swing point"""
     type: SwingType
@@ -41,7 +43,7 @@ class SwingPoint:
     volume: float
     institutional_ratio: float
 
-@dataclass
+@dataclass(slots=True)
 class StructureBreak:
     """Break of market structure"""
     id: str
@@ -98,6 +100,33 @@ class MarketStructure:
             "divergence_detected": self.divergence_detected
         }
 
+def _columns(candles: List[Dict], *fields: str) -> Tuple[np.ndarray, ...]:
+    """Candle fields as float arrays"""
+    n = len(candles)
+    return tuple(np.fromiter((c[f] for c in candles), dtype=float, count=n) for f in fields)
+
+def _prior_level(n: int, index: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Per candle, the price of the latest swing strictly before it (NaN before the first)"""
+    level = np.full(n, np.nan)
+    after = index + 1
+    keep = after < n
+    level[after[keep]] = prices[keep]
+    # Forward fill
+    filled = np.where(np.isnan(level), 0, np.arange(n))
+    np.maximum.accumulate(filled, out=filled)
+    return level[filled]
+
+def _break_events(is_high: np.ndarray, prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positions in a time-ordered swing sequence that break structure, with
+    direction +1 (low, high, higher high) or -1 (high, low, lower low)
+    """
+    m = np.arange(2, len(prices))
+    bullish = is_high[m] & is_high[m - 1] & ~is_high[m - 2] & (prices[m] > prices[m - 1])
+    bearish = ~is_high[m] & ~is_high[m - 1] & is_high[m - 2] & (prices[m] < prices[m - 1])
+    found = bullish | bearish
+    return m[found], np.where(bullish[found], 1, -1)
+
 class StructureAnalyzer:
     """Market structure analyzer with institutional validation"""
     
@@ -126,18 +155,40 @@ class StructureAnalyzer:
         try:
             # Get multi-exchange candles
             candles = await self._get_candles(symbol, timeframe)
+        except Exception as e:
+            logger.error(f"Error building candles for {symbol}: {e}", exc_info=True)
+            return self._empty_structure(symbol)
+        
+        return self.analyze_candles(symbol, candles)
+    
+    def analyze_candles(self, symbol: str, candles: List[Dict[str, Any]],
+                        swings: Optional[Tuple[List[SwingPoint], List[SwingPoint]]] = None,
+                        structure_breaks: Optional[List[StructureBreak]] = None) -> MarketStructure:
+        """
+        Analyze market structure on prepared multi-exchange candles
+        
+        Args:
+            symbol: Trading pair
+            candles: Time-ordered candles with buy and institutional volume
+            swings: Swing highs and lows already detected on ``candles``
+            structure_breaks: Breaks already detected from ``swings`` (e.g. by a StructureTracker)
             
+        Returns:
+            Complete market structure analysis
+        """
+        try:
             if len(candles) < self.swing_strength * 2 + 1:
                 logger.debug(f"Not enough candles for structure analysis: {len(candles)}")
                 return self._empty_structure(symbol)
             
             # Detect swing points
-            swing_highs, swing_lows = self._detect_swings(candles)
+            swing_highs, swing_lows = swings if swings is not None else self._detect_swings(candles)
             
             # Detect structure breaks
-            structure_breaks = self._detect_structure_breaks(
-                candles, swing_highs, swing_lows, symbol
-            )
+            if structure_breaks is None:
+                structure_breaks = self._detect_structure_breaks(
+                    candles, swing_highs, swing_lows, symbol
+                )
             
             # Determine trend
             trend, trend_strength = self._determine_trend(
@@ -341,150 +392,132 @@ class StructureAnalyzer:
     
     def _detect_swings(self, candles: List[Dict]) -> Tuple[List[SwingPoint], List[SwingPoint]]:
         """Detect swing highs and lows"""
-        swing_highs = []
-        swing_lows = []
-        
         if len(candles) < self.swing_strength * 2 + 1:
-            return swing_highs, swing_lows
+            return [], []
         
-        for i in range(self.swing_strength, len(candles) - self.swing_strength):
-            current = candles[i]
-            
-            # Check for swing high
-            is_swing_high = True
-            for j in range(1, self.swing_strength + 1):
-                if candles[i-j]['high'] >= current['high'] or candles[i+j]['high'] >= current['high']:
-                    is_swing_high = False
-                    break
-            
-            if is_swing_high:
-                # Check minimum swing size
-                avg_price = np.mean([c['close'] for c in candles[max(0, i-10):i]])
-                swing_size_pct = abs(current['high'] - avg_price) / avg_price * 100
-                
-                if swing_size_pct >= self.min_swing_size:
-                    swing_highs.append(SwingPoint(
-                        type=SwingType.HIGH,
-                        price=current['high'],
-                        timestamp=current['timestamp'],
-                        strength=self.swing_strength,
-                        volume=current['volume'],
-                        institutional_ratio=current['institutional_volume'] / current['volume'] if current['volume'] > 0 else 0
-                    ))
-            
-            # Check for swing low
-            is_swing_low = True
-            for j in range(1, self.swing_strength + 1):
-                if candles[i-j]['low'] <= current['low'] or candles[i+j]['low'] <= current['low']:
-                    is_swing_low = False
-                    break
-            
-            if is_swing_low:
-                # Check minimum swing size
-                avg_price = np.mean([c['close'] for c in candles[max(0, i-10):i]])
-                swing_size_pct = abs(current['low'] - avg_price) / avg_price * 100
-                
-                if swing_size_pct >= self.min_swing_size:
-                    swing_lows.append(SwingPoint(
-                        type=SwingType.LOW,
-                        price=current['low'],
-                        timestamp=current['timestamp'],
-                        strength=self.swing_strength,
-                        volume=current['volume'],
-                        institutional_ratio=current['institutional_volume'] / current['volume'] if current['volume'] > 0 else 0
-                    ))
+        high, low, close = _columns(candles, 'high', 'low', 'close')
+        high_idx, low_idx = self._swing_indices(high, low, close)
         
+        swing_highs = [self._swing_point(candles[i], SwingType.HIGH) for i in high_idx.tolist()]
+        swing_lows = [self._swing_point(candles[i], SwingType.LOW) for i in low_idx.tolist()]
         return swing_highs, swing_lows
     
+    def _swing_indices(self, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                       first: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Indices of swing highs and lows among candles ``first`` onwards
+        
+        A swing high is strictly above the ``swing_strength`` highs on each side
+        (lows mirrored) and at least ``min_swing_size`` % away from the mean close
+        of the 10 candles before it.
+        """
+        k = self.swing_strength
+        n = len(high)
+        centers = np.arange(max(k, first), n - k)
+        if len(centers) == 0:
+            return centers, centers
+        
+        # Window j covers candles j..j+k-1: the left side of center i is window
+        # i-k, the right side window i+1
+        window_max = sliding_window_view(high, k).max(axis=1)
+        window_min = sliding_window_view(low, k).min(axis=1)
+        is_high = high[centers] > np.maximum(window_max[centers - k], window_max[centers + 1])
+        is_low = low[centers] < np.minimum(window_min[centers - k], window_min[centers + 1])
+        
+        # Mean close of the (up to) 10 preceding candles via cumulative sums
+        cumulative = np.concatenate(([0.0], np.cumsum(close)))
+        starts = np.maximum(centers - 10, 0)
+        avg_price = (cumulative[centers] - cumulative[starts]) / (centers - starts)
+        is_high &= np.abs(high[centers] - avg_price) / avg_price * 100 >= self.min_swing_size
+        is_low &= np.abs(low[centers] - avg_price) / avg_price * 100 >= self.min_swing_size
+        
+        return centers[is_high], centers[is_low]
+    
+    def _swing_point(self, candle: Dict, swing_type: SwingType) -> SwingPoint:
+        return SwingPoint(
+            type=swing_type,
+            price=candle['high'] if swing_type == SwingType.HIGH else candle['low'],
+            timestamp=candle['timestamp'],
+            strength=self.swing_strength,
+            volume=candle['volume'],
+            institutional_ratio=candle['institutional_volume'] / candle['volume'] if candle['volume'] > 0 else 0
+        )
+    
     def _detect_structure_breaks(self, candles: List[Dict], 
                                 swing_highs: List[SwingPoint],
                                 swing_lows: List[SwingPoint],
                                 symbol: str) -> List[StructureBreak]:
-        """Detect BOS and CHoCH"""
-        breaks = []
+        """
+        Detect BOS and CHoCH
         
-        # Combine and sort swings
-        all_swings = swing_highs + swing_lows
-        all_swings.sort(key=lambda x: x.timestamp)
+        A break is a swing that exceeds the previous same-side swing right after a
+        swing of the opposite side (low, high, higher high / high, low, lower low).
+        It is a CHoCH when it flips the direction of the previous break, else a BOS.
+        The break candle is the first close-out of the previous swing level.
+        """
+        if len(swing_highs) + len(swing_lows) < 3:
+            return []
         
-        if len(all_swings) < 3:
-            return breaks
+        position = {c['timestamp']: i for i, c in enumerate(candles)}
+        swings = swing_highs + swing_lows
+        index = np.array([position[s.timestamp] for s in swings])
+        is_high = np.array([s.type == SwingType.HIGH for s in swings])
+        # Time order; a candle that is both a high and a low lists the high first
+        order = np.lexsort((~is_high, index))
+        swings = [swings[i] for i in order]
+        index, is_high = index[order], is_high[order]
+        prices = np.array([s.price for s in swings])
+        
+        events, directions = _break_events(is_high, prices)
+        if not len(events):
+            return []
         
-        # Track current trend
-        current_trend = TrendDirection.RANGING
+        high, low, volume = _columns(candles, 'high', 'low', 'volume')
+        avg_volume = np.mean(volume[-20:])
         
-        for i in range(2, len(all_swings)):
-            prev_prev = all_swings[i-2]
-            prev = all_swings[i-1]
-            current = all_swings[i]
-            
-            # Find candle where break occurred
-            break_candle = None
-            for candle in candles:
-                if prev.timestamp < candle['timestamp'] <= current.timestamp:
-                    # Check if price broke structure
-                    if current.type == SwingType.HIGH and prev.type == SwingType.HIGH:
-                        if candle['high'] > prev.price:
-                            break_candle = candle
-                            break
-                    elif current.type == SwingType.LOW and prev.type == SwingType.LOW:
-                        if candle['low'] < prev.price:
-                            break_candle = candle
-                            break
-            
-            if not break_candle:
-                continue
-            
-            # Determine break type
-            break_type = None
-            new_trend = current_trend
-            
-            # Bullish structure
-            if current.type == SwingType.HIGH and current.price > prev.price:
-                if prev_prev.type == SwingType.LOW and prev.type == SwingType.HIGH:
-                    if current_trend == TrendDirection.BULLISH:
-                        break_type = StructureBreakType.BOS  # Continuation
-                    else:
-                        break_type = StructureBreakType.CHOCH  # Change
-                        new_trend = TrendDirection.BULLISH
-            
-            # Bearish structure
-            elif current.type == SwingType.LOW and current.price < prev.price:
-                if prev_prev.type == SwingType.HIGH and prev.type == SwingType.LOW:
-                    if current_trend == TrendDirection.BEARISH:
-                        break_type = StructureBreakType.BOS  # Continuation
-                    else:
-                        break_type = StructureBreakType.CHOCH  # Change
-                        new_trend = TrendDirection.BEARISH
-            
-            if break_type:
-                # Calculate strength
-                vol_ratio = break_candle['volume'] / np.mean([c['volume'] for c in candles[-20:]])
-                inst_ratio = break_candle['institutional_volume'] / break_candle['volume'] if break_candle['volume'] > 0 else 0
-                
-                strength_score = min(100, (
-                    vol_ratio * 20 +  # Volume importance
-                    inst_ratio * 50 +  # Institutional importance
-                    len(break_candle['exchanges']) * 10  # Multi-exchange confirmation
-                ))
-                
-                breaks.append(StructureBreak(
-                    id=f"SB_{symbol}_{break_candle['timestamp'].isoformat()}",
-                    type=break_type,
-                    direction=new_trend,
-                    break_price=break_candle['close'],
-                    break_time=break_candle['timestamp'],
-                    previous_swing=prev,
-                    confirmation_volume=break_candle['volume'],
-                    institutional_confirmation=inst_ratio > 0.3,
-                    exchanges_confirmed=break_candle['exchanges'],
-                    strength_score=strength_score
-                ))
-                
-                current_trend = new_trend
+        # Crossing tests against the last swing level before each candle
+        n = len(candles)
+        crosses_up = np.flatnonzero(high > _prior_level(n, index[is_high], prices[is_high]))
+        crosses_down = np.flatnonzero(low < _prior_level(n, index[~is_high], prices[~is_high]))
+        
+        breaks = []
+        previous_direction = 0
+        for event, direction in zip(events.tolist(), directions.tolist()):
+            crosses = crosses_up if direction > 0 else crosses_down
+            prev_index = index[event - 1]
+            break_index = crosses[np.searchsorted(crosses, prev_index, side='right')]
+            breaks.append(self._structure_break(
+                symbol, candles[break_index], swings[event - 1], direction,
+                choch=direction != previous_direction, avg_volume=avg_volume
+            ))
+            previous_direction = direction
         
         return breaks
     
+    def _structure_break(self, symbol: str, break_candle: Dict, previous_swing: SwingPoint,
+                         direction: int, choch: bool, avg_volume: float) -> StructureBreak:
+        vol_ratio = break_candle['volume'] / avg_volume
+        inst_ratio = break_candle['institutional_volume'] / break_candle['volume'] if break_candle['volume'] > 0 else 0
+        
+        strength_score = min(100, (
+            vol_ratio * 20 +  # Volume importance
+            inst_ratio * 50 +  # Institutional importance
+            len(break_candle['exchanges']) * 10  # Multi-exchange confirmation
+        ))
+        
+        return StructureBreak(
+            id=f"SB_{symbol}_{break_candle['timestamp'].isoformat()}",
+            type=StructureBreakType.CHOCH if choch else StructureBreakType.BOS,
+            direction=TrendDirection.BULLISH if direction > 0 else TrendDirection.BEARISH,
+            break_price=break_candle['close'],
+            break_time=break_candle['timestamp'],
+            previous_swing=previous_swing,
+            confirmation_volume=break_candle['volume'],
+            institutional_confirmation=inst_ratio > 0.3,
+            exchanges_confirmed=break_candle['exchanges'],
+            strength_score=strength_score
+        )
+    
     def _determine_trend(self, swing_highs: List[SwingPoint],
                         swing_lows: List[SwingPoint],
                         breaks: List[StructureBreak]) -> Tuple[TrendDirection, float]:
@@ -604,3 +637,115 @@ class StructureAnalyzer:
         levels.sort(key=lambda x: x['price'])
         
         return levels
+
+
+class StructureTracker:
+    """
+    Swings and structure breaks for one symbol, maintained as candles close.
+    
+    Each update only inspects the candles whose swing status can have changed: a
+    swing needs ``swing_strength`` closed candles after it, so the newest ones
+    stay pending until enough have closed. New swings are classified into breaks
+    with the trend carried over from earlier updates, and swings and breaks that
+    fall out of the candle window are dropped.
+    
+    Usage:
+        tracker = StructureTracker(analyzer, "BTCUSDT")
+        if tracker.update(candles):
+            structure = analyzer.analyze_candles(symbol, candles, tracker.swings(), tracker.breaks)
+    """
+    
+    def __init__(self, analyzer: StructureAnalyzer, symbol: str):
+        self.analyzer = analyzer
+        self.symbol = symbol
+        self.candles: List[Dict[str, Any]] = []
+        self._times: List[datetime] = []
+        self._checked = 0  # Candles before this index have final swing status
+        self.swing_highs: List[SwingPoint] = []
+        self.swing_lows: List[SwingPoint] = []
+        self.breaks: List[StructureBreak] = []
+        self._recent: List[SwingPoint] = []  # Last two swings in time order
+        self._direction = 0  # Direction of the last break
+    
+    def swings(self) -> Tuple[List[SwingPoint], List[SwingPoint]]:
+        return list(self.swing_highs), list(self.swing_lows)
+    
+    def update(self, candles: List[Dict[str, Any]]) -> bool:
+        """
+        Take in candles closed since the last update (``candles`` is the full window)
+        
+        Returns:
+            True if swings or breaks changed
+        """
+        if not candles:
+            return False
+        
+        last = self._times[-1] if self._times else None
+        new = candles if last is None else candles[bisect.bisect_right(candles, last, key=_timestamp):]
+        self.candles.extend(new)
+        self._times.extend(c['timestamp'] for c in new)
+        
+        # The window follows the source series
+        window_start = candles[0]['timestamp']
+        expired = bisect.bisect_left(self._times, window_start)
+        if expired:
+            del self.candles[:expired]
+            del self._times[:expired]
+            self._checked = max(0, self._checked - expired)
+        changed = self._expire(window_start)
+        
+        k = self.analyzer.swing_strength
+        n = len(self.candles)
+        first = max(k, self._checked)
+        if n - k <= first:
+            return changed
+        
+        # Enough history before the first center for the swing window and mean close
+        offset = max(0, first - max(k, 10))
+        high, low, close = _columns(self.candles[offset:], 'high', 'low', 'close')
+        high_idx, low_idx = self.analyzer._swing_indices(high, low, close, first - offset)
+        self._checked = n - k
+        
+        found = sorted([(i + offset, 0) for i in high_idx.tolist()] +
+                       [(i + offset, 1) for i in low_idx.tolist()])
+        for index, side in found:
+            swing_type = SwingType.HIGH if side == 0 else SwingType.LOW
+            swing = self.analyzer._swing_point(self.candles[index], swing_type)
+            (self.swing_highs if side == 0 else self.swing_lows).append(swing)
+            self._on_swing(swing, index)
+        
+        return changed or bool(found)
+    
+    def _on_swing(self, swing: SwingPoint, index: int):
+        if len(self._recent) == 2:
+            sequence = self._recent + [swing]
+            is_high = np.array([s.type == SwingType.HIGH for s in sequence])
+            prices = np.array([s.price for s in sequence])
+            events, directions = _break_events(is_high, prices)
+            if len(events):
+                direction = int(directions[0])
+                previous = self._recent[-1]
+                # First candle after the previous swing that crosses its level
+                start = bisect.bisect_right(self._times, previous.timestamp)
+                field = 'high' if direction > 0 else 'low'
+                span, = _columns(self.candles[start:index + 1], field)
+                crossed = span > previous.price if direction > 0 else span < previous.price
+                break_candle = self.candles[start + int(np.argmax(crossed))]
+                volume, = _columns(self.candles[-20:], 'volume')
+                self.breaks.append(self.analyzer._structure_break(
+                    self.symbol, break_candle, previous, direction,
+                    choch=direction != self._direction, avg_volume=np.mean(volume)
+                ))
+                self._direction = direction
+        self._recent = self._recent[-1:] + [swing]
+    
+    def _expire(self, window_start: datetime) -> bool:
+        before = len(self.swing_highs) + len(self.swing_lows) + len(self.breaks)
+        self.swing_highs = [s for s in self.swing_highs if s.timestamp >= window_start]
+        self.swing_lows = [s for s in self.swing_lows if s.timestamp >= window_start]
+        self.breaks = [b for b in self.breaks if b.break_time >= window_start]
+        return len(self.swing_highs) + len(self.swing_lows) + len(self.breaks) != before
+
+
+def _timestamp(candle: Dict[str, Any]) -> datetime:
+    return candle['timestamp']
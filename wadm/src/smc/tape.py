@@ -0,0 +1,253 @@
+"""
+Consolidated cross-exchange trade tape
+One time-ordered stream of a symbol's trades across Bybit, Binance, Coinbase
+and Kraken, extended incrementally: each update fetches only the trades newer
+than every exchange's watermark and k-way merges them into the tape, so
+cross-exchange analytics read an already-ordered stream instead of
+concatenating and sorting every exchange's trades on every run.
+"""
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..logger import get_logger
+from .candles import EXCHANGES, INSTITUTIONAL_EXCHANGES, as_utc
+
+logger = get_logger(__name__)
+
+# Ties on timestamp are broken by exchange, then by arrival
+_RANK = {exchange: rank for rank, exchange in enumerate(EXCHANGES)}
+
+
+def _order(trade: Dict[str, Any]) -> Tuple[datetime, int]:
+    return trade['timestamp'], _RANK[trade['exchange']]
+
+
+def trade_key(trade: Dict[str, Any]) -> Any:
+    """Identity of a stored trade within its exchange, for watermark de-duplication"""
+    key = trade.get('trade_id') or trade.get('_id')
+    if key is None:
+        key = (trade.get('price'), trade.get('quantity'), trade.get('side'))
+    return key
+
+
+class TapeView:
+    """
+    Trades of a subset of exchanges, read through from the tape in time order.
+
+    Iterating never copies: the full exchange set reads the tape itself, a
+    single exchange reads that exchange's run, and other subsets filter the
+    tape on the fly. ``trades()`` gives random access; for mixed subsets the
+    list is built once per tape version and shared by every reader.
+    """
+
+    __slots__ = ("tape", "exchanges")
+
+    def __init__(self, tape: "ConsolidatedTape", exchanges: FrozenSet[str]):
+        self.tape = tape
+        self.exchanges = exchanges
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        tape = self.tape
+        if self.exchanges >= tape.exchange_set:
+            return iter(tape.trades)
+        if len(self.exchanges) == 1:
+            exchange, = self.exchanges
+            return iter(tape.by_exchange.get(exchange, ()))
+        exchanges = self.exchanges
+        return (trade for trade in tape.trades if trade['exchange'] in exchanges)
+
+    def __len__(self) -> int:
+        return sum(len(self.tape.by_exchange.get(exchange, ())) for exchange in self.exchanges)
+
+    def __bool__(self) -> bool:
+        return any(self.tape.by_exchange.get(exchange) for exchange in self.exchanges)
+
+    def trades(self) -> List[Dict[str, Any]]:
+        """Time-ordered list of the view's trades (do not mutate)"""
+        tape = self.tape
+        if self.exchanges >= tape.exchange_set:
+            return tape.trades
+        if len(self.exchanges) == 1:
+            exchange, = self.exchanges
+            return tape.by_exchange.get(exchange, [])
+        cached = tape._views.get(self.exchanges)
+        if cached is None or cached[0] != tape.version:
+            cached = tape._views[self.exchanges] = (tape.version, list(iter(self)))
+        return cached[1]
+
+
+class ConsolidatedTape:
+    """
+    Time-ordered trades of one symbol across exchanges, over a rolling window.
+
+    Every exchange has a watermark: the newest trade timestamp ingested from
+    it. Updates fetch each exchange's trades from its own watermark on, so an
+    exchange that persists late never loses trades (trades sharing the
+    watermark timestamp are told apart by trade id); its batch is merged into
+    the tape from the position of its oldest trade, which only reorders the
+    tail written since the slowest exchange's watermark.
+
+    Trades are dicts with ``price``, ``quantity``, ``side``, ``timestamp``
+    (aware UTC), ``exchange`` and ``is_institutional``.
+
+    Usage:
+        tape = ConsolidatedTape("BTCUSDT", lookback_hours=48)
+        tape.update(storage)
+        for trade in tape.view(INSTITUTIONAL_EXCHANGES): ...
+    """
+
+    def __init__(self, symbol: str, lookback_hours: int, exchanges: Iterable[str] = EXCHANGES):
+        self.symbol = symbol
+        self.lookback_hours = lookback_hours
+        self.exchange_set = frozenset(exchanges)
+        self.exchanges = [exchange for exchange in EXCHANGES if exchange in self.exchange_set]
+        self.trades: List[Dict[str, Any]] = []
+        self.by_exchange: Dict[str, List[Dict[str, Any]]] = {exchange: [] for exchange in self.exchanges}
+        self.watermarks: Dict[str, datetime] = {}
+        self._watermark_keys: Dict[str, Set[Any]] = {}  # Trades ingested at each watermark timestamp
+        self.version = 0
+        self.trades_loaded = 0
+        self.late_merges = 0
+        self._times: List[datetime] = []
+        self._exchange_times: Dict[str, List[datetime]] = {exchange: [] for exchange in self.exchanges}
+        self._views: Dict[FrozenSet[str], Tuple[int, List[Dict[str, Any]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.trades)
+
+    def __bool__(self) -> bool:
+        return bool(self.trades)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.trades)
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Time up to which the tape is final: the slowest exchange's watermark"""
+        if len(self.watermarks) < len(self.exchanges):
+            return None
+        return min(self.watermarks.values())
+
+    def view(self, exchanges: Optional[Iterable[str]] = None) -> TapeView:
+        return TapeView(self, frozenset(exchanges) if exchanges is not None else self.exchange_set)
+
+    def since(self, start: datetime) -> List[Dict[str, Any]]:
+        """Trades at or after ``start``"""
+        return self.trades[bisect_left(self._times, as_utc(start)):]
+
+    def update(self, storage, now: Optional[datetime] = None) -> int:
+        """
+        Ingest trades stored since the last update and drop those past the
+        lookback window.
+
+        Returns:
+            Number of new trades
+        """
+        if storage is None:
+            return 0
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(hours=self.lookback_hours)
+
+        batches = []
+        for exchange in self.exchanges:
+            since = max(self.watermarks.get(exchange, cutoff), cutoff)
+            minutes = math.ceil((now - since).total_seconds() / 60) + 1
+            try:
+                # Newest first
+                stored = storage.get_recent_trades(self.symbol, exchange, minutes=minutes)
+            except Exception as e:
+                logger.error(f"Error loading trades from {exchange}: {e}")
+                continue
+            seen = self._watermark_keys.get(exchange, set()) if since == self.watermarks.get(exchange) else set()
+            batch = self._normalize(stored, exchange, since, seen)
+            if batch:
+                watermark = batch[-1][1]['timestamp']
+                keys = {key for key, trade in batch if trade['timestamp'] == watermark}
+                self._watermark_keys[exchange] = keys | seen if watermark == since else keys
+                self.watermarks[exchange] = watermark
+                batches.append([trade for _, trade in batch])
+
+        added = sum(len(batch) for batch in batches)
+        if added:
+            self._insert(batches)
+        self._expire(cutoff)
+        self.trades_loaded += added
+        return added
+
+    @staticmethod
+    def _normalize(stored: List[Dict[str, Any]], exchange: str, since: datetime,
+                   seen: Set[Any]) -> List[Tuple[Any, Dict[str, Any]]]:
+        """
+        (trade key, tape trade) pairs in time order for trades at or after
+        ``since``, skipping those at ``since`` whose key is in ``seen``
+        """
+        institutional = exchange in INSTITUTIONAL_EXCHANGES
+        batch = []
+        for trade in reversed(stored):
+            timestamp = trade.get('timestamp')
+            if not timestamp:
+                continue
+            timestamp = as_utc(timestamp)
+            if timestamp < since:
+                continue
+            key = trade_key(trade)
+            if timestamp == since and key in seen:
+                continue
+            batch.append((key, {
+                'price': float(trade['price']),
+                'quantity': float(trade['quantity']),
+                'side': trade['side'],
+                'timestamp': timestamp,
+                'exchange': exchange,
+                'is_institutional': institutional
+            }))
+        # Storage hands trades back newest first; only re-sort if it did not
+        if any(batch[i][1]['timestamp'] > batch[i + 1][1]['timestamp'] for i in range(len(batch) - 1)):
+            batch.sort(key=lambda item: _order(item[1]))
+        return batch
+
+    def _insert(self, batches: List[List[Dict[str, Any]]]):
+        for batch in batches:
+            exchange = batch[0]['exchange']
+            runs, times = self.by_exchange.setdefault(exchange, []), self._exchange_times.setdefault(exchange, [])
+            if runs and batch[0]['timestamp'] < runs[-1]['timestamp']:
+                start = bisect_left(times, batch[0]['timestamp'])
+                runs[start:] = heapq.merge(runs[start:], batch, key=_order)
+                times[start:] = [trade['timestamp'] for trade in runs[start:]]
+            else:
+                runs.extend(batch)
+                times.extend(trade['timestamp'] for trade in batch)
+
+        # Everything older than the oldest new trade is already in order
+        oldest = min(batch[0]['timestamp'] for batch in batches)
+        start = bisect_left(self._times, oldest)
+        if start < len(self.trades):
+            self.late_merges += 1
+        self.trades[start:] = heapq.merge(self.trades[start:], *batches, key=_order)
+        self._times[start:] = [trade['timestamp'] for trade in self.trades[start:]]
+        self.version += 1
+
+    def _expire(self, cutoff: datetime):
+        expired = bisect_right(self._times, cutoff)
+        if not expired:
+            return
+        del self.trades[:expired]
+        del self._times[:expired]
+        for exchange, times in self._exchange_times.items():
+            stale = bisect_right(times, cutoff)
+            del self.by_exchange[exchange][:stale]
+            del times[:stale]
+        self.version += 1
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "trades": len(self.trades),
+            "by_exchange": {exchange: len(trades) for exchange, trades in self.by_exchange.items()},
+            "watermark": self.watermark,
+            "trades_loaded": self.trades_loaded,
+            "late_merges": self.late_merges,
+        }
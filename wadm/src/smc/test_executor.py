@@ -0,0 +1,107 @@
+"""
+Tests for the SMC execution backend (in-process parts; no worker processes started)
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from .executor import SMCExecutor, TradeCounter, TradeHistory, pack_trades
+
+
+class TestTradeCounter:
+    """Test the rolling trade counter used for pre-checks"""
+
+    def test_window_expires_old_minutes(self):
+        counter = TradeCounter(window_minutes=60)
+        start = 1_700_000_000.0
+        counter.add("BTCUSDT", 70, now=start)
+        counter.add("BTCUSDT", 40, now=start + 30 * 60)
+
+        assert counter.total("BTCUSDT", now=start + 59 * 60) == 110
+        assert counter.total("BTCUSDT", now=start + 61 * 60) == 40
+        assert counter.total("ETHUSDT") == 0
+
+
+class TestTradeHistory:
+    """Test the worker-side trade store"""
+
+    def test_round_trip_newest_first(self):
+        now = datetime.now(timezone.utc)
+        trades = {
+            "bybit": [{"timestamp": now - timedelta(minutes=m), "price": 100 + m, "quantity": 1,
+                       "side": "buy"} for m in range(3)],
+            "kraken": [{"timestamp": (now - timedelta(hours=60)).replace(tzinfo=None), "price": 90,
+                        "quantity": 2, "side": "sell"}],
+        }
+        history = TradeHistory(history_hours=48)
+        history.extend("BTCUSDT", pack_trades(trades))
+
+        recent = history.get_recent_trades("BTCUSDT", "bybit", minutes=10)
+        assert [t["price"] for t in recent] == [100.0, 101.0, 102.0]
+        assert recent[0]["side"] == "buy"
+        # Older than the history window
+        assert history.get_recent_trades("BTCUSDT", "kraken", minutes=5000) == []
+        assert history.count("BTCUSDT") == 3
+
+
+class _Analysis:
+    def to_dict(self):
+        return {"smc_bias": "neutral", "confluence_score": 0.0}
+
+
+class _SlowDashboard:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_comprehensive_analysis(self, symbol):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return _Analysis()
+
+    def get_memory_usage(self, symbol):
+        return {"symbol": symbol, "objects": 0, "bytes": 0, "stores": {}}
+
+
+class TestSMCExecutor:
+    """Test budget and coalescing with the in-process backend"""
+
+    def test_concurrent_requests_share_one_run(self):
+        dashboard = _SlowDashboard()
+        executor = SMCExecutor(storage=None, dashboard=dashboard, workers=0, min_trades=1)
+
+        async def scenario():
+            first = asyncio.create_task(executor.analyze("BTCUSDT"))
+            await asyncio.sleep(0)
+            capacity = (executor.has_capacity("BTCUSDT"), executor.has_capacity("ETHUSDT"))
+            results = await asyncio.gather(first, executor.analyze("BTCUSDT"))
+            return capacity, results
+
+        capacity, results = asyncio.run(scenario())
+
+        assert dashboard.calls == 1
+        assert results[0] == results[1] == {"smc_bias": "neutral", "confluence_score": 0.0}
+        # The running symbol can be joined; a second symbol waits for the budget
+        assert capacity == (True, False)
+
+    def test_ready_uses_counters(self):
+        executor = SMCExecutor(storage=None, workers=0, min_trades=100)
+        executor.record("BTCUSDT", 99)
+        assert not executor.ready("BTCUSDT")
+        executor.record("BTCUSDT", 1)
+        assert executor.ready("BTCUSDT")
+
+    def test_trades_persisted_late_at_the_watermark_are_shipped(self):
+        at = datetime.now(timezone.utc) - timedelta(minutes=1)
+
+        class _Storage:
+            trades = [{"timestamp": at, "trade_id": "1", "price": 100.0, "quantity": 1.0, "side": "buy"}]
+
+            def get_recent_trades(self, symbol, exchange, minutes=5):
+                return list(reversed(self.trades)) if exchange == "bybit" else []
+
+        storage = _Storage()
+        executor = SMCExecutor(storage=storage, workers=0)
+        assert len(executor._load_new_trades("BTCUSDT")) == 1
+
+        storage.trades.append({"timestamp": at, "trade_id": "2", "price": 100.0, "quantity": 1.0, "side": "buy"})
+        assert len(executor._load_new_trades("BTCUSDT")) == 1
+        assert len(executor._load_new_trades("BTCUSDT")) == 0
@@ -0,0 +1,109 @@
+"""
+Tests for Fair Value Gap detection and fill tracking
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+from .fvg_detector import FVGDetector, FVGStatus, FVGType
+
+
+def _candle(i, open_, close, high=None, low=None, volume=1.0):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return {
+        "timestamp": start + timedelta(minutes=15 * i),
+        "open": open_, "close": close,
+        "high": high if high is not None else max(open_, close),
+        "low": low if low is not None else min(open_, close),
+        "volume": volume, "institutional_volume": volume * 0.7,
+        "exchanges": ["bybit", "binance", "coinbase", "kraken"], "exchange_count": 4,
+    }
+
+
+def _gap_then(path):
+    """Flat candles, a bullish gap from 100.5 to 103, then candles with the given (low, high)"""
+    candles = [_candle(i, 100, 100, 100.5, 99.5) for i in range(5)]
+    candles.append(_candle(5, 100.2, 103.5, volume=5.0))
+    candles.append(_candle(6, 104, 104.5, 105, 103))
+    candles += [_candle(7 + i, low, high, high, low) for i, (low, high) in enumerate(path)]
+    return candles
+
+
+def _random_candles(n, seed=3):
+    rng = random.Random(seed)
+    price = 100.0
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.006)
+        volume = rng.uniform(1, 10) * (5 if rng.random() < 0.1 else 1)
+        candle = _candle(i, open_, price, volume=volume)
+        candle["exchange_count"] = rng.choice([1, 2, 3, 4])
+        candles.append(candle)
+    return candles
+
+
+class TestFVGDetector:
+    """Test vectorized detection and interval-indexed fills"""
+
+    def test_gap_fills_through_later_candles(self):
+        detector = FVGDetector()
+        candles = _gap_then([(103, 106), (102, 104)])
+
+        fvg, = asyncio.run(detector.analyze_candles("BTCUSDT", candles))
+        assert (fvg.type, fvg.bottom, fvg.top) == (FVGType.BULLISH, 100.5, 103)
+        assert fvg.volume_surge == 5.0
+        assert fvg.status == FVGStatus.PARTIALLY_FILLED
+        assert fvg.fill_percentage == 40.0
+
+        candles.append(_candle(9, 102, 100, 103, 100))
+        fvg, = asyncio.run(detector.analyze_candles("BTCUSDT", candles))
+        assert fvg.status == FVGStatus.FILLED
+        assert fvg.fill_complete_time == candles[-1]["timestamp"]
+
+    def test_fill_transitions_are_persisted(self):
+        class _Storage:
+            def __init__(self):
+                self.saved = []
+
+            def save_smc_analysis(self, record):
+                self.saved.append(record["data"]["status"])
+
+        storage = _Storage()
+        detector = FVGDetector(storage)
+        candles = _gap_then([(103, 106), (102, 104)])
+        asyncio.run(detector.analyze_candles("BTCUSDT", candles))
+        assert storage.saved == ["partially_filled"]
+
+        asyncio.run(detector.analyze_candles("BTCUSDT", candles))
+        candles.append(_candle(9, 102, 101, 103, 101))
+        asyncio.run(detector.analyze_candles("BTCUSDT", candles))
+        assert storage.saved == ["partially_filled"]
+
+        candles.append(_candle(10, 102, 100, 103, 100))
+        asyncio.run(detector.analyze_candles("BTCUSDT", candles))
+        assert storage.saved == ["partially_filled", "filled"]
+
+    def test_filled_gaps_expire(self):
+        detector = FVGDetector()
+        detector.filled_retention_periods = 3
+        candles = _gap_then([(99, 101)])
+        assert asyncio.run(detector.analyze_candles("BTCUSDT", candles))[0].status == FVGStatus.FILLED
+
+        candles += [_candle(len(candles) + i, 101, 101, 101.5, 100.5) for i in range(3)]
+        assert len(asyncio.run(detector.analyze_candles("BTCUSDT", candles))) == 1
+        candles.append(_candle(len(candles), 101, 101, 101.5, 100.5))
+        assert asyncio.run(detector.analyze_candles("BTCUSDT", candles)) == []
+
+    def test_incremental_updates_match_batch(self):
+        candles = _random_candles(600)
+        incremental = FVGDetector()
+        for end in range(3, len(candles) + 1, 11):
+            asyncio.run(incremental.analyze_candles("BTCUSDT", candles[max(0, end - 100):end]))
+        result = asyncio.run(incremental.analyze_candles("BTCUSDT", candles[-100:]))
+
+        batch = asyncio.run(FVGDetector().analyze_candles("BTCUSDT", candles[-100:]))
+
+        assert result
+        assert [(f.id, f.status, f.fill_percentage) for f in result] == \
+            [(f.id, f.status, f.fill_percentage) for f in batch]
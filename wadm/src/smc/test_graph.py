@@ -0,0 +1,120 @@
+"""
+Tests for the incremental SMC graph and shared candles
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from .candles import CandleSeries, build_exchange_candles
+from .graph import DependencyGraph
+
+
+def _graph(calls):
+    def node(name, result):
+        def compute(*args):
+            calls.append(name)
+            return result(*args)
+        return compute
+
+    graph = DependencyGraph("TEST")
+    graph.add_input("candles")
+    graph.add_input("price")
+    graph.add_node("swings", ["candles"], node("swings", lambda c: max(c)))
+    graph.add_node("blocks", ["candles"], node("blocks", lambda c: len(c)), fingerprint=lambda v: v)
+    graph.add_node("confluence", ["swings", "blocks", "price"],
+                   node("confluence", lambda s, b, p: (s, b, p)))
+    return graph
+
+
+class TestDependencyGraph:
+    """Test memoization and change propagation"""
+
+    def test_unchanged_inputs_skip_recompute(self):
+        calls = []
+        graph = _graph(calls)
+        graph.set_input("candles", [1, 2, 3], key=3)
+        graph.set_input("price", 100.0)
+
+        assert asyncio.run(graph.evaluate("confluence")) == (3, 3, 100.0)
+        calls.clear()
+        graph.set_input("candles", [1, 2, 3], key=3)
+        graph.set_input("price", 100.0)
+
+        assert asyncio.run(graph.evaluate("confluence")) == (3, 3, 100.0)
+        assert calls == []
+
+    def test_only_downstream_nodes_rerun(self):
+        calls = []
+        graph = _graph(calls)
+        graph.set_input("candles", [1, 2, 3], key=3)
+        graph.set_input("price", 100.0)
+        asyncio.run(graph.evaluate("confluence"))
+        calls.clear()
+
+        graph.set_input("price", 101.0)
+        asyncio.run(graph.evaluate("confluence"))
+
+        assert calls == ["confluence"]
+
+    def test_equal_fingerprint_stops_propagation(self):
+        calls = []
+        graph = _graph(calls)
+        graph.set_input("candles", [1, 2, 3], key=3)
+        graph.set_input("price", 100.0)
+        asyncio.run(graph.evaluate("confluence"))
+        blocks_version = graph.version("blocks")
+        calls.clear()
+
+        # Same length, same max: both detectors rerun but blocks keeps its version
+        graph.set_input("candles", [2, 1, 3], key=4)
+        asyncio.run(graph.evaluate("confluence"))
+
+        assert sorted(calls) == ["blocks", "confluence", "swings"]
+        assert graph.version("blocks") == blocks_version
+
+
+class _Store:
+    def __init__(self, trades):
+        self.trades = trades
+        self.requests = []
+
+    def get_recent_trades(self, symbol, exchange, minutes=5):
+        self.requests.append(minutes)
+        return [t for t in self.trades if t["exchange"] == exchange]
+
+
+class TestCandleSeries:
+    """Test shared multi-exchange candles"""
+
+    def test_open_close_follow_trade_time(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        trades = [
+            {"timestamp": start + timedelta(minutes=10), "price": 103, "quantity": 1, "side": "sell"},
+            {"timestamp": start + timedelta(minutes=1), "price": 101, "quantity": 2, "side": "buy"},
+        ]
+
+        candle, = build_exchange_candles(trades, 15)
+
+        assert (candle["open"], candle["close"]) == (101.0, 103.0)
+        assert (candle["buy_volume"], candle["sell_volume"]) == (2.0, 1.0)
+
+    def test_only_closed_candles_are_added_once(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        trades = [
+            {"exchange": exchange, "timestamp": start + timedelta(minutes=m), "price": 100 + m,
+             "quantity": 1.0, "side": "buy"}
+            for m in range(0, 40, 5) for exchange in ("bybit", "coinbase")
+        ]
+        store = _Store(trades)
+        series = CandleSeries("BTCUSDT", "15min", lookback_periods=10)
+
+        assert series.update(store, now=start + timedelta(minutes=31))
+        assert [c["timestamp"].minute for c in series.candles] == [0, 15]
+        assert series.candles[0]["institutional_volume"] == 3.0
+        assert series.candles[0]["exchange_count"] == 2
+
+        requests = len(store.requests)
+        assert not series.update(store, now=start + timedelta(minutes=40))
+        assert len(store.requests) == requests
+
+        assert series.update(store, now=start + timedelta(minutes=46))
+        assert [c["timestamp"].minute for c in series.candles] == [0, 15, 30]
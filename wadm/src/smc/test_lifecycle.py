@@ -0,0 +1,106 @@
+"""
+Tests for the bounded SMC state lifecycle
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from .lifecycle import COLD, EVICTED, EXPIRED, StateStore
+from .liquidity_mapper import LiquidityMapper
+from .zone_index import LIQUIDITY
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+class _Storage:
+    def __init__(self):
+        self.saved = []
+
+    def save_smc_analysis(self, analysis):
+        self.saved.append(analysis)
+
+
+def _zone(lower, score=70.0, formed=T0):
+    zone = SimpleNamespace(id=f"LZ_{lower}", type="volume_node", direction="bullish",
+                           lower_bound=lower, upper_bound=lower + 1, price=lower + 0.5,
+                           confluence_score=score,
+                           formation_start=datetime.fromtimestamp(formed, timezone.utc))
+    zone.to_dict = lambda: {"id": zone.id, "lower_bound": zone.lower_bound}
+    return zone
+
+
+class TestStateStore:
+    """Test expiry, caps, compaction and accounting"""
+
+    def test_expiry_follows_latest_put(self):
+        dropped = []
+        store = StateStore("signals", cap=10, on_drop=lambda s, item, reason: dropped.append((item, reason)))
+        store.put("BTCUSDT", "a", "A", expires_at=T0 + 10, score=1, now=T0)
+        store.put("BTCUSDT", "b", "B", expires_at=T0 + 20, score=1, now=T0)
+        store.put("BTCUSDT", "a", "A2", expires_at=T0 + 30, score=1, now=T0)
+
+        assert store.expire(T0 + 25) == 1
+        assert dropped == [("B", EXPIRED)]
+        assert store.get("BTCUSDT") == ["A2"]
+        store.expire(T0 + 30)
+        assert "BTCUSDT" not in store and store.get("BTCUSDT", []) == []
+
+    def test_cap_evicts_lowest_score(self):
+        dropped = []
+        store = StateStore("zones", cap=2, on_drop=lambda s, item, reason: dropped.append((item, reason)))
+        for key, score in [("a", 50), ("b", 90), ("c", 70), ("d", 10)]:
+            store.put("BTCUSDT", key, key.upper(), expires_at=T0 + 100, score=score, now=T0)
+
+        assert store.get("BTCUSDT") == ["B", "C"]
+        assert dropped == [("A", EVICTED), ("D", EVICTED)]
+
+        store.replace("BTCUSDT", [("c", "C", T0 + 100, 70)], now=T0)
+        assert store["BTCUSDT"] == ["C"]
+        assert store.dropped["removed"] == 1
+
+    def test_cold_entries_compact_and_memory_returns_to_zero(self):
+        dropped = []
+        store = StateStore("zones", cap=10, cold_after=timedelta(hours=1),
+                           on_drop=lambda s, item, reason: dropped.append((item, reason)))
+        for i in range(1000):
+            store.put("BTCUSDT", i, _zone(i), expires_at=T0 + 86400, score=50, now=T0)
+        store.put("ETHUSDT", "warm", _zone(1), expires_at=T0 + 86400, score=50, now=T0)
+        assert store.memory("BTCUSDT")["objects"] == 10
+        assert store.memory()["bytes"] > store.memory("ETHUSDT")["bytes"] > 0
+
+        store.touch("ETHUSDT", "warm", now=T0 + 3000)
+        assert store.compact(T0 + 3600) == 10
+
+        assert {reason for _, reason in dropped} == {EVICTED, COLD}
+        assert store.symbols() == ["ETHUSDT"]
+        assert store.memory("BTCUSDT") == {"objects": 0, "bytes": 0}
+        # Heaps do not keep growing with superseded entries
+        store.expire(T0 + 3600)
+        assert store.status()["heap_entries"] <= 64 + 2
+
+
+class TestLiquidityLifecycle:
+    """Test zone expiry and cold compaction in the liquidity mapper"""
+
+    def test_cold_zones_move_to_storage_and_leave_the_index(self):
+        storage = _Storage()
+        mapper = LiquidityMapper(storage)
+        now = datetime.now(timezone.utc).timestamp()
+        near, far = _zone(100, formed=now), _zone(200, formed=now)
+        mapper._update_active_zones("BTCUSDT", [near, far])
+        assert mapper.zones.get("BTCUSDT").count(LIQUIDITY) == 2
+
+        later = now + mapper.active_zones.cold_after.total_seconds() + 1
+        mapper.active_zones.touch("BTCUSDT", (near.type, near.lower_bound, near.upper_bound), now=later)
+        assert mapper.active_zones.compact(later) == 1
+
+        assert mapper.active_zones["BTCUSDT"] == [near]
+        assert [z.id for z in mapper.zones.get("BTCUSDT").zones()] == ["LZ_100"]
+        assert [(r["type"], r["reason"], r["data"]["id"]) for r in storage.saved] == \
+            [("liquidity_zone", COLD, "LZ_200")]
+
+    def test_old_zones_expire(self):
+        mapper = LiquidityMapper()
+        stale = _zone(100, formed=datetime.now(timezone.utc).timestamp() - 73 * 3600)
+        mapper._update_active_zones("BTCUSDT", [stale])
+        assert mapper.get_active_liquidity_zones("BTCUSDT") == []
+        assert len(mapper.zones.get("BTCUSDT")) == 0
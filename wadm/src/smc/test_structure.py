@@ -0,0 +1,91 @@
+"""
+Tests for swing and structure break detection
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+from .structure_analyzer import StructureAnalyzer, StructureTracker, StructureBreakType, TrendDirection
+
+
+def _candles(n, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    price = 100.0
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rng.gauss(0, 0.004)
+        volume = rng.uniform(1, 10)
+        candles.append({
+            "timestamp": start + timedelta(minutes=15 * i),
+            "open": open_, "close": price,
+            "high": round(max(open_, price) * (1 + abs(rng.gauss(0, 0.002))), 1),
+            "low": round(min(open_, price) * (1 - abs(rng.gauss(0, 0.002))), 1),
+            "volume": volume, "institutional_volume": volume / 2, "retail_volume": volume / 2,
+            "exchanges": ["bybit", "coinbase"],
+        })
+    return candles
+
+
+def _legs(legs, first=100.0):
+    """Candles whose closes move linearly through (target price, candle count) legs"""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    closes = [first]
+    for target, steps in legs:
+        origin = closes[-1]
+        closes.extend(origin + (target - origin) * s / steps for s in range(1, steps + 1))
+    return [{
+        "timestamp": start + timedelta(minutes=15 * i),
+        "open": c, "close": c, "high": c + 0.5, "low": c - 0.5,
+        "volume": 1.0, "institutional_volume": 0.5, "retail_volume": 0.5, "exchanges": ["bybit"],
+    } for i, c in enumerate(closes)]
+
+
+class TestStructureDetection:
+    """Test vectorized swings and breaks"""
+
+    def test_higher_high_and_lower_low_breaks(self):
+        analyzer = StructureAnalyzer()
+        # Low, high, flat pullback (no swing low), higher high; then the mirror image
+        candles = _legs([(90, 6), (110, 6), (107, 2), (107, 5), (120, 6),
+                         (100, 6), (103, 2), (103, 5), (95, 6), (80, 6), (90, 6)])
+
+        highs, lows = analyzer._detect_swings(candles)
+        breaks = analyzer._detect_structure_breaks(candles, highs, lows, "BTCUSDT")
+
+        assert [h.price for h in highs] == [110.5, 120.5]
+        assert [l.price for l in lows] == [89.5, 99.5, 79.5]
+        assert [(b.type, b.direction, b.previous_swing.price) for b in breaks] == [
+            (StructureBreakType.CHOCH, TrendDirection.BULLISH, 110.5),
+            (StructureBreakType.CHOCH, TrendDirection.BEARISH, 99.5),
+        ]
+        # The break candle is the first to cross the previous swing level
+        assert round(breaks[0].break_price, 6) == round(110 + 4 / 3, 6)
+        assert breaks[1].break_price == 99.0
+
+    def test_tracker_matches_batch_detection(self):
+        analyzer = StructureAnalyzer()
+        candles = _candles(400)
+        highs, lows = analyzer._detect_swings(candles)
+        breaks = analyzer._detect_structure_breaks(candles, highs, lows, "BTCUSDT")
+
+        tracker = StructureTracker(analyzer, "BTCUSDT")
+        for end in range(1, len(candles) + 1, 7):
+            tracker.update(candles[:end])
+        tracker.update(candles)
+
+        assert [h.timestamp for h in tracker.swing_highs] == [h.timestamp for h in highs]
+        assert [l.timestamp for l in tracker.swing_lows] == [l.timestamp for l in lows]
+        assert [(b.id, b.type) for b in tracker.breaks] == [(b.id, b.type) for b in breaks]
+
+    def test_tracker_drops_swings_outside_window(self):
+        analyzer = StructureAnalyzer()
+        candles = _candles(300)
+        tracker = StructureTracker(analyzer, "BTCUSDT")
+        tracker.update(candles[:200])
+
+        tracker.update(candles[100:300])
+
+        assert len(tracker.candles) == 200
+        assert all(s.timestamp >= candles[100]["timestamp"]
+                   for s in tracker.swing_highs + tracker.swing_lows)
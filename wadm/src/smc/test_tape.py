@@ -0,0 +1,98 @@
+"""
+Tests for the consolidated cross-exchange tape
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+from .candles import EXCHANGES, INSTITUTIONAL_EXCHANGES
+from .tape import ConsolidatedTape
+
+NOW = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+
+class _Storage:
+    """Trades visible per exchange up to a persisted-until time, newest first"""
+
+    def __init__(self, trades):
+        self.trades = trades
+        self.persisted = {}
+
+    def get_recent_trades(self, symbol, exchange, minutes=5):
+        until = self.persisted.get(exchange, NOW)
+        rows = [t for t in self.trades if t["exchange"] == exchange and t["timestamp"] <= until]
+        return sorted(rows, key=lambda t: t["timestamp"], reverse=True)
+
+
+def _trades(n, seed=5):
+    rng = random.Random(seed)
+    start = NOW - timedelta(hours=10)
+    return [{
+        "timestamp": start + timedelta(seconds=rng.randrange(0, 36000)),
+        "exchange": rng.choice(EXCHANGES),
+        "price": 100 + rng.random(), "quantity": rng.uniform(0.1, 2), "side": rng.choice(["buy", "sell"]),
+    } for _ in range(n)]
+
+
+def _key(trade):
+    return trade["timestamp"], EXCHANGES.index(trade["exchange"]), trade["price"]
+
+
+class TestConsolidatedTape:
+    """Test watermark merges, views and the rolling window"""
+
+    def test_late_exchange_merges_into_order(self):
+        trades = _trades(2000)
+        storage = _Storage(trades)
+        tape = ConsolidatedTape("BTCUSDT", lookback_hours=24)
+        # Kraken persists 20 minutes behind everyone else
+        for step in range(9, 0, -1):
+            cutoff = NOW - timedelta(hours=step)
+            storage.persisted = {e: cutoff for e in EXCHANGES}
+            storage.persisted["kraken"] = cutoff - timedelta(minutes=20)
+            tape.update(storage, now=NOW)
+            assert tape.watermark <= storage.persisted["kraken"]
+        storage.persisted = {}
+        tape.update(storage, now=NOW)
+
+        assert tape.late_merges > 0
+        keys = [_key(t) for t in tape]
+        assert sorted(keys) == sorted(_key(t) for t in trades)
+        assert all(a[:2] <= b[:2] for a, b in zip(keys, keys[1:]))
+        assert all(t["is_institutional"] == (t["exchange"] in INSTITUTIONAL_EXCHANGES) for t in tape)
+
+    def test_views_read_through_without_copies(self):
+        storage = _Storage(_trades(500))
+        tape = ConsolidatedTape("BTCUSDT", lookback_hours=24)
+        tape.update(storage, now=NOW)
+
+        institutional = tape.view(INSTITUTIONAL_EXCHANGES)
+        assert list(institutional) == [t for t in tape if t["exchange"] in INSTITUTIONAL_EXCHANGES]
+        assert len(institutional) == len(institutional.trades())
+        assert institutional.trades() is institutional.trades()
+        assert tape.view(["bybit"]).trades() is tape.by_exchange["bybit"]
+        assert tape.view().trades() is tape.trades
+
+    def test_window_drops_old_trades(self):
+        storage = _Storage(_trades(500))
+        tape = ConsolidatedTape("BTCUSDT", lookback_hours=5)
+        tape.update(storage, now=NOW)
+        assert min(t["timestamp"] for t in tape) > NOW - timedelta(hours=5)
+
+        later = NOW + timedelta(hours=2)
+        assert tape.update(storage, now=later) == 0
+        assert tape.trades[0]["timestamp"] > later - timedelta(hours=5)
+        assert sum(len(run) for run in tape.by_exchange.values()) == len(tape)
+        assert tape.since(NOW - timedelta(hours=1)) == [t for t in tape if t["timestamp"] >= NOW - timedelta(hours=1)]
+
+    def test_trades_persisted_late_at_the_watermark_are_kept(self):
+        at = NOW - timedelta(minutes=1)
+        fill = {"timestamp": at, "exchange": "bybit", "price": 100.0, "quantity": 1.0, "side": "buy"}
+        storage = _Storage([{**fill, "trade_id": "1"}])
+        tape = ConsolidatedTape("BTCUSDT", lookback_hours=1, exchanges=["bybit"])
+        assert tape.update(storage, now=NOW) == 1
+
+        # Same timestamp and price, persisted after the first update
+        storage.trades.append({**fill, "trade_id": "2"})
+        assert tape.update(storage, now=NOW) == 1
+        assert tape.update(storage, now=NOW) == 0
+        assert len(tape) == 2 and tape.watermark == at
@@ -0,0 +1,67 @@
+"""
+Tests for the price-sorted SMC zone index
+"""
+import itertools
+from types import SimpleNamespace
+
+from .zone_index import FAIR_VALUE_GAP, LIQUIDITY, ORDER_BLOCK, ZoneIndex, fvg_zone, order_block_zone, record_zone
+
+
+def _block(bottom, top, direction="bullish", score=70.0):
+    return SimpleNamespace(id=f"OB_{bottom}", type=direction, bottom=bottom, top=top,
+                           midpoint=(bottom + top) / 2, confidence_score=score)
+
+
+def _gap(bottom, top, direction="bullish", score=65.0):
+    return SimpleNamespace(id=f"FVG_{bottom}", type=direction, bottom=bottom, top=top,
+                           midpoint=(bottom + top) / 2, quality_score=score)
+
+
+class TestZoneIndex:
+    """Test range and nearest-level queries"""
+
+    def test_nearest_levels_by_edge_and_filters(self):
+        index = ZoneIndex("BTCUSDT")
+        blocks = [_block(90, 92), _block(95, 96, score=50.0), _block(104, 106, "bearish"),
+                  _block(110, 111, "bearish")]
+        index.sync(ORDER_BLOCK, blocks, order_block_zone)
+        index.sync(FAIR_VALUE_GAP, [_gap(97, 99), _gap(101, 103, "bearish")], fvg_zone)
+
+        below = [z.lower for z in index.iter_below(100, edge="lower")]
+        assert below == [97, 95, 90]
+        assert [z.upper for z in itertools.islice(index.iter_above(100, edge="upper"), 2)] == [103, 106]
+        assert next(index.iter_below(100, kind=ORDER_BLOCK, min_strength=60)).lower == 90
+        assert [z.id for z in index.between(96, 105, direction="bearish")] == ["FVG_101", "OB_104"]
+        assert index.nearest(100, kind=ORDER_BLOCK).id == "OB_95"
+        assert index.lowest("lower", kind=ORDER_BLOCK).lower == 90
+        assert index.highest("upper").upper == 111
+        assert index.count(ORDER_BLOCK, direction="bearish") == 2
+        assert (index.count_above(100), index.count_below(100)) == (3, 3)
+        assert index.zones(LIQUIDITY) == []
+
+    def test_sync_only_touches_changed_sources(self):
+        index = ZoneIndex("BTCUSDT")
+        kept, dropped = _block(90, 92), _block(95, 96)
+        converted = []
+
+        def convert(ob):
+            converted.append(ob.id)
+            return order_block_zone(ob)
+
+        index.sync(ORDER_BLOCK, [kept, dropped], convert)
+        added = _block(99, 100)
+        assert index.sync(ORDER_BLOCK, [kept, added], convert) == (1, 1)
+
+        assert converted == ["OB_90", "OB_95", "OB_99"]
+        assert [z.id for z in index.zones()] == ["OB_90", "OB_99"]
+        assert index.discard(kept)
+        assert len(index) == 1 and index.count() == 1
+
+    def test_retired_records_are_not_zones(self):
+        def record(kind, **data):
+            return {"type": kind, "data": {"id": "Z1", "type": "bullish", "bottom": 90, "top": 92, **data}}
+
+        assert record_zone(record(ORDER_BLOCK, active=True, mitigated=False)).price == 91
+        assert record_zone(record(ORDER_BLOCK, active=False, mitigated=True)) is None
+        assert record_zone(record(FAIR_VALUE_GAP, status="partially_filled")).lower == 90
+        assert record_zone(record(FAIR_VALUE_GAP, status="filled")) is None
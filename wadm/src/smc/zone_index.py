@@ -0,0 +1,319 @@
+"""
+Price-sorted index of active SMC zones
+Order blocks, fair value gaps and liquidity zones of one symbol kept in sorted
+arrays per price edge, so range and nearest-level queries bisect to the
+current price instead of scanning and re-sorting every zone list.
+"""
+import bisect
+import heapq
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+ORDER_BLOCK = "order_block"
+FAIR_VALUE_GAP = "fair_value_gap"
+LIQUIDITY = "liquidity"
+
+EDGES = ("lower", "price", "upper")
+
+
+def _value(field: Any) -> str:
+    return getattr(field, 'value', field)
+
+
+class Zone:
+    """
+    One indexed zone.
+
+    ``price`` is the zone's reference level (order block / gap midpoint,
+    liquidity zone centre), ``strength`` its 0-100 score (OB confidence, FVG
+    quality, liquidity confluence). ``source`` is the detector object or
+    stored record the zone was built from.
+    """
+
+    __slots__ = ("key", "id", "kind", "type", "direction", "lower", "upper", "price",
+                 "strength", "source")
+
+    def __init__(self, key: Hashable, id: str, kind: str, type: str, direction: str,
+                 lower: float, upper: float, price: float, strength: float, source: Any = None):
+        self.key = key
+        self.id = id
+        self.kind = kind
+        self.type = type
+        self.direction = direction
+        self.lower = lower
+        self.upper = upper
+        self.price = price
+        self.strength = strength
+        self.source = source
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "type": self.type,
+            "direction": self.direction,
+            "lower": self.lower,
+            "upper": self.upper,
+            "price": self.price,
+            "strength": round(self.strength, 1),
+        }
+
+
+def order_block_zone(ob: Any) -> Zone:
+    return Zone(id(ob), ob.id, ORDER_BLOCK, _value(ob.type), _value(ob.type),
+                ob.bottom, ob.top, ob.midpoint, ob.confidence_score, ob)
+
+
+def fvg_zone(fvg: Any) -> Zone:
+    return Zone(id(fvg), fvg.id, FAIR_VALUE_GAP, _value(fvg.type), _value(fvg.type),
+                fvg.bottom, fvg.top, fvg.midpoint, fvg.quality_score, fvg)
+
+
+def liquidity_zone(zone: Any) -> Zone:
+    return Zone(id(zone), zone.id, LIQUIDITY, _value(zone.type), _value(zone.direction),
+                zone.lower_bound, zone.upper_bound, zone.price, zone.confluence_score, zone)
+
+
+def record_zone(record: Dict[str, Any]) -> Optional[Zone]:
+    """
+    Zone from a stored ``order_block`` / ``fair_value_gap`` analysis record;
+    None for mitigated blocks and filled gaps, which are no longer levels
+    """
+    data = record.get("data") or {}
+    kind = record.get("type")
+    if kind == ORDER_BLOCK:
+        if data.get("mitigated") or data.get("active") is False:
+            return None
+        strength = data.get("confidence_score", 0.0)
+    elif kind == FAIR_VALUE_GAP:
+        if data.get("status") == "filled":
+            return None
+        strength = data.get("quality_score", 0.0)
+    else:
+        return None
+    try:
+        lower, upper = float(data["bottom"]), float(data["top"])
+        return Zone(data["id"], data["id"], kind, data["type"], data["type"], lower, upper,
+                    float(data.get("midpoint", (lower + upper) / 2)), float(strength), record)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class _SortedEdge:
+    """Zones of one kind sorted by one edge price"""
+
+    __slots__ = ("edge", "keys", "zones")
+
+    def __init__(self, edge: str):
+        self.edge = edge
+        self.keys: List[float] = []
+        self.zones: List[Zone] = []
+
+    def add(self, zone: Zone):
+        value = getattr(zone, self.edge)
+        i = bisect.bisect_right(self.keys, value)
+        self.keys.insert(i, value)
+        self.zones.insert(i, zone)
+
+    def remove(self, zone: Zone):
+        i = bisect.bisect_left(self.keys, getattr(zone, self.edge))
+        while self.zones[i] is not zone:
+            i += 1
+        del self.keys[i]
+        del self.zones[i]
+
+    def ascending(self, price: float, inclusive: bool) -> Iterator[Zone]:
+        start = (bisect.bisect_left if inclusive else bisect.bisect_right)(self.keys, price)
+        return (self.zones[i] for i in range(start, len(self.zones)))
+
+    def descending(self, price: float, inclusive: bool) -> Iterator[Zone]:
+        end = (bisect.bisect_right if inclusive else bisect.bisect_left)(self.keys, price)
+        return (self.zones[i] for i in range(end - 1, -1, -1))
+
+
+class ZoneIndex:
+    """
+    Active zones of one symbol, sorted by lower edge, reference price and upper
+    edge.
+
+    Inserts and removals bisect into each sorted edge; queries bisect to the
+    query price and walk outwards only as far as the caller consumes, so the
+    nearest few levels cost O(log n) regardless of how many zones are tracked.
+    Query filters: ``kind``, ``direction`` (one value or a collection),
+    ``min_strength`` and an arbitrary ``where`` predicate.
+
+    Usage:
+        index.sync(ORDER_BLOCK, blocks, order_block_zone)
+        support = next(index.iter_below(price, edge="lower", direction="bullish"), None)
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self._zones: Dict[Hashable, Zone] = {}
+        self._edges: Dict[Tuple[str, str], _SortedEdge] = {}
+        self._counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._zones)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._zones
+
+    def get(self, key: Hashable) -> Optional[Zone]:
+        return self._zones.get(key)
+
+    def add(self, zone: Zone):
+        """Insert a zone, replacing any zone with the same key"""
+        if zone.key in self._zones:
+            self.remove(zone.key)
+        self._zones[zone.key] = zone
+        for edge in EDGES:
+            sorted_edge = self._edges.get((zone.kind, edge))
+            if sorted_edge is None:
+                sorted_edge = self._edges[(zone.kind, edge)] = _SortedEdge(edge)
+            sorted_edge.add(zone)
+        self._counts[(zone.kind, zone.type, zone.direction)] += 1
+
+    def remove(self, key: Hashable) -> Optional[Zone]:
+        zone = self._zones.pop(key, None)
+        if zone is None:
+            return None
+        for edge in EDGES:
+            self._edges[(zone.kind, edge)].remove(zone)
+        counter_key = (zone.kind, zone.type, zone.direction)
+        self._counts[counter_key] -= 1
+        if not self._counts[counter_key]:
+            del self._counts[counter_key]
+        return zone
+
+    def discard(self, source: Any) -> bool:
+        """Remove the zone built from a detector object"""
+        return self.remove(id(source)) is not None
+
+    def sync(self, kind: str, sources: Iterable[Any], convert: Callable[[Any], Zone]) -> Tuple[int, int]:
+        """
+        Make the indexed zones of ``kind`` match ``sources``. Zones are keyed by
+        source object, so only sources that were not indexed yet are converted.
+
+        Returns:
+            (added, removed)
+        """
+        wanted = {id(source): source for source in sources}
+        stale = [key for key, zone in self._zones.items() if zone.kind == kind and key not in wanted]
+        for key in stale:
+            self.remove(key)
+        added = 0
+        for key, source in wanted.items():
+            if key not in self._zones:
+                self.add(convert(source))
+                added += 1
+        return added, len(stale)
+
+    def clear(self, kind: Optional[str] = None):
+        if kind is None:
+            self._zones.clear()
+            self._edges.clear()
+            self._counts.clear()
+        else:
+            for key in [key for key, zone in self._zones.items() if zone.kind == kind]:
+                self.remove(key)
+
+    def zones(self, kind: Optional[str] = None) -> List[Zone]:
+        """Zones in ascending reference price"""
+        return list(self.iter_above(float('-inf'), kind=kind, inclusive=True))
+
+    def iter_above(self, price: float, edge: str = "price", kind: Optional[str] = None,
+                   inclusive: bool = False, **filters) -> Iterator[Zone]:
+        """Zones whose ``edge`` is above ``price``, nearest first"""
+        streams = [sorted_edge.ascending(price, inclusive) for sorted_edge in self._sorted(kind, edge)]
+        merged = streams[0] if len(streams) == 1 else heapq.merge(
+            *streams, key=lambda zone: getattr(zone, edge))
+        return self._filtered(merged, **filters)
+
+    def iter_below(self, price: float, edge: str = "price", kind: Optional[str] = None,
+                   inclusive: bool = False, **filters) -> Iterator[Zone]:
+        """Zones whose ``edge`` is below ``price``, nearest first"""
+        streams = [sorted_edge.descending(price, inclusive) for sorted_edge in self._sorted(kind, edge)]
+        merged = streams[0] if len(streams) == 1 else heapq.merge(
+            *streams, key=lambda zone: getattr(zone, edge), reverse=True)
+        return self._filtered(merged, **filters)
+
+    def between(self, low: float, high: float, edge: str = "price",
+                kind: Optional[str] = None, **filters) -> List[Zone]:
+        """Zones whose ``edge`` lies in ``[low, high]``, ascending"""
+        result = []
+        for zone in self.iter_above(low, edge, kind, inclusive=True, **filters):
+            if getattr(zone, edge) > high:
+                break
+            result.append(zone)
+        return result
+
+    def nearest(self, price: float, edge: str = "price", kind: Optional[str] = None,
+                **filters) -> Optional[Zone]:
+        below = next(self.iter_below(price, edge, kind, inclusive=True, **filters), None)
+        above = next(self.iter_above(price, edge, kind, **filters), None)
+        if below is None or above is None:
+            return below or above
+        return below if price - getattr(below, edge) <= getattr(above, edge) - price else above
+
+    def lowest(self, edge: str = "price", kind: Optional[str] = None, **filters) -> Optional[Zone]:
+        return next(self.iter_above(float('-inf'), edge, kind, inclusive=True, **filters), None)
+
+    def highest(self, edge: str = "price", kind: Optional[str] = None, **filters) -> Optional[Zone]:
+        return next(self.iter_below(float('inf'), edge, kind, inclusive=True, **filters), None)
+
+    def count(self, kind: Optional[str] = None, type: Optional[str] = None,
+              direction: Optional[str] = None) -> int:
+        return sum(n for (k, t, d), n in self._counts.items()
+                   if (kind is None or k == kind) and (type is None or t == type)
+                   and (direction is None or d == direction))
+
+    def count_above(self, price: float, edge: str = "price", kind: Optional[str] = None) -> int:
+        return sum(len(e.keys) - bisect.bisect_right(e.keys, price) for e in self._sorted(kind, edge))
+
+    def count_below(self, price: float, edge: str = "price", kind: Optional[str] = None) -> int:
+        return sum(bisect.bisect_left(e.keys, price) for e in self._sorted(kind, edge))
+
+    def _sorted(self, kind: Optional[str], edge: str) -> List[_SortedEdge]:
+        if edge not in EDGES:
+            raise ValueError(f"Unknown zone edge: {edge}")
+        if kind is not None:
+            sorted_edge = self._edges.get((kind, edge))
+            return [sorted_edge] if sorted_edge is not None else [_SortedEdge(edge)]
+        return [e for (k, name), e in self._edges.items() if name == edge] or [_SortedEdge(edge)]
+
+    @staticmethod
+    def _filtered(zones: Iterator[Zone], direction: Any = None, min_strength: float = 0.0,
+                  where: Optional[Callable[[Zone], bool]] = None) -> Iterator[Zone]:
+        directions = {direction} if isinstance(direction, str) else set(direction or ())
+        for zone in zones:
+            if directions and zone.direction not in directions:
+                continue
+            if zone.strength < min_strength:
+                continue
+            if where is not None and not where(zone):
+                continue
+            yield zone
+
+
+class ZoneRegistry:
+    """Per-symbol zone indexes shared by the SMC detectors"""
+
+    def __init__(self):
+        self._indexes: Dict[str, ZoneIndex] = {}
+
+    def get(self, symbol: str) -> ZoneIndex:
+        index = self._indexes.get(symbol)
+        if index is None:
+            index = self._indexes[symbol] = ZoneIndex(symbol)
+        return index
+
+    def symbols(self) -> List[str]:
+        return list(self._indexes)
+
+    def clear(self):
+        self._indexes.clear()
@@ -5,15 +5,18 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 import pymongo
 from pymongo import MongoClient
-from src.config import MONGODB_URL, TRADES_RETENTION, INDICATORS_RETENTION
+from src.config import MONGODB_URL, INDICATORS_RETENTION, COMPACTION_BATCH_SIZE, COMPACTION_MAX_BATCHES
 from src.logger import get_logger
 from src.models import Trade, VolumeProfile, OrderFlow
+from src.metrics import MongoCommandMetrics, RETENTION_DELETED
+from src.storage.retention import delete_expired
+from src.storage.stats import stats_sampler
 
 logger = get_logger(__name__)
 
 class StorageManager:
     def __init__(self):
-        self.client = MongoClient(MONGODB_URL)
+        self.client = MongoClient(MONGODB_URL, event_listeners=[MongoCommandMetrics()])
         self.db = self.client.wadm
         
         # Collections
@@ -24,28 +27,32 @@ class StorageManager:
         
         # Create indexes
         self._create_indexes()
+        stats_sampler.attach(self.db)
         
         logger.info("Storage manager initialized")
     
     def _create_indexes(self):
         """Create necessary indexes with error handling"""
         try:
-            # Trades indexes - basic indexing without TTL for now
-            self.trades.create_index([("symbol", 1), ("exchange", 1), ("timestamp", -1)])
-            
-            # Indicators indexes - basic indexing
-            self.volume_profiles.create_index([("symbol", 1), ("exchange", 1), ("timestamp", -1)])
-            self.order_flows.create_index([("symbol", 1), ("exchange", 1), ("timestamp", -1)])
+            # Trades and indicators indexes; the trailing _id serves keyset pagination
+            # on (timestamp, _id), with or without an exchange filter
+            for collection in (self.trades, self.volume_profiles, self.order_flows):
+                collection.create_index([("symbol", 1), ("exchange", 1), ("timestamp", -1), ("_id", -1)])
+                collection.create_index([("symbol", 1), ("timestamp", -1), ("_id", -1)])
             
             # SMC indexes
             self.smc_analyses.create_index([("symbol", 1), ("timestamp", -1)])
             
             logger.info("Basic indexes created successfully")
             
+            # Raw trades are deleted by the retention compactor once rolled up into bars;
+            # a TTL index would drop them whether or not they were
+            if "timestamp_1" in self.trades.index_information():
+                self.trades.drop_index("timestamp_1")
+            
             # Create TTL indexes with proper error handling
             try:
                 # Only create TTL if not time-series collections
-                self.trades.create_index([("timestamp", 1)], expireAfterSeconds=TRADES_RETENTION)
                 self.volume_profiles.create_index([("timestamp", 1)], expireAfterSeconds=INDICATORS_RETENTION)
                 self.order_flows.create_index([("timestamp", 1)], expireAfterSeconds=INDICATORS_RETENTION)
                 self.smc_analyses.create_index([("timestamp", 1)], expireAfterSeconds=INDICATORS_RETENTION)
@@ -66,7 +73,11 @@ class StorageManager:
             return 0
         
         try:
+            # persisted_at is when the write was issued; it drives indicator latency stamps
+            persisted_at = datetime.now(timezone.utc)
             docs = [t.to_dict() for t in trades]
+            for doc in docs:
+                doc["persisted_at"] = persisted_at
             result = self.trades.insert_many(docs)
             return len(result.inserted_ids)
         except Exception as e:
@@ -116,30 +127,40 @@ class StorageManager:
         )
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get storage statistics"""
+        """Get storage statistics (sampled snapshot with estimated counts, see stats_sampler)"""
+        snapshot = stats_sampler.snapshot()
+        counts = {name: stats.get("count", -1) for name, stats in snapshot["collections"].items()}
         return {
-            "trades_count": self.trades.count_documents({}),
-            "volume_profiles_count": self.volume_profiles.count_documents({}),
-            "order_flows_count": self.order_flows.count_documents({}),
-            "db_stats": self.db.command("dbStats"),
-            "smc_analyses_count": self.smc_analyses.count_documents({})
+            "trades_count": counts.get("trades", 0),
+            "volume_profiles_count": counts.get("volume_profiles", 0),
+            "order_flows_count": counts.get("order_flows", 0),
+            "db_stats": snapshot["db_stats"],
+            "smc_analyses_count": counts.get("smc_analyses", 0),
+            "collections": snapshot["collections"],
+            "exchanges": snapshot["exchanges"],
+            "sampled_at": snapshot["sampled_at"],
+            "age_seconds": snapshot["age_seconds"]
         }
     
     def cleanup_old_data(self):
-        """Manual cleanup of old data (backup to TTL indexes)"""
+        """
+        Manual cleanup of old indicators (backup to TTL indexes), in bounded
+        batches. Trades and bars are expired by the retention compactor.
+        """
         try:
-            # Clean trades older than retention
-            trades_cutoff = datetime.now(timezone.utc) - timedelta(seconds=TRADES_RETENTION)
-            trades_result = self.trades.delete_many({"timestamp": {"$lt": trades_cutoff}})
-            
-            # Clean indicators older than retention
             indicators_cutoff = datetime.now(timezone.utc) - timedelta(seconds=INDICATORS_RETENTION)
-            vp_result = self.volume_profiles.delete_many({"timestamp": {"$lt": indicators_cutoff}})
-            of_result = self.order_flows.delete_many({"timestamp": {"$lt": indicators_cutoff}})
+            deleted = {}
+            for collection in (self.volume_profiles, self.order_flows):
+                deleted[collection.name] = 0
+                for _ in range(COMPACTION_MAX_BATCHES):
+                    count = delete_expired(collection, {}, indicators_cutoff, COMPACTION_BATCH_SIZE)
+                    deleted[collection.name] += count
+                    if count < COMPACTION_BATCH_SIZE:
+                        break
+                RETENTION_DELETED.labels(collection.name).inc(deleted[collection.name])
             
-            logger.info(f"Cleanup: deleted {trades_result.deleted_count} trades, "
-                       f"{vp_result.deleted_count} volume profiles, "
-                       f"{of_result.deleted_count} order flows")
+            logger.info(f"Cleanup: deleted {deleted['volume_profiles']} volume profiles, "
+                       f"{deleted['order_flows']} order flows")
         except Exception as e:
             logger.error(f"Error in cleanup: {e}")
     
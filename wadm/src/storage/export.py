@@ -0,0 +1,341 @@
+"""
+Columnar bulk export for WADM data
+Streams trades, candles and indicator series out of MongoDB as Arrow IPC or Parquet
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+
+EXPORT_FORMATS = ("arrow", "parquet")
+EXPORT_DATASETS = ("trades", "candles", "volume_profiles", "order_flows")
+
+# Rows per Arrow record batch / Parquet row group. Also used as the Mongo cursor
+# batch size so at most one chunk of documents is held in memory at a time.
+DEFAULT_CHUNK_SIZE = 50_000
+
+CANDLE_INTERVALS_MS = {
+    "1m": 60 * 1000, "5m": 5 * 60 * 1000, "15m": 15 * 60 * 1000,
+    "30m": 30 * 60 * 1000, "1h": 60 * 60 * 1000, "4h": 4 * 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000, "1w": 7 * 24 * 60 * 60 * 1000
+}
+
+
+def _field_types() -> Dict[str, Dict[str, Any]]:
+    """Column types per dataset (built lazily so the module imports without pyarrow)"""
+    ts = pa.timestamp("ms", tz="UTC")
+    return {
+        "trades": {
+            "timestamp": ts,
+            "exchange": pa.string(),
+            "symbol": pa.string(),
+            "price": pa.float64(),
+            "quantity": pa.float64(),
+            "side": pa.string(),
+            "trade_id": pa.string(),
+        },
+        "candles": {
+            "timestamp": ts,
+            "open": pa.float64(),
+            "high": pa.float64(),
+            "low": pa.float64(),
+            "close": pa.float64(),
+            "volume": pa.float64(),
+            "buy_volume": pa.float64(),
+            "sell_volume": pa.float64(),
+            "trades": pa.int64(),
+        },
+        "volume_profiles": {
+            "timestamp": ts,
+            "exchange": pa.string(),
+            "symbol": pa.string(),
+            "poc": pa.float64(),
+            "vah": pa.float64(),
+            "val": pa.float64(),
+            "total_volume": pa.float64(),
+            "volume_distribution": pa.map_(pa.string(), pa.float64()),
+        },
+        "order_flows": {
+            "timestamp": ts,
+            "exchange": pa.string(),
+            "symbol": pa.string(),
+            "buy_volume": pa.float64(),
+            "sell_volume": pa.float64(),
+            "delta": pa.float64(),
+            "cumulative_delta": pa.float64(),
+            "imbalance_ratio": pa.float64(),
+            "large_trades_count": pa.int64(),
+            "absorption_detected": pa.bool_(),
+            "momentum_score": pa.float64(),
+            "institutional_volume": pa.float64(),
+            "vwap_delta": pa.float64(),
+            "absorption_events": pa.string(),  # JSON encoded, nested shape varies
+        },
+    }
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for columnar export (pip install pyarrow)")
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Mongo stores naive UTC datetimes; normalise filters to match"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class DataExporter:
+    """
+    Chunked columnar exporter over the WADM collections.
+
+    Filters on symbol/exchange/timestamp and the column projection are pushed
+    down to MongoDB, and documents are converted to Arrow one cursor batch at a
+    time, so memory stays bounded by ``chunk_size`` regardless of the range.
+    """
+
+    def __init__(self, db, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        _require_pyarrow()
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def schema(self, dataset: str, columns: Optional[List[str]] = None) -> "pa.Schema":
+        """Arrow schema for a dataset, optionally restricted to ``columns``"""
+        types = _field_types().get(dataset)
+        if types is None:
+            raise ValueError(f"Unknown dataset '{dataset}'. Expected one of {EXPORT_DATASETS}")
+
+        if columns:
+            unknown = [c for c in columns if c not in types]
+            if unknown:
+                raise ValueError(f"Unknown columns for {dataset}: {unknown}")
+            names = columns
+        else:
+            names = list(types)
+
+        return pa.schema([(name, types[name]) for name in names])
+
+    def _build_filter(self, symbol: str, exchange: Optional[str],
+                      start_time: Optional[datetime], end_time: Optional[datetime]) -> Dict[str, Any]:
+        query: Dict[str, Any] = {"symbol": symbol.upper()}
+        if exchange:
+            query["exchange"] = exchange
+        time_range = {}
+        if start_time:
+            time_range["$gte"] = _as_utc(start_time)
+        if end_time:
+            time_range["$lt"] = _as_utc(end_time)
+        if time_range:
+            query["timestamp"] = time_range
+        return query
+
+    def _to_batch(self, rows: List[Dict[str, Any]], schema: "pa.Schema") -> "pa.RecordBatch":
+        """Convert a chunk of documents to a record batch, column by column"""
+        arrays = []
+        for schema_field in schema:
+            name = schema_field.name
+            if name == "volume_distribution":
+                values = [
+                    [(str(k), float(v)) for k, v in (row.get(name) or {}).items()]
+                    for row in rows
+                ]
+            elif name == "absorption_events":
+                values = [json.dumps(row.get(name) or [], default=str) for row in rows]
+            elif name == "trade_id":
+                values = [None if row.get(name) is None else str(row[name]) for row in rows]
+            else:
+                values = [row.get(name) for row in rows]
+            arrays.append(pa.array(values, type=schema_field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def _chunked(self, cursor: Iterator[Dict[str, Any]], schema: "pa.Schema") -> Iterator["pa.RecordBatch"]:
+        rows: List[Dict[str, Any]] = []
+        for doc in cursor:
+            rows.append(doc)
+            if len(rows) >= self.chunk_size:
+                yield self._to_batch(rows, schema)
+                rows = []
+        if rows:
+            yield self._to_batch(rows, schema)
+
+    def iter_batches(self, dataset: str, symbol: str, exchange: Optional[str] = None,
+                     start_time: Optional[datetime] = None, end_time: Optional[datetime] = None,
+                     columns: Optional[List[str]] = None,
+                     timeframe: str = "1m") -> Iterator["pa.RecordBatch"]:
+        """
+        Yield record batches for ``dataset`` ordered by timestamp.
+
+        Args:
+            dataset: One of trades, candles, volume_profiles, order_flows
+            symbol: Trading symbol (e.g. "BTCUSDT")
+            exchange: Optional exchange filter
+            start_time: Inclusive lower bound on timestamp
+            end_time: Exclusive upper bound on timestamp
+            columns: Optional column projection
+            timeframe: Candle interval (candles dataset only)
+        """
+        schema = self.schema(dataset, columns)
+
+        if dataset == "candles":
+            cursor = self._candle_cursor(symbol, exchange, start_time, end_time, timeframe)
+        else:
+            query = self._build_filter(symbol, exchange, start_time, end_time)
+            projection = {name: 1 for name in schema.names}
+            projection["_id"] = 0
+            cursor = (
+                self.db[dataset]
+                .find(query, projection)
+                .sort("timestamp", 1)
+                .batch_size(self.chunk_size)
+            )
+
+        yield from self._chunked(cursor, schema)
+
+    def _candle_cursor(self, symbol: str, exchange: Optional[str],
+                       start_time: Optional[datetime], end_time: Optional[datetime],
+                       timeframe: str):
+        """OHLCV aggregation over trades, same bucketing as /market/candles"""
+        interval_ms = CANDLE_INTERVALS_MS.get(timeframe)
+        if interval_ms is None:
+            raise ValueError(f"Unknown timeframe '{timeframe}'. Expected one of {list(CANDLE_INTERVALS_MS)}")
+
+        pipeline = [
+            {"$match": self._build_filter(symbol, exchange, start_time, end_time)},
+            {"$project": {"_id": 0, "timestamp": 1, "price": 1, "quantity": 1, "side": 1}},
+            {
+                "$addFields": {
+                    "bucket": {
+                        "$subtract": [
+                            {"$toLong": "$timestamp"},
+                            {"$mod": [{"$toLong": "$timestamp"}, interval_ms]}
+                        ]
+                    }
+                }
+            },
+            {"$sort": {"bucket": 1, "timestamp": 1}},
+            {
+                "$group": {
+                    "_id": "$bucket",
+                    "open": {"$first": "$price"},
+                    "high": {"$max": "$price"},
+                    "low": {"$min": "$price"},
+                    "close": {"$last": "$price"},
+                    "volume": {"$sum": "$quantity"},
+                    "trades": {"$sum": 1},
+                    "buy_volume": {"$sum": {"$cond": [{"$eq": ["$side", "buy"]}, "$quantity", 0]}},
+                    "sell_volume": {"$sum": {"$cond": [{"$eq": ["$side", "sell"]}, "$quantity", 0]}}
+                }
+            },
+            {"$sort": {"_id": 1}},
+            {"$addFields": {"timestamp": {"$toDate": "$_id"}}},
+        ]
+        return self.db.trades.aggregate(pipeline, allowDiskUse=True, batchSize=self.chunk_size)
+
+    def _open_writer(self, sink, fmt: str, schema: "pa.Schema"):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Expected one of {EXPORT_FORMATS}")
+        if fmt == "parquet":
+            return pq.ParquetWriter(sink, schema, compression="zstd")
+        return pa.ipc.new_stream(sink, schema)
+
+    def _write_batch(self, writer, batch: "pa.RecordBatch"):
+        if isinstance(writer, pq.ParquetWriter):
+            writer.write_batch(batch, row_group_size=self.chunk_size)
+        else:
+            writer.write_batch(batch)
+
+    def write(self, sink, fmt: str, dataset: str, symbol: str, **kwargs) -> int:
+        """
+        Write a dataset to ``sink`` (path or binary file object).
+
+        Returns:
+            Number of rows written
+        """
+        schema = self.schema(dataset, kwargs.get("columns"))
+        writer = self._open_writer(sink, fmt, schema)
+        rows = 0
+
+        try:
+            for batch in self.iter_batches(dataset, symbol, **kwargs):
+                self._write_batch(writer, batch)
+                rows += batch.num_rows
+        finally:
+            writer.close()
+
+        logger.info(f"Exported {rows} {dataset} rows for {symbol} as {fmt}")
+        return rows
+
+    def stream(self, fmt: str, dataset: str, symbol: str, **kwargs) -> Iterator[bytes]:
+        """
+        Encode a dataset incrementally, yielding bytes as each chunk is written.
+
+        Suitable for a streaming HTTP response: only the current chunk and its
+        encoded bytes are held in memory.
+        """
+        schema = self.schema(dataset, kwargs.get("columns"))
+        buffer = _DrainableSink()
+        writer = self._open_writer(buffer, fmt, schema)
+
+        try:
+            for batch in self.iter_batches(dataset, symbol, **kwargs):
+                self._write_batch(writer, batch)
+                data = buffer.drain()
+                if data:
+                    yield data
+        finally:
+            writer.close()
+
+        data = buffer.drain()
+        if data:
+            yield data
+
+
+class _DrainableSink:
+    """Minimal writable file object whose contents can be taken incrementally"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
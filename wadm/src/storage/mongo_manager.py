@@ -2,7 +2,7 @@
 MongoDB Manager for API with optional MongoDB support
 Wrapper that works even without MongoDB for development
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta, timezone
 import logging
 
@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 try:
     from src.config import Config
     from src.storage import StorageManager
+    from src.storage.pagination import fetch_page
     MONGODB_AVAILABLE = True
 except Exception as e:
     logger.warning(f"MongoDB not available: {e}")
@@ -189,6 +190,7 @@ class MongoManager:
                     self.val = data.get('val')
                     self.total_volume = data.get('total_volume')
                     self.volume_nodes = data.get('volume_nodes', [])
+                    self.latency = data.get('latency')
             
             return VolumeProfile(result)
         return None
@@ -214,14 +216,21 @@ class MongoManager:
                     self.sell_volume = data.get('sell_volume')
                     self.absorption_events = data.get('absorption_events')
                     self.momentum_score = data.get('momentum_score', 0.0)
+                    self.latency = data.get('latency')
             
             return OrderFlow(result)
         return None
     
-    async def get_volume_profiles(self, symbol: str, start_time: datetime, end_time: datetime, limit: int = 100) -> List[Any]:
-        """Get volume profiles in time range"""
+    async def get_volume_profiles(self, symbol: str, start_time: datetime, end_time: datetime, limit: int = 100,
+                                  cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        """
+        Get one page of volume profiles in a time range, newest first
+        
+        Returns:
+            (profiles, cursor for the next page or None)
+        """
         if not self.connected:
-            return []
+            return [], None
         
         query = {
             "symbol": symbol,
@@ -231,10 +240,10 @@ class MongoManager:
             }
         }
         
-        cursor = self.volume_profiles.find(query).sort("timestamp", -1).limit(limit)
+        docs, next_cursor = fetch_page(self.volume_profiles, query, limit, cursor)
         results = []
         
-        for doc in cursor:
+        for doc in docs:
             class VolumeProfile:
                 def __init__(self, data):
                     self.timestamp = data.get('timestamp')
@@ -246,12 +255,18 @@ class MongoManager:
             
             results.append(VolumeProfile(doc))
         
-        return results
+        return results, next_cursor
     
-    async def get_order_flows(self, symbol: str, start_time: datetime, end_time: datetime, limit: int = 100) -> List[Any]:
-        """Get order flows in time range"""
+    async def get_order_flows(self, symbol: str, start_time: datetime, end_time: datetime, limit: int = 100,
+                              cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+        """
+        Get one page of order flows in a time range, newest first
+        
+        Returns:
+            (flows, cursor for the next page or None)
+        """
         if not self.connected:
-            return []
+            return [], None
         
         query = {
             "symbol": symbol,
@@ -261,10 +276,10 @@ class MongoManager:
             }
         }
         
-        cursor = self.order_flows.find(query).sort("timestamp", -1).limit(limit)
+        docs, next_cursor = fetch_page(self.order_flows, query, limit, cursor)
         results = []
         
-        for doc in cursor:
+        for doc in docs:
             class OrderFlow:
                 def __init__(self, data):
                     self.timestamp = data.get('timestamp')
@@ -272,12 +287,15 @@ class MongoManager:
                     self.cumulative_delta = data.get('cumulative_delta')
                     self.buy_volume = data.get('buy_volume')
                     self.sell_volume = data.get('sell_volume')
+                    self.imbalance_ratio = data.get('imbalance_ratio')
+                    self.large_trades_count = data.get('large_trades_count')
                     self.absorption_events = data.get('absorption_events')
+                    self.absorption_detected = data.get('absorption_detected', bool(data.get('absorption_events')))
                     self.momentum_score = data.get('momentum_score', 0.0)
             
             results.append(OrderFlow(doc))
         
-        return results
+        return results, next_cursor
     
     async def get_trades_range(self, symbol: str, start_time: datetime, end_time: datetime, limit: int = 10000) -> List[Dict[str, Any]]:
         """Get trades in a time range for SMC analysis"""
@@ -310,6 +328,24 @@ class MongoManager:
         
         return trades
     
+    async def get_smc_zone_records(self, symbol: str, since: datetime, limit: int = 5000) -> List[Dict[str, Any]]:
+        """
+        Get order block and FVG detection records saved at or after a time, oldest
+        first. Inclusive, so records written late at ``since`` are not missed;
+        callers skip the ones they already applied.
+        """
+        if not self.connected:
+            return []
+        
+        query = {
+            "symbol": symbol,
+            "type": {"$in": ["order_block", "fair_value_gap"]},
+            "timestamp": {"$gte": since}
+        }
+        
+        cursor = self.smc_analyses.find(query).sort("timestamp", 1).limit(limit)
+        return list(cursor)
+    
     def close(self):
         """Close connection"""
         if self.storage:
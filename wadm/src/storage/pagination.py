@@ -0,0 +1,103 @@
+"""
+Keyset (cursor) pagination
+Pages are range queries on ``(timestamp, _id)`` that start after the last
+document of the previous page, so page N costs the same as page 1 and a
+client can walk a whole day of trades without O(offset) skips or a count
+per page. Cursors are opaque URL-safe tokens.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from src.config import PAGINATION_COUNT_LIMIT
+
+ASCENDING = 1
+DESCENDING = -1
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Cursor positioned after ``doc``"""
+    timestamp = doc["timestamp"]
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    _id = doc["_id"]
+    payload = {"t": timestamp.isoformat(), "i": str(_id), "o": isinstance(_id, ObjectId)}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, Any]:
+    """
+    Returns:
+        (timestamp, _id) of the last document of the previous page
+
+    Raises:
+        ValueError: malformed cursor
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        timestamp = datetime.fromisoformat(payload["t"])
+        _id = ObjectId(payload["i"]) if payload.get("o") else payload["i"]
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {e}") from None
+    return timestamp, _id
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str], direction: int = DESCENDING) -> Dict[str, Any]:
+    """``query`` restricted to documents after ``cursor`` in (timestamp, _id) order"""
+    if not cursor:
+        return query
+    timestamp, _id = decode_cursor(cursor)
+    op = "$lt" if direction == DESCENDING else "$gt"
+    after = {"$or": [
+        {"timestamp": {op: timestamp}},
+        {"timestamp": timestamp, "_id": {op: _id}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+def fetch_page(collection, query: Dict[str, Any], limit: int, cursor: Optional[str] = None,
+               direction: int = DESCENDING, projection: Optional[Dict[str, Any]] = None
+               ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page in (timestamp, _id) order; served by a (..., timestamp, _id) index
+
+    Returns:
+        (documents, cursor for the next page or None on the last page)
+    """
+    docs = list(
+        collection.find(keyset_query(query, cursor, direction), projection)
+        .sort([("timestamp", direction), ("_id", direction)])
+        .limit(limit + 1)
+    )
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
+
+
+def iter_pages(collection, query: Dict[str, Any], page_size: int = 1000, cursor: Optional[str] = None,
+               direction: int = ASCENDING, projection: Optional[Dict[str, Any]] = None
+               ) -> Iterator[List[Dict[str, Any]]]:
+    """Every page after ``cursor`` (blocking); each page is one indexed range query"""
+    while True:
+        docs, cursor = fetch_page(collection, query, page_size, cursor, direction, projection)
+        if docs:
+            yield docs
+        if cursor is None:
+            return
+
+
+def approximate_total(collection, query: Dict[str, Any],
+                      cap: int = PAGINATION_COUNT_LIMIT) -> Tuple[int, bool]:
+    """
+    Matching documents counted up to ``cap``
+
+    Returns:
+        (count, whether the count stopped at the cap and is a lower bound)
+    """
+    count = collection.count_documents(query, limit=cap)
+    return count, count >= cap
@@ -0,0 +1,349 @@
+"""
+Tiered retention for market data
+Raw trades are kept for hours, 1s bars with per-second order flow for days and
+1m bars with compact volume-profile histograms and CVD for months. A background
+compactor rolls each tier up into the next and deletes expired documents in
+bounded batches, so long-horizon queries read small pre-reduced collections and
+nothing is deleted before it has been rolled up.
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne
+
+from src.config import (
+    BARS_1M_RETENTION, BARS_1S_RETENTION, COMPACTION_BATCH_SIZE, COMPACTION_MAX_BATCHES,
+    TRADES_RETENTION
+)
+from src.logger import get_logger
+from src.metrics import RETENTION_DELETED, RETENTION_LAG, RETENTION_PASS_SECONDS, RETENTION_ROLLED_UP
+from src.models import Exchange
+
+logger = get_logger(__name__)
+
+# Price bins of the per-minute volume profile
+PROFILE_BINS = 24
+
+
+@dataclass(frozen=True)
+class RetentionTier:
+    """One resolution of market data and how long it is kept"""
+    collection: str
+    resolution: int  # Seconds per document, 0 for raw trades
+    retention: int   # Seconds
+
+
+def default_tiers() -> List[RetentionTier]:
+    return [
+        RetentionTier("trades", 0, TRADES_RETENTION),
+        RetentionTier("trade_bars_1s", 1, BARS_1S_RETENTION),
+        RetentionTier("trade_bars_1m", 60, BARS_1M_RETENTION),
+    ]
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo hands back naive UTC datetimes
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _floor(value: datetime, resolution: int) -> datetime:
+    epoch = int(_as_utc(value).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % resolution, timezone.utc)
+
+
+def _bar(symbol: str, exchange: str, start: datetime, resolution: int, price: float) -> Dict[str, Any]:
+    return {
+        "_id": f"{symbol}:{exchange}:{int(start.timestamp())}",
+        "symbol": symbol, "exchange": exchange, "timestamp": start, "resolution": resolution,
+        "open": price, "high": price, "low": price, "close": price,
+        "volume": 0.0, "buy_volume": 0.0, "sell_volume": 0.0, "notional": 0.0,
+        "trades": 0, "buy_trades": 0, "max_trade": 0.0,
+    }
+
+
+def _finish(bar: Dict[str, Any]) -> Dict[str, Any]:
+    bar["delta"] = bar["buy_volume"] - bar["sell_volume"]
+    bar["vwap"] = bar["notional"] / bar["volume"] if bar["volume"] else bar["close"]
+    return bar
+
+
+def roll_up_trades(trades: Iterable[Dict[str, Any]], symbol: str, exchange: str,
+                   resolution: int = 1) -> List[Dict[str, Any]]:
+    """
+    Time-ordered trades of one symbol/exchange to bars with order-flow
+    aggregates (buy/sell volume and counts, delta, VWAP, largest trade)
+    """
+    bars: Dict[datetime, Dict[str, Any]] = {}
+    for trade in trades:
+        start = _floor(trade["timestamp"], resolution)
+        price = float(trade["price"])
+        quantity = float(trade["quantity"])
+        bar = bars.get(start)
+        if bar is None:
+            bar = bars[start] = _bar(symbol, exchange, start, resolution, price)
+        else:
+            bar["high"] = max(bar["high"], price)
+            bar["low"] = min(bar["low"], price)
+            bar["close"] = price
+        bar["volume"] += quantity
+        bar["notional"] += price * quantity
+        bar["trades"] += 1
+        bar["max_trade"] = max(bar["max_trade"], quantity)
+        if str(trade.get("side", "")).lower() == "buy":
+            bar["buy_volume"] += quantity
+            bar["buy_trades"] += 1
+        else:
+            bar["sell_volume"] += quantity
+    return [_finish(bar) for bar in bars.values()]
+
+
+def _profile(bars: List[Dict[str, Any]], low: float, high: float) -> Dict[str, Any]:
+    """Volume histogram over ``PROFILE_BINS`` equal price bins, each bar's volume at its VWAP"""
+    if high <= low:
+        return {"low": low, "step": 0.0, "volume": [sum(b["volume"] for b in bars)]}
+    step = (high - low) / PROFILE_BINS
+    volume = [0.0] * PROFILE_BINS
+    for bar in bars:
+        volume[min(int((bar["vwap"] - low) / step), PROFILE_BINS - 1)] += bar["volume"]
+    return {"low": low, "step": step, "volume": volume}
+
+
+def roll_up_bars(bars: Iterable[Dict[str, Any]], symbol: str, exchange: str, resolution: int,
+                 cvd: float = 0.0) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Time-ordered finer bars of one symbol/exchange to coarser bars carrying a
+    volume profile and the cumulative volume delta at their close
+
+    Returns:
+        (bars, CVD after the last bar)
+    """
+    groups: Dict[datetime, List[Dict[str, Any]]] = {}
+    for bar in bars:
+        groups.setdefault(_floor(bar["timestamp"], resolution), []).append(bar)
+
+    result = []
+    for start, group in groups.items():
+        bar = _bar(symbol, exchange, start, resolution, group[0]["open"])
+        bar["high"] = max(b["high"] for b in group)
+        bar["low"] = min(b["low"] for b in group)
+        bar["close"] = group[-1]["close"]
+        for field in ("volume", "buy_volume", "sell_volume", "notional", "trades", "buy_trades"):
+            bar[field] = sum(b[field] for b in group)
+        bar["max_trade"] = max(b["max_trade"] for b in group)
+        _finish(bar)
+        cvd += bar["delta"]
+        bar["cvd"] = cvd
+        bar["profile"] = _profile(group, bar["low"], bar["high"])
+        result.append(bar)
+    return result, cvd
+
+
+class RetentionCompactor:
+    """
+    Rolls each tier into the next and expires old documents, per symbol and
+    exchange.
+
+    Every roll-up keeps a watermark (``retention_state``): source documents
+    before it are already in the target tier. One step reads at most
+    ``batch_size`` source documents (a single bucket larger than that is read
+    whole), and bars are written with deterministic ids, so a step interrupted
+    midway is simply redone. A tier's documents are only deleted once they are
+    past its retention and behind the watermark of the roll-up that reads them.
+
+    ``run_pass`` is blocking; run it in a thread off the ingest path.
+    """
+
+    # Grace period after a bucket closes for in-flight writes to land
+    settle_seconds = 5
+
+    def __init__(self, db, symbols: Iterable[str], tiers: Optional[List[RetentionTier]] = None,
+                 batch_size: int = COMPACTION_BATCH_SIZE, max_batches: int = COMPACTION_MAX_BATCHES,
+                 exchanges: Optional[Iterable[str]] = None):
+        self.db = db
+        self.symbols = list(symbols)
+        self.exchanges = list(exchanges) if exchanges is not None else [e.value for e in Exchange]
+        self.tiers = tiers or default_tiers()
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.state = db["retention_state"]
+        # Per target tier, symbol and exchange: (watermark, CVD at the watermark)
+        self._cvd: Dict[Tuple[str, str, str], Tuple[datetime, float]] = {}
+        self.passes = 0
+        self.last_pass: Dict[str, Any] = {}
+
+    def ensure_indexes(self):
+        try:
+            for tier in self.tiers[1:]:
+                self.db[tier.collection].create_index([("symbol", 1), ("exchange", 1), ("timestamp", -1)])
+        except Exception as e:
+            logger.warning(f"Retention index creation failed: {e}")
+
+    def run_pass(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Roll up everything that closed and delete what expired
+
+        Returns:
+            Documents rolled up per source tier and deleted per collection
+        """
+        started = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        rolled = {tier.collection: 0 for tier in self.tiers[:-1]}
+        deleted = {tier.collection: 0 for tier in self.tiers}
+        lag: Dict[str, float] = {}
+
+        for symbol in self.symbols:
+            for exchange in self.exchanges:
+                for source, target in zip(self.tiers, self.tiers[1:]):
+                    for _ in range(self.max_batches):
+                        count, more = self._roll_up(source, target, symbol, exchange, now)
+                        rolled[source.collection] += count
+                        if not more:
+                            break
+                    watermark = self._watermark(target, symbol, exchange)
+                    if watermark is not None:
+                        behind = (now - watermark).total_seconds()
+                        lag[target.collection] = max(lag.get(target.collection, 0.0), behind)
+
+                for i, tier in enumerate(self.tiers):
+                    consumer = self.tiers[i + 1] if i + 1 < len(self.tiers) else None
+                    for _ in range(self.max_batches):
+                        count = self._expire(tier, consumer, symbol, exchange, now)
+                        deleted[tier.collection] += count
+                        if count < self.batch_size:
+                            break
+
+        for collection, count in rolled.items():
+            RETENTION_ROLLED_UP.labels(collection).inc(count)
+        for collection, count in deleted.items():
+            RETENTION_DELETED.labels(collection).inc(count)
+        for collection, seconds in lag.items():
+            RETENTION_LAG.labels(collection).set(seconds)
+        elapsed = time.perf_counter() - started
+        RETENTION_PASS_SECONDS.observe(elapsed)
+
+        self.passes += 1
+        self.last_pass = {
+            "finished_at": now, "seconds": round(elapsed, 3),
+            "rolled_up": rolled, "deleted": deleted, "lag_seconds": lag,
+        }
+        if any(rolled.values()) or any(deleted.values()):
+            logger.info(f"Retention pass: rolled up {rolled}, deleted {deleted} in {elapsed:.2f}s")
+        return self.last_pass
+
+    def _state_id(self, target: RetentionTier, symbol: str, exchange: str) -> str:
+        return f"{target.collection}:{symbol}:{exchange}"
+
+    def _watermark(self, target: RetentionTier, symbol: str, exchange: str) -> Optional[datetime]:
+        state = self.state.find_one({"_id": self._state_id(target, symbol, exchange)})
+        return _as_utc(state["rolled_until"]) if state else None
+
+    def _roll_up(self, source: RetentionTier, target: RetentionTier, symbol: str, exchange: str,
+                 now: datetime) -> Tuple[int, bool]:
+        """
+        One bounded roll-up step
+
+        Returns:
+            (source documents consumed, whether closed documents remain)
+        """
+        collection = self.db[source.collection]
+        watermark = self._watermark(target, symbol, exchange)
+        closed = _floor(now - timedelta(seconds=self.settle_seconds), target.resolution)
+        if source is not self.tiers[0]:
+            # A rolled-up source is only complete up to its own watermark
+            upstream = self._watermark(source, symbol, exchange)
+            if upstream is None:
+                return 0, False
+            closed = min(closed, _floor(upstream, target.resolution))
+        if watermark is not None and watermark >= closed:
+            return 0, False
+
+        span = {"$lt": closed}
+        if watermark is not None:
+            span["$gte"] = watermark
+        query = {"symbol": symbol, "exchange": exchange, "timestamp": span}
+        docs = list(collection.find(query).sort("timestamp", 1).limit(self.batch_size))
+        if not docs:
+            if watermark is not None:
+                self._advance(target, symbol, exchange, closed)
+            return 0, False
+
+        until = closed
+        more = len(docs) == self.batch_size
+        if more:
+            # The last bucket may continue past the batch: stop before it
+            until = _floor(docs[-1]["timestamp"], target.resolution)
+            if until <= _floor(docs[0]["timestamp"], target.resolution):
+                # One bucket holds more than a batch: read that bucket whole
+                until = until + timedelta(seconds=target.resolution)
+                span = {"$gte": _floor(docs[0]["timestamp"], target.resolution), "$lt": until}
+                docs = list(collection.find({**query, "timestamp": span}).sort("timestamp", 1))
+            else:
+                docs = [doc for doc in docs if _as_utc(doc["timestamp"]) < until]
+
+        cvd = None
+        if source.resolution == 0:
+            bars = roll_up_trades(docs, symbol, exchange, target.resolution)
+        else:
+            bars, cvd = roll_up_bars(docs, symbol, exchange, target.resolution,
+                                     self._last_cvd(target, symbol, exchange, watermark))
+
+        self.db[target.collection].bulk_write(
+            [ReplaceOne({"_id": bar["_id"]}, bar, upsert=True) for bar in bars], ordered=False)
+        self._advance(target, symbol, exchange, until)
+        # Only once the bars are written: a failed step is redone from the same CVD
+        if cvd is not None:
+            self._cvd[(target.collection, symbol, exchange)] = (until, cvd)
+        return len(docs), more
+
+    def _last_cvd(self, target: RetentionTier, symbol: str, exchange: str,
+                  watermark: Optional[datetime]) -> float:
+        """CVD at ``watermark``: the close of the last target bar before it"""
+        if watermark is None:
+            return 0.0
+        cached = self._cvd.get((target.collection, symbol, exchange))
+        if cached is not None and cached[0] == watermark:
+            return cached[1]
+        last = self.db[target.collection].find_one(
+            {"symbol": symbol, "exchange": exchange, "timestamp": {"$lt": watermark}},
+            sort=[("timestamp", -1)])
+        return last.get("cvd", 0.0) if last else 0.0
+
+    def _advance(self, target: RetentionTier, symbol: str, exchange: str, until: datetime):
+        self.state.update_one(
+            {"_id": self._state_id(target, symbol, exchange)},
+            {"$set": {"rolled_until": until}}, upsert=True)
+
+    def _expire(self, tier: RetentionTier, consumer: Optional[RetentionTier], symbol: str,
+                exchange: str, now: datetime) -> int:
+        """Delete one batch of expired documents; returns documents deleted"""
+        cutoff = now - timedelta(seconds=tier.retention)
+        if consumer is not None:
+            watermark = self._watermark(consumer, symbol, exchange)
+            if watermark is None:
+                return 0  # Never rolled up: keep everything
+            cutoff = min(cutoff, watermark)
+        return delete_expired(self.db[tier.collection],
+                              {"symbol": symbol, "exchange": exchange}, cutoff, self.batch_size)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "tiers": [
+                {"collection": t.collection, "resolution": t.resolution, "retention": t.retention}
+                for t in self.tiers
+            ],
+            "symbols": len(self.symbols),
+            "batch_size": self.batch_size,
+            "passes": self.passes,
+            "last_pass": self.last_pass,
+        }
+
+
+def delete_expired(collection, query: Dict[str, Any], cutoff: datetime, batch_size: int) -> int:
+    """Delete up to ``batch_size`` documents matching ``query`` older than ``cutoff``"""
+    ids = [doc["_id"] for doc in collection.find(
+        {**query, "timestamp": {"$lt": cutoff}}, {"_id": 1}).limit(batch_size)]
+    if not ids:
+        return 0
+    return collection.delete_many({"_id": {"$in": ids}}).deleted_count
@@ -0,0 +1,159 @@
+"""
+Sampled storage statistics
+Collection sizes come from collection metadata (estimated_document_count and
+$collStats) and per-exchange trade counts from the manager's own ingest
+counters, refreshed in the background and served from memory, so status
+endpoints polled every few seconds never scan a collection.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from src.config import STATS_SAMPLE_INTERVAL
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+COLLECTIONS = ["trades", "volume_profiles", "order_flows", "smc_analyses", "trade_bars_1s", "trade_bars_1m"]
+
+
+class IngestCounters:
+    """
+    Trades persisted and newest trade time per exchange, counted where the
+    trades are written. ``flush`` adds what was counted since the previous
+    flush to the shared ``ingest_stats`` collection, so counts from every
+    shard and across restarts add up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, exchange: str, count: int, last_trade_time: Optional[datetime]):
+        with self._lock:
+            pending = self._pending.setdefault(exchange, {"trades": 0, "last_trade_time": None})
+            pending["trades"] += count
+            if last_trade_time and (pending["last_trade_time"] is None
+                                    or last_trade_time > pending["last_trade_time"]):
+                pending["last_trade_time"] = last_trade_time
+
+    def flush(self, db) -> int:
+        """Write pending counts; returns exchanges updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for exchange, counts in pending.items():
+            update: Dict[str, Any] = {"$inc": {"trades": counts["trades"]}}
+            if counts["last_trade_time"]:
+                update["$max"] = {"last_trade_time": counts["last_trade_time"]}
+            try:
+                db.ingest_stats.update_one({"_id": exchange}, update, upsert=True)
+            except Exception as e:
+                logger.warning(f"Ingest counter flush failed for {exchange}: {e}")
+                self.record(exchange, counts["trades"], counts["last_trade_time"])
+        return len(pending)
+
+
+class StatsSampler:
+    """
+    Latest storage statistics snapshot, refreshed every ``interval`` seconds.
+
+    ``snapshot()`` only reads memory; until the background task has sampled
+    once it reports no data (``sampled_at`` None). One sampler is shared by
+    every StorageManager of the process.
+    """
+
+    def __init__(self, interval: float = STATS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.db = None
+        self.samples = 0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, db):
+        if self.db is None:
+            self.db = db
+
+    def sample(self) -> Dict[str, Any]:
+        """Read collection metadata and ingest counters (blocking)"""
+        started = time.perf_counter()
+        collections = {}
+        for name in COLLECTIONS:
+            collection = self.db[name]
+            try:
+                stats = {"count": collection.estimated_document_count()}
+                storage = next(collection.aggregate([{"$collStats": {"storageStats": {}}}]), {})
+                storage = storage.get("storageStats", {})
+                stats["size_bytes"] = storage.get("size", 0)
+                stats["storage_bytes"] = storage.get("storageSize", 0)
+                stats["index_bytes"] = storage.get("totalIndexSize", 0)
+            except Exception as e:
+                logger.debug(f"Stats sample failed for {name}: {e}")
+                stats = {"count": -1}
+            collections[name] = stats
+
+        try:
+            db_stats = self.db.command("dbStats")
+        except Exception as e:
+            logger.debug(f"dbStats failed: {e}")
+            db_stats = {}
+
+        exchanges = {}
+        try:
+            for doc in self.db.ingest_stats.find({}):
+                exchanges[doc["_id"]] = {
+                    "trades": doc.get("trades", 0),
+                    "last_trade_time": doc.get("last_trade_time"),
+                }
+        except Exception as e:
+            logger.debug(f"Ingest stats read failed: {e}")
+
+        snapshot = {
+            "sampled_at": datetime.now(timezone.utc),
+            "sample_seconds": round(time.perf_counter() - started, 4),
+            "collections": collections,
+            "exchanges": exchanges,
+            "db_stats": db_stats,
+        }
+        with self._lock:
+            self._snapshot = snapshot
+            self.samples += 1
+        return snapshot
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest snapshot with its age; never scans"""
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            # Called from async handlers: sampling here would block the event loop
+            return {"sampled_at": None, "age_seconds": None, "collections": {}, "exchanges": {}, "db_stats": {}}
+        age = (datetime.now(timezone.utc) - snapshot["sampled_at"]).total_seconds()
+        return {**snapshot, "age_seconds": round(age, 3)}
+
+    def start(self):
+        """Refresh in the background on the running loop"""
+        if self._task is None and self.db is not None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sample)
+            except Exception as e:
+                logger.error(f"Stats sampler error: {e}")
+            await asyncio.sleep(self.interval)
+
+
+stats_sampler = StatsSampler()
+ingest_counters = IngestCounters()
@@ -0,0 +1,102 @@
+"""
+Tests for keyset pagination
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from .pagination import ASCENDING, decode_cursor, encode_cursor, fetch_page, iter_pages, keyset_query
+
+T0 = datetime(2025, 1, 1)  # Mongo hands back naive UTC
+
+
+def _match(doc, query):
+    if "$and" in query:
+        return all(_match(doc, q) for q in query["$and"])
+    if "$or" in query:
+        return any(_match(doc, q) for q in query["$or"])
+    for field, condition in query.items():
+        value = doc[field]
+        if isinstance(value, datetime) and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        if not isinstance(condition, dict):
+            if isinstance(condition, datetime) and condition.tzinfo is None:
+                condition = condition.replace(tzinfo=timezone.utc)
+            if value != condition:
+                return False
+            continue
+        for op, operand in condition.items():
+            if isinstance(operand, datetime) and operand.tzinfo is None:
+                operand = operand.replace(tzinfo=timezone.utc)
+            if op == "$lt" and not value < operand:
+                return False
+            if op == "$gt" and not value > operand:
+                return False
+    return True
+
+
+class _Cursor(list):
+    def sort(self, keys):
+        result = list(self)
+        for field, direction in reversed(keys):
+            result.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return _Cursor(result)
+
+    def limit(self, n):
+        return _Cursor(self[:n])
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.matched = []
+
+    def find(self, query, projection=None):
+        matched = [doc for doc in self.docs if _match(doc, query)]
+        self.matched.append(len(matched))
+        return _Cursor(matched)
+
+
+def _trades(n):
+    # Several trades share each timestamp so _id has to break ties
+    return [{"_id": ObjectId(), "symbol": "BTCUSDT", "timestamp": T0 + timedelta(seconds=i // 3), "n": i}
+            for i in range(n)]
+
+
+class TestKeysetPagination:
+    """Test cursor round trips and complete, duplicate-free walks"""
+
+    def test_cursor_round_trip(self):
+        doc = _trades(1)[0]
+        timestamp, _id = decode_cursor(encode_cursor(doc))
+        assert timestamp == doc["timestamp"].replace(tzinfo=timezone.utc)
+        assert _id == doc["_id"]
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_pages_cover_everything_once_in_order(self):
+        trades = _trades(250)
+        collection = _Collection(trades)
+        seen, cursor = [], None
+        while True:
+            docs, cursor = fetch_page(collection, {"symbol": "BTCUSDT"}, 40, cursor)
+            seen.extend(doc["n"] for doc in docs)
+            if cursor is None:
+                break
+        assert sorted(seen) == list(range(250)) and len(seen) == 250
+        order = [(trades[n]["timestamp"], trades[n]["_id"]) for n in seen]
+        assert order == sorted(order, reverse=True)
+
+    def test_each_page_starts_at_the_cursor(self):
+        collection = _Collection(_trades(3000))
+        pages = list(iter_pages(collection, {"symbol": "BTCUSDT"}, page_size=100, direction=ASCENDING))
+        assert sum(len(page) for page in pages) == 3000
+        # Each range starts after the previous page; with the index, limit ends it there too
+        assert collection.matched == [3000 - 100 * i for i in range(30)]
+
+    def test_keyset_query_keeps_filters(self):
+        doc = _trades(1)[0]
+        query = keyset_query({"symbol": "BTCUSDT"}, encode_cursor(doc))
+        assert query["$and"][0] == {"symbol": "BTCUSDT"}
+        assert keyset_query({"symbol": "BTCUSDT"}, None) == {"symbol": "BTCUSDT"}
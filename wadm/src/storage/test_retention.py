@@ -0,0 +1,209 @@
+"""
+Tests for tiered retention roll-ups and bounded expiry
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from .retention import RetentionCompactor, RetentionTier, roll_up_bars, roll_up_trades
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _match(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for op, operand in condition.items():
+            if op == "$lt" and not value < operand:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$in" and value not in operand:
+                return False
+    return True
+
+
+class _Cursor(list):
+    def sort(self, field, direction):
+        return _Cursor(sorted(self, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def limit(self, n):
+        return _Cursor(self[:n])
+
+
+class _Collection:
+    """The slice of pymongo's collection API the compactor uses"""
+
+    def __init__(self):
+        self.docs = {}
+        self.deletes = []
+
+    def find(self, query, projection=None):
+        return _Cursor(doc for doc in self.docs.values() if _match(doc, query))
+
+    def find_one(self, query, sort=None):
+        found = self.find(query)
+        if sort:
+            found = found.sort(*sort[0])
+        return found[0] if found else None
+
+    def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {"_id": query["_id"]}).update(update["$set"])
+
+    def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            doc = request._doc
+            self.docs[doc["_id"]] = dict(doc)
+
+    def delete_many(self, query):
+        ids = query["_id"]["$in"]
+        self.deletes.append(len(ids))
+        for _id in ids:
+            del self.docs[_id]
+        return type("Result", (), {"deleted_count": len(ids)})()
+
+
+class _Db(dict):
+    def __missing__(self, name):
+        collection = self[name] = _Collection()
+        return collection
+
+
+def _trades(seconds, per_second=3):
+    trades = []
+    for s in range(seconds):
+        for i in range(per_second):
+            trades.append({
+                "_id": len(trades), "symbol": "BTCUSDT", "exchange": "bybit",
+                "timestamp": T0 + timedelta(seconds=s, milliseconds=100 * i),
+                "price": 100.0 + (s % 7) + i, "quantity": 1.0 + i,
+                "side": "buy" if i % 2 == 0 else "sell",
+            })
+    return trades
+
+
+class TestRollUps:
+    """Test the pure bar and profile roll-ups"""
+
+    def test_trades_to_second_bars(self):
+        bars = roll_up_trades(_trades(2), "BTCUSDT", "bybit", 1)
+        assert [b["timestamp"] for b in bars] == [T0, T0 + timedelta(seconds=1)]
+        bar = bars[0]
+        assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (100.0, 102.0, 100.0, 102.0)
+        assert (bar["volume"], bar["buy_volume"], bar["sell_volume"]) == (6.0, 4.0, 2.0)
+        assert (bar["trades"], bar["buy_trades"], bar["max_trade"], bar["delta"]) == (3, 2, 3.0, 2.0)
+        assert bar["vwap"] == (100 * 1 + 101 * 2 + 102 * 3) / 6
+        assert bar["_id"] == f"BTCUSDT:bybit:{int(T0.timestamp())}"
+
+    def test_second_bars_to_minute_bars_with_cvd_and_profile(self):
+        seconds = roll_up_trades(_trades(120), "BTCUSDT", "bybit", 1)
+        minutes, cvd = roll_up_bars(seconds, "BTCUSDT", "bybit", 60, cvd=10.0)
+
+        assert len(minutes) == 2
+        assert minutes[0]["volume"] == sum(b["volume"] for b in seconds[:60])
+        assert minutes[0]["cvd"] == 10.0 + minutes[0]["delta"]
+        assert cvd == minutes[1]["cvd"] == minutes[0]["cvd"] + minutes[1]["delta"]
+        profile = minutes[0]["profile"]
+        assert len(profile["volume"]) == 24
+        assert abs(sum(profile["volume"]) - minutes[0]["volume"]) < 1e-9
+        assert profile["low"] == minutes[0]["low"]
+
+
+class TestRetentionCompactor:
+    """Test bounded, watermark-driven roll-up and expiry"""
+
+    def _compactor(self, batch_size=50):
+        db = _Db()
+        tiers = [
+            RetentionTier("trades", 0, 60),
+            RetentionTier("trade_bars_1s", 1, 3600),
+            RetentionTier("trade_bars_1m", 60, 86400),
+        ]
+        compactor = RetentionCompactor(db, ["BTCUSDT"], tiers=tiers, batch_size=batch_size,
+                                       max_batches=100, exchanges=["bybit"])
+        return db, compactor
+
+    def test_rolls_up_everything_and_deletes_in_batches(self):
+        db, compactor = self._compactor()
+        trades = _trades(180)
+        db["trades"].docs = {t["_id"]: t for t in trades}
+
+        result = compactor.run_pass(now=T0 + timedelta(minutes=5))
+
+        assert result["rolled_up"] == {"trades": 540, "trade_bars_1s": 180}
+        assert len(db["trade_bars_1s"].docs) == 180
+        minutes = sorted(db["trade_bars_1m"].docs.values(), key=lambda b: b["timestamp"])
+        assert len(minutes) == 3
+        assert sum(b["volume"] for b in minutes) == sum(t["quantity"] for t in trades)
+        assert minutes[-1]["cvd"] == sum(b["delta"] for b in minutes)
+        # Raw trades past retention are gone, never more than a batch at a time
+        assert result["deleted"]["trades"] == 540
+        assert max(db["trades"].deletes) <= 50
+
+    def test_nothing_is_deleted_before_it_is_rolled_up(self):
+        db, compactor = self._compactor()
+        db["trades"].docs = {t["_id"]: t for t in _trades(30)}
+        compactor.settle_seconds = 3600  # Nothing has closed yet
+
+        result = compactor.run_pass(now=T0 + timedelta(minutes=5))
+        assert result["deleted"]["trades"] == 0
+        assert len(db["trades"].docs) == 90
+
+    def test_resumes_from_watermark_without_double_counting(self):
+        db, compactor = self._compactor()
+        trades = _trades(120)
+        db["trades"].docs = {t["_id"]: t for t in trades[:180]}
+        compactor.run_pass(now=T0 + timedelta(seconds=65))
+        db["trades"].docs.update({t["_id"]: t for t in trades[180:]})
+        compactor.run_pass(now=T0 + timedelta(seconds=130))
+
+        minutes = sorted(db["trade_bars_1m"].docs.values(), key=lambda b: b["timestamp"])
+        assert [b["trades"] for b in minutes] == [180, 180]
+        assert minutes[-1]["cvd"] == minutes[0]["delta"] + minutes[1]["delta"]
+
+    def test_failed_write_and_restart_keep_cvd_exact(self):
+        db, compactor = self._compactor()
+        trades = _trades(180)
+        db["trades"].docs = {t["_id"]: t for t in trades[:180]}
+        compactor.run_pass(now=T0 + timedelta(seconds=65))
+        db["trades"].docs.update({t["_id"]: t for t in trades[180:]})
+
+        def fail(requests, ordered=True):
+            raise RuntimeError("write failed")
+        db["trade_bars_1m"].bulk_write = fail
+        with pytest.raises(RuntimeError):
+            compactor.run_pass(now=T0 + timedelta(seconds=130))
+        del db["trade_bars_1m"].bulk_write
+        compactor.run_pass(now=T0 + timedelta(seconds=130))
+
+        # A new process seeds the CVD from the bar before its watermark
+        _, restarted = self._compactor()
+        restarted.db, restarted.state = db, db["retention_state"]
+        restarted.run_pass(now=T0 + timedelta(seconds=190))
+
+        minutes = sorted(db["trade_bars_1m"].docs.values(), key=lambda b: b["timestamp"])
+        assert len(minutes) == 3
+        running = 0.0
+        for bar in minutes:
+            running += bar["delta"]
+            assert bar["cvd"] == running
+
+    def test_downstream_waits_for_an_upstream_backlog(self):
+        db, compactor = self._compactor(batch_size=500)
+        compactor.max_batches = 2
+        trades = _trades(600)
+        db["trades"].docs = {t["_id"]: t for t in trades}
+
+        for _ in range(6):
+            compactor.run_pass(now=T0 + timedelta(minutes=20))
+            minutes = [b["trades"] for b in sorted(db["trade_bars_1m"].docs.values(),
+                                                     key=lambda b: b["timestamp"])]
+            # Only whole minutes are rolled up, however far the 1s tier got
+            assert all(count == 180 for count in minutes)
+
+        assert len(minutes) == 10
+        assert sum(minutes) == len(trades)
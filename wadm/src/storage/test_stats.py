@@ -0,0 +1,74 @@
+"""
+Tests for sampled storage statistics
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from .stats import COLLECTIONS, IngestCounters, StatsSampler
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _db():
+    db = MagicMock()
+    collection = MagicMock()
+    collection.estimated_document_count.return_value = 1000
+    collection.aggregate.side_effect = lambda pipeline: iter([{"storageStats": {"size": 2048, "storageSize": 1024}}])
+    db.__getitem__.return_value = collection
+    db.command.return_value = {"db": "wadm", "storageSize": 1024 * 1024}
+    db.ingest_stats.find.return_value = [{"_id": "bybit", "trades": 42, "last_trade_time": T0}]
+    return db, collection
+
+
+class TestStatsSampler:
+    """Test metadata-only sampling and in-memory snapshots"""
+
+    def test_sample_uses_metadata_and_snapshot_reads_memory(self):
+        db, collection = _db()
+        sampler = StatsSampler()
+        sampler.attach(db)
+        assert sampler.snapshot()["sampled_at"] is None
+        collection.estimated_document_count.assert_not_called()
+
+        sampler.sample()
+        snapshot = sampler.snapshot()
+        assert snapshot["collections"]["trades"] == {
+            "count": 1000, "size_bytes": 2048, "storage_bytes": 1024, "index_bytes": 0}
+        assert snapshot["exchanges"] == {"bybit": {"trades": 42, "last_trade_time": T0}}
+        assert snapshot["age_seconds"] >= 0
+        collection.count_documents.assert_not_called()
+
+        calls = collection.estimated_document_count.call_count
+        for _ in range(10):
+            sampler.snapshot()
+        assert collection.estimated_document_count.call_count == calls == len(COLLECTIONS)
+        assert sampler.samples == 1
+
+    def test_unattached_sampler_reports_no_data(self):
+        assert StatsSampler().snapshot()["sampled_at"] is None
+
+
+class TestIngestCounters:
+    """Test incremental flushes of per-exchange counts"""
+
+    def test_flush_sends_deltas_since_last_flush(self):
+        db = MagicMock()
+        counters = IngestCounters()
+        counters.record("bybit", 10, T0)
+        counters.record("bybit", 5, T0 - timedelta(seconds=1))
+
+        assert counters.flush(db) == 1
+        db.ingest_stats.update_one.assert_called_once_with(
+            {"_id": "bybit"}, {"$inc": {"trades": 15}, "$max": {"last_trade_time": T0}}, upsert=True)
+        assert counters.flush(db) == 0
+
+    def test_failed_flush_keeps_counts(self):
+        db = MagicMock()
+        db.ingest_stats.update_one.side_effect = RuntimeError("down")
+        counters = IngestCounters()
+        counters.record("kraken", 3, T0)
+        counters.flush(db)
+
+        db.ingest_stats.update_one.side_effect = None
+        counters.flush(db)
+        assert db.ingest_stats.update_one.call_args[0][1]["$inc"] == {"trades": 3}
@@ -0,0 +1,151 @@
+"""
+Tests for the indicator update feed
+"""
+import asyncio
+from datetime import datetime, timezone
+
+from src.indicator_feed import (
+    FeedFilter, IndicatorFeed, IndicatorFeedPublisher, apply_patch, merge_patch
+)
+
+NOW = datetime(2025, 1, 2, tzinfo=timezone.utc)
+
+
+class _Cursor(list):
+    def sort(self, field, direction):
+        return _Cursor(sorted(self, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def limit(self, n):
+        return _Cursor(self[:n])
+
+
+class _Collection:
+    def __init__(self):
+        self.docs = []
+
+    def find(self, query, projection=None):
+        after = query.get("seq", {}).get("$gt", 0)
+        return _Cursor({k: v for k, v in doc.items() if k != "_id"} for doc in self.docs if doc["seq"] > after)
+
+    def insert_many(self, docs, ordered=True):
+        self.docs.extend(dict(doc) for doc in docs)
+
+
+class _Counters:
+    def __init__(self):
+        self.seq = 0
+
+    def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        self.seq += update["$inc"]["seq"]
+        return {"_id": query["_id"], "seq": self.seq}
+
+
+class _DB(dict):
+    def __init__(self):
+        super().__init__(indicator_updates=_Collection())
+        self.counters = _Counters()
+
+
+def _doc(seq, symbol="BTCUSDT", indicator="volume_profile", **data):
+    return {"seq": seq, "indicator": indicator, "symbol": symbol, "exchange": "bybit", "timeframe": "1m",
+            "published_at": NOW, "data": data}
+
+
+async def _drain(subscription, n):
+    return [await asyncio.wait_for(subscription.next_message(), 1) for _ in range(n)]
+
+
+class TestMergePatch:
+    """Test that deltas carry only changed fields and bins"""
+
+    def test_round_trip(self):
+        previous = {"poc": 100.0, "total_volume": 5.0, "volume_distribution": {"99.0": 2.0, "100.0": 3.0}}
+        current = {"poc": 100.0, "total_volume": 6.0, "volume_distribution": {"100.0": 4.0, "101.0": 2.0}}
+        patch = merge_patch(previous, current)
+        assert patch == {"total_volume": 6.0, "volume_distribution": {"99.0": None, "100.0": 4.0, "101.0": 2.0}}
+        assert apply_patch(previous, patch) == current
+        assert merge_patch(current, current) == {}
+
+
+class TestIndicatorFeed:
+    """Test publishing, ordered tailing, coalescing and resume"""
+
+    def test_publish_and_poll_in_order(self):
+        db = _DB()
+        publisher = IndicatorFeedPublisher()
+        publisher.publish("order_flow", "BTCUSDT", "bybit", "1m", {"delta": 1.0})
+        publisher.publish("order_flow", "BTCUSDT", "bybit", "1m", {"delta": 2.0})
+        publisher.publish("order_flow", "ETHUSDT", "bybit", "1m", {"delta": 3.0})
+        # Same key within one flush collapses to the latest
+        assert publisher.flush(db) == 2
+        assert publisher.flush(db) == 0
+
+        feed = IndicatorFeed(gap_timeout=5)
+        feed.attach(db)
+        assert [doc["data"]["delta"] for doc in feed.poll(now=0)] == [2.0, 3.0]
+
+        # Seq 4 reserved but not inserted yet: delivery waits, then skips it
+        db["indicator_updates"].docs.append(_doc(5))
+        assert feed.poll(now=1) == []
+        assert feed.poll(now=3) == []
+        assert [doc["seq"] for doc in feed.poll(now=6)] == [5]
+
+    def test_filters_coalescing_and_deltas(self):
+        async def scenario():
+            feed = IndicatorFeed()
+            subscription = feed.subscribe(FeedFilter.from_params(symbols="BTCUSDT"), max_rate=1000)
+            feed.ingest([_doc(1, poc=100.0, total_volume=1.0), _doc(2, symbol="ETHUSDT", poc=5.0)])
+            first = await _drain(subscription, 1)
+            feed.ingest([_doc(3, poc=100.0, total_volume=2.0), _doc(4, poc=101.0, total_volume=3.0)])
+            second = await _drain(subscription, 1)
+            return first + second, subscription
+
+        (full, delta), subscription = asyncio.run(scenario())
+        assert full["type"] == "full" and full["data"] == {"poc": 100.0, "total_volume": 1.0}
+        # Seq 3 coalesced into seq 4, sent as a patch against what the client has
+        assert delta["seq"] == 4 and delta["patch"] == {"poc": 101.0, "total_volume": 3.0}
+        assert not subscription.pending
+
+    def test_failing_listener_does_not_block_delivery(self):
+        async def scenario():
+            feed = IndicatorFeed()
+            seen = []
+
+            def broken(doc):
+                raise RuntimeError("listener bug")
+            feed.add_listener(broken)
+            feed.add_listener(seen.append)
+            subscription = feed.subscribe(FeedFilter(), max_rate=1000)
+            feed.ingest([_doc(1, poc=100.0), _doc(2, symbol="ETHUSDT", poc=5.0)])
+            return seen, await _drain(subscription, 2)
+
+        seen, delivered = asyncio.run(scenario())
+        assert [doc["seq"] for doc in seen] == [1, 2]
+        assert [m["seq"] for m in delivered] == [1, 2]
+
+    def test_rate_cap(self):
+        async def scenario():
+            feed = IndicatorFeed()
+            subscription = feed.subscribe(FeedFilter(), max_rate=20)
+            feed.ingest([_doc(i, symbol=f"S{i}", poc=1.0) for i in range(1, 4)])
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await _drain(subscription, 3)
+            return loop.time() - started
+
+        assert asyncio.run(scenario()) >= 0.09
+
+    def test_resume_and_resync(self):
+        async def scenario():
+            feed = IndicatorFeed(buffer_size=3)
+            feed.ingest([_doc(i, symbol=f"S{i % 2}", poc=float(i)) for i in range(1, 6)])
+            feed.last_seq = 5
+            resumed = await _drain(feed.subscribe(FeedFilter(), since=3, max_rate=1000), 2)
+            stale = await _drain(feed.subscribe(FeedFilter(), since=1, max_rate=1000), 3)
+            return resumed, stale
+
+        resumed, stale = asyncio.run(scenario())
+        assert [m["seq"] for m in resumed] == [4, 5]
+        assert all(m["type"] == "full" for m in resumed)
+        assert stale[0] == {"type": "resync"}
+        assert [m["seq"] for m in stale[1:]] == [4, 5]
@@ -0,0 +1,64 @@
+"""
+Tests for end-to-end latency tracking
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from .latency import LatencyTracker
+from .models import Trade, Exchange, Side
+
+
+def _trade(age_seconds: float, received: datetime) -> Trade:
+    return Trade(
+        exchange=Exchange.BYBIT,
+        symbol="BTCUSDT",
+        price=100.0,
+        quantity=1.0,
+        side=Side.BUY,
+        timestamp=received - timedelta(seconds=age_seconds),
+        trade_id="1",
+        received_at=received,
+    )
+
+
+class TestLatencyTracker:
+    """Test rolling latency windows and stamps"""
+
+    def test_network_and_parse_recorded(self):
+        """Network latency is receive minus exchange time, per trade"""
+        tracker = LatencyTracker(window=16)
+        received = datetime.now(timezone.utc)
+        trades = [_trade(0.2, received), _trade(0.4, received)]
+
+        tracker.record_trades("bybit", trades, received.timestamp() + 0.001)
+
+        summary = tracker.summary()
+        assert summary["network"]["bybit"]["count"] == 2
+        assert 190 <= summary["network"]["bybit"]["max_ms"] <= 410
+        assert summary["parse"]["bybit"]["p50_ms"] >= 0
+
+    def test_window_is_bounded(self):
+        """Only the most recent samples are kept"""
+        tracker = LatencyTracker(window=4)
+        for value in range(10):
+            tracker.record("persist", "binance", value / 1000)
+
+        summary = tracker.summary()["persist"]["binance"]
+        assert summary["count"] == 4
+        assert summary["p50_ms"] >= 6
+
+    def test_indicator_stamp_and_serve_age(self):
+        """Indicator stamps carry the newest input trade times through to serving"""
+        tracker = LatencyTracker(window=16)
+        now = datetime.now(timezone.utc)
+        docs = [
+            {"timestamp": (now - timedelta(seconds=3)).replace(tzinfo=None), "persisted_at": now - timedelta(seconds=2)},
+            {"timestamp": (now - timedelta(seconds=1)).replace(tzinfo=None), "persisted_at": now - timedelta(seconds=0.5)},
+        ]
+
+        stamp = tracker.stamp_indicator(docs, "volume_profile", "bybit")
+
+        assert stamp["source_time"] == (now - timedelta(seconds=1))
+        assert stamp["persisted_at"] == now - timedelta(seconds=0.5)
+        assert tracker.record_served("bybit", stamp) >= 0
+        assert {"end_to_end", "indicator", "serve"} <= set(tracker.summary())
@@ -0,0 +1,52 @@
+"""
+Tests for event loop monitoring and the sampling profiler
+"""
+
+import asyncio
+import time
+
+from .loop_monitor import LoopMonitor
+
+
+def _blocking_call(seconds):
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    """Test lag measurement, stall attribution and profiling"""
+
+    def test_blocking_call_is_captured(self):
+        """A blocking call inside a coroutine shows up as a slow callback with its stack"""
+        async def scenario():
+            monitor = LoopMonitor("test-stall", interval=0.02, slow_threshold=0.05)
+            monitor.start()
+            await asyncio.sleep(0.05)
+            _blocking_call(0.3)
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+            return monitor.report()
+
+        report = asyncio.run(scenario())
+
+        assert report["lag_ms"]["max"] >= 200
+        assert report["slow_callbacks"]
+        stack = report["slow_callbacks"][0]["stack"]
+        assert any("_blocking_call" in entry for entry in stack)
+
+    def test_profiler_folded_stacks(self):
+        """The profiler samples the loop thread and emits folded stacks"""
+        async def scenario():
+            monitor = LoopMonitor("test-profile", interval=0.02, slow_threshold=1.0)
+            monitor.start()
+            monitor.profiler.start(hz=200)
+            _blocking_call(0.2)
+            monitor.profiler.stop()
+            await monitor.stop()
+            return monitor.profiler
+
+        profiler = asyncio.run(scenario())
+
+        assert profiler.samples > 0
+        lines = profiler.folded().strip().splitlines()
+        assert any("_blocking_call" in line for line in lines)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
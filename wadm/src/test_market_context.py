@@ -0,0 +1,93 @@
+"""
+Tests for compact market context snapshots
+"""
+import json
+from datetime import datetime, timezone
+
+from src.indicator_feed import IndicatorFeed
+from src.market_context import MarketContextService, estimate_tokens
+from src.market_stats import RollingStats
+
+NOW = datetime(2025, 1, 2, tzinfo=timezone.utc)
+
+
+class _Stats:
+    """Market stats mirror stand-in over one RollingStats"""
+
+    def __init__(self, trades):
+        self.stats = RollingStats()
+        for ts, price, quantity in trades:
+            self.stats.add(ts, price, quantity, True)
+        self.refreshed_at = NOW
+
+    def get(self, symbol, timeframe):
+        minutes = {"1h": 60, "4h": 240, "1d": 1440}.get(timeframe)
+        return self.stats.window(minutes) if symbol == "BTCUSDT" and minutes else None
+
+
+def _update(seq, indicator, timeframe, data, exchange="bybit"):
+    return {"seq": seq, "indicator": indicator, "symbol": "BTCUSDT", "exchange": exchange,
+            "timeframe": timeframe, "published_at": NOW, "data": data}
+
+
+def _service():
+    base = NOW.timestamp() - 1800
+    stats = _Stats([(base + i, price, 1.0) for i, price in enumerate([99.0, 100.0, 101.0] * 10)])
+    feed = IndicatorFeed()
+    service = MarketContextService(timeframes=["1h", "15m"], max_tokens=400)
+    service.attach(feed, stats)
+    feed.ingest([
+        _update(1, "volume_profile", "1h", {"poc": 100.0, "vah": 101.0, "val": 99.0, "total_volume": 30.0,
+                                             "volume_distribution": {"99.0": 5.0, "100.0": 20.0, "101.0": 5.0}}),
+        _update(2, "volume_profile", "1h", {"poc": 250.0, "vah": 251.0, "val": 249.0, "total_volume": 3.0,
+                                             "volume_distribution": {"250.0": 3.0}}, exchange="kraken"),
+        _update(3, "order_flow", "15m", {"buy_volume": 6.0, "sell_volume": 4.0, "delta": 2.0,
+                                          "cumulative_delta": 10.0}),
+        _update(4, "order_flow", "15m", {"buy_volume": 1.0, "sell_volume": 3.0, "delta": -2.0,
+                                          "cumulative_delta": -4.0}, exchange="binance"),
+        _update(5, "order_flow", "1s", {"delta": 1.0}),
+        _update(6, "smc", "15m", {"smc_bias": "bullish", "trend_direction": "up", "confluence_score": 71.234567,
+                                  "setup_quality": "good", "current_price": 100.5,
+                                  "key_support_levels": [99.0, 98.0, 97.0, 96.0], "key_resistance_levels": [102.0]}),
+    ])
+    return service
+
+
+class TestMarketContext:
+    """Test section content, budgeting and render caching"""
+
+    def test_sections_summarize_updates(self):
+        service = _service()
+        sections = {section.name: section for section in service.sections("BTCUSDT")}
+        assert list(sections)[:2] == ["price", "smc"]
+        assert "order_flow_1s" not in sections
+        # Levels from the most liquid venue, flow summed across exchanges
+        assert sections["volume_profile_1h"].data["poc"] == 100.0
+        assert sections["volume_profile_1h"].data["hvn"][0] == 100.0
+        assert sections["order_flow_15m"].data == {"delta": 0.0, "cvd": 6.0, "buy_pct": 50.0, "exchanges": 2}
+        assert sections["smc"].data["support"] == [99.0, 98.0, 97.0]
+        assert sections["smc"].data["confluence"] == 71.2346
+        vwap = sections["vwap_1h"].data
+        assert vwap["vwap"] == 100.0 and abs(vwap["sd"] - (2 / 3) ** 0.5) < 1e-4
+        assert service.sections("ETHUSDT") == []
+
+    def test_budget_drops_lowest_priority_first(self):
+        service = _service()
+        full = service.render("BTCUSDT", "text", 400)
+        assert not full["omitted"] and full["tokens"] <= 400
+        tight = service.render("BTCUSDT", "text", 60)
+        assert tight["tokens"] <= 60
+        assert tight["content"].splitlines()[1].startswith("price:")
+        assert tight["omitted"][-1] == "order_flow_15m"
+
+        compact = service.render("BTCUSDT", "json", 120)
+        assert estimate_tokens(json.dumps(compact["content"], separators=(",", ":"))) <= 120
+        assert "smc" in compact["content"]
+
+    def test_render_is_cached_until_the_next_update(self):
+        service = _service()
+        first = service.render("BTCUSDT")
+        assert service.render("BTCUSDT") is first
+        service.on_update(_update(7, "smc", "15m", {"smc_bias": "bearish", "key_support_levels": []}))
+        second = service.render("BTCUSDT")
+        assert second is not first and "bearish" in second["content"]
@@ -0,0 +1,99 @@
+"""
+Tests for rolling 24h market statistics
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from src.market_stats import MarketStatsEngine, MarketStatsMirror, RollingStats
+from src.models import Exchange, Side
+
+NOW = datetime(2025, 1, 2, tzinfo=timezone.utc)
+
+
+def _trades(n, hours=30, seed=3):
+    rng = random.Random(seed)
+    start = NOW.timestamp() - hours * 3600
+    trades = sorted((start + rng.uniform(0, hours * 3600), 100 + rng.uniform(-5, 5),
+                     rng.uniform(0.1, 2), rng.random() < 0.5) for _ in range(n))
+    # A few trades delivered a couple of minutes late
+    for i in range(50, n, 97):
+        trades[i], trades[i - 3] = trades[i - 3], trades[i]
+    return trades
+
+
+def _expected(trades, minutes):
+    now_minute = int(NOW.timestamp() // 60)
+    window = [t for t in trades if int(t[0] // 60) > now_minute - minutes]
+    first = min(window)
+    return {
+        "open": first[1],
+        "high": max(t[1] for t in window),
+        "low": min(t[1] for t in window),
+        "volume": sum(t[2] for t in window),
+        "buy_volume": sum(t[2] for t in window if t[3]),
+        "trades": len(window),
+    }
+
+
+class TestRollingStats:
+    """Test incremental windows against a brute-force scan"""
+
+    def test_windows_match_a_full_scan(self):
+        trades = _trades(5000)
+        stats = RollingStats()
+        for trade in trades:
+            stats.add(*trade)
+
+        now_minute = int(NOW.timestamp() // 60)
+        for minutes in (60, 240, 24 * 60):
+            window = stats.window(minutes, now_minute)
+            expected = _expected(trades, minutes)
+            for field, value in expected.items():
+                assert abs(window[field] - value) < 1e-6, (minutes, field)
+            assert window["close"] == max(trades)[1]
+
+        # Everything older than the window has been subtracted from the totals
+        assert stats.buckets[0].minute > now_minute - 24 * 60
+
+    def test_quiet_symbol_expires_to_empty(self):
+        stats = RollingStats(window_minutes=60)
+        stats.add(NOW.timestamp(), 100.0, 1.0, True)
+        later = int(NOW.timestamp() // 60) + 61
+        assert stats.window(60, later) is None
+        assert stats.totals["volume"] == 0
+
+
+class TestMirror:
+    """Test published documents served from memory"""
+
+    def _mirror(self, published_at):
+        engine = MarketStatsEngine()
+        trade = lambda exchange, price, offset: SimpleNamespace(
+            symbol="BTCUSDT", exchange=exchange, price=price, quantity=1.0, side=Side.BUY,
+            timestamp=NOW - timedelta(minutes=offset))
+        engine.record([trade(Exchange.BYBIT, 100.0, 30), trade(Exchange.BYBIT, 102.0, 5),
+                       trade(Exchange.KRAKEN, 99.0, 40), trade(Exchange.KRAKEN, 101.0, 1)])
+        docs = engine.documents(now=published_at)
+
+        db = MagicMock()
+        db.market_stats.find.return_value = docs
+        mirror = MarketStatsMirror(stale_seconds=30)
+        mirror.attach(db)
+        mirror.refresh()
+        return mirror
+
+    def test_merges_exchanges_and_serves_windows(self):
+        mirror = self._mirror(NOW)
+        merged = mirror.get("BTCUSDT", "1h", now=NOW)
+        assert (merged["open"], merged["high"], merged["low"], merged["close"]) == (99.0, 102.0, 99.0, 101.0)
+        assert merged["trades"] == 4
+        assert mirror.get("BTCUSDT", "15m", "bybit", now=NOW)["trades"] == 1
+        assert mirror.get("BTCUSDT", "1w", now=NOW) is None
+        assert mirror.summary(now=NOW)["kraken"]["symbols"] == {"BTCUSDT"}
+
+    def test_stale_publications_fall_back(self):
+        mirror = self._mirror(NOW - timedelta(minutes=5))
+        assert mirror.get("BTCUSDT", "1h", now=NOW) is None
+        assert mirror.summary(now=NOW) is None
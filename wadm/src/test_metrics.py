@@ -0,0 +1,105 @@
+"""
+Tests for the Prometheus metrics primitives
+"""
+
+import asyncio
+
+import pytest
+
+from .metrics import MetricsRegistry, Counter, Gauge, Histogram, BadRequest, _is_loopback, _scrape_handler
+
+
+def _get(routes, target, local_routes=None):
+    """Status line of one GET against the scrape handler"""
+    async def request():
+        server = await asyncio.start_server(_scrape_handler(routes, local_routes), "127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+        status = (await reader.readline()).decode().strip()
+        writer.close()
+        server.close()
+        return status
+    return asyncio.run(request())
+
+
+class TestMetrics:
+    """Test metric families and text exposition"""
+
+    def test_counter_labels_render(self):
+        """Labelled counters render one sample per label set"""
+        registry = MetricsRegistry()
+        counter = Counter("test_messages_total", "Messages", ["exchange"], registry=registry)
+        counter.labels("bybit").inc()
+        counter.labels("bybit").inc(2)
+        counter.labels("kraken").inc()
+
+        output = registry.render()
+        assert "# TYPE test_messages_total counter" in output
+        assert 'test_messages_total{exchange="bybit"} 3' in output
+        assert 'test_messages_total{exchange="kraken"} 1' in output
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Histogram buckets are cumulative and include +Inf, sum and count"""
+        registry = MetricsRegistry()
+        histogram = Histogram("test_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        output = registry.render()
+        assert 'test_seconds_bucket{le="0.1"} 1' in output
+        assert 'test_seconds_bucket{le="1"} 2' in output
+        assert 'test_seconds_bucket{le="+Inf"} 3' in output
+        assert "test_seconds_count 3" in output
+        assert "test_seconds_sum 5.55" in output
+
+    def test_gauge_function_read_at_scrape(self):
+        """Callback gauges are evaluated when rendered"""
+        registry = MetricsRegistry()
+        gauge = Gauge("test_depth", "Depth", ["queue"], registry=registry)
+        items = [1, 2]
+        gauge.labels("buffer").set_function(lambda: len(items))
+        items.append(3)
+
+        assert 'test_depth{queue="buffer"} 3' in registry.render()
+
+    def test_label_count_checked(self):
+        """Wrong number of label values is rejected"""
+        registry = MetricsRegistry()
+        counter = Counter("test_checked_total", "Checked", ["a", "b"], registry=registry)
+        with pytest.raises(ValueError):
+            counter.labels("only-one")
+
+    def test_duplicate_registration_rejected(self):
+        """A metric name can only be registered once per registry"""
+        registry = MetricsRegistry()
+        Counter("test_dup_total", "Dup", registry=registry)
+        with pytest.raises(ValueError):
+            Counter("test_dup_total", "Dup", registry=registry)
+
+    def test_failing_route_answers_500(self):
+        """A route that raises still gets a response"""
+        async def broken(query):
+            raise RuntimeError("boom")
+        assert _get({"/broken": broken}, "/broken") == "HTTP/1.1 500 Internal Server Error"
+        assert _get({}, "/missing") == "HTTP/1.1 404 Not Found"
+
+    def test_bad_request_and_local_routes(self):
+        """Routes reject bad input with 400; local routes answer loopback clients only"""
+        async def strict(query):
+            raise BadRequest("seconds must be positive")
+
+        async def ok(query):
+            return "text/plain", b"ok\n"
+        assert _get({"/strict": strict}, "/strict?seconds=-1") == "HTTP/1.1 400 Bad Request"
+        assert _get({}, "/debug", local_routes={"/debug": ok}) == "HTTP/1.1 200 OK"
+
+        class _Writer:
+            def __init__(self, peer):
+                self.peer = peer
+
+            def get_extra_info(self, name):
+                return self.peer
+        assert _is_loopback(_Writer(("127.0.0.1", 5000)))
+        assert _is_loopback(_Writer(("::1", 5000, 0, 0)))
+        assert not _is_loopback(_Writer(("10.0.0.7", 5000)))
+        assert not _is_loopback(_Writer(None))
@@ -0,0 +1,46 @@
+"""
+Tests for symbol sharding
+"""
+
+from .sharding import ConsistentHashRing, assign_symbols, ShardSupervisor
+
+SYMBOLS = [f"SYM{i}USDT" for i in range(200)]
+
+
+class TestConsistentHashing:
+    """Test symbol to shard assignment"""
+
+    def test_assignment_covers_all_symbols_once(self):
+        """Every symbol lands on exactly one shard, deterministically"""
+        assignment = assign_symbols(SYMBOLS, 4)
+
+        assigned = [s for symbols in assignment.values() for s in symbols]
+        assert sorted(assigned) == sorted(SYMBOLS)
+        assert assignment == assign_symbols(SYMBOLS, 4)
+        assert all(len(symbols) > 20 for symbols in assignment.values())
+
+    def test_adding_shard_moves_few_symbols(self):
+        """Growing from 4 to 5 shards only moves symbols onto the new shard"""
+        before = ConsistentHashRing(list(range(4)))
+        after = ConsistentHashRing(list(range(5)))
+
+        moved = [s for s in SYMBOLS if before.node_for(s) != after.node_for(s)]
+
+        assert all(after.node_for(s) == 4 for s in moved)
+        assert len(moved) < len(SYMBOLS) / 2
+
+
+class TestShardSupervisor:
+    """Test supervisor-side aggregation (no worker processes started)"""
+
+    def test_aggregate_status(self):
+        supervisor = ShardSupervisor(2, symbols=SYMBOLS[:10], metrics_port=0)
+        supervisor.shards[0].status = {"stats": {"trades_received": 5}, "running_calculations": 1}
+        supervisor.shards[1].status = {"stats": {"trades_received": 7}, "running_calculations": 2}
+
+        status = supervisor.aggregate_status()
+
+        assert status["stats"]["trades_received"] == 12
+        assert status["running_calculations"] == 3
+        assert status["alive"] == 0
+        assert sum(len(s["symbols"]) for s in status["shard_status"]) == 10